@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Ticket, KnowledgeBase, Notification, FrontlineWorkflowExecution,
-    FrontlineMeeting, Document, FrontlineAnalytics
+    FrontlineMeeting, Document, FrontlineAnalytics, TicketDailyRollup
 )
 
 
@@ -54,3 +54,9 @@ class FrontlineAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['metric_name', 'calculated_at']
     search_fields = ['metric_name']
 
+
+@admin.register(TicketDailyRollup)
+class TicketDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'date', 'total', 'open', 'resolved', 'auto_resolved', 'updated_at']
+    list_filter = ['date']
+    search_fields = ['user__username']
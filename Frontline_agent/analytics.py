@@ -0,0 +1,143 @@
+"""
+Frontline ticket analytics
+Ticket aggregates computed in the database, and the TicketDailyRollup rows
+that keep the dashboard from scanning a user's whole ticket history.
+
+A rollup row holds the current state of the tickets one user created on one
+day, so it changes whenever one of those tickets does: the Ticket signals
+refresh it on every save/delete, bulk writers call refresh_rollups_for_tickets,
+and a daily Celery task rebuilds recent days to catch anything else.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Ticket, TicketDailyRollup
+
+OPEN_STATUSES = ('new', 'open', 'in_progress')
+RESOLVED_STATUSES = ('resolved', 'closed', 'auto_resolved')
+
+RESOLUTION_TIME = ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField())
+
+# Conditional counts / sums evaluated in one pass over the tickets
+TICKET_AGGREGATES = {
+    'total': Count('id'),
+    'open': Count('id', filter=Q(status__in=OPEN_STATUSES)),
+    'resolved': Count('id', filter=Q(status__in=RESOLVED_STATUSES)),
+    'auto_resolved': Count('id', filter=Q(auto_resolved=True)),
+    'resolution_count': Count('id', filter=Q(resolved_at__isnull=False)),
+    'resolution_time': Sum(RESOLUTION_TIME, filter=Q(resolved_at__isnull=False)),
+}
+
+ROLLUP_FIELDS = ('total', 'open', 'resolved', 'auto_resolved', 'resolution_count', 'resolution_seconds')
+
+
+def _rollup_values(row: Dict) -> Dict:
+    values = {field: row[field] or 0 for field in ROLLUP_FIELDS if field != 'resolution_seconds'}
+    values['resolution_seconds'] = row['resolution_time'].total_seconds() if row['resolution_time'] else 0.0
+    return values
+
+
+def _rebuild(tickets, rollups) -> int:
+    """
+    Bring the given rollup rows up to date with fresh aggregates of the given
+    tickets (grouped per user and day).
+
+    The existing rows are locked first, so concurrent refreshes of the same
+    days (two tickets saved at once) wait for each other instead of racing;
+    a row another transaction has just inserted for a new day is left to it
+    rather than failing the ticket save with an IntegrityError.
+    """
+    with transaction.atomic():
+        existing = {(rollup.user_id, rollup.date): rollup for rollup in rollups.select_for_update()}
+        rows = (
+            tickets.annotate(day=TruncDate('created_at'))
+            .order_by().values('created_by_id', 'day')
+            .annotate(**TICKET_AGGREGATES)
+        )
+        now = timezone.now()
+        changed, new_rows = [], []
+        for row in rows:
+            values = _rollup_values(row)
+            rollup = existing.pop((row['created_by_id'], row['day']), None)
+            if rollup is None:
+                new_rows.append(TicketDailyRollup(user_id=row['created_by_id'], date=row['day'], **values))
+                continue
+            for field, value in values.items():
+                setattr(rollup, field, value)
+            rollup.updated_at = now
+            changed.append(rollup)
+        if existing:
+            TicketDailyRollup.objects.filter(pk__in=[rollup.pk for rollup in existing.values()]).delete()
+        TicketDailyRollup.objects.bulk_update(changed, ROLLUP_FIELDS + ('updated_at',), batch_size=500)
+        TicketDailyRollup.objects.bulk_create(new_rows, batch_size=500, ignore_conflicts=True)
+    return len(changed) + len(new_rows)
+
+
+def _local_day(value: datetime) -> date:
+    """Creation day of a ticket in the current time zone, as TruncDate computes it."""
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def ticket_rollup_key(ticket: Ticket) -> Tuple[int, date]:
+    return ticket.created_by_id, _local_day(ticket.created_at)
+
+
+def refresh_rollups(keys: Iterable[Tuple[int, date]]) -> int:
+    """Recompute the rollup rows of the given (user_id, date) pairs."""
+    keys = set(keys)
+    if not keys:
+        return 0
+    tickets_q, rollups_q = Q(), Q()
+    for user_id, day in keys:
+        start = _day_start(day)
+        tickets_q |= Q(created_by_id=user_id, created_at__gte=start, created_at__lt=start + timedelta(days=1))
+        rollups_q |= Q(user_id=user_id, date=day)
+    return _rebuild(Ticket.objects.filter(tickets_q), TicketDailyRollup.objects.filter(rollups_q))
+
+
+def refresh_rollups_for_tickets(ticket_ids: Iterable[int]) -> int:
+    """Recompute the rollup rows the given tickets belong to (for writers that bypass signals, e.g. bulk_update)."""
+    tickets = Ticket.objects.filter(id__in=list(ticket_ids)).values_list('created_by_id', 'created_at')
+    return refresh_rollups((user_id, _local_day(created_at)) for user_id, created_at in tickets)
+
+
+def rebuild_rollups(since: Optional[date] = None) -> int:
+    """Recompute all rollup rows, or those from the given day on."""
+    tickets, rollups = Ticket.objects.all(), TicketDailyRollup.objects.all()
+    if since is not None:
+        tickets = tickets.filter(created_at__gte=_day_start(since))
+        rollups = rollups.filter(date__gte=since)
+    return _rebuild(tickets, rollups)
+
+
+def user_ticket_analytics(user) -> Dict:
+    """Dashboard figures for the tickets a user created, summed from their rollup rows in one query."""
+    totals = TicketDailyRollup.objects.filter(user=user).aggregate(
+        **{field: Sum(field) for field in ROLLUP_FIELDS}
+    )
+    total = totals['total'] or 0
+    resolved = totals['resolved'] or 0
+    auto_resolved = totals['auto_resolved'] or 0
+    resolution_count = totals['resolution_count'] or 0
+    return {
+        "total_tickets": total,
+        "open_tickets": totals['open'] or 0,
+        "resolved_tickets": resolved,
+        "auto_resolved_count": auto_resolved,
+        "resolution_rate": (resolved / total * 100) if total > 0 else 0,
+        "auto_resolution_rate": (auto_resolved / total * 100) if total > 0 else 0,
+        "avg_resolution_time_hours": (
+            totals['resolution_seconds'] / resolution_count / 3600
+            if resolution_count and totals['resolution_seconds'] else None
+        ),
+    }
@@ -6,3 +6,6 @@ class FrontlineAgentConfig(AppConfig):
     name = 'Frontline_agent'
     verbose_name = 'Frontline Agent'
 
+    def ready(self):
+        """Import signals when app is ready"""
+        import Frontline_agent.signals  # noqa
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """Roll up the existing tickets (same aggregates as Frontline_agent.analytics)."""
+    Ticket = apps.get_model('Frontline_agent', 'Ticket')
+    TicketDailyRollup = apps.get_model('Frontline_agent', 'TicketDailyRollup')
+    resolved = Q(resolved_at__isnull=False)
+    rows = (
+        Ticket.objects.annotate(day=TruncDate('created_at'))
+        .order_by().values('created_by_id', 'day')
+        .annotate(
+            total=Count('id'),
+            open=Count('id', filter=Q(status__in=['new', 'open', 'in_progress'])),
+            resolved=Count('id', filter=Q(status__in=['resolved', 'closed', 'auto_resolved'])),
+            auto_resolved=Count('id', filter=Q(auto_resolved=True)),
+            resolution_count=Count('id', filter=resolved),
+            resolution_time=Sum(ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField()), filter=resolved),
+        )
+    )
+    TicketDailyRollup.objects.bulk_create([
+        TicketDailyRollup(
+            user_id=row['created_by_id'], date=row['day'], total=row['total'], open=row['open'],
+            resolved=row['resolved'], auto_resolved=row['auto_resolved'], resolution_count=row['resolution_count'],
+            resolution_seconds=row['resolution_time'].total_seconds() if row['resolution_time'] else 0.0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Frontline_agent', '0002_alter_document_uploaded_by_alter_notification_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('open', models.PositiveIntegerField(default=0)),
+                ('resolved', models.PositiveIntegerField(default=0)),
+                ('auto_resolved', models.PositiveIntegerField(default=0)),
+                ('resolution_count', models.PositiveIntegerField(default=0, help_text='Tickets with a resolved_at')),
+                ('resolution_seconds', models.FloatField(default=0, help_text='Sum of resolved_at - created_at over those tickets')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -249,3 +249,28 @@ class FrontlineAnalytics(models.Model):
     def __str__(self):
         return f"{self.metric_name} - {self.metric_value}"
 
+
+
+class TicketDailyRollup(models.Model):
+    """
+    Ticket counts per creator and creation day, kept current by the Ticket
+    signals (see analytics.py). Summing a user's rows gives the dashboard
+    figures without scanning their ticket history.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ticket_rollups')
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    open = models.PositiveIntegerField(default=0)
+    resolved = models.PositiveIntegerField(default=0)
+    auto_resolved = models.PositiveIntegerField(default=0)
+    resolution_count = models.PositiveIntegerField(default=0, help_text="Tickets with a resolved_at")
+    resolution_seconds = models.FloatField(default=0, help_text="Sum of resolved_at - created_at over those tickets")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        app_label = 'Frontline_agent'
+        ordering = ['-date']
+        unique_together = [['user', 'date']]
+    
+    def __str__(self):
+        return f"{self.user} - {self.date}: {self.total} tickets"
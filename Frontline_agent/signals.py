@@ -0,0 +1,46 @@
+"""
+Django signals for the Frontline Agent
+Keep the knowledge base search index in step with KnowledgeBase articles,
+and the daily ticket rollups in step with Tickets.
+"""
+
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import KnowledgeBase, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=KnowledgeBase)
+def knowledge_article_saved_handler(sender, instance, **kwargs):
+    """Re-index a created or edited article."""
+    if kwargs.get('raw', False):
+        return
+    from core.Fronline_agent.knowledge_index import get_knowledge_index
+    try:
+        get_knowledge_index().add_article(instance)
+    except OSError as e:
+        # The article is saved either way; a later rebuild picks it up
+        logger.error(f"Failed to index knowledge article {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=KnowledgeBase)
+def knowledge_article_deleted_handler(sender, instance, **kwargs):
+    from core.Fronline_agent.knowledge_index import get_knowledge_index
+    try:
+        get_knowledge_index().remove_article(instance.pk)
+    except OSError as e:
+        logger.error(f"Failed to remove knowledge article {instance.pk} from the index: {e}")
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_rollup_handler(sender, instance, **kwargs):
+    """Recompute the daily rollup row the ticket belongs to."""
+    if kwargs.get('raw', False):
+        return
+    from .analytics import refresh_rollups, ticket_rollup_key
+    refresh_rollups([ticket_rollup_key(instance)])
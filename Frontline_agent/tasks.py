@@ -0,0 +1,25 @@
+"""
+Celery tasks for the Frontline Agent
+"""
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from .analytics import rebuild_rollups
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def rebuild_ticket_rollups_task(self, days=2):
+    """
+    Recompute the daily ticket rollups of the last `days` days (all of them if
+    days is None), catching ticket writes that bypassed the signals.
+    
+    Scheduled: Daily via Celery Beat
+    """
+    try:
+        since = timezone.localdate() - timedelta(days=days - 1) if days else None
+        rows = rebuild_rollups(since)
+        return {'status': 'success', 'message': f'Rebuilt {rows} ticket rollup rows'}
+    except Exception as e:
+        raise self.retry(exc=e)
@@ -6,6 +6,7 @@ urlpatterns = [
     
     # Knowledge Q&A Agent
     path('api/knowledge-qa/', views.knowledge_qa, name='frontline_knowledge_qa'),
+    path('api/knowledge-qa/stream/', views.knowledge_qa_stream, name='frontline_knowledge_qa_stream'),
     
     # Ticket Triage & Auto-resolution Agent
     path('api/tickets/', views.list_tickets, name='frontline_list_tickets'),
@@ -8,7 +8,10 @@ from django.utils import timezone
 from datetime import timedelta
 import json
 
+from core.document_extraction import SUPPORTED_EXTENSIONS, DocumentExtractionError, extract_text
 from core.models import UserProfile
+from core.streaming import sse_response
+from .analytics import user_ticket_analytics
 from .models import (
     Ticket, KnowledgeBase, Notification, FrontlineWorkflowExecution,
     FrontlineMeeting, Document, FrontlineAnalytics
@@ -132,21 +135,7 @@ def knowledge_qa(request):
         if not question:
             return JsonResponse({"error": "Question is required"}, status=400)
         
-        # Get knowledge base articles for context
-        knowledge_articles = KnowledgeBase.objects.all()[:10]
-        context = {
-            'knowledge_base': [
-                {
-                    'title': kb.title,
-                    'content': kb.content[:500],  # First 500 chars
-                    'category': kb.category,
-                    'tags': kb.get_tags_list(),
-                }
-                for kb in knowledge_articles
-            ]
-        }
-        
-        result = knowledge_agent.answer_question(question, context=context)
+        result = knowledge_agent.answer_question(question, context=_knowledge_base_context())
         return JsonResponse(result)
         
     except json.JSONDecodeError:
@@ -155,6 +144,47 @@ def knowledge_qa(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@login_required
+@require_http_methods(["POST"])
+def knowledge_qa_stream(request):
+    """Knowledge Q&A Agent endpoint as server-sent events ('token' events, then 'done' with the knowledge_qa payload)"""
+    if not is_frontline_agent(request.user):
+        return JsonResponse({"error": "Unauthorized. Frontline Agent role required."}, status=403)
+    
+    agents = get_agents()
+    knowledge_agent = agents['knowledge_agent']
+    
+    try:
+        data = json.loads(request.body)
+        question = data.get('question', '').strip()
+        
+        if not question:
+            return JsonResponse({"error": "Question is required"}, status=400)
+        
+        return sse_response(knowledge_agent.stream_answer(question, context=_knowledge_base_context()))
+        
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+def _knowledge_base_context():
+    """Knowledge base articles for Knowledge Q&A context"""
+    knowledge_articles = KnowledgeBase.objects.all()[:10]
+    return {
+        'knowledge_base': [
+            {
+                'title': kb.title,
+                'content': kb.content[:500],  # First 500 chars
+                'category': kb.category,
+                'tags': kb.get_tags_list(),
+            }
+            for kb in knowledge_articles
+        ]
+    }
+
+
 # Ticket Triage & Auto-resolution Agent Views
 @login_required
 @require_http_methods(["POST"])
@@ -548,13 +578,27 @@ def upload_document(request):
             related_ticket_id=int(ticket_id) if ticket_id else None,
         )
         
-        # Process document (simple implementation)
-        document.processed = True
-        document.processed_data = {
+        # Process document: extract text from the upload in memory (shared extraction service)
+        processed_data = {
             "file_name": uploaded_file.name,
             "file_size": uploaded_file.size,
             "mime_type": uploaded_file.content_type,
         }
+        document.processed = True
+        if os.path.splitext(uploaded_file.name)[1].lower() in SUPPORTED_EXTENSIONS:
+            try:
+                extraction = extract_text(uploaded_file)
+                processed_data.update({
+                    "text": extraction["text"],
+                    "page_count": extraction["page_count"],
+                    "pages_extracted": extraction["pages_extracted"],
+                    "truncated": extraction["truncated"],
+                    "content_hash": extraction["content_hash"],
+                })
+            except DocumentExtractionError as exc:
+                document.processed = False
+                processed_data["extraction_error"] = str(exc)
+        document.processed_data = processed_data
         document.save()
         
         return JsonResponse({
@@ -580,36 +624,8 @@ def get_analytics(request):
         return JsonResponse({"error": "Unauthorized. Frontline Agent role required."}, status=403)
     
     try:
-        # Calculate basic analytics
-        tickets = Ticket.objects.filter(created_by=request.user)
-        
-        total_tickets = tickets.count()
-        open_tickets = tickets.filter(status__in=['new', 'open', 'in_progress']).count()
-        resolved_tickets = tickets.filter(status__in=['resolved', 'closed', 'auto_resolved']).count()
-        auto_resolved_count = tickets.filter(auto_resolved=True).count()
-        
-        # Calculate resolution time (average)
-        resolved_tickets_with_time = tickets.filter(
-            resolved_at__isnull=False
-        ).exclude(resolved_at__isnull=True)
-        
-        avg_resolution_time = None
-        if resolved_tickets_with_time.exists():
-            total_seconds = sum(
-                (t.resolved_at - t.created_at).total_seconds()
-                for t in resolved_tickets_with_time
-            )
-            avg_resolution_time = total_seconds / resolved_tickets_with_time.count()
-        
-        analytics_data = {
-            "total_tickets": total_tickets,
-            "open_tickets": open_tickets,
-            "resolved_tickets": resolved_tickets,
-            "auto_resolved_count": auto_resolved_count,
-            "resolution_rate": (resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0,
-            "auto_resolution_rate": (auto_resolved_count / total_tickets * 100) if total_tickets > 0 else 0,
-            "avg_resolution_time_hours": avg_resolution_time / 3600 if avg_resolution_time else None,
-        }
+        # Summed from the per-day rollups (analytics.py), not the ticket history
+        analytics_data = user_ticket_analytics(request.user)
         
         return JsonResponse(analytics_data)
         
@@ -21,7 +21,7 @@ import {
 } from '@/components/ui/dialog';
 import { useToast } from '@/components/ui/use-toast';
 import { Loader2, FileText, Calendar, ChevronLeft, ChevronRight } from 'lucide-react';
-import { getCVRecords, getJobDescriptions } from '@/services/recruitmentAgentService';
+import { getCVRecord, getCVRecords, getJobDescriptions } from '@/services/recruitmentAgentService';
 import QualificationReasoning from './QualificationReasoning';
 
 const PAGE_SIZES = [10, 25, 50];
@@ -38,6 +38,7 @@ const CVRecords = () => {
   const [pageSize, setPageSize] = useState(10);
   const [selectedIds, setSelectedIds] = useState(new Set());
   const [selectedRecord, setSelectedRecord] = useState(null);
+  const [detailLoading, setDetailLoading] = useState(false);
   const [modalOpen, setModalOpen] = useState(false);
 
   useEffect(() => {
@@ -127,9 +128,26 @@ const CVRecords = () => {
     });
   };
 
-  const handleRowClick = (record) => {
+  const handleRowClick = async (record) => {
+    // List rows only carry summary fields; load the full profile for the modal
     setSelectedRecord(record);
     setModalOpen(true);
+    try {
+      setDetailLoading(true);
+      const response = await getCVRecord(record.id);
+      if (response.status === 'success' && response.data) {
+        setSelectedRecord((current) => (current && current.id === record.id ? response.data : current));
+      }
+    } catch (error) {
+      console.error('Error fetching CV record:', error);
+      toast({
+        title: 'Error',
+        description: 'Failed to load candidate details',
+        variant: 'destructive',
+      });
+    } finally {
+      setDetailLoading(false);
+    }
   };
 
   const handleCloseModal = () => {
@@ -226,7 +244,6 @@ const CVRecords = () => {
                 </TableHeader>
                 <TableBody>
                   {records.map((record) => {
-                    const parsed = record.parsed || {};
                     const isSelected = selectedIds.has(record.id);
                     return (
                       <TableRow
@@ -239,16 +256,16 @@ const CVRecords = () => {
                           <Checkbox
                             checked={isSelected}
                             onCheckedChange={(checked) => handleSelectRow(record.id, !!checked)}
-                            aria-label={`Select ${parsed.name || record.file_name}`}
+                            aria-label={`Select ${record.candidate_name || record.file_name}`}
                             className="translate-y-0.5"
                           />
                         </TableCell>
                         <TableCell className="font-medium">
                           {record.rank != null ? record.rank : '—'}
                         </TableCell>
-                        <TableCell>{parsed.name || record.file_name || '—'}</TableCell>
+                        <TableCell>{record.candidate_name || record.file_name || '—'}</TableCell>
                         <TableCell className="text-muted-foreground">
-                          {parsed.email || '—'}
+                          {record.candidate_email || '—'}
                         </TableCell>
                         <TableCell className="max-w-[180px] truncate" title={record.job_description_title}>
                           {record.job_description_title || '—'}
@@ -336,6 +353,7 @@ const CVRecords = () => {
             <CandidateDetailContent
               record={selectedRecord}
               getDecisionBadge={getDecisionBadge}
+              loading={detailLoading}
             />
           )}
         </DialogContent>
@@ -344,11 +362,13 @@ const CVRecords = () => {
   );
 };
 
-function CandidateDetailContent({ record, getDecisionBadge }) {
+function CandidateDetailContent({ record, getDecisionBadge, loading }) {
   const parsed = record.parsed || {};
   const qualified = record.qualified || {};
   const summary = record.insights?.summary || record.summary?.summary;
-  const skills = parsed.skills || [];
+  const skills = parsed.skills || record.top_skills || [];
+  const name = parsed.name || record.candidate_name;
+  const email = parsed.email || record.candidate_email;
 
   return (
     <div className="space-y-4">
@@ -365,9 +385,9 @@ function CandidateDetailContent({ record, getDecisionBadge }) {
               <Badge variant="secondary">{record.qualification_priority}</Badge>
             )}
           </div>
-          <h3 className="text-lg font-semibold">{parsed.name || record.file_name || 'Unknown'}</h3>
+          <h3 className="text-lg font-semibold">{name || record.file_name || 'Unknown'}</h3>
           <p className="text-sm text-muted-foreground">
-            {parsed.email && <span>{parsed.email}</span>}
+            {email && <span>{email}</span>}
             {parsed.phone && (
               <span className="ml-2">{parsed.phone}</span>
             )}
@@ -389,6 +409,12 @@ function CandidateDetailContent({ record, getDecisionBadge }) {
         </div>
       </div>
 
+      {loading && (
+        <div className="flex justify-center py-4">
+          <Loader2 className="h-6 w-6 animate-spin text-muted-foreground" />
+        </div>
+      )}
+
       {summary && (
         <div>
           <h4 className="font-semibold text-sm mb-1">Summary</h4>
@@ -245,7 +245,9 @@ export const rescheduleInterview = async (interviewId, newSlotDatetime) => {
 
 /**
  * Get CV records/candidates with server-side pagination
- * @param {object} filters - Optional filters (job_id, decision, page, page_size)
+ * List rows carry summary fields only (candidate_name, candidate_email, top_skills, total_experience_years);
+ * use getCVRecord for the full parsed/insights/qualified data.
+ * @param {object} filters - Optional filters (job_id, decision, search, min_score, sort, page, page_size)
  */
 export const getCVRecords = async (filters = {}) => {
   try {
@@ -256,6 +258,15 @@ export const getCVRecords = async (filters = {}) => {
     if (filters.decision) {
       params.append('decision', filters.decision);
     }
+    if (filters.search) {
+      params.append('search', filters.search);
+    }
+    if (filters.min_score != null) {
+      params.append('min_score', String(filters.min_score));
+    }
+    if (filters.sort) {
+      params.append('sort', filters.sort);
+    }
     if (filters.page != null) {
       params.append('page', String(filters.page));
     }
@@ -274,6 +285,20 @@ export const getCVRecords = async (filters = {}) => {
   }
 };
 
+/**
+ * Get one CV record with full parsed/insights/enriched/qualified data
+ * @param {number} cvId - CV record ID
+ */
+export const getCVRecord = async (cvId) => {
+  try {
+    const response = await companyApi.get(`/recruitment/cv-records/${cvId}`);
+    return response;
+  } catch (error) {
+    console.error('Get CV record error:', error);
+    throw error;
+  }
+};
+
 /**
  * Get email settings for the company user
  */
@@ -391,6 +416,7 @@ export default {
   getRescheduleSlots,
   rescheduleInterview,
   getCVRecords,
+  getCVRecord,
   getEmailSettings,
   updateEmailSettings,
   getInterviewSettings,
@@ -183,7 +183,9 @@ urlpatterns = [
     re_path(r'^project-manager/ai/task-prioritization/?$', pm_agent.task_prioritization, name='pm_task_prioritization'),
     re_path(r'^project-manager/ai/generate-subtasks/?$', pm_agent.generate_subtasks, name='pm_generate_subtasks'),
     re_path(r'^project-manager/ai/timeline-gantt/?$', pm_agent.timeline_gantt, name='pm_timeline_gantt'),
+    re_path(r'^project-manager/ai/timeline-gantt/delta/?$', pm_agent.timeline_gantt_delta, name='pm_timeline_gantt_delta'),
     re_path(r'^project-manager/ai/knowledge-qa/?$', pm_agent.knowledge_qa, name='pm_knowledge_qa'),
+    re_path(r'^project-manager/ai/knowledge-qa/stream/?$', pm_agent.knowledge_qa_stream, name='pm_knowledge_qa_stream'),  # SSE
     
     # Manual Project and Task Creation endpoints (Company User)
     re_path(r'^project-manager/projects/create/?$', pm_agent.create_project_manual, name='pm_create_project_manual'),
@@ -214,6 +216,9 @@ urlpatterns = [
     re_path(r'^recruitment/job-descriptions/create/?$', recruitment_agent.create_job_description, name='recruitment_create_job_description'),  # POST
     re_path(r'^recruitment/job-descriptions/(?P<job_description_id>\d+)/update/?$', recruitment_agent.update_job_description, name='recruitment_update_job_description'),  # PUT/PATCH
     re_path(r'^recruitment/job-descriptions/(?P<job_description_id>\d+)/delete/?$', recruitment_agent.delete_job_description, name='recruitment_delete_job_description'),  # DELETE
+    re_path(r'^recruitment/job-descriptions/(?P<job_description_id>\d+)/rematch/?$', recruitment_agent.rematch_job_description, name='recruitment_rematch_job_description'),  # POST
+    re_path(r'^recruitment/job-descriptions/(?P<job_description_id>\d+)/matches/?$', recruitment_agent.list_job_matches, name='recruitment_list_job_matches'),  # GET
+    re_path(r'^recruitment/job-descriptions/(?P<job_description_id>\d+)/matches/(?P<cv_id>\d+)/reasoning/?$', recruitment_agent.job_match_reasoning, name='recruitment_job_match_reasoning'),  # POST
     re_path(r'^recruitment/interviews/?$', recruitment_agent.list_interviews, name='recruitment_list_interviews'),  # GET
     re_path(r'^recruitment/interviews/schedule/?$', recruitment_agent.schedule_interview, name='recruitment_schedule_interview'),  # POST
     re_path(r'^recruitment/interviews/(?P<interview_id>\d+)/?$', recruitment_agent.get_interview_details, name='recruitment_get_interview_details'),  # GET
@@ -221,6 +226,7 @@ urlpatterns = [
     re_path(r'^recruitment/interviews/(?P<interview_id>\d+)/reschedule-slots/?$', recruitment_agent.get_reschedule_slots, name='recruitment_get_reschedule_slots'),  # GET
     re_path(r'^recruitment/interviews/(?P<interview_id>\d+)/reschedule/?$', recruitment_agent.reschedule_interview, name='recruitment_reschedule_interview'),  # POST
     re_path(r'^recruitment/cv-records/?$', recruitment_agent.list_cv_records, name='recruitment_list_cv_records'),  # GET
+    re_path(r'^recruitment/cv-records/(?P<cv_id>\d+)/?$', recruitment_agent.get_cv_record, name='recruitment_get_cv_record'),  # GET
     re_path(r'^recruitment/settings/email/?$', recruitment_agent.email_settings, name='recruitment_email_settings'),  # GET/POST
     re_path(r'^recruitment/settings/interview/?$', recruitment_agent.interview_settings, name='recruitment_interview_settings'),  # GET/POST
     re_path(r'^recruitment/settings/qualification/?$', recruitment_agent.qualification_settings, name='recruitment_qualification_settings'),  # GET/POST
@@ -256,6 +262,7 @@ urlpatterns = [
     re_path(r'^marketing/email-accounts/(?P<account_id>\d+)/delete/?$', marketing_agent.delete_email_account, name='marketing_delete_email_account'),  # POST
     re_path(r'^marketing/email-accounts/(?P<account_id>\d+)/test/?$', marketing_agent.test_email_account, name='marketing_test_email_account'),  # POST
     re_path(r'^marketing/qa/?$', marketing_agent.marketing_qa, name='marketing_qa'),  # POST
+    re_path(r'^marketing/qa/stream/?$', marketing_agent.marketing_qa_stream, name='marketing_qa_stream'),  # POST, SSE
     re_path(r'^marketing/market-research/?$', marketing_agent.market_research, name='marketing_market_research'),  # POST
     re_path(r'^marketing/outreach-campaign/?$', marketing_agent.outreach_campaign, name='marketing_outreach_campaign'),  # POST
     re_path(r'^marketing/document-authoring/?$', marketing_agent.document_authoring, name='marketing_document_authoring'),  # POST
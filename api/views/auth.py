@@ -64,7 +64,7 @@ def login(request):
         
         # Update last login
         user.last_login = timezone.now()
-        user.save()
+        user.save(update_fields=['last_login'])
         
         # Generate or get token
         token, created = Token.objects.get_or_create(user=user)
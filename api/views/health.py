@@ -4,6 +4,9 @@ from rest_framework.permissions import AllowAny
 from django.db import connection
 from django.utils import timezone
 
+from core.llm_scheduler import get_llm_scheduler
+from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -18,6 +21,8 @@ def health_check(request):
             'status': 'ok',
             'message': 'Server is running',
             'database': 'connected',
+            'agent_pool': AgentRegistry.health_check(),
+            'llm_scheduler': get_llm_scheduler().stats(),
             'timestamp': timezone.now().isoformat(),
         }, status=200)
     except Exception as e:
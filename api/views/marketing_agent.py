@@ -4,7 +4,8 @@ Similar structure to recruitment_agent.py
 """
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
@@ -21,6 +22,7 @@ import socket
 
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
+from core.streaming import EventStreamRenderer, sse_response
 from marketing_agent.models import (
     Campaign, Lead, EmailTemplate, EmailSequence, EmailSequenceStep,
     EmailSendHistory, EmailAccount, CampaignContact, MarketingNotification,
@@ -893,6 +895,38 @@ def marketing_qa(request):
         )
 
 
+@api_view(["POST"])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def marketing_qa_stream(request):
+    """Marketing Q&A Agent as server-sent events ('token' events, then 'done' with the marketing_qa payload)"""
+    try:
+        company_user = request.user
+        user = _get_or_create_user_for_company_user(company_user)
+        
+        agent = AgentRegistry.get_agent("marketing_qa")
+        question = request.data.get('question', '')
+        
+        if not question:
+            return Response(
+                {'status': 'error', 'message': 'Question is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return sse_response(
+            agent.stream_process(question=question, user_id=user.id),
+            lambda result: {'status': 'success', 'data': result},
+        )
+        
+    except Exception as e:
+        logger.exception("marketing_qa_stream failed")
+        return Response(
+            {'status': 'error', 'message': 'Marketing Q&A failed', 'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(["POST"])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
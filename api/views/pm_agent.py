@@ -1,6 +1,7 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from django.contrib.auth import get_user_model
@@ -15,24 +16,12 @@ import logging
 import json
 from datetime import datetime, timedelta
 import os
-import tempfile
 
 logger = logging.getLogger(__name__)
 
-# Text extraction imports
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    logger.warning("PyPDF2 not available. PDF extraction will not work.")
-
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    logger.warning("python-docx not available. DOCX extraction will not work.")
+# Text extraction (PDF/DOCX/TXT) - shared service with process pool, page limit and cache
+from core.document_extraction import extract_text
+from core.streaming import EventStreamRenderer, sse_response
 
 
 def _ensure_project_manager(user):
@@ -1196,15 +1185,71 @@ def timeline_gantt(request):
         )
 
 
-@api_view(["POST"])
+@api_view(["GET"])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
-def knowledge_qa(request):
+def timeline_gantt_delta(request):
     """
-    Knowledge Q&A Agent API - Only accessible to company users.
-    Body:
-      - question: str (required)
-      - project_id: int (optional)
+    Compact Gantt chart refresh - Only accessible to company users.
+    Query params:
+      - project_id: int (required)
+      - since_version: int (optional) - schedule version of the chart the client holds;
+        omitted (or no longer cached) returns the full columnar chart
+    """
+    company_user = request.user
+    can_access = False
+    if hasattr(company_user, 'can_access_project_manager_features'):
+        can_access = company_user.can_access_project_manager_features()
+    else:
+        can_access = company_user.role in ['project_manager', 'company_user']
+
+    if not can_access:
+        return Response(
+            {"status": "error", "message": "Access denied. Project manager or company user role required."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    try:
+        project_id = request.query_params.get("project_id")
+        since_version = request.query_params.get("since_version")
+        if not project_id:
+            return Response(
+                {"status": "error", "message": "project_id is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            since_version = int(since_version) if since_version not in (None, "") else None
+        except ValueError:
+            return Response(
+                {"status": "error", "message": "since_version must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
+        agent = AgentRegistry.get_agent("timeline_gantt")
+        result = agent.process(action="gantt_delta", project_id=project.id, since_version=since_version)
+        if not result.get("success"):
+            return Response(
+                {"status": "error", "message": result.get("error", "Gantt delta failed")},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"status": "success", "data": result}, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("timeline_gantt_delta failed")
+        return Response(
+            {"status": "error", "message": "Gantt delta failed", "error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def _knowledge_qa_request(request):
+    """
+    Validate a Knowledge Q&A request and build the agent's inputs from the
+    company user's projects, tasks and users.
+
+    Returns:
+        (kwargs for KnowledgeQAAgent.process, None) or (None, error Response)
     """
     # request.user is a CompanyUser instance when authenticated via CompanyUserTokenAuthentication
     company_user = request.user
@@ -1219,167 +1264,188 @@ def knowledge_qa(request):
         can_access = company_user.role in ['project_manager', 'company_user']
     
     if not can_access:
-        return Response(
+        return None, Response(
             {"status": "error", "message": "Access denied. Project manager or company user role required."},
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    try:
-        question = request.data.get("question", "").strip()
-        if not question:
-            return Response(
-                {"status": "error", "message": "question is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    question = request.data.get("question", "").strip()
+    if not question:
+        return None, Response(
+            {"status": "error", "message": "question is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        project_id = request.data.get("project_id")
-        
-        all_projects = Project.objects.filter(created_by_company_user=company_user)
-        all_tasks = Task.objects.filter(project__created_by_company_user=company_user).select_related("project", "assignee")
-        
-        # Get all users created by this company user
-        from core.models import UserProfile
-        created_user_profiles = UserProfile.objects.filter(
-            created_by_company_user=company_user
-        ).select_related('user')
-        
-        # Build available users list with their roles
-        available_users = []
-        for profile in created_user_profiles:
-            user = profile.user
-            available_users.append({
-                'id': user.id,
-                'username': user.username,
-                'name': user.get_full_name() or user.username,
-                'email': user.email,
-                'role': profile.role or 'team_member',
-                'is_active': user.is_active,
+    project_id = request.data.get("project_id")
+    
+    all_projects = Project.objects.filter(created_by_company_user=company_user)
+    all_tasks = Task.objects.filter(project__created_by_company_user=company_user).select_related("project", "assignee")
+    
+    # Get all users created by this company user
+    from core.models import UserProfile
+    created_user_profiles = UserProfile.objects.filter(
+        created_by_company_user=company_user
+    ).select_related('user')
+    
+    # Build available users list with their roles
+    available_users = []
+    for profile in created_user_profiles:
+        user = profile.user
+        available_users.append({
+            'id': user.id,
+            'username': user.username,
+            'name': user.get_full_name() or user.username,
+            'email': user.email,
+            'role': profile.role or 'team_member',
+            'is_active': user.is_active,
+        })
+    
+    # Build user-task assignments information
+    user_assignments = []
+    for user_info in available_users:
+        user_id = user_info['id']
+        # Get tasks for this user
+        if project_id:
+            user_tasks = Task.objects.filter(
+                project_id=project_id, 
+                assignee_id=user_id,
+                project__created_by_company_user=company_user
+            )
+        else:
+            user_tasks = all_tasks.filter(assignee_id=user_id)
+        
+        tasks_by_project = {}
+        for task in user_tasks:
+            project_name = task.project.name
+            task_project_id = task.project.id
+            if task_project_id not in tasks_by_project:
+                tasks_by_project[task_project_id] = {
+                    'project_id': task_project_id,
+                    'project_name': project_name,
+                    'tasks': []
+                }
+            tasks_by_project[task_project_id]['tasks'].append({
+                'id': task.id,
+                'title': task.title,
+                'status': task.status,
+                'priority': task.priority
             })
         
-        # Build user-task assignments information
-        user_assignments = []
-        for user_info in available_users:
-            user_id = user_info['id']
-            # Get tasks for this user
-            if project_id:
-                user_tasks = Task.objects.filter(
-                    project_id=project_id, 
-                    assignee_id=user_id,
-                    project__created_by_company_user=company_user
-                )
-            else:
-                user_tasks = all_tasks.filter(assignee_id=user_id)
-            
-            tasks_by_project = {}
-            for task in user_tasks:
-                project_name = task.project.name
-                task_project_id = task.project.id
-                if task_project_id not in tasks_by_project:
-                    tasks_by_project[task_project_id] = {
-                        'project_id': task_project_id,
-                        'project_name': project_name,
-                        'tasks': []
-                    }
-                tasks_by_project[task_project_id]['tasks'].append({
-                    'id': task.id,
-                    'title': task.title,
-                    'status': task.status,
-                    'priority': task.priority
-                })
-            
-            user_assignments.append({
-                'user_id': user_id,
-                'username': user_info['username'],
-                'name': user_info.get('name', user_info['username']),
-                'role': user_info.get('role', 'team_member'),
-                'email': user_info.get('email', ''),
-                'total_tasks': user_tasks.count(),
-                'projects': list(tasks_by_project.values())
-            })
+        user_assignments.append({
+            'user_id': user_id,
+            'username': user_info['username'],
+            'name': user_info.get('name', user_info['username']),
+            'role': user_info.get('role', 'team_member'),
+            'email': user_info.get('email', ''),
+            'total_tasks': user_tasks.count(),
+            'projects': list(tasks_by_project.values())
+        })
+
+    if project_id:
+        project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
+        tasks = Task.objects.filter(project=project).select_related("assignee")
+        context = {
+            "project": {
+                "id": project.id,
+                "name": project.name,
+                "description": project.description,
+                "status": project.status,
+                "priority": project.priority,
+            "tasks": [
+                {
+                    "id": t.id,
+                    "title": t.title,
+                    "status": t.status,
+                    "priority": t.priority,
+                    "description": t.description,
+                    "assignee_id": t.assignee.id if t.assignee else None,
+                    "assignee_username": t.assignee.username if t.assignee else None,
+                }
+                for t in tasks
+            ],
+            },
+            "all_projects": [
+                {
+                    "id": p.id,
+                    "name": p.name,
+                    "status": p.status,
+                    "priority": p.priority,
+                    "tasks_count": p.tasks.count(),
+                    "description": p.description[:100] if p.description else "",
+                }
+                for p in all_projects
+            ],
+            "user_assignments": user_assignments,
+        }
+    else:
+        context = {
+            "all_projects": [
+                {
+                    "id": p.id,
+                    "name": p.name,
+                    "status": p.status,
+                    "priority": p.priority,
+                    "tasks_count": p.tasks.count(),
+                    "description": p.description[:100] if p.description else "",
+                }
+                for p in all_projects
+            ],
+            "tasks": [
+                {
+                    "id": t.id,
+                    "title": t.title,
+                    "status": t.status,
+                    "priority": t.priority,
+                    "description": t.description,
+                    "project_name": t.project.name,
+                    "assignee_id": t.assignee.id if t.assignee else None,
+                    "assignee_username": t.assignee.username if t.assignee else None,
+                }
+                for t in all_tasks[:50]
+            ],
+            "user_assignments": user_assignments,
+        }
+    # Projects and their agent_context_version (bumped by project, task, dependency and team changes):
+    # the context assembler's cache key, instead of a digest of the whole context
+    context["version"] = ",".join(f"{p.id}.{p.agent_context_version}" for p in all_projects)
+
+    # Enhanced: Get session_id for conversational memory
+    session_id = request.data.get("session_id")
+    if not session_id:
+        # Generate session ID from company user ID
+        session_id = f"company_user_{company_user.id}"
+    
+    return {
+        "question": question,
+        "context": context,
+        "available_users": available_users,
+        "session_id": session_id,
+    }, None
 
-        if project_id:
-            project = get_object_or_404(Project, id=project_id, created_by_company_user=company_user)
-            tasks = Task.objects.filter(project=project).select_related("assignee")
-            context = {
-                "project": {
-                    "id": project.id,
-                    "name": project.name,
-                    "description": project.description,
-                    "status": project.status,
-                    "priority": project.priority,
-                "tasks": [
-                    {
-                        "id": t.id,
-                        "title": t.title,
-                        "status": t.status,
-                        "priority": t.priority,
-                        "description": t.description,
-                        "assignee_id": t.assignee.id if t.assignee else None,
-                        "assignee_username": t.assignee.username if t.assignee else None,
-                    }
-                    for t in tasks
-                ],
-                },
-                "all_projects": [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "status": p.status,
-                        "priority": p.priority,
-                        "tasks_count": p.tasks.count(),
-                        "description": p.description[:100] if p.description else "",
-                    }
-                    for p in all_projects
-                ],
-                "user_assignments": user_assignments,
-            }
-        else:
-            context = {
-                "all_projects": [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "status": p.status,
-                        "priority": p.priority,
-                        "tasks_count": p.tasks.count(),
-                        "description": p.description[:100] if p.description else "",
-                    }
-                    for p in all_projects
-                ],
-                "tasks": [
-                    {
-                        "id": t.id,
-                        "title": t.title,
-                        "status": t.status,
-                        "priority": t.priority,
-                        "description": t.description,
-                        "project_name": t.project.name,
-                        "assignee_id": t.assignee.id if t.assignee else None,
-                        "assignee_username": t.assignee.username if t.assignee else None,
-                    }
-                    for t in all_tasks[:50]
-                ],
-                "user_assignments": user_assignments,
-            }
 
-        # Enhanced: Get session_id for conversational memory
-        session_id = request.data.get("session_id")
-        if not session_id:
-            # Generate session ID from company user ID
-            session_id = f"company_user_{company_user.id}"
+@api_view(["POST"])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def knowledge_qa(request):
+    """
+    Knowledge Q&A Agent API - Only accessible to company users.
+    Body:
+      - question: str (required)
+      - project_id: int (optional)
+      - session_id: str (optional)
+    """
+    try:
+        qa_kwargs, error_response = _knowledge_qa_request(request)
+        if error_response is not None:
+            return error_response
         
         agent = AgentRegistry.get_agent("knowledge_qa")
-        result = agent.process(
-            question=question, 
-            context=context, 
-            available_users=available_users,
-            session_id=session_id
-        )
+        result = agent.process(**qa_kwargs)
 
         return Response({
             "status": "success", 
             "data": result,
-            "session_id": session_id  # Return session_id for frontend to use
+            "session_id": qa_kwargs["session_id"]  # Return session_id for frontend to use
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -1390,6 +1456,35 @@ def knowledge_qa(request):
         )
 
 
+@api_view(["POST"])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def knowledge_qa_stream(request):
+    """
+    Knowledge Q&A as server-sent events: the answer is sent piece by piece
+    ('token' events) as it is generated, then a 'done' event carries the same
+    payload knowledge_qa returns. Same body as knowledge_qa.
+    """
+    try:
+        qa_kwargs, error_response = _knowledge_qa_request(request)
+        if error_response is not None:
+            return error_response
+        
+        agent = AgentRegistry.get_agent("knowledge_qa")
+        return sse_response(
+            agent.stream_answer(**qa_kwargs),
+            lambda result: {"status": "success", "data": result, "session_id": qa_kwargs["session_id"]},
+        )
+
+    except Exception as e:
+        logger.exception("knowledge_qa_stream failed")
+        return Response(
+            {"status": "error", "message": "Knowledge Q&A failed", "error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 @api_view(["POST"])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
@@ -1757,50 +1852,10 @@ def get_available_users(request):
 def _extract_text_from_file(file):
     """
     Extract text from uploaded file.
-    Supports: .txt, .pdf, .docx
+    Supports: .txt, .pdf, .docx (read from memory, no temp file)
     """
-    file_extension = os.path.splitext(file.name)[1].lower()
-    text = ""
-    
     try:
-        if file_extension == '.txt':
-            # Read text file
-            file.seek(0)
-            text = file.read().decode('utf-8', errors='ignore')
-        
-        elif file_extension == '.pdf' and PDF_AVAILABLE:
-            # Extract text from PDF
-            file.seek(0)
-            pdf_reader = PyPDF2.PdfReader(file)
-            text_parts = []
-            for page in pdf_reader.pages:
-                text_parts.append(page.extract_text())
-            text = "\n".join(text_parts)
-        
-        elif file_extension == '.docx' and DOCX_AVAILABLE:
-            # Extract text from DOCX
-            file.seek(0)
-            # Save to temp file for docx library
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp_file:
-                for chunk in file.chunks():
-                    tmp_file.write(chunk)
-                tmp_file_path = tmp_file.name
-            
-            try:
-                doc = Document(tmp_file_path)
-                text_parts = []
-                for paragraph in doc.paragraphs:
-                    text_parts.append(paragraph.text)
-                text = "\n".join(text_parts)
-            finally:
-                # Clean up temp file
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_extension}. Supported types: .txt, .pdf, .docx")
-        
-        return text.strip()
+        return extract_text(file)['text'].strip()
     
     except Exception as e:
         logger.exception(f"Error extracting text from file: {file.name}")
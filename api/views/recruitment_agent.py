@@ -3,14 +3,13 @@ Recruitment Agent API Views for Company Users
 """
 import json
 import logging
-import tempfile
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from django.db import close_old_connections, connection
 from django.db.models import Q
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
@@ -25,7 +24,7 @@ from recruitment_agent.agents.interview_scheduling import InterviewSchedulingAge
 from recruitment_agent.core import GroqClient
 from recruitment_agent.log_service import LogService
 from recruitment_agent.django_repository import DjangoRepository
-from recruitment_agent.models import Interview, CVRecord, JobDescription, RecruiterEmailSettings, RecruiterInterviewSettings, RecruiterQualificationSettings
+from recruitment_agent.models import Interview, CVRecord, CVJobMatch, JobDescription, RecruiterEmailSettings, RecruiterInterviewSettings, RecruiterQualificationSettings, split_top_skills
 
 from api.authentication import CompanyUserTokenAuthentication
 from api.permissions import IsCompanyUserOnly
@@ -185,19 +184,12 @@ def process_cvs(request):
         
         # Process CV files
         parsed_results = []
-        temp_paths = []
         
         try:
             for uploaded_file in files:
-                suffix = Path(uploaded_file.name).suffix
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    for chunk in uploaded_file.chunks():
-                        tmp.write(chunk)
-                    temp_path = Path(tmp.name)
-                    temp_paths.append(temp_path)
-                
                 try:
-                    parsed = cv_agent.parse_file(str(temp_path))
+                    # Extracted from memory by the shared extraction service (no temp file)
+                    parsed = cv_agent.parse_upload(uploaded_file)
                 except Exception as parse_exc:
                     # Check if it's an API key expiration error
                     from recruitment_agent.core import GroqClientError
@@ -230,13 +222,6 @@ def process_cvs(request):
                     'record_id': record_id,
                 })
             
-            # Clean up temp files
-            for temp_path in temp_paths:
-                try:
-                    temp_path.unlink()
-                except Exception:
-                    pass
-            
             # If parse_only, return parsed results
             if parse_only:
                 return Response({
@@ -419,13 +404,6 @@ def process_cvs(request):
             })
             
         except Exception as e:
-            # Clean up temp files on error
-            for temp_path in temp_paths:
-                try:
-                    temp_path.unlink()
-                except Exception:
-                    pass
-            
             logger.error(f"CV processing error: {e}")
             return Response({
                 'status': 'error',
@@ -613,6 +591,7 @@ def create_job_description(request):
         department = request.data.get('department', '').strip() or None
         job_type = request.data.get('type', 'Full-time').strip()
         requirements = request.data.get('requirements', '').strip() or None
+        rematch_existing_cvs = str(request.data.get('rematch_existing_cvs', False)).lower() in ('true', '1')
         
         if not title or not description:
             return Response({
@@ -642,6 +621,9 @@ def create_job_description(request):
             requirements=requirements,
         )
         
+        # Optionally score the existing CV pool against the new job in the background
+        rematch_queued = _queue_rematch(job_desc.id) if rematch_existing_cvs and keywords_json else False
+        
         return Response({
             'status': 'success',
             'message': 'Job description created successfully',
@@ -651,6 +633,7 @@ def create_job_description(request):
                 'description': job_desc.description,
                 'is_active': job_desc.is_active,
                 'created_at': job_desc.created_at.isoformat(),
+                'rematch_queued': rematch_queued,
             }
         }, status=status.HTTP_201_CREATED)
     
@@ -773,6 +756,209 @@ def delete_job_description(request, job_description_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _run_rematch_in_thread(job_description_id: int) -> None:
+    """Thread target for the no-broker fallback: closes the thread's DB connection and releases its agents."""
+    from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+    from recruitment_agent.rematch import rematch_job_description
+    close_old_connections()
+    try:
+        rematch_job_description(job_description_id)
+    except Exception as exc:
+        logger.error(f"Background re-match for job #{job_description_id} failed: {exc}", exc_info=True)
+    finally:
+        AgentRegistry.release_thread_agents()
+        connection.close()
+
+
+def _queue_rematch(job_description_id: int) -> bool:
+    """Queue the CV re-match job on Celery; fall back to a background thread if the broker is unavailable."""
+    try:
+        from recruitment_agent.tasks import rematch_job_description_task
+        rematch_job_description_task.delay(job_description_id)
+        return True
+    except Exception as exc:
+        logger.warning(f"Could not queue re-match task for job #{job_description_id} ({exc}); running in background thread")
+    try:
+        import threading
+        thread = threading.Thread(target=_run_rematch_in_thread, args=(job_description_id,))
+        thread.daemon = True
+        thread.start()
+        return True
+    except Exception as exc:
+        logger.error(f"Failed to start re-match for job #{job_description_id}: {exc}")
+        return False
+
+
+@api_view(['POST'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def rematch_job_description(request, job_description_id):
+    """Score the stored CV pool against a job description (deterministic, no LLM calls)"""
+    try:
+        company_user = request.user
+        
+        job_desc = JobDescription.objects.filter(
+            id=job_description_id,
+            company_user=company_user
+        ).first()
+        
+        if not job_desc:
+            return Response({
+                'status': 'error',
+                'message': 'Job description not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if not job_desc.keywords_json:
+            return Response({
+                'status': 'error',
+                'message': 'Job description has no parsed keywords. Update the description to regenerate keywords first.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        run_sync = str(request.data.get('sync', False)).lower() in ('true', '1')
+        if run_sync:
+            from recruitment_agent.rematch import rematch_job_description as run_rematch
+            stats = run_rematch(job_desc.id)
+            return Response({
+                'status': 'success',
+                'message': f"Scored {stats['scored']} stored CVs against this job",
+                'data': stats,
+            })
+        
+        queued = _queue_rematch(job_desc.id)
+        return Response({
+            'status': 'success' if queued else 'error',
+            'message': 'Re-match started' if queued else 'Could not start re-match',
+            'data': {'job_description_id': job_desc.id, 'queued': queued},
+        }, status=status.HTTP_202_ACCEPTED if queued else status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    except Exception as e:
+        logger.error(f"Error re-matching CVs: {e}")
+        return Response({
+            'status': 'error',
+            'message': f'Re-match failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def list_job_matches(request, job_description_id):
+    """List re-match results (stored CVs ranked against a job) with server-side pagination"""
+    try:
+        company_user = request.user
+        
+        job_desc = JobDescription.objects.filter(
+            id=job_description_id,
+            company_user=company_user
+        ).first()
+        
+        if not job_desc:
+            return Response({
+                'status': 'error',
+                'message': 'Job description not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        decision = request.query_params.get('decision')  # INTERVIEW, HOLD, REJECT
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(max(1, int(request.query_params.get('page_size', 20))), 100)
+        except (ValueError, TypeError):
+            page = 1
+            page_size = 20
+        
+        matches = CVJobMatch.objects.filter(job_description=job_desc)
+        if decision:
+            matches = matches.filter(qualification_decision=decision)
+        matches = matches.order_by('rank', 'id')
+        total = matches.count()
+        
+        start = (page - 1) * page_size
+        rows = matches.values(
+            'cv_record_id', 'cv_record__file_name', 'cv_record__candidate_name', 'cv_record__candidate_email',
+            'role_fit_score',
+            'qualification_decision', 'qualification_confidence', 'qualification_priority',
+            'match_percentage', 'rank', 'narrative_json', 'updated_at',
+        )[start:start + page_size]
+        
+        data = []
+        for row in rows:
+            data.append({
+                'cv_record_id': row['cv_record_id'],
+                'file_name': row['cv_record__file_name'],
+                'candidate_name': row['cv_record__candidate_name'],
+                'candidate_email': row['cv_record__candidate_email'],
+                'role_fit_score': row['role_fit_score'],
+                'qualification_decision': row['qualification_decision'],
+                'qualification_confidence': row['qualification_confidence'],
+                'qualification_priority': row['qualification_priority'],
+                'match_percentage': row['match_percentage'],
+                'rank': row['rank'],
+                'has_narrative': bool(row['narrative_json']),
+                'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+            })
+        
+        return Response({
+            'status': 'success',
+            'data': data,
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+        })
+    
+    except Exception as e:
+        logger.error(f"Error listing job matches: {e}")
+        return Response({
+            'status': 'error',
+            'message': f'Failed to list job matches: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def job_match_reasoning(request, job_description_id, cv_id):
+    """Generate (or return cached) LLM narrative reasoning for one stored CV against a job"""
+    try:
+        company_user = request.user
+        
+        match = CVJobMatch.objects.select_related('cv_record', 'job_description').filter(
+            job_description_id=job_description_id,
+            job_description__company_user=company_user,
+            cv_record_id=cv_id,
+        ).first()
+        
+        if not match:
+            return Response({
+                'status': 'error',
+                'message': 'Match not found. Run re-match for this job first.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        regenerate = str(request.data.get('regenerate', False)).lower() in ('true', '1')
+        if match.narrative_json and not regenerate:
+            narrative = json.loads(match.narrative_json)
+        else:
+            from recruitment_agent.rematch import generate_narrative
+            narrative = generate_narrative(match, get_agents()['sum_agent'])
+        
+        return Response({
+            'status': 'success',
+            'data': {
+                'cv_record_id': match.cv_record_id,
+                'job_description_id': match.job_description_id,
+                'role_fit_score': match.role_fit_score,
+                'qualification': json.loads(match.qualification_json) if match.qualification_json else None,
+                'narrative': narrative,
+            }
+        })
+    
+    except Exception as e:
+        logger.error(f"Error generating match reasoning: {e}")
+        return Response({
+            'status': 'error',
+            'message': f'Failed to generate reasoning: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
@@ -1208,12 +1394,19 @@ def get_interview_details(request, interview_id):
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
 def list_cv_records(request):
-    """List CV records for the company user with server-side pagination"""
+    """
+    List CV records for the company user with server-side pagination.
+    Runs from the indexed summary columns only; full parsed/insights/enriched/qualified
+    blobs are returned by the detail endpoint (recruitment/cv-records/<id>).
+    """
     try:
         company_user = request.user
         
         job_id = request.query_params.get('job_id')
         decision = request.query_params.get('decision')  # INTERVIEW, HOLD, REJECT
+        search = (request.query_params.get('search') or '').strip()  # name or email
+        min_score = request.query_params.get('min_score')
+        sort = request.query_params.get('sort')  # rank (default), score, experience, name, newest
         page_param = request.query_params.get('page')
         page_size_param = request.query_params.get('page_size')
         
@@ -1239,35 +1432,53 @@ def list_cv_records(request):
         if decision:
             cv_records = cv_records.filter(qualification_decision=decision)
         
-        cv_records = cv_records.order_by('-rank', '-created_at')
+        if search:
+            cv_records = cv_records.filter(Q(candidate_name__icontains=search) | Q(candidate_email__icontains=search))
+        
+        if min_score:
+            try:
+                cv_records = cv_records.filter(role_fit_score__gte=int(min_score))
+            except (ValueError, TypeError):
+                pass
+        
+        sort_orders = {
+            'rank': ('-rank', '-created_at'),
+            'score': ('-role_fit_score', '-created_at'),
+            'experience': ('-total_experience_years', '-created_at'),
+            'name': ('candidate_name', '-created_at'),
+            'newest': ('-created_at',),
+        }
+        cv_records = cv_records.order_by(*sort_orders.get(sort, sort_orders['rank']))
         total = cv_records.count()
         
         if paginate and page_size is not None:
             start = (page - 1) * page_size
             cv_records = cv_records[start:start + page_size]
         
+        rows = cv_records.values(
+            'id', 'file_name', 'role_fit_score', 'rank',
+            'qualification_decision', 'qualification_confidence', 'qualification_priority',
+            'job_description_id', 'job_description__title',
+            'candidate_name', 'candidate_email', 'top_skills', 'total_experience_years',
+            'created_at',
+        )
         records_list = []
-        for cv in cv_records:
-            parsed_data = json.loads(cv.parsed_json) if cv.parsed_json else {}
-            insights_data = json.loads(cv.insights_json) if cv.insights_json else {}
-            enriched_data = json.loads(cv.enriched_json) if cv.enriched_json else {}
-            qualification_data = json.loads(cv.qualification_json) if cv.qualification_json else {}
-            
+        for row in rows:
             records_list.append({
-                'id': cv.id,
-                'file_name': cv.file_name,
-                'role_fit_score': cv.role_fit_score,
-                'rank': cv.rank,
-                'qualification_decision': cv.qualification_decision,
-                'qualification_confidence': cv.qualification_confidence,
-                'qualification_priority': cv.qualification_priority,
-                'job_description_id': cv.job_description_id,
-                'job_description_title': cv.job_description.title if cv.job_description else None,
-                'parsed': parsed_data,
-                'insights': insights_data,
-                'enriched': enriched_data,
-                'qualified': qualification_data,
-                'created_at': cv.created_at.isoformat() if cv.created_at else None,
+                'id': row['id'],
+                'file_name': row['file_name'],
+                'role_fit_score': row['role_fit_score'],
+                'rank': row['rank'],
+                'qualification_decision': row['qualification_decision'],
+                'qualification_confidence': row['qualification_confidence'],
+                'qualification_priority': row['qualification_priority'],
+                'job_description_id': row['job_description_id'],
+                'job_description_title': row['job_description__title'],
+                'candidate_name': row['candidate_name'],
+                'candidate_email': row['candidate_email'],
+                'top_skills': split_top_skills(row['top_skills']),
+                'total_experience_years': row['total_experience_years'],
+                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
             })
         
         payload = {
@@ -1288,6 +1499,56 @@ def list_cv_records(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@authentication_classes([CompanyUserTokenAuthentication])
+@permission_classes([IsCompanyUserOnly])
+def get_cv_record(request, cv_id):
+    """Get one CV record with the full parsed/insights/enriched/qualified data"""
+    try:
+        company_user = request.user
+        
+        try:
+            cv = CVRecord.objects.select_related('job_description').get(
+                id=cv_id, job_description__company_user=company_user
+            )
+        except CVRecord.DoesNotExist:
+            return Response({
+                'status': 'error',
+                'message': 'CV record not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'status': 'success',
+            'data': {
+                'id': cv.id,
+                'file_name': cv.file_name,
+                'role_fit_score': cv.role_fit_score,
+                'rank': cv.rank,
+                'qualification_decision': cv.qualification_decision,
+                'qualification_confidence': cv.qualification_confidence,
+                'qualification_priority': cv.qualification_priority,
+                'job_description_id': cv.job_description_id,
+                'job_description_title': cv.job_description.title if cv.job_description else None,
+                'candidate_name': cv.candidate_name,
+                'candidate_email': cv.candidate_email,
+                'top_skills': cv.top_skills_list,
+                'total_experience_years': cv.total_experience_years,
+                'parsed': json.loads(cv.parsed_json) if cv.parsed_json else {},
+                'insights': json.loads(cv.insights_json) if cv.insights_json else {},
+                'enriched': json.loads(cv.enriched_json) if cv.enriched_json else {},
+                'qualified': json.loads(cv.qualification_json) if cv.qualification_json else {},
+                'created_at': cv.created_at.isoformat() if cv.created_at else None,
+            }
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting CV record: {e}")
+        return Response({
+            'status': 'error',
+            'message': f'Failed to get CV record: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET', 'POST'])
 @authentication_classes([CompanyUserTokenAuthentication])
 @permission_classes([IsCompanyUserOnly])
@@ -141,6 +141,20 @@ class FrontlineAgent(BaseAgent):
         
         return result
     
+    def triage_tickets(self, limit: Optional[int] = None, dry_run: bool = False) -> Dict:
+        """
+        Classify and auto-resolve pending tickets in bulk (see triage.py).
+        
+        Args:
+            limit: Maximum number of tickets to triage
+            dry_run: Compute everything but don't save
+            
+        Returns:
+            Triage report with counts and per-stage latency
+        """
+        from .triage import TicketTriagePipeline
+        return TicketTriagePipeline(self).run(limit=limit, dry_run=dry_run)
+    
     def search_knowledge(self, query: str) -> Dict:
         """
         Search knowledge base for information.
@@ -159,7 +173,7 @@ class FrontlineAgent(BaseAgent):
         Main processing method for the agent.
         
         Args:
-            action: Action to perform ('answer_question', 'process_ticket', 'search_knowledge')
+            action: Action to perform ('answer_question', 'process_ticket', 'triage_tickets', 'search_knowledge')
             **kwargs: Action-specific parameters
             
         Returns:
@@ -182,6 +196,9 @@ class FrontlineAgent(BaseAgent):
                 return {'success': False, 'error': 'Title, description, and user_id are required'}
             return self.process_ticket(title, description, user_id)
         
+        elif action == 'triage_tickets':
+            return self.triage_tickets(kwargs.get('limit'), kwargs.get('dry_run', False))
+        
         elif action == 'search_knowledge':
             query = kwargs.get('query', '')
             if not query:
@@ -0,0 +1,376 @@
+"""
+Knowledge Base Search Index
+BM25 ranked retrieval over Frontline KnowledgeBase articles.
+
+The index is a base segment plus a change log, both under
+FRONTLINE_KB_INDEX_DIR:
+
+    knowledge_index.npz   vocabulary and postings in CSR form (per term: the
+                          article rows containing it and the term frequencies),
+                          per-article id / length / category, and how many
+                          bytes of the log the segment already contains
+    knowledge_index.log   JSON lines appended when an article is saved or
+                          deleted: {"id", "category", "length", "tf"} or
+                          {"id", "deleted": true}
+
+Every process holds the segment in memory and, before each search, replays log
+lines it has not seen yet into a small in-memory delta (changed articles) plus
+tombstones (rows of the segment that are outdated). Once the delta grows past
+a fraction of the segment, it is merged and a new segment written atomically.
+
+Writing a segment (merge or rebuild) also rotates the log down to the entries
+the segment does not contain, so the log stays small and a starting process
+replays only that tail. Appends and rotation hold an exclusive lock on
+knowledge_index.lock (where fcntl is available) so no entry is lost to a
+rotation; readers notice a rotated log by its inode and replay it from the
+start (replaying an entry twice is harmless, entries are upserts).
+
+Titles count twice (a cheap field boost); tags and content once.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends and rotations are not locked against each other
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+CATEGORIES = ['faq', 'documentation', 'troubleshooting', 'policies', 'procedures', 'other']
+# Merge the delta into a new segment past this many changed articles (or 10% of the segment)
+MIN_MERGE_DOCS = 64
+TF_MAX = np.iinfo(np.uint16).max  # term frequencies are stored as uint16
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    'a an and are as at be but by can do does for from has have how i if in is it its '
+    'me my not of on or our so than that the their them then there these this to was '
+    'we what when where which who why will with you your'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens without stopwords; a trailing plural 's' is dropped."""
+    tokens = []
+    for token in _TOKEN_RE.findall((text or '').lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def article_terms(title: str, content: str, tags: str = '') -> Counter:
+    return Counter(tokenize(title) * 2 + tokenize(tags) + tokenize(content))
+
+
+def _category_code(category: str) -> int:
+    try:
+        return CATEGORIES.index(category)
+    except ValueError:
+        return CATEGORIES.index('other')
+
+
+class KnowledgeIndex:
+    """One index directory; search() is safe to call from several threads."""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.segment_path = os.path.join(self.directory, 'knowledge_index.npz')
+        self.log_path = os.path.join(self.directory, 'knowledge_index.log')
+        self.lock_path = os.path.join(self.directory, 'knowledge_index.lock')
+        self._lock = threading.RLock()
+        self._segment_stamp = None
+        self._log_identity = None
+        self._reset_segment(np.zeros(0, np.int64), np.zeros(0, np.int32), np.zeros(0, np.int8),
+                            [], np.zeros(1, np.int64), np.zeros(0, np.int32), np.zeros(0, np.uint16), 0)
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _reset_segment(self, doc_ids, doc_len, doc_cat, terms, term_ptr, post_doc, post_tf, log_offset):
+        self.doc_ids = doc_ids
+        self.doc_len = doc_len
+        self.doc_cat = doc_cat
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.term_ptr = term_ptr
+        self.post_doc = post_doc
+        self.post_tf = post_tf
+        self.row_of = {doc_id: row for row, doc_id in enumerate(doc_ids.tolist())}
+        self.log_offset = log_offset
+        self.tombstones = set()
+        self.delta: Dict[int, Tuple[int, int, Dict[str, int]]] = {}  # id -> (category code, length, tf)
+        self.live_docs = len(doc_ids)
+        self.total_len = int(doc_len.sum())
+
+    def _remove(self, doc_id: int) -> None:
+        old = self.delta.pop(doc_id, None)
+        if old is not None:
+            self.live_docs -= 1
+            self.total_len -= old[1]
+        row = self.row_of.get(doc_id)
+        if row is not None and row not in self.tombstones:
+            self.tombstones.add(row)
+            self.live_docs -= 1
+            self.total_len -= int(self.doc_len[row])
+
+    def _apply(self, entry: Dict) -> None:
+        doc_id = int(entry['id'])
+        self._remove(doc_id)
+        if not entry.get('deleted'):
+            self.delta[doc_id] = (_category_code(entry.get('category')), int(entry['length']), entry['tf'])
+            self.live_docs += 1
+            self.total_len += int(entry['length'])
+
+    # ------------------------------------------------------------------
+    # Disk
+    # ------------------------------------------------------------------
+
+    def _stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _log_size(self) -> int:
+        stamp = self._stamp(self.log_path)
+        return stamp[1] if stamp else 0
+
+    def _log_stat(self) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """Size and (device, inode) of the log; a rotation replaces the inode."""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return 0, None
+        return stat.st_size, (stat.st_dev, stat.st_ino)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes for log appends and rotation."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _load_segment(self) -> bool:
+        try:
+            with np.load(self.segment_path, allow_pickle=False) as data:
+                vocabulary = str(data['vocabulary'])
+                self._reset_segment(
+                    data['doc_ids'], data['doc_len'], data['doc_cat'],
+                    vocabulary.split('\n') if vocabulary else [],
+                    data['term_ptr'], data['post_doc'], data['post_tf'], int(data['log_offset']),
+                )
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Knowledge index segment unreadable, rebuilding: {e}")
+            return False
+        return True
+
+    def _write_segment(self, docs: Sequence[Tuple[int, int, int, Dict[str, int]]], log_offset: int) -> None:
+        """
+        Write (id, category code, length, tf) docs, which contain the first
+        log_offset bytes of the log, as a new segment, rotate the log down to
+        the remaining entries and load the segment (the entries are replayed
+        on the next sync).
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for row, (_, _, _, tf) in enumerate(docs):
+            for term, count in tf.items():
+                postings.setdefault(term, []).append((row, count))
+        terms = sorted(postings)
+        term_ptr = np.zeros(len(terms) + 1, np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=term_ptr[1:])
+        post_doc = np.fromiter((row for term in terms for row, _ in postings[term]), np.int32, int(term_ptr[-1]))
+        post_tf = np.fromiter((min(count, TF_MAX) for term in terms for _, count in postings[term]),
+                              np.uint16, int(term_ptr[-1]))
+        arrays = {
+            'doc_ids': np.fromiter((doc[0] for doc in docs), np.int64, len(docs)),
+            'doc_cat': np.fromiter((doc[1] for doc in docs), np.int8, len(docs)),
+            'doc_len': np.fromiter((doc[2] for doc in docs), np.int32, len(docs)),
+            'vocabulary': np.array('\n'.join(terms)),
+            'term_ptr': term_ptr,
+            'post_doc': post_doc,
+            'post_tf': post_tf,
+            'log_offset': np.array(0, np.int64),
+        }
+        suffix = f'{os.getpid()}.{threading.get_ident()}.tmp'
+        with self._file_lock():
+            # The segment goes first: a reader that loads it before the log is rotated
+            # replays the old log from the start, which only repeats merged upserts
+            tmp_path = f'{self.segment_path}.{suffix}'
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, self.segment_path)
+            tail = b''
+            if self._log_size() > log_offset:
+                with open(self.log_path, 'rb') as f:
+                    f.seek(log_offset)
+                    tail = f.read()
+            tmp_path = f'{self.log_path}.{suffix}'
+            with open(tmp_path, 'wb') as f:
+                f.write(tail)
+            os.replace(tmp_path, self.log_path)
+            self._log_identity = self._log_stat()[1]
+        self._reset_segment(arrays['doc_ids'], arrays['doc_len'], arrays['doc_cat'], terms,
+                            term_ptr, post_doc, post_tf, 0)
+        self._segment_stamp = self._stamp(self.segment_path)
+
+    def rebuild(self) -> None:
+        """Index every KnowledgeBase article from the database (one query)."""
+        from Frontline_agent.models import KnowledgeBase
+        with self._lock:
+            # Log entries written while the articles are read are replayed afterwards (upserts are idempotent)
+            log_offset = self._log_size()
+            docs = []
+            for doc_id, category, title, content, tags in KnowledgeBase.objects.order_by('id').values_list(
+                'id', 'category', 'title', 'content', 'tags'
+            ):
+                tf = article_terms(title, content, tags)
+                docs.append((doc_id, _category_code(category), sum(tf.values()), dict(tf)))
+            self._write_segment(docs, log_offset)
+            logger.info(f"Knowledge index rebuilt: {len(docs)} articles, {len(self.terms)} terms")
+
+    def _merge(self) -> None:
+        docs = [
+            (int(doc_id), int(self.doc_cat[row]), int(self.doc_len[row]), {})
+            for row, doc_id in enumerate(self.doc_ids.tolist()) if row not in self.tombstones
+        ]
+        position = {doc[0]: i for i, doc in enumerate(docs)}
+        # Term frequencies of the surviving rows come back out of the postings
+        for term, t in self.terms.items():
+            start, end = self.term_ptr[t], self.term_ptr[t + 1]
+            for row, count in zip(self.post_doc[start:end].tolist(), self.post_tf[start:end].tolist()):
+                if row not in self.tombstones:
+                    docs[position[int(self.doc_ids[row])]][3][term] = count
+        docs.extend((doc_id, cat, length, tf) for doc_id, (cat, length, tf) in self.delta.items())
+        docs.sort()
+        self._write_segment(docs, self.log_offset)
+
+    def sync(self) -> None:
+        """Pick up a segment written by another process and log entries not seen yet."""
+        with self._lock:
+            stamp = self._stamp(self.segment_path)
+            if stamp is None:
+                self.rebuild()
+            elif stamp != self._segment_stamp:
+                if not self._load_segment():
+                    self.rebuild()
+                self._segment_stamp = self._stamp(self.segment_path)
+            size, identity = self._log_stat()
+            if self._log_identity is not None and (identity != self._log_identity or size < self.log_offset):
+                self.log_offset = 0  # rotated by a merge in another process
+            self._log_identity = identity
+            if size > self.log_offset:
+                with open(self.log_path, 'rb') as f:
+                    f.seek(self.log_offset)
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # partially written - read it next time
+                        self.log_offset += len(line)
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, KeyError) as e:
+                            logger.warning(f"Skipping bad knowledge index log entry: {e}")
+            if len(self.delta) > max(MIN_MERGE_DOCS, len(self.doc_ids) // 10):
+                self._merge()
+
+    # ------------------------------------------------------------------
+    # Updates (called from KnowledgeBase signals)
+    # ------------------------------------------------------------------
+
+    def _append(self, entry: Dict) -> None:
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._file_lock(), open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def add_article(self, article) -> None:
+        tf = article_terms(article.title, article.content, article.tags)
+        self._append({'id': article.id, 'category': article.category,
+                      'length': sum(tf.values()), 'tf': dict(tf)})
+
+    def remove_article(self, article_id: int) -> None:
+        self._append({'id': article_id, 'deleted': True})
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, categories: Optional[Iterable[str]] = None, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Top articles for query by BM25, as (article id, score), best first.
+        Document frequencies count outdated segment rows until the next merge,
+        which only slightly flattens IDF.
+        """
+        self.sync()
+        with self._lock:
+            terms = list(dict.fromkeys(tokenize(query)))
+            if not terms or not self.live_docs:
+                return []
+            allowed = None if categories is None else {_category_code(c) for c in categories}
+            n_docs = self.live_docs
+            avg_len = max(self.total_len / n_docs, 1.0)
+
+            scores = np.zeros(len(self.doc_ids))
+            delta_scores: Dict[int, float] = {}
+            for term in terms:
+                t = self.terms.get(term)
+                rows = counts = None
+                df = 0
+                if t is not None:
+                    start, end = self.term_ptr[t], self.term_ptr[t + 1]
+                    rows, counts = self.post_doc[start:end], self.post_tf[start:end]
+                    df = end - start
+                delta_hits = [(doc_id, tf[term], length) for doc_id, (_, length, tf) in self.delta.items() if term in tf]
+                df += len(delta_hits)
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                if rows is not None:
+                    norm = K1 * (1 - B + B * self.doc_len[rows] / avg_len)
+                    np.add.at(scores, rows, idf * counts * (K1 + 1) / (counts + norm))
+                for doc_id, tf, length in delta_hits:
+                    norm = K1 * (1 - B + B * length / avg_len)
+                    delta_scores[doc_id] = delta_scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+            hits = [
+                (int(self.doc_ids[row]), float(scores[row])) for row in np.flatnonzero(scores).tolist()
+                if row not in self.tombstones and (allowed is None or int(self.doc_cat[row]) in allowed)
+            ]
+            hits.extend(
+                (doc_id, score) for doc_id, score in delta_scores.items()
+                if allowed is None or self.delta[doc_id][0] in allowed
+            )
+            hits.sort(key=lambda hit: (-hit[1], hit[0]))
+            return hits[:limit]
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Process-wide index over FRONTLINE_KB_INDEX_DIR."""
+    global _index
+    directory = str(getattr(settings, 'FRONTLINE_KB_INDEX_DIR', os.path.join(settings.BASE_DIR, 'search_index')))
+    with _index_lock:
+        if _index is None or _index.directory != directory:
+            _index = KnowledgeIndex(directory)
+        return _index
@@ -4,7 +4,7 @@ Enterprise-level rule-based classification for tickets
 """
 import re
 import logging
-from typing import Tuple, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -28,6 +28,156 @@ class TicketPriority(Enum):
     URGENT = "urgent"
 
 
+_WORD_CHAR = re.compile(r'\w')
+_LITERAL_ALTERNATION = re.compile(r'^\\b\((.+)\)\\b$')
+_PLAIN_ALTERNATIVE = re.compile(r"(?:[\w ]|\\')+")
+_LEADING_ALTERNATION = re.compile(r'^\\b\(([^()]+)\)(?=\\s|\\b|$)')
+
+
+def _literal_alternatives(pattern: str) -> Optional[List[str]]:
+    r"""
+    The literals of a r'\b(word|two words|...)\b' pattern, or None if the pattern
+    is anything more than that (it is then matched as a regex of its own).
+    """
+    match = _LITERAL_ALTERNATION.match(pattern)
+    if not match:
+        return None
+    literals = []
+    for alt in match.group(1).split('|'):
+        # Words, spaces and escaped apostrophes only
+        if not _PLAIN_ALTERNATIVE.fullmatch(alt):
+            return None
+        literal = alt.replace("\\'", "'")
+        if not (_WORD_CHAR.match(literal[0]) and _WORD_CHAR.match(literal[-1])):
+            return None
+        literals.append(literal)
+    return literals
+
+
+class _RuleScanner:
+    """
+    The rules of a TicketClassificationRules class, compiled once.
+
+    Category patterns and complex indicators are r'\\b(word|two words|...)\\b'
+    alternations of literals. All their literals go into one table keyed by
+    the literal's leading word, so a single pass over the words of the text
+    (one C-level \\w+ scan) finds every pattern that matches, overlapping
+    matches included. A hit of literal L at a word start is checked with
+    text.startswith(L, start) plus the word boundary after it, which is exactly
+    what re.search(pattern) would accept. Priority / urgent keywords are plain
+    substring tests, as before. Auto-resolvable patterns (real regexes) and any
+    pattern that is not a literal alternation are precompiled.
+
+    Measured on 460-character tickets: a combined lookahead alternation over
+    all literals costs more than the original per-pattern searches in CPython's
+    re, because it is retried at every character; the word table does not.
+    """
+
+    _WORDS = re.compile(r'\w+')
+
+    def __init__(self, rules):
+        # Every category pattern / complex indicator gets an integer id; hits are sets of ids
+        self.pattern_category: List[object] = []  # id -> category, or None for complex indicators
+        # leading word -> [(literal, pattern id)]
+        self.by_first_word: Dict[str, List[Tuple[str, int]]] = {}
+        self.fallback: List[Tuple[int, re.Pattern]] = []
+
+        def add(pattern: str, category) -> None:
+            pattern_id = len(self.pattern_category)
+            self.pattern_category.append(category)
+            literals = _literal_alternatives(pattern)
+            if literals is None:
+                self.fallback.append((pattern_id, re.compile(pattern, re.IGNORECASE)))
+                return
+            for literal in literals:
+                literal = literal.lower()
+                first_word = self._WORDS.match(literal).group()
+                self.by_first_word.setdefault(first_word, []).append((literal, pattern_id))
+
+        for category, patterns in rules.CATEGORY_PATTERNS.items():
+            for pattern in patterns:
+                add(pattern, category)
+        for indicator in rules.COMPLEX_INDICATORS:
+            add(indicator, None)
+        self.priority_keywords = [
+            (priority, keyword) for priority, keywords in rules.PRIORITY_KEYWORDS.items() for keyword in keywords
+        ]
+        self.urgent_keywords = list(rules.URGENT_KEYWORDS)
+        # (regex, words one of which must occur in the text for it to match, or None)
+        self.auto = [(re.compile(config['pattern'], re.IGNORECASE), self._leading_words(config['pattern']))
+                     for config in rules.AUTO_RESOLVABLE_PATTERNS]
+
+    @classmethod
+    def _leading_words(cls, pattern: str) -> Optional[frozenset]:
+        """
+        For a pattern starting with r'\\b(alt|alt ...)' followed by \\s, \\b or the end,
+        the first words of the alternatives: each is a whole word of any text it matches.
+        """
+        match = _LEADING_ALTERNATION.match(pattern)
+        if not match:
+            return None
+        words = set()
+        for alt in match.group(1).split('|'):
+            if not _PLAIN_ALTERNATIVE.fullmatch(alt) or not _WORD_CHAR.match(alt):
+                return None
+            words.add(cls._WORDS.match(alt.lower()).group())
+        return frozenset(words)
+
+    def scan(self, text: str) -> Dict:
+        """
+        {'categories': {category: number of its patterns that match},
+         'priorities': {priority: number of its keywords in the text},
+         'complex': bool, 'urgent': bool}
+        """
+        hits = set()
+        by_first_word = self.by_first_word
+        length = len(text)
+        for word in self._WORDS.finditer(text):
+            candidates = by_first_word.get(word.group())
+            if candidates is None:
+                continue
+            start = word.start()
+            for literal, pattern_id in candidates:
+                end = start + len(literal)
+                if text.startswith(literal, start) and (end == length or not _WORD_CHAR.match(text, end)):
+                    hits.add(pattern_id)
+        for pattern_id, regex in self.fallback:
+            if pattern_id not in hits and regex.search(text):
+                hits.add(pattern_id)
+
+        categories: Dict[object, int] = {}
+        complex_hit = False
+        for pattern_id in hits:
+            category = self.pattern_category[pattern_id]
+            if category is None:
+                complex_hit = True
+            else:
+                categories[category] = categories.get(category, 0) + 1
+        priorities: Dict[object, int] = {}
+        for priority, keyword in self.priority_keywords:
+            if keyword in text:
+                priorities[priority] = priorities.get(priority, 0) + 1
+        return {
+            'categories': categories,
+            'priorities': priorities,
+            'complex': complex_hit,
+            'urgent': any(keyword in text for keyword in self.urgent_keywords),
+        }
+
+    def first_auto_resolvable(self, text: str) -> Optional[int]:
+        """Index of the first AUTO_RESOLVABLE_PATTERNS entry that matches anywhere in text."""
+        words = None
+        for index, (regex, leading_words) in enumerate(self.auto):
+            if leading_words is not None:
+                if words is None:
+                    words = set(self._WORDS.findall(text))
+                if leading_words.isdisjoint(words):
+                    continue
+            if regex.search(text):
+                return index
+        return None
+
+
 class TicketClassificationRules:
     """
     Rule-based ticket classification engine.
@@ -121,6 +271,13 @@ class TicketClassificationRules:
         r'\b(cannot|unable|failed|broken|down|outage)\b',
     ]
     
+    # Keywords that escalate a ticket on their own (should_escalate without a classification)
+    URGENT_KEYWORDS = ['urgent', 'critical', 'emergency', 'asap']
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._scanner = _RuleScanner(cls)
+    
     @classmethod
     def classify_ticket(cls, description: str, title: Optional[str] = None) -> Dict:
         """
@@ -144,30 +301,34 @@ class TicketClassificationRules:
             }
         
         text = f"{title} {description}".lower() if title else description.lower()
-        
+        return cls._classify_text(text)
+    
+    @classmethod
+    def _classify_text(cls, text: str) -> Dict:
         # Check for auto-resolvable patterns first
-        for pattern_config in cls.AUTO_RESOLVABLE_PATTERNS:
-            if re.search(pattern_config['pattern'], text, re.IGNORECASE):
-                logger.info(f"Matched auto-resolvable pattern: {pattern_config['pattern']}")
-                return {
-                    'category': pattern_config['category'].value,
-                    'priority': pattern_config['priority'].value,
-                    'confidence': 0.9,
-                    'auto_resolvable': True,
-                    'should_escalate': False,
-                    'resolution_template': pattern_config.get('resolution_template'),
-                    'reasoning': f"Matched auto-resolvable pattern: {pattern_config['pattern']}"
-                }
+        auto_index = cls._scanner.first_auto_resolvable(text)
+        if auto_index is not None:
+            pattern_config = cls.AUTO_RESOLVABLE_PATTERNS[auto_index]
+            logger.info(f"Matched auto-resolvable pattern: {pattern_config['pattern']}")
+            return {
+                'category': pattern_config['category'].value,
+                'priority': pattern_config['priority'].value,
+                'confidence': 0.9,
+                'auto_resolvable': True,
+                'should_escalate': False,
+                'resolution_template': pattern_config.get('resolution_template'),
+                'reasoning': f"Matched auto-resolvable pattern: {pattern_config['pattern']}"
+            }
         
-        # Check for complex indicators (escalation needed)
-        is_complex = any(re.search(indicator, text, re.IGNORECASE) for indicator in cls.COMPLEX_INDICATORS)
+        # Category pattern, priority keyword and complexity hits in one scan
+        scan = cls._scanner.scan(text)
+        is_complex = scan['complex']
         
-        # Classify category
-        category_scores = {}
-        for category, patterns in cls.CATEGORY_PATTERNS.items():
-            score = sum(1 for pattern in patterns if re.search(pattern, text, re.IGNORECASE))
-            if score > 0:
-                category_scores[category] = score
+        # Classify category (dict order breaks ties, as CATEGORY_PATTERNS order did)
+        category_scores = {
+            category: scan['categories'][category]
+            for category in cls.CATEGORY_PATTERNS if category in scan['categories']
+        }
         
         if category_scores:
             category = max(category_scores, key=category_scores.get)
@@ -177,11 +338,10 @@ class TicketClassificationRules:
             category_confidence = 0.5
         
         # Classify priority
-        priority_scores = {}
-        for priority, keywords in cls.PRIORITY_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                priority_scores[priority] = score
+        priority_scores = {
+            priority: scan['priorities'][priority]
+            for priority in cls.PRIORITY_KEYWORDS if priority in scan['priorities']
+        }
         
         if priority_scores:
             priority = max(priority_scores, key=priority_scores.get)
@@ -208,6 +368,14 @@ class TicketClassificationRules:
             'reasoning': f"Category: {category.value} (confidence: {category_confidence:.2f}), Priority: {priority.value}, Complex: {is_complex}"
         }
     
+    @classmethod
+    def classify_many(cls, tickets: Iterable[Tuple[Optional[str], str]]) -> List[Dict]:
+        """
+        Classify (title, description) pairs, e.g. to re-classify historical
+        tickets after the rules changed. Same result as classify_ticket per pair.
+        """
+        return [cls.classify_ticket(description, title) for title, description in tickets]
+    
     @classmethod
     def is_low_complexity(cls, description: str) -> bool:
         """
@@ -222,21 +390,11 @@ class TicketClassificationRules:
         text = description.lower()
         
         # Check for complex indicators
-        has_complex_indicators = any(
-            re.search(indicator, text, re.IGNORECASE) 
-            for indicator in cls.COMPLEX_INDICATORS
-        )
-        
-        if has_complex_indicators:
+        if cls._scanner.scan(text)['complex']:
             return False
         
         # Check for auto-resolvable patterns
-        has_auto_resolvable = any(
-            re.search(pattern['pattern'], text, re.IGNORECASE)
-            for pattern in cls.AUTO_RESOLVABLE_PATTERNS
-        )
-        
-        return has_auto_resolvable
+        return cls._scanner.first_auto_resolvable(text) is not None
     
     @classmethod
     def should_escalate(cls, description: str, classification: Optional[Dict] = None) -> bool:
@@ -253,14 +411,9 @@ class TicketClassificationRules:
         if classification:
             return classification.get('should_escalate', False)
         
-        text = description.lower()
-        
-        # Urgent keywords
-        if any(keyword in text for keyword in ['urgent', 'critical', 'emergency', 'asap']):
-            return True
-        
-        # Complex issues
-        if any(re.search(indicator, text, re.IGNORECASE) for indicator in cls.COMPLEX_INDICATORS):
-            return True
-        
-        return False
+        # Urgent keywords or complex issues
+        scan = cls._scanner.scan(description.lower())
+        return scan['urgent'] or scan['complex']
+
+
+TicketClassificationRules._scanner = _RuleScanner(TicketClassificationRules)
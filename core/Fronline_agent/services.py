@@ -8,6 +8,7 @@ from django.utils import timezone
 from django.db import transaction
 
 from .database_service import PayPerProjectDatabaseService
+from .knowledge_index import get_knowledge_index
 from .rules import TicketClassificationRules
 
 logger = logging.getLogger(__name__)
@@ -37,7 +38,7 @@ class KnowledgeService:
         logger.info(f"Searching knowledge base for: {query[:100]}")
         
         try:
-            # Search all knowledge sources
+            # Search all knowledge sources (PayPerProject tables first, they are authoritative)
             faqs = self.db_service.get_faqs(search_term=query, limit=max_results)
             policies = self.db_service.get_policies(search_term=query, limit=max_results)
             manuals = self.db_service.get_manuals(search_term=query, limit=max_results)
@@ -74,6 +75,20 @@ class KnowledgeService:
                     'source': 'PayPerProject Database'
                 })
             
+            sources = {
+                'faqs': len(faqs),
+                'policies': len(policies),
+                'manuals': len(manuals)
+            }
+            
+            # Then the local knowledge base articles the BM25 index ranks for the query
+            seen = {self._result_text(result) for result in all_results}
+            for result in self._search_index(query, max_results):
+                if self._result_text(result) in seen:
+                    continue  # already returned by a lookup (e.g. the local FAQ fallback)
+                all_results.append(result)
+                sources[self.INDEXED_CATEGORIES[result['category']][1]] += 1
+            
             logger.info(f"Found {len(all_results)} knowledge base results")
             
             return {
@@ -81,11 +96,7 @@ class KnowledgeService:
                 'query': query,
                 'results': all_results,
                 'count': len(all_results),
-                'sources': {
-                    'faqs': len(faqs),
-                    'policies': len(policies),
-                    'manuals': len(manuals)
-                }
+                'sources': sources
             }
         except Exception as e:
             logger.error(f"Knowledge search failed: {e}", exc_info=True)
@@ -96,6 +107,60 @@ class KnowledgeService:
                 'count': 0
             }
     
+    # KnowledgeBase category -> (result type, sources key)
+    INDEXED_CATEGORIES = {
+        'faq': ('faq', 'faqs'),
+        'policies': ('policy', 'policies'),
+        'documentation': ('manual', 'manuals'),
+    }
+    
+    @staticmethod
+    def _result_text(result: Dict) -> Tuple[str, str, str]:
+        return (
+            result['type'],
+            result.get('question') or result.get('title') or '',
+            result.get('answer') or result.get('content') or '',
+        )
+    
+    def _search_index(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Rank the local FAQs, policies and manuals (KnowledgeBase articles) with
+        the BM25 index and load the hits in one query, up to max_results per
+        category, best first. Empty when nothing matches or the index is
+        unavailable.
+        """
+        try:
+            hits = get_knowledge_index().search(
+                query, categories=self.INDEXED_CATEGORIES, limit=max_results * len(self.INDEXED_CATEGORIES) * 4
+            )
+        except OSError as e:
+            logger.error(f"Knowledge index unavailable: {e}")
+            return []
+        if not hits:
+            return []
+        
+        from Frontline_agent.models import KnowledgeBase
+        articles = KnowledgeBase.objects.in_bulk([article_id for article_id, _ in hits])
+        per_category = {}
+        results = []
+        for article_id, score in hits:
+            article = articles.get(article_id)
+            if article is None or article.category not in self.INDEXED_CATEGORIES:
+                continue  # deleted or re-categorised since it was indexed
+            if per_category.get(article.category, 0) >= max_results:
+                continue
+            per_category[article.category] = per_category.get(article.category, 0) + 1
+            result_type = self.INDEXED_CATEGORIES[article.category][0]
+            if result_type == 'faq':
+                result = {'type': 'faq', 'question': article.title, 'answer': article.content}
+            else:
+                result = {'type': result_type, 'title': article.title, 'content': article.content,
+                          f'{result_type}_type': article.category}
+            result.update({'id': article.id, 'category': article.category, 'score': round(score, 4),
+                           'source': 'Knowledge Base'})
+            results.append(result)
+        return results
+    
     def get_answer(self, question: str) -> Dict:
         """
         Get answer to a question from knowledge base.
@@ -166,6 +231,58 @@ class TicketAutomationService:
         
         return classification
     
+    def reclassify_tickets(self, queryset=None, batch_size: int = 1000, dry_run: bool = False) -> Dict:
+        """
+        Re-run rule-based classification over existing tickets (e.g. after the
+        rules changed) and store the new category / priority where they differ.
+        Tickets are streamed in primary key order and updated with bulk_update.
+        
+        Args:
+            queryset: Tickets to re-classify (default: all tickets)
+            batch_size: Tickets classified and written per batch
+            dry_run: Count the changes without saving them
+            
+        Returns:
+            Dictionary with processed / changed counts and per-category changes
+        """
+        from Frontline_agent.models import Ticket
+        
+        queryset = Ticket.objects.all() if queryset is None else queryset
+        rows = queryset.order_by('pk').values_list('pk', 'title', 'description', 'category', 'priority')
+        processed = changed = 0
+        moved_to: Dict[str, int] = {}
+        
+        def flush(batch):
+            nonlocal processed, changed
+            results = self.classification_rules.classify_many((title, description) for _, title, description, _, _ in batch)
+            updates = []
+            for (pk, _, _, category, priority), result in zip(batch, results):
+                if (result['category'], result['priority']) != (category, priority):
+                    updates.append(Ticket(pk=pk, category=result['category'], priority=result['priority']))
+                    if result['category'] != category:
+                        moved_to[result['category']] = moved_to.get(result['category'], 0) + 1
+            if updates and not dry_run:
+                Ticket.objects.bulk_update(updates, ['category', 'priority'])
+            processed += len(batch)
+            changed += len(updates)
+        
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        
+        logger.info(f"Re-classified {processed} tickets: {changed} changed{' (dry run)' if dry_run else ''}")
+        return {
+            'processed': processed,
+            'changed': changed,
+            'category_changes': moved_to,
+            'dry_run': dry_run,
+        }
+    
     def find_solution(self, description: str, category: str) -> Optional[Dict]:
         """
         Search knowledge base for potential solution.
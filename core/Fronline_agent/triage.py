@@ -0,0 +1,238 @@
+"""
+Batch Ticket Triage
+Classifies pending tickets in bulk and auto-resolves the ones the rules allow.
+
+Tickets whose text is the same after normalisation (case, whitespace,
+punctuation, numbers, e-mail addresses and URLs) and that got the same
+classification form one cluster: the knowledge base is searched once and the
+LLM is asked once per cluster, and every ticket in it gets that resolution.
+Results are written with bulk_update / bulk_create, only to tickets that are
+still pending when the batch is written (the others count as 'skipped');
+tickets that were not resolved keep their status. The report carries the time
+spent in each stage.
+"""
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .prompts import FRONTLINE_AUTO_RESOLVE_PROMPT
+from .services import TicketAutomationService
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ('new', 'open')
+STAGES = ('load', 'classify', 'cluster', 'knowledge', 'llm', 'write')
+
+_EMAIL = re.compile(r'\S+@\S+')
+_URL = re.compile(r'https?://\S+|www\.\S+')
+_NUMBER = re.compile(r'\d+')
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_ticket_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text two tickets share when they only differ in case, spacing, punctuation, numbers, e-mails or URLs."""
+    text = f"{title or ''} {description or ''}".lower()
+    text = _EMAIL.sub(' email ', text)
+    text = _URL.sub(' url ', text)
+    text = _NUMBER.sub(' 0 ', text)
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+class TicketTriagePipeline:
+    """
+    Bulk triage of pending tickets.
+
+    Without an agent the knowledge base solution is stored as the resolution
+    as is; with one (a FrontlineAgent) it is formatted by the LLM the same way
+    FrontlineAgent.process_ticket does, up to llm_workers calls at a time.
+    """
+
+    def __init__(self, agent=None, batch_size: int = 500, llm_workers: int = 4):
+        self.agent = agent
+        self.batch_size = batch_size
+        self.llm_workers = max(1, llm_workers)
+        self.ticket_service = agent.ticket_service if agent is not None else TicketAutomationService()
+
+    def run(self, queryset=None, limit: Optional[int] = None, dry_run: bool = False) -> Dict:
+        """
+        Triage pending tickets (status new/open, not yet resolved).
+
+        Args:
+            queryset: Tickets to consider (default: all tickets)
+            limit: Maximum number of tickets to triage
+            dry_run: Compute everything but don't save
+
+        Returns:
+            Report with counts, per-stage seconds and tickets per second
+        """
+        from Frontline_agent.models import Ticket
+
+        queryset = Ticket.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(status__in=PENDING_STATUSES, resolved_at__isnull=True).order_by('pk')
+        if limit:
+            queryset = queryset[:limit]
+
+        report = {
+            'processed': 0, 'clusters': 0, 'auto_resolved': 0, 'escalated': 0, 'skipped': 0,
+            'llm_calls': 0, 'dry_run': dry_run, 'stage_seconds': dict.fromkeys(STAGES, 0.0),
+        }
+        started = time.perf_counter()
+        rows = queryset.values_list('pk', 'title', 'description', 'category', 'priority', 'created_by_id')
+        batch = []
+        load_started = time.perf_counter()
+        for row in rows.iterator(chunk_size=self.batch_size):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                report['stage_seconds']['load'] += time.perf_counter() - load_started
+                self._triage_batch(batch, report, dry_run)
+                batch = []
+                load_started = time.perf_counter()
+        report['stage_seconds']['load'] += time.perf_counter() - load_started
+        if batch:
+            self._triage_batch(batch, report, dry_run)
+
+        elapsed = time.perf_counter() - started
+        report['seconds'] = round(elapsed, 4)
+        report['tickets_per_second'] = round(report['processed'] / elapsed, 1) if elapsed > 0 else 0.0
+        report['stage_seconds'] = {stage: round(seconds, 4) for stage, seconds in report['stage_seconds'].items()}
+        logger.info(
+            f"Triaged {report['processed']} tickets in {report['clusters']} clusters: "
+            f"{report['auto_resolved']} auto-resolved, {report['escalated']} escalated, "
+            f"{report['tickets_per_second']} tickets/s"
+        )
+        return report
+
+    def _triage_batch(self, batch: List, report: Dict, dry_run: bool) -> None:
+        stage_seconds = report['stage_seconds']
+
+        mark = time.perf_counter()
+        classifications = self.ticket_service.classification_rules.classify_many(
+            (title, description) for _, title, description, _, _, _ in batch
+        )
+        stage_seconds['classify'] += time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        clusters: Dict[tuple, List[int]] = {}
+        for i, ((_, title, description, _, _, _), classification) in enumerate(zip(batch, classifications)):
+            key = (classification['category'], classification['priority'], normalize_ticket_text(title, description))
+            clusters.setdefault(key, []).append(i)
+        stage_seconds['cluster'] += time.perf_counter() - mark
+
+        # One knowledge lookup per cluster, using its first ticket
+        mark = time.perf_counter()
+        resolutions: Dict[tuple, str] = {}
+        for key, members in clusters.items():
+            _, title, description, _, _, _ = batch[members[0]]
+            can_resolve, resolution, _ = self.ticket_service.auto_resolve_ticket(
+                title, description, classifications[members[0]]
+            )
+            if can_resolve and resolution:
+                resolutions[key] = resolution
+        stage_seconds['knowledge'] += time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        if self.agent is not None and resolutions:
+            keys = list(resolutions)
+            with ThreadPoolExecutor(max_workers=min(self.llm_workers, len(keys))) as pool:
+                formatted = list(pool.map(
+                    lambda key: self._format_resolution(batch[clusters[key][0]], classifications[clusters[key][0]], resolutions[key]),
+                    keys,
+                ))
+            resolutions.update(zip(keys, formatted))
+            report['llm_calls'] += len(keys)
+        stage_seconds['llm'] += time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        self._write(batch, classifications, clusters, resolutions, report, dry_run)
+        stage_seconds['write'] += time.perf_counter() - mark
+
+        report['processed'] += len(batch)
+        report['clusters'] += len(clusters)
+
+    def _format_resolution(self, row, classification: Dict, solution: str) -> str:
+        _, title, description, _, _, _ = row
+        try:
+            prompt = FRONTLINE_AUTO_RESOLVE_PROMPT.format(
+                ticket_title=title,
+                ticket_description=description,
+                category=classification.get('category', 'other'),
+                priority=classification.get('priority', 'medium'),
+                solution=solution,
+            )
+            return self.agent._call_llm(
+                prompt=prompt,
+                system_prompt=self.agent.system_prompt,
+                temperature=0.3,
+                max_tokens=300,
+            )
+        except Exception as e:
+            logger.warning(f"Error formatting auto-resolution response: {e}")
+            return solution
+
+    def _write(self, batch, classifications, clusters, resolutions, report, dry_run) -> None:
+        from Frontline_agent.analytics import refresh_rollups_for_tickets
+        from Frontline_agent.models import Notification, Ticket
+
+        now = timezone.now()
+        resolved, classified, notifications = [], [], {}
+        for key, members in clusters.items():
+            resolution = resolutions.get(key)
+            for i in members:
+                pk, title, _, _, _, created_by_id = batch[i]
+                classification = classifications[i]
+                ticket = Ticket(
+                    pk=pk,
+                    category=classification.get('category', 'other'),
+                    priority=classification.get('priority', 'medium'),
+                    updated_at=now,
+                )
+                if resolution:
+                    ticket.status = 'auto_resolved'
+                    ticket.auto_resolved = True
+                    ticket.resolution = resolution
+                    ticket.resolution_confidence = classification.get('confidence', 0.0)
+                    ticket.resolved_at = now
+                    resolved.append(ticket)
+                    notifications[pk] = Notification(
+                        user_id=created_by_id,
+                        type='ticket_update',
+                        title=f'Ticket Auto-Resolved: {title}'[:200],
+                        message='Your ticket has been automatically resolved.',
+                        related_ticket=ticket,
+                    )
+                else:
+                    classified.append(ticket)
+                    if classification.get('should_escalate', False):
+                        report['escalated'] += 1
+
+        if dry_run:
+            report['auto_resolved'] += len(resolved)
+            return
+        with transaction.atomic():
+            # Tickets picked up, resolved or edited by someone else since they were
+            # loaded are left alone (the rows stay locked until the batch is written)
+            pending = set(
+                Ticket.objects.select_for_update()
+                .filter(pk__in=[ticket.pk for ticket in resolved + classified],
+                        status__in=PENDING_STATUSES, resolved_at__isnull=True)
+                .values_list('pk', flat=True)
+            )
+            resolved = [ticket for ticket in resolved if ticket.pk in pending]
+            classified = [ticket for ticket in classified if ticket.pk in pending]
+            report['skipped'] += len(batch) - len(pending)
+            report['auto_resolved'] += len(resolved)
+
+            Ticket.objects.bulk_update(resolved, [
+                'category', 'priority', 'status', 'auto_resolved', 'resolution',
+                'resolution_confidence', 'resolved_at', 'updated_at',
+            ], batch_size=self.batch_size)
+            # Tickets the job did not resolve keep their status (e.g. 'new')
+            Ticket.objects.bulk_update(classified, ['category', 'priority', 'updated_at'], batch_size=self.batch_size)
+            Notification.objects.bulk_create([notifications[ticket.pk] for ticket in resolved], batch_size=self.batch_size)
+            # bulk_update skips the Ticket signals that maintain the daily rollups
+            refresh_rollups_for_tickets(ticket.pk for ticket in resolved + classified)
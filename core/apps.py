@@ -7,4 +7,10 @@ class CoreConfig(AppConfig):
     
     def ready(self):
         """Import signals when app is ready"""
-        import core.signals  # noqa
\ No newline at end of file
+        import core.signals  # noqa
+        from django.core.signals import request_finished, request_started
+        from .llm_scheduler import enter_request, leave_request
+
+        # LLM calls made while serving a request use the short queue timeout / retry policy
+        request_started.connect(enter_request, dispatch_uid='llm_scheduler_enter_request')
+        request_finished.connect(leave_request, dispatch_uid='llm_scheduler_leave_request')
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+Shared text extraction for uploaded documents (PDF, DOCX, TXT).
+
+Used by the CV and job description parsers, the PM agent file upload and the
+Frontline document upload. Extraction runs in a small process pool so heavy or
+malformed PDFs do not block the request thread, with a page limit and a per-file
+timeout. Uploads are read from memory (no temp files) and results are cached by
+content hash, so the same file uploaded twice is only extracted once.
+
+Settings (all optional, see project_manager_ai/settings.py):
+    DOCUMENT_EXTRACTION_USE_PROCESS_POOL, DOCUMENT_EXTRACTION_WORKERS,
+    DOCUMENT_EXTRACTION_MAX_PAGES, DOCUMENT_EXTRACTION_TIMEOUT,
+    DOCUMENT_EXTRACTION_MAX_BYTES, DOCUMENT_EXTRACTION_CACHE_SIZE
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+DEFAULT_MAX_PAGES = 50
+DEFAULT_TIMEOUT = 30  # seconds per file
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_SIZE = 256
+
+
+class DocumentExtractionError(ValueError):
+    """Raised when a document cannot be extracted (unsupported, too large, timed out or unreadable)."""
+
+
+def _setting(name: str, default: Any) -> Any:
+    # Read lazily so pool workers (spawned processes) never need Django configured
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+# ---------------------------------------------------------------------------
+# Page iterators (run inside the worker process, or inline as a fallback)
+# ---------------------------------------------------------------------------
+
+def _iter_pdf_pages(data: bytes, max_pages: int) -> Iterator[Tuple[str, int]]:
+    """Yield (page_text, total_pages) for up to max_pages pages."""
+    try:
+        import pdfplumber
+    except ImportError:
+        pdfplumber = None
+
+    if pdfplumber is not None:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            total = len(pdf.pages)
+            for page in pdf.pages[:max_pages]:
+                text = page.extract_text() or ""
+                # Release parsed layout objects as we go - keeps memory flat on long PDFs
+                close = getattr(page, 'close', None) or getattr(page, 'flush_cache', None)
+                if close:
+                    close()
+                yield text, total
+        return
+
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    total = len(reader.pages)
+    for idx in range(min(total, max_pages)):
+        yield reader.pages[idx].extract_text() or "", total
+
+
+def _iter_docx_pages(data: bytes, max_pages: int) -> Iterator[Tuple[str, int]]:
+    # DOCX has no page model - the whole body is one page
+    from docx import Document
+    doc = Document(io.BytesIO(data))
+    paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+    yield "\n".join(paragraphs), 1
+
+
+def _iter_txt_pages(data: bytes, max_pages: int) -> Iterator[Tuple[str, int]]:
+    yield data.decode('utf-8', errors='ignore'), 1
+
+
+_PAGE_ITERATORS = {
+    '.pdf': _iter_pdf_pages,
+    '.docx': _iter_docx_pages,
+    '.txt': _iter_txt_pages,
+}
+
+
+def iter_pages(data: bytes, extension: str, max_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Stream page texts in-process, one page at a time.
+    For callers that want to start work before the whole document is read.
+    """
+    extension = _normalize_extension(extension)
+    max_pages = max_pages or _setting('DOCUMENT_EXTRACTION_MAX_PAGES', DEFAULT_MAX_PAGES)
+    for text, _total in _PAGE_ITERATORS[extension](data, max_pages):
+        yield text
+
+
+def _extract_pages(extension: str, data: bytes, max_pages: int) -> Dict[str, Any]:
+    """Worker entry point - must stay module-level so it pickles for the process pool."""
+    pages: List[str] = []
+    total = 0
+    for text, total in _PAGE_ITERATORS[extension](data, max_pages):
+        pages.append(text)
+    return {'pages': pages, 'page_count': total}
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_disabled = False
+
+
+def _get_pool():
+    """Lazily create the shared pool. Returns None when extraction must run inline."""
+    global _pool, _pool_disabled
+    if _pool is not None or _pool_disabled:
+        return _pool
+    if not _setting('DOCUMENT_EXTRACTION_USE_PROCESS_POOL', True):
+        return None
+    with _pool_lock:
+        if _pool is None and not _pool_disabled:
+            try:
+                # spawn: workers never inherit DB connections or request threads
+                ctx = multiprocessing.get_context('spawn')
+                _pool = ctx.Pool(
+                    processes=_setting('DOCUMENT_EXTRACTION_WORKERS', DEFAULT_WORKERS),
+                    maxtasksperchild=100,
+                )
+            except (AssertionError, OSError, ValueError) as exc:
+                # e.g. inside a daemonic Celery prefork child, which cannot have children
+                logger.warning(f"Document extraction pool unavailable, extracting inline: {exc}")
+                _pool_disabled = True
+    return _pool
+
+
+def _retire_pool(pool, grace: float) -> None:
+    """
+    Take a pool with a stuck worker out of service after a timeout.
+
+    The stuck job cannot be cancelled and Pool does not say which worker runs it,
+    so new jobs go to a fresh pool while this one stops taking work and is
+    terminated once every job already submitted to it has passed its own timeout.
+    Only the pool the timed-out job ran on is retired - if another timeout already
+    replaced it, the current pool is left alone.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    pool.close()
+    reaper = threading.Timer(grace, pool.terminate)
+    reaper.daemon = True
+    reaper.start()
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes (tests, management commands)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool.join()
+            _pool = None
+
+
+# ---------------------------------------------------------------------------
+# Content-hash cache
+# ---------------------------------------------------------------------------
+
+_cache: "OrderedDict[Tuple[str, str, int], Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+        return result
+
+
+def _cache_put(key, result: Dict[str, Any]) -> None:
+    max_size = _setting('DOCUMENT_EXTRACTION_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+    if max_size <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def _normalize_extension(extension: str) -> str:
+    ext = (extension or '').lower()
+    if ext and not ext.startswith('.'):
+        ext = f'.{ext}'
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise DocumentExtractionError(
+            f"Unsupported file type: {ext or 'unknown'}. Supported types: {', '.join(SUPPORTED_EXTENSIONS)}"
+        )
+    return ext
+
+
+def _read_source(source: Any, max_bytes: int) -> Tuple[bytes, Optional[str]]:
+    """Return (data, name) from bytes, a filesystem path or a (Django) file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+        name = None
+    elif isinstance(source, (str, Path)):
+        path = Path(source)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+        if path.stat().st_size > max_bytes:
+            raise DocumentExtractionError(f"File too large: {path.name} exceeds {max_bytes} bytes")
+        return path.read_bytes(), path.name
+    else:
+        name = getattr(source, 'name', None)
+        size = getattr(source, 'size', None)
+        if size is not None and size > max_bytes:
+            raise DocumentExtractionError(f"File too large: {name} exceeds {max_bytes} bytes")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        if hasattr(source, 'chunks'):
+            data = b''.join(source.chunks())
+        else:
+            data = source.read()
+        # Leave the upload readable for callers that also store it
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+    if len(data) > max_bytes:
+        raise DocumentExtractionError(f"File too large: {name or 'document'} exceeds {max_bytes} bytes")
+    return data, name
+
+
+def extract_text(
+    source: Any,
+    filename: Optional[str] = None,
+    max_pages: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Extract text from a document.
+
+    Args:
+        source: bytes, a file path, or a file object (e.g. Django UploadedFile)
+        filename: used for the file type when source has no name
+        max_pages: pages to extract (PDF); defaults to DOCUMENT_EXTRACTION_MAX_PAGES
+        timeout: seconds before extraction is abandoned; defaults to DOCUMENT_EXTRACTION_TIMEOUT
+
+    Returns:
+        {'text', 'pages', 'page_count', 'pages_extracted', 'truncated', 'content_hash', 'cached'}
+    """
+    max_bytes = _setting('DOCUMENT_EXTRACTION_MAX_BYTES', DEFAULT_MAX_BYTES)
+    max_pages = max_pages or _setting('DOCUMENT_EXTRACTION_MAX_PAGES', DEFAULT_MAX_PAGES)
+    timeout = timeout or _setting('DOCUMENT_EXTRACTION_TIMEOUT', DEFAULT_TIMEOUT)
+
+    data, source_name = _read_source(source, max_bytes)
+    name = filename or source_name or ''
+    extension = _normalize_extension(os.path.splitext(name)[1])
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    cache_key = (content_hash, extension, max_pages)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return dict(cached, cached=True)
+
+    if extension == '.txt':
+        # Nothing to parse - not worth a round trip to the pool
+        raw = _extract_pages(extension, data, max_pages)
+    else:
+        raw = _run_extraction(extension, data, max_pages, timeout, name)
+
+    pages = raw['pages']
+    result = {
+        'text': "\n".join(page for page in pages if page),
+        'pages': pages,
+        'page_count': raw['page_count'],
+        'pages_extracted': len(pages),
+        'truncated': raw['page_count'] > len(pages),
+        'content_hash': content_hash,
+        'cached': False,
+    }
+    _cache_put(cache_key, result)
+    return result
+
+
+def _run_extraction(extension: str, data: bytes, max_pages: int, timeout: float, name: str) -> Dict[str, Any]:
+    pool = _get_pool()
+    try:
+        if pool is None:
+            return _extract_pages(extension, data, max_pages)
+        async_result = pool.apply_async(_extract_pages, (extension, data, max_pages))
+        return async_result.get(timeout=timeout)
+    except multiprocessing.TimeoutError:
+        _retire_pool(pool, grace=timeout)
+        logger.error(f"Text extraction timed out after {timeout}s: {name}")
+        raise DocumentExtractionError(f"Text extraction timed out after {timeout}s: {name}")
+    except DocumentExtractionError:
+        raise
+    except Exception as exc:
+        logger.error(f"Text extraction failed for {name}: {exc}")
+        raise DocumentExtractionError(f"Failed to extract text from {name or 'document'}: {exc}") from exc
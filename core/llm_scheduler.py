@@ -0,0 +1,378 @@
+"""
+Rate-limit aware scheduling of Groq LLM requests.
+
+Every Groq call in the process (PM and marketing agents, the recruitment
+GroqClient) goes through one LLMScheduler, which keeps a requests-per-minute
+and tokens-per-minute budget for each API key over a sliding 60 second window:
+
+- A request waits (queues) until a key of its pool has room for it, trying the
+  keys in order, so GROQ_API_KEY and GROQ_REC_API_KEY absorb each other's
+  bursts instead of one failing while the other is idle.
+- The budget follows what Groq reports: x-ratelimit-remaining-* / reset-*
+  response headers (which also cover other processes using the same key) and
+  Retry-After on a 429, which blocks the key until then.
+  The agents call the Groq SDK through with_raw_response and pass the
+  headers to observe(); GroqClient reads them off its HTTP response.
+- Rate-limited, 5xx and connection failures are retried up to
+  LLM_MAX_RETRIES times with jittered exponential backoff; other errors are
+  raised at once. The error of the last attempt is raised unchanged.
+- Calls made while a web request is being served (between request_started
+  and request_finished, so streamed answers included) queue for at most
+  LLM_REQUEST_QUEUE_TIMEOUT and are retried LLM_REQUEST_MAX_RETRIES times,
+  so a user gets an error instead of a hung page; Celery tasks, management
+  commands and other background callers use the long LLM_QUEUE_TIMEOUT.
+- The marketing agents' OpenAI calls use the same retry and queueing policy
+  on their own key, without the Groq RPM/TPM budget (set_key_limits).
+
+Settings (all optional, see project_manager_ai/settings.py):
+    GROQ_RPM_LIMIT, GROQ_TPM_LIMIT, LLM_MAX_RETRIES, LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX, LLM_QUEUE_TIMEOUT, LLM_REQUEST_QUEUE_TIMEOUT,
+    LLM_REQUEST_MAX_RETRIES
+"""
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+WINDOW_SECONDS = 60.0
+DEFAULT_COMPLETION_TOKENS = 1024  # completion size assumed when a request sets no max_tokens
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+_request_thread = threading.local()
+
+
+def enter_request(**kwargs) -> None:
+    """Give the calling thread's LLM calls the short request policy (request_started receiver)."""
+    _request_thread.active = True
+
+
+def leave_request(**kwargs) -> None:
+    """Back to the background policy (request_finished receiver)."""
+    _request_thread.active = False
+
+
+def in_request() -> bool:
+    return getattr(_request_thread, 'active', False)
+
+
+class LLMRateLimitError(Exception):
+    """No API key had budget for a request within the queue timeout."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_request_tokens(messages: Sequence[Dict], max_tokens: Optional[int] = None) -> int:
+    """Tokens a chat request counts against the TPM limit: prompt (about four characters per token) plus the completion cap."""
+    prompt_tokens = sum(math.ceil(len(message.get('content') or '') / 4) for message in messages)
+    return prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def parse_duration(value) -> Optional[float]:
+    """Seconds in a Retry-After / x-ratelimit-reset-* value ('12', '7.66s', '2m59.56s', '120ms')."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class KeyBudget:
+    """Requests and tokens one API key used in the last minute, plus any provider-imposed block."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window: deque = deque()  # [timestamp, tokens] per request, oldest first
+        self.window_tokens = 0
+        self.blocked_until = 0.0
+
+    def _expire(self, now: float) -> None:
+        while self.window and self.window[0][0] <= now - WINDOW_SECONDS:
+            self.window_tokens -= self.window.popleft()[1]
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a request of the given size fits the budget (0 if it fits now)."""
+        self._expire(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rpm and len(self.window) >= self.rpm:
+            wait = max(wait, self.window[len(self.window) - self.rpm][0] + WINDOW_SECONDS - now)
+        # A request larger than the whole TPM budget still runs once the window is empty
+        if self.tpm and self.window and self.window_tokens + tokens > self.tpm:
+            excess, freed = self.window_tokens + tokens - self.tpm, 0
+            for timestamp, used in self.window:
+                freed += used
+                if freed >= excess:
+                    wait = max(wait, timestamp + WINDOW_SECONDS - now)
+                    break
+        return wait
+
+    def reserve(self, tokens: int, now: float) -> List:
+        entry = [now, tokens]
+        self.window.append(entry)
+        self.window_tokens += tokens
+        return entry
+
+    def settle(self, entry: List, tokens: int) -> None:
+        """Replace a reservation's estimated tokens with the tokens actually used."""
+        self.window_tokens += tokens - entry[1]
+        entry[1] = tokens
+
+    def block(self, seconds: float, now: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+def _rate_limit_details(exc: BaseException) -> Tuple[bool, bool, Optional[float]]:
+    """(retryable, rate limited, Retry-After seconds) for an error raised by a request, following `raise ... from` causes."""
+    retryable = rate_limited = False
+    retry_after = None
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        response = getattr(exc, 'response', None)
+        status_code = getattr(exc, 'status_code', None) or getattr(response, 'status_code', None)
+        if getattr(exc, 'is_rate_limit', False) or status_code == 429:
+            retryable = rate_limited = True
+            if getattr(exc, 'retry_after', None) is not None:
+                retry_after = exc.retry_after
+            elif response is not None and getattr(response, 'headers', None) is not None:
+                retry_after = parse_duration(response.headers.get('retry-after'))
+        elif isinstance(status_code, int) and status_code >= 500:
+            retryable = True
+        elif type(exc).__name__ in ('ConnectionError', 'Timeout', 'ConnectTimeout', 'ReadTimeout',
+                                    'APIConnectionError', 'APITimeoutError'):
+            retryable = True
+        if retry_after is not None:
+            break
+        exc = exc.__cause__
+    return retryable, rate_limited, retry_after
+
+
+class LLMScheduler:
+    """
+    Admits LLM requests against per-key RPM/TPM budgets and retries the ones
+    that fail transiently. Thread-safe; one instance per process (get_llm_scheduler).
+    """
+
+    def __init__(self, rpm: int = 30, tpm: int = 6000, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, queue_timeout: float = 300.0,
+                 request_queue_timeout: float = 10.0, request_max_retries: int = 1):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.request_queue_timeout = request_queue_timeout
+        self.request_max_retries = request_max_retries
+        self._budgets: Dict[str, KeyBudget] = {}
+        self._cond = threading.Condition()
+        self._stats = {
+            'requests': 0, 'retries': 0, 'rate_limited': 0, 'failed': 0,
+            'queued': 0, 'queue_seconds': 0.0,
+        }
+
+    def _budget(self, api_key: str) -> KeyBudget:
+        budget = self._budgets.get(api_key)
+        if budget is None:
+            budget = self._budgets[api_key] = KeyBudget(self.rpm, self.tpm)
+        return budget
+
+    def set_key_limits(self, api_key: str, rpm: int, tpm: int) -> None:
+        """Own RPM/TPM budget for a key of another provider (0 = no local limit, follow its headers and 429s only)."""
+        with self._cond:
+            budget = self._budget(api_key)
+            budget.rpm, budget.tpm = rpm, tpm
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: a random delay up to base * 2^attempt (capped at backoff_max)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def policy(self) -> Tuple[float, int]:
+        """(queue timeout, max retries) for the calling thread: short while serving a web request."""
+        if in_request():
+            return self.request_queue_timeout, self.request_max_retries
+        return self.queue_timeout, self.max_retries
+
+    def acquire(self, api_keys: Sequence[str], tokens: int,
+                queue_timeout: Optional[float] = None) -> Tuple[str, List]:
+        """Wait until one of the keys (in order of preference) has budget for the request and reserve it."""
+        if not api_keys:
+            raise ValueError("No API key configured for the LLM request")
+        if queue_timeout is None:
+            queue_timeout = self.policy()[0]
+        started = time.monotonic()
+        deadline = started + queue_timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait, index = min((self._budget(key).wait_time(tokens, now), i) for i, key in enumerate(api_keys))
+                api_key = api_keys[index]
+                if wait <= 0:
+                    if now > started:
+                        self._stats['queued'] += 1
+                        self._stats['queue_seconds'] += now - started
+                    return api_key, self._budget(api_key).reserve(tokens, now)
+                if now + wait > deadline:
+                    raise LLMRateLimitError(
+                        f"LLM rate limit: no API key has capacity for {tokens} tokens "
+                        f"within {queue_timeout:.0f}s (next slot in {wait:.1f}s)",
+                        retry_after=wait,
+                    )
+                self._cond.wait(wait)
+
+    def observe(self, api_key: str, headers: Optional[Mapping]) -> None:
+        """Align a key's budget with the x-ratelimit-* headers of a Groq response."""
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._cond:
+            budget = self._budget(api_key)
+            for kind in ('tokens', 'requests'):
+                try:
+                    remaining = int(float(headers.get(f'x-ratelimit-remaining-{kind}')))
+                except (TypeError, ValueError):
+                    continue
+                reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if remaining <= 0 and reset:
+                    budget.block(reset, now)
+
+    def parse_raw(self, api_key: str, raw_response):
+        """Observe the headers of a Groq SDK raw response (....with_raw_response.create()) and return the parsed result."""
+        self.observe(api_key, getattr(raw_response, 'headers', None))
+        return raw_response.parse()
+
+    def run(self, request: Callable[[str], T], api_keys: Sequence[str], estimated_tokens: int,
+            actual_tokens: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        """
+        Call request(api_key) once a key has budget, retrying transient failures.
+
+        Args:
+            request: Makes the LLM call with the given API key
+            api_keys: Keys the request may use, preferred first
+            estimated_tokens: Tokens reserved against the key's TPM budget
+            actual_tokens: Reads the tokens really used from the result, to correct the reservation
+
+        Raises:
+            LLMRateLimitError: No key had budget within the queue timeout
+            Exception: Whatever the last attempt raised
+        """
+        queue_timeout, max_retries = self.policy()
+        attempt = 0
+        while True:
+            api_key, entry = self.acquire(api_keys, estimated_tokens, queue_timeout)
+            with self._cond:
+                self._stats['requests'] += 1
+            try:
+                result = request(api_key)
+            except Exception as exc:
+                retryable, rate_limited, retry_after = _rate_limit_details(exc)
+                with self._cond:
+                    if rate_limited:
+                        self._stats['rate_limited'] += 1
+                        # The whole key is over its limit: park it so queued requests move to the other keys
+                        delay = retry_after if retry_after is not None else self._backoff(attempt)
+                        self._budget(api_key).block(delay + random.uniform(0, self.backoff_base), time.monotonic())
+                        self._cond.notify_all()
+                    if not retryable or attempt >= max_retries:
+                        self._stats['failed'] += 1
+                        raise
+                    self._stats['retries'] += 1
+                attempt += 1
+                logger.warning(f"LLM request failed ({exc}); retry {attempt}/{max_retries}")
+                if not rate_limited:
+                    time.sleep(self._backoff(attempt))
+                continue
+            if actual_tokens is not None:
+                try:
+                    used = actual_tokens(result)
+                except Exception:
+                    used = None
+                if used:
+                    with self._cond:
+                        self._budget(api_key).settle(entry, used)
+                        self._cond.notify_all()
+            return result
+
+    def stats(self) -> Dict:
+        """Counters since start, plus each key's current minute (keys shown by their last four characters)."""
+        now = time.monotonic()
+        with self._cond:
+            keys = {}
+            for api_key, budget in self._budgets.items():
+                budget._expire(now)
+                keys[f"...{api_key[-4:]}"] = {
+                    'requests_last_minute': len(budget.window),
+                    'tokens_last_minute': budget.window_tokens,
+                    'blocked_seconds': round(max(0.0, budget.blocked_until - now), 2),
+                }
+            return {**self._stats, 'queue_seconds': round(self._stats['queue_seconds'], 3),
+                    'rpm_limit': self.rpm, 'tpm_limit': self.tpm, 'keys': keys}
+
+
+def _setting(name: str, default):
+    value = getattr(settings, name, None) if settings.configured else os.environ.get(name)
+    return default if value in (None, '') else type(default)(value)
+
+
+def groq_key_pool(preferred: Optional[str] = None) -> List[str]:
+    """Groq API keys a request may use: the caller's own key first, then the other configured keys."""
+    candidates: Iterable[Optional[str]] = (
+        preferred,
+        _setting('GROQ_API_KEY', '') or os.environ.get('GROQ_API_KEY'),
+        _setting('GROQ_REC_API_KEY', '') or os.environ.get('GROQ_REC_API_KEY'),
+    )
+    keys = []
+    for key in candidates:
+        key = (key or '').strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler configured from the GROQ_*_LIMIT / LLM_* settings."""
+    global _scheduler
+    config = (
+        _setting('GROQ_RPM_LIMIT', 30),
+        _setting('GROQ_TPM_LIMIT', 6000),
+        _setting('LLM_MAX_RETRIES', 5),
+        _setting('LLM_BACKOFF_BASE', 1.0),
+        _setting('LLM_BACKOFF_MAX', 60.0),
+        _setting('LLM_QUEUE_TIMEOUT', 300.0),
+        _setting('LLM_REQUEST_QUEUE_TIMEOUT', 10.0),
+        _setting('LLM_REQUEST_MAX_RETRIES', 1),
+    )
+    with _scheduler_lock:
+        if _scheduler is None or (
+            _scheduler.rpm, _scheduler.tpm, _scheduler.max_retries,
+            _scheduler.backoff_base, _scheduler.backoff_max, _scheduler.queue_timeout,
+            _scheduler.request_queue_timeout, _scheduler.request_max_retries,
+        ) != config:
+            _scheduler = LLMScheduler(*config)
+        return _scheduler
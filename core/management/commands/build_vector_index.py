@@ -0,0 +1,78 @@
+"""
+Management command to (re)build the embedding vector store.
+Embeds new or changed knowledge base articles, projects, tasks and marketing
+documents in batches and drops vectors of deleted objects.
+
+Usage:
+    python manage.py build_vector_index
+    python manage.py build_vector_index --sources kb,task
+    python manage.py build_vector_index --reset        # after changing VECTOR_STORE_EMBEDDER
+    python manage.py build_vector_index --compact --ivf 256
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.vector_store import SOURCES, VectorStoreError, get_vector_store, index_sources
+
+
+class Command(BaseCommand):
+    help = 'Embed knowledge base articles, projects, tasks and marketing documents into the vector store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sources',
+            type=str,
+            default=','.join(SOURCES),
+            help=f"Comma-separated sources to index (default: {','.join(SOURCES)})",
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Delete the store first and embed everything again',
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Drop vectors of deleted or re-embedded objects afterwards (no other writers may run)',
+        )
+        parser.add_argument(
+            '--ivf',
+            type=int,
+            default=0,
+            help='Build an IVF partitioning with this many lists afterwards (for large stores)',
+        )
+
+    def handle(self, *args, **options):
+        sources = [s.strip() for s in options['sources'].split(',') if s.strip()]
+        unknown = set(sources) - set(SOURCES)
+        if unknown:
+            raise CommandError(f"Unknown sources: {', '.join(sorted(unknown))}")
+
+        if options['reset']:
+            from django.conf import settings
+            from core import vector_store
+            directory = str(getattr(settings, 'VECTOR_STORE_DIR', os.path.join(settings.BASE_DIR, 'vector_store')))
+            for suffix in ('.json', '.f32', '.jsonl', '.ivf.npz'):
+                path = os.path.join(directory, f'vectors{suffix}')
+                if os.path.exists(path):
+                    os.remove(path)
+            vector_store._stores.clear()
+
+        try:
+            store = get_vector_store()
+        except VectorStoreError as e:
+            raise CommandError(str(e))
+
+        for source, counts in index_sources(store, sources).items():
+            self.stdout.write(
+                f"{source}: {counts['total']} objects, {counts['embedded']} embedded, {counts['removed']} removed"
+            )
+        if options['compact']:
+            store.compact()
+            self.stdout.write('Compacted')
+        if options['ivf']:
+            store.build_ivf(options['ivf'])
+            self.stdout.write(f"Built IVF partitioning with {options['ivf']} lists")
+        self.stdout.write(self.style.SUCCESS(f'Vector store holds {len(store)} vectors'))
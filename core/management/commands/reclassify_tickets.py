@@ -0,0 +1,53 @@
+"""
+Management command to re-classify existing Frontline tickets with the current
+rule-based classifier (core/Fronline_agent/rules.py), e.g. after the rules changed.
+
+Usage:
+    python manage.py reclassify_tickets
+    python manage.py reclassify_tickets --status open,new --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.Fronline_agent.services import TicketAutomationService
+from Frontline_agent.models import Ticket
+
+
+class Command(BaseCommand):
+    help = 'Re-classify Frontline tickets (category and priority) with the current rules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            type=str,
+            default='',
+            help='Comma-separated ticket statuses to include (default: all tickets)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tickets classified and updated per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without saving',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Ticket.objects.all()
+        statuses = [s.strip() for s in options['status'].split(',') if s.strip()]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+
+        result = TicketAutomationService().reclassify_tickets(
+            queryset, batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        self.stdout.write(f"Processed {result['processed']} tickets, {result['changed']} changed")
+        for category, count in sorted(result['category_changes'].items()):
+            self.stdout.write(f"  -> {category}: {count}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Done'))
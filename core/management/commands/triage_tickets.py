@@ -0,0 +1,69 @@
+"""
+Management command to triage pending Frontline tickets in bulk: classify them,
+auto-resolve near-identical tickets with one knowledge lookup and one LLM
+answer per cluster, and report throughput and per-stage latency.
+
+Usage:
+    python manage.py triage_tickets
+    python manage.py triage_tickets --limit 5000 --llm-workers 8
+    python manage.py triage_tickets --no-llm --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.Fronline_agent.triage import TicketTriagePipeline
+
+
+class Command(BaseCommand):
+    help = 'Classify and auto-resolve pending Frontline tickets in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=0,
+            help='Maximum number of tickets to triage (default: all pending)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tickets loaded, clustered and written per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--llm-workers',
+            type=int,
+            default=4,
+            help='Concurrent LLM calls per batch (default: 4)',
+        )
+        parser.add_argument(
+            '--no-llm',
+            action='store_true',
+            help='Store knowledge base solutions as is instead of formatting them with the LLM',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would happen without saving',
+        )
+
+    def handle(self, *args, **options):
+        agent = None
+        if not options['no_llm']:
+            from core.Fronline_agent.frontline_agent import FrontlineAgent
+            agent = FrontlineAgent()
+
+        pipeline = TicketTriagePipeline(agent, batch_size=options['batch_size'], llm_workers=options['llm_workers'])
+        report = pipeline.run(limit=options['limit'] or None, dry_run=options['dry_run'])
+
+        self.stdout.write(
+            f"Triaged {report['processed']} tickets in {report['clusters']} clusters "
+            f"({report['tickets_per_second']} tickets/s): {report['auto_resolved']} auto-resolved, "
+            f"{report['escalated']} escalated, {report['llm_calls']} LLM calls"
+        )
+        for stage, seconds in report['stage_seconds'].items():
+            self.stdout.write(f"  {stage}: {seconds:.3f}s")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Done'))
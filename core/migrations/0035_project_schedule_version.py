@@ -0,0 +1,18 @@
+# Generated manually for Project.schedule_version (schedule cache invalidation)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_update_userprofile_roles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped whenever tasks or task dependencies change; schedule caches key on it'),
+        ),
+    ]
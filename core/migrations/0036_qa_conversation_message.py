@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_project_schedule_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QAConversationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.CharField(max_length=255)),
+                ('entry', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['session_id', 'id'], name='core_qaconv_session_7b7cf3_idx')],
+            },
+        ),
+    ]
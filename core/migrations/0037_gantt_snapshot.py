@@ -0,0 +1,31 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_qa_conversation_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GanttSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(help_text='Project.schedule_version the chart was built for')),
+                ('chart', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gantt_snapshots', to='core.project')),
+            ],
+            options={
+                'ordering': ['project', '-version'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ganttsnapshot',
+            constraint=models.UniqueConstraint(fields=('project', 'version'), name='unique_gantt_snapshot_version'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0037_gantt_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserContextVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='context_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='agent_context_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped when the project, its tasks, dependencies or team change; agent context caches key on it'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import DatabaseError, IntegrityError, models, router, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db.models.signals import post_save
@@ -72,6 +72,8 @@ class Project(models.Model):
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    schedule_version = models.PositiveIntegerField(default=0, help_text='Bumped whenever tasks or task dependencies change; schedule caches key on it')
+    agent_context_version = models.PositiveIntegerField(default=0, help_text='Bumped when the project, its tasks, dependencies or team change; agent context caches key on it')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -80,6 +82,84 @@ class Project(models.Model):
     
     def __str__(self):
         return self.name
+    
+    VERSION_FIELDS = ('schedule_version', 'agent_context_version')
+    
+    def save(self, *args, **kwargs):
+        # The version counters are only ever changed by the bump_* methods (atomic F() updates).
+        # Never write them back from a possibly stale in-memory instance.
+        if self._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+            super().save(*args, **kwargs)
+            return
+        # Fields deferred by .only() / .defer() are not loaded, so they are not written either
+        deferred = self.get_deferred_fields()
+        kwargs['update_fields'] = [
+            f.name for f in self._meta.concrete_fields
+            if not f.primary_key and f.name not in self.VERSION_FIELDS and f.attname not in deferred
+        ]
+        if deferred:
+            super().save(*args, **kwargs)
+            return
+        try:
+            # Savepoint, so a failed update leaves an enclosing transaction usable
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Project, instance=self)):
+                super().save(*args, **kwargs)
+        except DatabaseError as e:
+            if str(e) != 'Save with update_fields did not affect any rows.':
+                raise
+            # The row was deleted meanwhile: insert it again, as a plain save() does
+            kwargs.pop('update_fields')
+            super().save(*args, **kwargs)
+    
+    @classmethod
+    def bump_schedule_version(cls, project_id):
+        """Invalidate cached schedules (CPM, Gantt) for a project."""
+        if project_id:
+            cls.objects.filter(pk=project_id).update(schedule_version=models.F('schedule_version') + 1)
+    
+    # Agent context caches (ContextManager) are keyed by agent_context_version and by
+    # UserContextVersion. They are stored in the database, not the cache, so a bump
+    # reaches every process even when each one has its own local cache.
+    @classmethod
+    def context_version(cls, project_id):
+        return cls.objects.filter(pk=project_id).values_list('agent_context_version', flat=True).first() or 0
+    
+    @classmethod
+    def user_context_version(cls, user_id):
+        return UserContextVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+    
+    @classmethod
+    def bump_context_version(cls, project_id):
+        """Invalidate cached agent context for a project."""
+        if project_id:
+            cls.objects.filter(pk=project_id).update(agent_context_version=models.F('agent_context_version') + 1)
+    
+    @classmethod
+    def bump_user_context_version(cls, *user_ids):
+        """Invalidate cached project lists of the given owners / managers."""
+        for user_id in set(user_ids):
+            if user_id:
+                UserContextVersion.bump(user_id)
+
+
+class UserContextVersion(models.Model):
+    """Counter behind a user's cached project list (ContextManager.get_user_projects_context)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='context_version')
+    version = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user_id} - v{self.version}"
+    
+    @classmethod
+    def bump(cls, user_id):
+        if cls.objects.filter(user_id=user_id).update(version=models.F('version') + 1):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, version=1)
+        except IntegrityError:
+            # Created concurrently (or the user is being deleted)
+            cls.objects.filter(user_id=user_id).update(version=models.F('version') + 1)
 
 
 class Task(models.Model):
@@ -1084,6 +1164,47 @@ class ChatbotMessage(models.Model):
         return f"{self.sender_type} - {self.message[:50]}"
 
 
+class QAConversationMessage(models.Model):
+    """
+    One question/answer turn of a Knowledge QA session. Database side of the
+    conversation store (project_manager_agent/ai_agents/conversation_store.py),
+    used when Redis is not configured or not reachable.
+    """
+    session_id = models.CharField(max_length=255)
+    entry = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['session_id', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.session_id} - {str(self.entry.get('question', ''))[:50]}"
+
+
+class GanttSnapshot(models.Model):
+    """
+    Compact Gantt chart of a project at one schedule version
+    (project_manager_agent/ai_agents/gantt_payload.py). Persisted so delta
+    refreshes work from any web process; the cache only saves the read.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='gantt_snapshots')
+    version = models.PositiveIntegerField(help_text='Project.schedule_version the chart was built for')
+    chart = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['project', '-version']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'version'], name='unique_gantt_snapshot_version'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project.name} - v{self.version}"
+
+
 # ============================================================================
 # payPerProject Additional Models - User Management
 # ============================================================================
@@ -3,10 +3,11 @@ Django signals for Project Manager Agent features
 Handles automatic email sending and notifications on model changes.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Task, TaskActivityLog, Notification
+from .models import Project, Subtask, Task, TaskActivityLog, TeamMember, Notification
 from .email_service import EmailService
 
 
@@ -191,6 +192,121 @@ def task_post_save_handler(sender, instance, created, **kwargs):
             logger.error(f"Error creating activity log: {str(e)}")
 
 
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_schedule_version_handler(sender, instance, **kwargs):
+    """
+    Any task change can move the schedule - bump the project's schedule_version
+    so cached CPM/Gantt results for the old version are not reused.
+    """
+    if kwargs.get('raw', False):
+        return
+    Project.bump_schedule_version(instance.project_id)
+    Project.bump_context_version(instance.project_id)
+    if kwargs.get('created', True):
+        # Created or deleted: the project's task count in its owner's project list changed
+        Project.bump_user_context_version(*(
+            Project.objects.filter(pk=instance.project_id)
+            .values_list('owner_id', 'project_manager_id').first() or ()
+        ))
+
+
+@receiver(m2m_changed, sender=Task.depends_on.through)
+def task_dependencies_changed_handler(sender, instance, action, pk_set, **kwargs):
+    """Dependency edges added/removed/cleared (either side of the relation)."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Self-referential M2M: instance is a Task on both sides, pk_set are the tasks on the other end
+    project_ids = {instance.project_id}
+    if pk_set:
+        project_ids.update(Task.objects.filter(pk__in=pk_set).values_list('project_id', flat=True))
+    for project_id in project_ids:
+        Project.bump_schedule_version(project_id)
+        Project.bump_context_version(project_id)
+
+
+@receiver(post_save, sender=Subtask)
+@receiver(post_delete, sender=Subtask)
+def subtask_schedule_version_handler(sender, instance, **kwargs):
+    """Subtask progress feeds task progress on the Gantt chart."""
+    if kwargs.get('raw', False):
+        return
+    Project.bump_schedule_version(
+        Task.objects.filter(pk=instance.task_id).values_list('project_id', flat=True).first()
+    )
+
+
+def _loaded(instance, attname, default):
+    """A field of the instance, or default when it was deferred (not loaded, so not saved either)."""
+    return default if attname in instance.get_deferred_fields() else getattr(instance, attname)
+
+
+@receiver(pre_save, sender=Project)
+def project_start_date_handler(sender, instance, **kwargs):
+    """
+    Gantt dates are laid out from the project start - moving it is a schedule change.
+    A previous owner / manager loses the project from their cached project list.
+    """
+    if kwargs.get('raw', False) or instance._state.adding or not instance.pk:
+        return
+    old = Project.objects.filter(pk=instance.pk).values_list(
+        'start_date', 'owner_id', 'project_manager_id'
+    ).first()
+    if old is None:
+        return
+    old_start, old_owner_id, old_manager_id = old
+    if _loaded(instance, 'start_date', old_start) != old_start:
+        Project.bump_schedule_version(instance.pk)
+    # Kept for project_context_version_handler, so deferred fields are not loaded one by one
+    instance._context_users = (
+        _loaded(instance, 'owner_id', old_owner_id),
+        _loaded(instance, 'project_manager_id', old_manager_id),
+    )
+    Project.bump_user_context_version(*(
+        user_id for user_id in (old_owner_id, old_manager_id)
+        if user_id not in instance._context_users
+    ))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_context_version_handler(sender, instance, **kwargs):
+    """Cached agent context embeds the project's own fields."""
+    if kwargs.get('raw', False):
+        return
+    Project.bump_context_version(instance.pk)
+    users = instance.__dict__.pop('_context_users', None)
+    if users is None:
+        users = (_loaded(instance, 'owner_id', None), _loaded(instance, 'project_manager_id', None))
+    Project.bump_user_context_version(*users)
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def team_member_context_version_handler(sender, instance, **kwargs):
+    """Cached agent context lists the project team."""
+    if kwargs.get('raw', False):
+        return
+    Project.bump_context_version(instance.project_id)
+
+
+# User fields shown in cached agent context (team names, assignee usernames)
+USER_CONTEXT_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+
+@receiver(post_save, sender=User)
+def user_context_version_handler(sender, instance, created, **kwargs):
+    """Renaming a user invalidates their cached project list and the context of every project showing them."""
+    update_fields = kwargs.get('update_fields')
+    if created or kwargs.get('raw', False) or (update_fields and not USER_CONTEXT_FIELDS & set(update_fields)):
+        return
+    Project.bump_user_context_version(instance.pk)
+    Project.objects.filter(
+        Q(owner=instance) | Q(project_manager=instance)
+        | Q(team_members__user=instance) | Q(tasks__assignee=instance)
+    ).update(agent_context_version=F('agent_context_version') + 1)
+
+
 # Note: We need to connect these signals in apps.py to ensure they're loaded
 # The signals will be connected in core/apps.py
 
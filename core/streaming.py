@@ -0,0 +1,70 @@
+"""
+Server-sent events for streamed LLM answers.
+
+Agents that can stream (KnowledgeQAAgent.stream_answer,
+MarketingQAAgent.stream_process) yield ('token', text) pairs while the model
+is generating and one ('result', payload) pair at the end. sse_response turns
+that into a text/event-stream response:
+
+    event: token   data: {"text": "..."}       one per piece of the answer
+    event: done    data: <final payload>        the same JSON the non-streaming endpoint returns
+    event: error   data: {"status": "error", "message": "..."}
+
+DRF views add EventStreamRenderer so clients sending
+Accept: text/event-stream (e.g. EventSource) are not refused with a 406, and
+get validation errors as an 'error' event.
+"""
+import json
+import logging
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data) -> str:
+    """One server-sent event with a JSON data line."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def _event_stream(events: Iterable[Tuple[str, object]], final_payload: Callable) -> Iterator[str]:
+    try:
+        for event, data in events:
+            if event == 'token':
+                yield sse_event('token', {'text': data})
+            else:
+                yield sse_event('done', final_payload(data))
+    except Exception as e:
+        logger.exception("Streaming response failed")
+        yield sse_event('error', {'status': 'error', 'message': str(e)})
+
+
+def sse_response(events: Iterable[Tuple[str, object]],
+                 final_payload: Optional[Callable] = None) -> StreamingHttpResponse:
+    """
+    Stream an agent's (event, data) pairs as server-sent events.
+
+    Args:
+        events: ('token', text) pairs followed by a ('result', payload) pair
+        final_payload: Builds the 'done' event data from the result (default: the result as is)
+    """
+    response = StreamingHttpResponse(
+        _event_stream(events, final_payload or (lambda result: result)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Renders non-streamed DRF responses (errors) of an SSE endpoint as one 'error' event."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data).encode(self.charset)
@@ -0,0 +1,41 @@
+"""
+Celery tasks for core services.
+"""
+from celery import shared_task
+
+from .vector_store import SOURCES, get_vector_store, index_sources
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def refresh_vector_index_task(self, sources=None):
+    """
+    Embed new or changed knowledge base articles, projects, tasks and marketing
+    documents into the vector store and drop vectors of deleted objects.
+    Request threads only read the store, so new content reaches it here.
+    
+    Scheduled: Every 15 minutes via Celery Beat
+    """
+    try:
+        summary = index_sources(get_vector_store(), sources or SOURCES)
+        embedded = sum(counts['embedded'] for counts in summary.values())
+        return {'status': 'success', 'message': f'Embedded {embedded} objects', 'summary': summary}
+    except Exception as e:
+        raise self.retry(exc=e)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=300)
+def purge_conversation_messages_task(self):
+    """
+    Delete the Knowledge QA conversation turns kept in the database
+    (QAConversationMessage) of sessions idle for longer than CONVERSATION_TTL.
+    Redis expires its sessions itself.
+    
+    Scheduled: Every hour via Celery Beat
+    """
+    from project_manager_agent.ai_agents.conversation_store import get_conversation_store
+
+    try:
+        deleted = get_conversation_store().purge_expired()
+        return {'status': 'success', 'message': f'Deleted {deleted} expired conversation turns'}
+    except Exception as e:
+        raise self.retry(exc=e)
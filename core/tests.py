@@ -1,3 +1,592 @@
-from django.test import TestCase
+import io
+import multiprocessing
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core import document_extraction
+from core.document_extraction import DocumentExtractionError, extract_text
+from core.Fronline_agent import knowledge_index
+from core.Fronline_agent.knowledge_index import KnowledgeIndex, get_knowledge_index
+from core.Fronline_agent.rules import TicketCategory, TicketClassificationRules
+from core.Fronline_agent.services import KnowledgeService, TicketAutomationService
+from core.Fronline_agent.triage import TicketTriagePipeline, normalize_ticket_text
+from core.llm_scheduler import KeyBudget, LLMRateLimitError, LLMScheduler, in_request, parse_duration
+from core.vector_store import HashingEmbedder, VectorStore, VectorStoreError
+from Frontline_agent.analytics import rebuild_rollups, refresh_rollups, user_ticket_analytics
+from Frontline_agent.models import KnowledgeBase, Notification, Ticket, TicketDailyRollup
+
+
+class KnowledgeIndexTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(FRONTLINE_KB_INDEX_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory.name
+        self.user = User.objects.create(username='kb-author')
+
+    def article(self, title, content, category='faq', tags=''):
+        return KnowledgeBase.objects.create(title=title, content=content, category=category,
+                                            tags=tags, created_by=self.user)
+
+    def test_ranked_multi_word_search_across_categories(self):
+        reset = self.article('How do I reset my password?', 'Open settings and choose reset password.')
+        refund = self.article('Refund policy', 'Refunds are issued within 14 days of a payment.', 'policies')
+        self.article('Invoices', 'Download invoices from the billing page.', 'documentation')
+        self.article('Password rules', 'Passwords need 12 characters.', 'troubleshooting')
+        index = get_knowledge_index()
+
+        hits = index.search('I forgot my password, how can I reset it')
+        self.assertEqual(hits[0][0], reset.id)
+        hits = index.search('when will my payment refund arrive', categories=['faq', 'policies', 'documentation'])
+        self.assertEqual([article_id for article_id, _ in hits], [refund.id])
+        self.assertEqual(index.search('the and of'), [])
+
+    def test_saves_and_deletes_reach_other_processes_through_the_log(self):
+        first = self.article('Shipping times', 'Orders ship in 2 days.')
+        index = get_knowledge_index()
+        self.assertEqual([hit[0] for hit in index.search('shipping')], [first.id])
+
+        other_process = KnowledgeIndex(self.directory)
+        first.title = 'Delivery times'
+        first.save()
+        second = self.article('Shipping abroad', 'International shipping takes 10 days.')
+        for idx in (index, other_process):
+            self.assertEqual([hit[0] for hit in idx.search('shipping')], [second.id])
+            self.assertEqual([hit[0] for hit in idx.search('delivery')], [first.id])
+        second.delete()
+        self.assertEqual(other_process.search('shipping'), [])
+
+    def test_delta_is_merged_into_a_new_segment(self):
+        index = get_knowledge_index()
+        index.sync()
+        articles = [self.article(f'Topic {i}', f'keyword{i % 5} common text') for i in range(knowledge_index.MIN_MERGE_DOCS + 5)]
+        self.assertEqual(len(index.search('common', limit=1000)), len(articles))
+        self.assertEqual(index.delta, {})
+        self.assertEqual(len(index.doc_ids), len(articles))
+        # A fresh reader loads the merged segment and skips the log entries it already contains
+        reader = KnowledgeIndex(self.directory)
+        self.assertEqual(sorted(hit[0] for hit in reader.search('keyword3', limit=1000)),
+                         [a.id for a in articles if a.content.startswith('keyword3 ')])
+        self.assertEqual(reader.delta, {})
+        # The merge rotated the log down to the entries the new segment does not hold
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, 'knowledge_index.log')), 0)
+
+        extra = self.article('Late topic', 'keyword3 common text')
+        self.assertIn(extra.id, [hit[0] for hit in reader.search('keyword3', limit=1000)])
+        self.assertIn(extra.id, [hit[0] for hit in index.search('keyword3', limit=1000)])
+
+    def test_search_knowledge_keeps_the_payperproject_results(self):
+        self.article('Reset password', 'Use the forgot password link on the login page.')
+        self.article('Refund policy', 'Refunds are issued within 14 days.', 'policies')
+        service = KnowledgeService()
+        faq = {'question': 'Password reset', 'answer': 'Ask your administrator.', 'category': 'account'}
+        with mock.patch.object(service.db_service, 'get_faqs', return_value=[faq]), \
+                mock.patch.object(service.db_service, 'get_policies', return_value=[]), \
+                mock.patch.object(service.db_service, 'get_manuals', return_value=[]):
+            result = service.search_knowledge('how do I reset my password')
+        self.assertEqual([(r['source'], r['type']) for r in result['results']],
+                         [('PayPerProject Database', 'faq'), ('Knowledge Base', 'faq')])
+        self.assertEqual(result['sources'], {'faqs': 2, 'policies': 0, 'manuals': 0})
+
+
+class VectorStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.store = VectorStore(self.directory, embedder=HashingEmbedder(dim=128), batch_size=7)
+
+    def corpus(self, n=300, seed=0):
+        rng = np.random.default_rng(seed)
+        words = [f'term{i}' for i in range(400)]
+        return [(f'task:{i}', ' '.join(rng.choice(words, 25))) for i in range(n)]
+
+    def test_embedder_is_deterministic_and_normalised(self):
+        a = HashingEmbedder(dim=64).embed(['reset the password', ''])
+        b = HashingEmbedder(dim=64).embed(['reset the password', ''])
+        np.testing.assert_array_equal(a, b)
+        self.assertAlmostEqual(float(np.linalg.norm(a[0])), 1.0, places=5)
+        self.assertFalse(a[1].any())
+
+    def test_search_filters_and_skips_unchanged_texts(self):
+        docs = self.corpus()
+        self.assertEqual(self.store.upsert(docs), len(docs))
+        self.assertEqual(self.store.upsert(docs), 0)
+        self.store.upsert([('project:1', docs[5][1])])
+        self.assertEqual(self.store.search(docs[5][1], k=2)[0][1], self.store.search(docs[5][1], k=2)[1][1])
+        self.assertEqual([key for key, _ in self.store.search(docs[5][1], k=1, prefixes=['project:'])], ['project:1'])
+        self.assertEqual(self.store.search(docs[5][1], k=3, keys=['task:7', 'task:5', 'missing'])[0][0], 'task:5')
+        self.assertEqual(len(self.store.search(docs[5][1], k=3, keys=['task:7', 'task:5'])), 2)
+
+    def test_updates_deletes_and_compaction_are_seen_by_other_readers(self):
+        docs = self.corpus()
+        self.store.upsert(docs)
+        reader = VectorStore(self.directory, embedder=HashingEmbedder(dim=128))
+        self.store.upsert([('task:3', 'completely different words here')])
+        self.store.delete(['task:4'])
+        self.assertEqual(reader.search('completely different words here', k=1)[0][0], 'task:3')
+        self.assertNotIn('task:4', reader.keys())
+        self.assertEqual(len(reader), len(docs) - 1)
+
+        expected = self.store.search(docs[10][1], k=5)
+        self.store.compact()
+        self.assertEqual(self.store.rows, len(docs) - 1)
+        self.assertEqual([key for key, _ in reader.search(docs[10][1], k=5)], [key for key, _ in expected])
+
+    def test_reader_remaps_after_compaction_in_another_process(self):
+        docs = self.corpus()
+        self.store.upsert(docs)
+        reader = VectorStore(self.directory, embedder=HashingEmbedder(dim=128))
+        self.assertEqual(len(reader), len(docs))
+        self.store.upsert([(key, text + ' revised') for key, text in docs[:200]])
+        self.store.compact()
+        # The compacted id table has grown past the reader's old offset again
+        self.store.upsert([(f'task:new{i}', text) for i, (_, text) in enumerate(self.corpus(n=400, seed=2))])
+        self.assertGreater(os.path.getsize(self.store.ids_path), reader.ids_offset)
+
+        self.assertEqual(len(reader), len(docs) + 400)
+        self.assertEqual(reader.rows, self.store.rows)
+        for key, text in [docs[3], docs[250]]:
+            text = text + ' revised' if key == docs[3][0] else text
+            self.assertEqual(reader.search(text, k=1)[0][0], key)
+
+    def test_search_items_reads_without_writing(self):
+        docs = self.corpus(n=20)
+        self.store.upsert(docs[:10])
+        items = dict(docs[5:15])
+        items['task:5'] = 'changed text for five'
+        rows = self.store.rows
+        results = self.store.search_items('changed text for five', items, k=3)
+        self.assertEqual(results[0][0], 'task:5')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(self.store.rows, rows)
+        self.assertEqual(self.store.search_items(docs[12][1], items, k=1)[0][0], docs[12][0])
+        self.assertEqual(self.store.search_items('anything', {}, k=3), [])
+
+    def test_ivf_search_finds_exact_matches(self):
+        docs = self.corpus(n=2000, seed=1)
+        self.store.upsert(docs)
+        self.store.build_ivf(n_lists=16)
+        self.store.upsert([('task:new', 'added after the partitioning')])
+        for key, text in docs[::97]:
+            self.assertEqual(self.store.search(text, k=1, nprobe=2)[0][0], key)
+        self.assertEqual(self.store.search('added after the partitioning', k=1, nprobe=1)[0][0], 'task:new')
+
+    def test_embedder_change_is_rejected(self):
+        self.store.upsert(self.corpus(n=1))  # the header is written with the first vectors
+        with self.assertRaises(VectorStoreError):
+            VectorStore(self.directory, embedder=HashingEmbedder(dim=64))
+
+
+def _blank_pdf(pages):
+    from PyPDF2 import PdfWriter
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+class _TimedOutPool:
+    def __init__(self):
+        self.closed = False
+
+    def apply_async(self, func, args):
+        result = mock.Mock()
+        result.get.side_effect = multiprocessing.TimeoutError()
+        return result
+
+    def close(self):
+        self.closed = True
+
+    def terminate(self):
+        pass
+
+
+@override_settings(DOCUMENT_EXTRACTION_USE_PROCESS_POOL=False)
+class DocumentExtractionTests(SimpleTestCase):
+
+    def setUp(self):
+        document_extraction.clear_cache()
+        self.addCleanup(document_extraction.clear_cache)
+
+    def test_cache_hit_by_content_hash(self):
+        first = extract_text(b'Senior Python developer', filename='cv.txt')
+        second = extract_text(b'Senior Python developer', filename='renamed.txt')
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['content_hash'], first['content_hash'])
+        self.assertEqual(second['text'], 'Senior Python developer')
+        self.assertFalse(extract_text(b'Junior Python developer', filename='cv.txt')['cached'])
+
+    def test_page_cap(self):
+        result = extract_text(_blank_pdf(5), filename='long.pdf', max_pages=2)
+        self.assertEqual((result['page_count'], result['pages_extracted'], result['truncated']), (5, 2, True))
+        full = extract_text(_blank_pdf(5), filename='long.pdf', max_pages=10)
+        self.assertEqual((full['pages_extracted'], full['truncated'], full['cached']), (5, False, False))
+
+    def test_inline_fallback_when_no_pool_can_be_created(self):
+        context = mock.Mock()
+        context.Pool.side_effect = AssertionError('daemonic processes are not allowed to have children')
+        self.addCleanup(setattr, document_extraction, '_pool_disabled', False)
+        with override_settings(DOCUMENT_EXTRACTION_USE_PROCESS_POOL=True), \
+                mock.patch.object(document_extraction.multiprocessing, 'get_context', return_value=context):
+            result = extract_text(_blank_pdf(3), filename='cv.pdf')
+            self.assertEqual(result['pages_extracted'], 3)
+            self.assertTrue(document_extraction._pool_disabled)
+            extract_text(_blank_pdf(4), filename='cv.pdf')
+        self.assertEqual(context.Pool.call_count, 1)
+
+    def test_timeout_retires_only_the_pool_the_job_ran_on(self):
+        stuck = _TimedOutPool()
+        self.addCleanup(setattr, document_extraction, '_pool', None)
+        with mock.patch.object(document_extraction, '_pool', stuck), \
+                mock.patch.object(document_extraction.threading, 'Timer') as timer, \
+                override_settings(DOCUMENT_EXTRACTION_USE_PROCESS_POOL=True):
+            with self.assertRaises(DocumentExtractionError):
+                extract_text(_blank_pdf(1), filename='slow.pdf', timeout=5)
+            self.assertIsNone(document_extraction._pool)
+            self.assertTrue(stuck.closed)
+            timer.assert_called_once_with(5, stuck.terminate)
+
+            # A late timeout from a pool that was already replaced leaves the current pool alone
+            current = _TimedOutPool()
+            document_extraction._pool = current
+            document_extraction._retire_pool(stuck, grace=5)
+            self.assertIs(document_extraction._pool, current)
+            self.assertFalse(current.closed)
+            self.assertEqual(timer.call_count, 1)
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(DocumentExtractionError):
+            extract_text(b'data', filename='cv.exe')
+
+
+class TicketClassificationRulesTests(TestCase):
+    def test_classification(self):
+        result = TicketClassificationRules.classify_ticket('I forgot password for my login', 'help')
+        self.assertEqual((result['category'], result['priority']), ('account', 'medium'))
+        self.assertTrue(result['auto_resolvable'])
+
+        result = TicketClassificationRules.classify_ticket('The server is down, outage everywhere', 'urgent')
+        self.assertEqual((result['category'], result['priority']), ('technical', 'urgent'))
+        self.assertTrue(result['should_escalate'])
+        self.assertFalse(TicketClassificationRules.is_low_complexity('The server is down, how to fix'))
+        self.assertEqual(TicketClassificationRules.classify_ticket('', '')['category'], 'other')
+
+    def test_subclass_rules_are_compiled(self):
+        class ShippingRules(TicketClassificationRules):
+            CATEGORY_PATTERNS = {TicketCategory.OTHER: [r'\b(shipping|delivery|parcel)\b']}
+
+        self.assertEqual(ShippingRules.classify_ticket('Where is my parcel?')['category'], 'other')
+        self.assertEqual(TicketClassificationRules.classify_ticket('Where is my parcel?', 'billing')['category'], 'billing')
+
+    def test_reclassify_updates_changed_tickets_only(self):
+        user = User.objects.create_user('agent', password='x')
+        stale = Ticket.objects.create(title='Refund', description='Please refund the invoice charge',
+                                      category='other', priority='low', created_by=user)
+        current = Ticket.objects.create(title='Crash', description='The server is down',
+                                        category='technical', priority='urgent', created_by=user)
+
+        service = TicketAutomationService()
+        result = service.reclassify_tickets(batch_size=1, dry_run=True)
+        self.assertEqual((result['processed'], result['changed']), (2, 1))
+        self.assertEqual(Ticket.objects.get(pk=stale.pk).category, 'other')
+
+        result = service.reclassify_tickets()
+        self.assertEqual(result['category_changes'], {'billing': 1})
+        self.assertEqual(Ticket.objects.get(pk=stale.pk).category, 'billing')
+        self.assertEqual(Ticket.objects.get(pk=current.pk).priority, 'urgent')
+
+
+class TicketTriagePipelineTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(FRONTLINE_KB_INDEX_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(username='customer')
+        KnowledgeBase.objects.create(title='Reset password', category='faq', created_by=self.user,
+                                     content='Use the forgot password link on the login page to reset your password.')
+
+    def ticket(self, title, description, **fields):
+        return Ticket.objects.create(title=title, description=description, created_by=self.user, **fields)
+
+    def test_near_identical_tickets_share_one_resolution(self):
+        self.assertEqual(normalize_ticket_text('Forgot password!', 'Account a@b.com, order 12'),
+                         normalize_ticket_text('forgot  password', 'account x@y.org order 7'))
+        resets = [self.ticket('Forgot password', f'I forgot password for account {n}, please help') for n in range(3)]
+        outage = self.ticket('Outage', 'The server is down and everything is broken')
+        done = self.ticket('Forgot password', 'I forgot password', status='closed')
+
+        calls = []
+
+        class Agent:
+            ticket_service = TicketAutomationService()
+            system_prompt = 'system'
+
+            def _call_llm(self, prompt, **kwargs):
+                calls.append(prompt)
+                return 'Formatted answer'
+
+        report = TicketTriagePipeline(Agent(), batch_size=10).run()
+        self.assertEqual((report['processed'], report['clusters'], report['llm_calls']), (4, 2, 1))
+        self.assertEqual((report['auto_resolved'], report['escalated']), (3, 1))
+        self.assertEqual(set(report['stage_seconds']), {'load', 'classify', 'cluster', 'knowledge', 'llm', 'write'})
+        self.assertEqual(len(calls), 1)
+
+        for ticket in Ticket.objects.filter(pk__in=[t.pk for t in resets]):
+            self.assertEqual((ticket.status, ticket.resolution, ticket.category), ('auto_resolved', 'Formatted answer', 'account'))
+            self.assertIsNotNone(ticket.resolved_at)
+        outage.refresh_from_db()
+        self.assertEqual((outage.status, outage.priority, outage.resolution), ('new', 'urgent', None))
+        done.refresh_from_db()
+        self.assertEqual(done.status, 'closed')
+        self.assertEqual(Notification.objects.filter(related_ticket__in=resets).count(), 3)
+
+    def test_tickets_changed_during_the_batch_are_not_overwritten(self):
+        taken, untouched = [self.ticket('Forgot password', f'I forgot password for account {n}') for n in range(2)]
+        closed = self.ticket('Outage', 'The server is down and everything is broken')
+
+        class Agent:
+            ticket_service = TicketAutomationService()
+            system_prompt = 'system'
+
+            def _call_llm(self, prompt, **kwargs):
+                return 'Formatted answer'
+
+        pipeline = TicketTriagePipeline(Agent(), batch_size=10)
+        write = pipeline._write
+
+        def write_after_concurrent_edits(*args):
+            # An agent picks one ticket up and closes another while the batch is being triaged
+            Ticket.objects.filter(pk=taken.pk).update(status='in_progress')
+            Ticket.objects.filter(pk=closed.pk).update(status='closed', resolution='Fixed by hand')
+            write(*args)
+
+        with mock.patch.object(pipeline, '_write', side_effect=write_after_concurrent_edits):
+            report = pipeline.run()
+        self.assertEqual((report['processed'], report['auto_resolved'], report['skipped']), (3, 1, 2))
+
+        taken.refresh_from_db()
+        self.assertEqual((taken.status, taken.resolution, taken.resolved_at), ('in_progress', None, None))
+        closed.refresh_from_db()
+        self.assertEqual((closed.status, closed.resolution), ('closed', 'Fixed by hand'))
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.status, 'auto_resolved')
+        self.assertEqual(list(Notification.objects.values_list('related_ticket', flat=True)), [untouched.pk])
+
+    def test_dry_run_without_llm(self):
+        ticket = self.ticket('Forgot password', 'I forgot password')
+        report = TicketTriagePipeline().run(dry_run=True)
+        self.assertEqual((report['auto_resolved'], report['llm_calls']), (1, 0))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'new')
+
+
+class TicketAnalyticsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='customer')
+        self.now = timezone.now()
+
+    def ticket(self, status='new', days_ago=0, resolved_hours=None, auto_resolved=False):
+        ticket = Ticket.objects.create(title='t', description='d', status=status, created_by=self.user,
+                                       auto_resolved=auto_resolved)
+        created_at = self.now - timedelta(days=days_ago)
+        resolved_at = created_at + timedelta(hours=resolved_hours) if resolved_hours is not None else None
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=created_at, resolved_at=resolved_at)
+        ticket.refresh_from_db()
+        # Back-dating moves the ticket to another rollup day: refresh today's row and the new one
+        refresh_rollups([(self.user.id, timezone.localdate())])
+        ticket.save()
+        return ticket
+
+    def expected(self):
+        """The figures the dashboard computed in Python before the rollups."""
+        tickets = list(Ticket.objects.filter(created_by=self.user))
+        total = len(tickets)
+        resolved = sum(t.status in ('resolved', 'closed', 'auto_resolved') for t in tickets)
+        auto = sum(t.auto_resolved for t in tickets)
+        times = [(t.resolved_at - t.created_at).total_seconds() for t in tickets if t.resolved_at]
+        return {
+            'total_tickets': total,
+            'open_tickets': sum(t.status in ('new', 'open', 'in_progress') for t in tickets),
+            'resolved_tickets': resolved,
+            'auto_resolved_count': auto,
+            'resolution_rate': resolved / total * 100 if total else 0,
+            'auto_resolution_rate': auto / total * 100 if total else 0,
+            'avg_resolution_time_hours': sum(times) / len(times) / 3600 if times else None,
+        }
+
+    def assertAnalytics(self):
+        with self.assertNumQueries(1):
+            analytics = user_ticket_analytics(self.user)
+        expected = self.expected()
+        self.assertEqual({k: v for k, v in analytics.items() if k != 'avg_resolution_time_hours'},
+                         {k: v for k, v in expected.items() if k != 'avg_resolution_time_hours'})
+        if expected['avg_resolution_time_hours'] is None:
+            self.assertIsNone(analytics['avg_resolution_time_hours'])
+        else:
+            self.assertAlmostEqual(analytics['avg_resolution_time_hours'], expected['avg_resolution_time_hours'], places=6)
+
+    def test_rollups_follow_ticket_changes(self):
+        self.assertAnalytics()
+        self.ticket('new')
+        self.ticket('open', days_ago=1)
+        closed = self.ticket('closed', days_ago=3, resolved_hours=5)
+        self.ticket('auto_resolved', days_ago=3, resolved_hours=1, auto_resolved=True)
+        self.assertEqual(TicketDailyRollup.objects.filter(user=self.user).count(), 3)
+        self.assertAnalytics()
+
+        pending = self.ticket('in_progress', days_ago=1)
+        pending.status = 'resolved'
+        pending.resolved_at = pending.created_at + timedelta(hours=10)
+        pending.save()
+        closed.delete()
+        self.assertAnalytics()
+
+    def test_rebuild_matches_incremental_rollups(self):
+        for days_ago in range(5):
+            self.ticket('resolved', days_ago=days_ago, resolved_hours=days_ago + 1)
+        incremental = list(TicketDailyRollup.objects.order_by('date').values_list(
+            'date', 'total', 'resolved', 'resolution_count', 'resolution_seconds'))
+        Ticket.objects.update(status='closed')  # bypasses the signals
+        self.assertEqual(rebuild_rollups(), 5)
+        rebuilt = list(TicketDailyRollup.objects.order_by('date').values_list(
+            'date', 'total', 'resolved', 'resolution_count', 'resolution_seconds'))
+        self.assertEqual(rebuilt, incremental)
+        self.assertAnalytics()
+
+    def test_rollup_rows_are_updated_in_place_and_races_do_not_fail_saves(self):
+        ticket = self.ticket('open')
+        rollup = TicketDailyRollup.objects.get(user=self.user)
+        ticket.status = 'closed'
+        ticket.save()
+        self.assertEqual(TicketDailyRollup.objects.get(user=self.user).pk, rollup.pk)
+
+        bulk_create = TicketDailyRollup.objects.bulk_create
+
+        def bulk_create_after_a_concurrent_refresh(objs, **kwargs):
+            # Another save inserted the row for the same day after this refresh locked the existing ones
+            for obj in objs:
+                TicketDailyRollup.objects.create(user_id=obj.user_id, date=obj.date, total=1, open=1)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(TicketDailyRollup.objects, 'bulk_create', side_effect=bulk_create_after_a_concurrent_refresh) as patched:
+            self.ticket('new', days_ago=2)
+        self.assertTrue(patched.called)
+        self.assertEqual(TicketDailyRollup.objects.filter(user=self.user).count(), 2)
+        self.assertAnalytics()
+
+        ticket.delete()
+        self.assertFalse(TicketDailyRollup.objects.filter(pk=rollup.pk).exists())
+        self.assertAnalytics()
+
+
+class _RateLimited(Exception):
+    is_rate_limit = True
+
+    def __init__(self, retry_after=None):
+        super().__init__('429 Too Many Requests')
+        self.retry_after = retry_after
+
+
+class LLMSchedulerTests(SimpleTestCase):
+    def test_budget_waits_for_the_window_to_free_requests_and_tokens(self):
+        budget = KeyBudget(rpm=2, tpm=1000)
+        budget.reserve(400, now=0.0)
+        budget.reserve(400, now=10.0)
+        self.assertEqual(budget.wait_time(100, now=20.0), 40.0)  # rpm: the first request leaves at t=60
+        self.assertEqual(budget.wait_time(100, now=61.0), 0.0)
+
+        budget = KeyBudget(rpm=100, tpm=1000)
+        entry = budget.reserve(700, now=0.0)
+        budget.reserve(200, now=5.0)
+        self.assertEqual(budget.wait_time(300, now=10.0), 50.0)  # tpm: 200 tokens must expire
+        budget.settle(entry, 100)
+        self.assertEqual(budget.wait_time(300, now=10.0), 0.0)
+        self.assertEqual(KeyBudget(rpm=10, tpm=1000).wait_time(5000, now=0.0), 0.0)  # oversized request, empty window
+
+        self.assertEqual(parse_duration('2m59.5s'), 179.5)
+        self.assertEqual(parse_duration('120ms'), 0.12)
+        self.assertEqual(parse_duration('7'), 7.0)
+
+    def test_requests_spill_over_to_the_next_key_and_queue_times_out(self):
+        scheduler = LLMScheduler(rpm=1, tpm=100000, queue_timeout=0.05)
+        used = [scheduler.run(lambda key: key, ['primary', 'secondary'], 10) for _ in range(2)]
+        self.assertEqual(used, ['primary', 'secondary'])
+        with self.assertRaises(LLMRateLimitError) as raised:
+            scheduler.run(lambda key: key, ['primary', 'secondary'], 10)
+        self.assertGreater(raised.exception.retry_after, 50)
+
+    def test_rate_limited_key_is_parked_and_request_retried_on_another(self):
+        scheduler = LLMScheduler(rpm=100, tpm=100000, backoff_base=0.001)
+        calls = []
+
+        def request(key):
+            calls.append(key)
+            if key == 'primary':
+                raise _RateLimited(retry_after=30)
+            return 'ok'
+
+        self.assertEqual(scheduler.run(request, ['primary', 'secondary'], 10), 'ok')
+        self.assertEqual(calls, ['primary', 'secondary'])
+        self.assertEqual(scheduler.run(request, ['primary', 'secondary'], 10), 'ok')
+        self.assertEqual(calls[-1], 'secondary')  # primary stays blocked for Retry-After
+        stats = scheduler.stats()
+        self.assertEqual((stats['rate_limited'], stats['retries'], stats['failed']), (1, 1, 0))
+
+        scheduler.observe('secondary', {'x-ratelimit-remaining-tokens': '0', 'x-ratelimit-reset-tokens': '7.5s'})
+        self.assertGreater(scheduler.stats()['keys']['...dary']['blocked_seconds'], 7)
+
+    def test_request_threads_fail_fast_and_background_callers_wait(self):
+        from django.core.signals import request_finished, request_started
+
+        scheduler = LLMScheduler(rpm=1, tpm=100000, max_retries=3, backoff_base=0.001, queue_timeout=300,
+                                 request_queue_timeout=0.05, request_max_retries=0)
+        self.assertEqual(scheduler.policy(), (300, 3))
+        scheduler.run(lambda key: key, ['k'], 10)
+        request_started.send(sender=None)
+        try:
+            self.assertTrue(in_request())
+            self.assertEqual(scheduler.policy(), (0.05, 0))
+            with self.assertRaises(LLMRateLimitError):
+                scheduler.run(lambda key: key, ['k'], 10)  # the next slot is a minute away
+            with self.assertRaises(ConnectionError):
+                LLMScheduler(rpm=100, tpm=100000, request_max_retries=0).run(
+                    lambda key: (_ for _ in ()).throw(ConnectionError('reset')), ['k'], 10)
+        finally:
+            request_finished.send(sender=None)
+        self.assertFalse(in_request())
+
+    def test_transient_errors_are_retried_with_backoff_and_others_raised(self):
+        scheduler = LLMScheduler(rpm=100, tpm=100000, max_retries=2, backoff_base=0.001)
+        failures = iter([ConnectionError('reset'), ConnectionError('reset')])
+
+        def flaky(key):
+            error = next(failures, None)
+            if error:
+                raise error
+            return 'ok'
+
+        self.assertEqual(scheduler.run(flaky, ['k'], 10), 'ok')
+        with self.assertRaises(ValueError):
+            scheduler.run(lambda key: (_ for _ in ()).throw(ValueError('bad request')), ['k'], 10)
+        with self.assertRaises(_RateLimited):
+            scheduler.run(lambda key: (_ for _ in ()).throw(_RateLimited(retry_after=0)), ['k'], 10)
+        self.assertEqual(scheduler.stats()['failed'], 2)
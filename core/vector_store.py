@@ -0,0 +1,541 @@
+"""
+Persistent embedding store for semantic retrieval.
+
+Vectors for knowledge base articles, projects, tasks and marketing documents
+live in one append-only float32 matrix under VECTOR_STORE_DIR, read through a
+memory map, so a query costs one matrix-vector product instead of
+re-embedding the corpus:
+
+    <name>.json     header: embedder name and dimension (written with the first vectors)
+    <name>.f32      row-major float32 matrix, one L2-normalised row per vector
+    <name>.jsonl    id table, one JSON line per event:
+                    {"row", "key", "hash"} - key now points at row
+                    {"key", "deleted": true}
+    <name>.ivf.npz  optional inverted-file partitioning (see build_ivf)
+
+Keys are '<source>:<id>' (e.g. 'task:42'). Re-indexing a key appends a new row
+and leaves the old one dead; unchanged texts (same hash) are not re-embedded.
+Writers append with O_APPEND and take their row numbers from the write offset,
+so several processes can write at once. Readers replay id table lines they
+have not seen before each search, and start over from the new files when the
+id table was replaced (a compact() in another process). compact() drops dead
+rows; run it with no concurrent writers. The writers are build_vector_index
+and refresh_vector_index_task (core/tasks.py). Request threads only read:
+search_items() embeds unindexed texts for the call without storing them.
+
+Embedders are pluggable (VECTOR_STORE_EMBEDDER): 'hashing' is a local,
+deterministic feature-hashing embedder (the default, and what tests use);
+'openai' calls the embeddings API in batches; anything else is imported as a
+dotted path to a class with .name, .dim and .embed(texts) -> (n, dim) array.
+
+Settings (all optional, see project_manager_ai/settings.py):
+    VECTOR_STORE_DIR, VECTOR_STORE_EMBEDDER, VECTOR_STORE_BATCH_SIZE
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 64
+MAX_TEXT_CHARS = 8000  # longer texts are truncated before embedding
+SEARCH_CHUNK_ROWS = 65536  # rows scored per matrix-vector product (bounds memory)
+
+
+class VectorStoreError(ValueError):
+    """Raised when a store cannot be opened with the configured embedder."""
+
+
+def _setting(name: str, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ---------------------------------------------------------------------------
+# Embedders
+# ---------------------------------------------------------------------------
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+@lru_cache(maxsize=65536)
+def _feature_slot(feature: str, dim: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+    return digest % dim, (1.0 if digest >> 63 else -1.0)
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words and word bigrams, log-scaled counts.
+    Deterministic across processes and machines; no model, no network.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f'hashing-{dim}'
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = _WORD_RE.findall(text.lower())
+            counts = Counter(words)
+            counts.update(map(' '.join, zip(words, words[1:])))
+            if not counts:
+                continue
+            slots, signs = zip(*[_feature_slot(feature, self.dim) for feature in counts])
+            weights = np.array(signs, dtype=np.float32) * (1.0 + np.log(np.fromiter(counts.values(), np.float32)))
+            np.add.at(vectors[i], np.array(slots), weights)
+        return _normalise(vectors)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings (OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL); one API call per batch."""
+
+    def __init__(self, model: Optional[str] = None, dim: Optional[int] = None):
+        from openai import OpenAI
+        api_key = _setting('OPENAI_API_KEY', None)
+        if not api_key:
+            raise VectorStoreError('OPENAI_API_KEY is not set; use the hashing embedder or configure OpenAI')
+        self.client = OpenAI(api_key=api_key)
+        self.model = model or _setting('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-large')
+        self.name = f'openai:{self.model}'
+        self.dim = dim or {'text-embedding-3-small': 1536, 'text-embedding-ada-002': 1536}.get(self.model, 3072)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        return _normalise([item.embedding for item in response.data])
+
+
+def get_embedder():
+    name = _setting('VECTOR_STORE_EMBEDDER', 'hashing')
+    if name == 'hashing':
+        return HashingEmbedder()
+    if name == 'openai':
+        return OpenAIEmbedder()
+    from django.utils.module_loading import import_string
+    return import_string(name)()
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class VectorStore:
+    """One store (header, matrix, id table) in a directory. Thread safe within a process."""
+
+    def __init__(self, directory, name: str = 'vectors', embedder=None, batch_size: Optional[int] = None):
+        self.directory = str(directory)
+        self.name = name
+        self.embedder = embedder or get_embedder()
+        self.dim = self.embedder.dim
+        self.batch_size = batch_size or _setting('VECTOR_STORE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        base = os.path.join(self.directory, name)
+        self.header_path = f'{base}.json'
+        self.matrix_path = f'{base}.f32'
+        self.ids_path = f'{base}.jsonl'
+        self.ivf_path = f'{base}.ivf.npz'
+        self._lock = threading.RLock()
+        self._check_header()
+        self._reset()
+
+    def _check_header(self, create: bool = False) -> None:
+        """Refuse a store built with another embedder; the header is only written by writers (create=True)."""
+        header = {'embedder': self.embedder.name, 'dim': self.dim}
+        try:
+            with open(self.header_path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            if create:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.header_path, 'w', encoding='utf-8') as f:
+                    json.dump(header, f)
+            return
+        if stored != header:
+            raise VectorStoreError(
+                f"Vector store {self.name} was built with {stored}, not {header}. "
+                f"Rebuild it (manage.py build_vector_index --reset) after changing the embedder."
+            )
+
+    def _reset(self) -> None:
+        self.ids_offset = 0
+        self.rows = 0
+        self.key_row: Dict[str, int] = {}
+        self.row_key: Dict[int, str] = {}
+        self.hashes: Dict[str, str] = {}
+        self.live = np.zeros(0, dtype=bool)
+        self._matrix = None
+        self._masks: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._ivf = None
+        self._ivf_stamp = None
+        self._ids_identity = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def sync(self) -> None:
+        """Replay id table lines written (by any process) since the last call."""
+        with self._lock:
+            try:
+                stat = os.stat(self.ids_path)
+                size, identity = stat.st_size, (stat.st_dev, stat.st_ino)
+            except FileNotFoundError:
+                size, identity = 0, None
+            if identity != self._ids_identity or size < self.ids_offset:
+                # A new id table file means compact() (or a reset) replaced the store:
+                # replay it from the start and map the new matrix
+                self._reset()
+                self._ids_identity = identity
+            if size > self.ids_offset:
+                with open(self.ids_path, 'rb') as f:
+                    f.seek(self.ids_offset)
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # partially written - read it next time
+                        self.ids_offset += len(line)
+                        self._apply(json.loads(line))
+            self._sync_ivf()
+
+    def _apply(self, entry: Dict) -> None:
+        key = entry['key']
+        old = self.key_row.pop(key, None)
+        if old is not None:
+            del self.row_key[old]
+            self.live[old] = False
+        self.hashes.pop(key, None)
+        if entry.get('deleted'):
+            self._masks.clear()
+            return
+        row = entry['row']
+        if row >= self.rows:
+            self.rows = row + 1
+            if self.rows > len(self.live):
+                live = np.zeros(max(self.rows, 2 * len(self.live)), dtype=bool)
+                live[:len(self.live)] = self.live
+                self.live = live
+        self.key_row[key] = row
+        self.row_key[row] = key
+        self.hashes[key] = entry['hash']
+        self.live[row] = True
+        self._masks.clear()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None or len(self._matrix) < self.rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(self.rows, self.dim)) \
+                if self.rows else np.zeros((0, self.dim), np.float32)
+        return self._matrix
+
+    def __len__(self) -> int:
+        self.sync()
+        return len(self.key_row)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def upsert(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Embed and store (key, text) items in batches, skipping texts that are
+        unchanged since they were stored. Returns how many were embedded.
+        """
+        self.sync()
+        pending = []
+        written = 0
+        for key, text in items:
+            text = (text or '')[:MAX_TEXT_CHARS]
+            digest = text_hash(text)
+            if self.hashes.get(key) == digest:
+                continue
+            pending.append((key, text, digest))
+            if len(pending) >= self.batch_size:
+                written += self._write_batch(pending)
+                pending = []
+        if pending:
+            written += self._write_batch(pending)
+        return written
+
+    def _write_batch(self, batch: List[Tuple[str, str, str]]) -> int:
+        self._check_header(create=True)
+        vectors = np.ascontiguousarray(self.embedder.embed([text for _, text, _ in batch]), dtype=np.float32)
+        if vectors.shape != (len(batch), self.dim):
+            raise VectorStoreError(f'Embedder returned {vectors.shape}, expected ({len(batch)}, {self.dim})')
+        data = vectors.tobytes()
+        fd = os.open(self.matrix_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            os.write(fd, data)
+            # With O_APPEND the write lands at the end of the file, wherever other writers left it
+            first_row = (os.lseek(fd, 0, os.SEEK_CUR) - len(data)) // (self.dim * 4)
+        finally:
+            os.close(fd)
+        self._append_ids([{'row': first_row + i, 'key': key, 'hash': digest}
+                          for i, (key, _, digest) in enumerate(batch)])
+        return len(batch)
+
+    def _append_ids(self, entries: List[Dict]) -> None:
+        lines = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries)
+        with open(self.ids_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+        self.sync()
+
+    def delete(self, keys: Iterable[str]) -> int:
+        self.sync()
+        entries = [{'key': key, 'deleted': True} for key in keys if key in self.key_row]
+        if entries:
+            self._append_ids(entries)
+        return len(entries)
+
+    def keys(self, prefix: str = '') -> List[str]:
+        self.sync()
+        return [key for key in self.key_row if key.startswith(prefix)]
+
+    def compact(self) -> None:
+        """Rewrite the matrix and id table with live rows only (drops the IVF partitioning)."""
+        with self._lock:
+            self.sync()
+            self._check_header(create=True)
+            live_keys = sorted(self.key_row, key=self.key_row.get)
+            rows = np.array([self.key_row[key] for key in live_keys], dtype=np.int64)
+            matrix_tmp, ids_tmp = f'{self.matrix_path}.tmp', f'{self.ids_path}.tmp'
+            with open(matrix_tmp, 'wb') as f:
+                for start in range(0, len(rows), SEARCH_CHUNK_ROWS):
+                    f.write(np.ascontiguousarray(self.matrix[rows[start:start + SEARCH_CHUNK_ROWS]]).tobytes())
+            with open(ids_tmp, 'w', encoding='utf-8') as f:
+                for row, key in enumerate(live_keys):
+                    f.write(json.dumps({'row': row, 'key': key, 'hash': self.hashes[key]}, separators=(',', ':')) + '\n')
+            self._matrix = None
+            os.replace(matrix_tmp, self.matrix_path)
+            os.replace(ids_tmp, self.ids_path)
+            if os.path.exists(self.ivf_path):
+                os.remove(self.ivf_path)
+            self._reset()
+            self.sync()
+
+    # ------------------------------------------------------------------
+    # IVF partitioning
+    # ------------------------------------------------------------------
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 8, seed: int = 0) -> None:
+        """
+        Partition the live rows into n_lists clusters (spherical k-means on a
+        sample). Searches then score only the rows in the nprobe closest lists,
+        plus rows added after the build.
+        """
+        with self._lock:
+            self.sync()
+            rows = np.flatnonzero(self.live[:self.rows])
+            if not len(rows):
+                return
+            n_lists = max(1, min(n_lists or int(np.sqrt(len(rows))), len(rows)))
+            rng = np.random.default_rng(seed)
+            sample = rows if len(rows) <= 256 * n_lists else np.sort(rng.choice(rows, 256 * n_lists, replace=False))
+            train = np.asarray(self.matrix[sample])
+            centroids = train[rng.choice(len(train), n_lists, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(train @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, train)
+                empty = np.bincount(assignment, minlength=n_lists) == 0
+                sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+                centroids = _normalise(sums)
+
+            assignment = np.concatenate([
+                np.argmax(np.asarray(self.matrix[rows[start:start + SEARCH_CHUNK_ROWS]]) @ centroids.T, axis=1)
+                for start in range(0, len(rows), SEARCH_CHUNK_ROWS)
+            ])
+            order = np.argsort(assignment, kind='stable')
+            list_ptr = np.zeros(n_lists + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignment, minlength=n_lists), out=list_ptr[1:])
+            tmp_path = f'{self.ivf_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, centroids=centroids, list_ptr=list_ptr, list_rows=rows[order],
+                         rows_covered=np.array(self.rows, dtype=np.int64))
+            os.replace(tmp_path, self.ivf_path)
+            self._sync_ivf()
+
+    def _sync_ivf(self) -> None:
+        try:
+            stat = os.stat(self.ivf_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            self._ivf, self._ivf_stamp = None, None
+            return
+        if stamp != self._ivf_stamp:
+            with np.load(self.ivf_path, allow_pickle=False) as data:
+                self._ivf = {name: data[name] for name in ('centroids', 'list_ptr', 'list_rows', 'rows_covered')}
+            self._ivf_stamp = stamp
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _mask(self, prefixes: Tuple[str, ...]) -> np.ndarray:
+        mask = self._masks.get(prefixes)
+        if mask is None:
+            mask = np.zeros(self.rows, dtype=bool)
+            for row, key in self.row_key.items():
+                if key.startswith(prefixes):
+                    mask[row] = True
+            self._masks[prefixes] = mask
+        return mask
+
+    def search(self, query: Union[str, np.ndarray], k: int = 10, prefixes: Optional[Sequence[str]] = None,
+               keys: Optional[Iterable[str]] = None, nprobe: int = 8) -> List[Tuple[str, float]]:
+        """
+        Top-k (key, cosine similarity), best first. Restrict to keys starting with
+        one of prefixes, or to an explicit key list. With an IVF partitioning in
+        place (and no key list), only the nprobe closest lists are scored.
+        """
+        self.sync()
+        with self._lock:
+            if isinstance(query, str):
+                query = self.embedder.embed([query[:MAX_TEXT_CHARS]])[0]
+            query = np.asarray(query, dtype=np.float32)
+            if keys is not None:
+                candidates = np.array(sorted({self.key_row[key] for key in keys if key in self.key_row}), dtype=np.int64)
+            elif self._ivf is not None:
+                ivf = self._ivf
+                probe = np.argsort(-(ivf['centroids'] @ query), kind='stable')[:nprobe]
+                candidates = np.concatenate(
+                    [ivf['list_rows'][ivf['list_ptr'][l]:ivf['list_ptr'][l + 1]] for l in probe]
+                    + [np.arange(int(ivf['rows_covered']), self.rows, dtype=np.int64)]
+                )
+                candidates = candidates[self.live[candidates]]
+            else:
+                candidates = None
+
+            if candidates is not None:
+                if prefixes:
+                    candidates = candidates[self._mask(tuple(prefixes))[candidates]]
+                scores = np.asarray(self.matrix[np.sort(candidates)]) @ query if len(candidates) else np.zeros(0)
+                return self._top(np.sort(candidates), scores, k)
+
+            allowed = self.live[:self.rows] if not prefixes else self._mask(tuple(prefixes))
+            best_rows, best_scores = np.zeros(0, np.int64), np.zeros(0, np.float32)
+            for start in range(0, self.rows, SEARCH_CHUNK_ROWS):
+                end = min(start + SEARCH_CHUNK_ROWS, self.rows)
+                rows = start + np.flatnonzero(allowed[start:end])
+                if not len(rows):
+                    continue
+                scores = np.asarray(self.matrix[start:end]) @ query
+                best_rows = np.concatenate([best_rows, rows])
+                best_scores = np.concatenate([best_scores, scores[rows - start]])
+                if len(best_rows) > k:
+                    keep = np.argpartition(-best_scores, k)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+            return self._top(best_rows, best_scores, k)
+
+    def search_items(self, query: str, items: Dict[str, str], k: int = 10,
+                     reuse_stored: bool = False) -> List[Tuple[str, float]]:
+        """
+        Top-k (key, cosine similarity) among the given key -> text items, best first.
+        Read only: stored vectors are used where the text is unchanged (with
+        reuse_stored, for every stored key, e.g. when the texts are excerpts of
+        what was indexed), the other texts are embedded for this call (in one
+        batch) and not stored.
+        """
+        self.sync()
+        with self._lock:
+            keys, rows, pending = [], [], []
+            for key, text in items.items():
+                text = (text or '')[:MAX_TEXT_CHARS]
+                if key in self.key_row and (reuse_stored or self.hashes.get(key) == text_hash(text)):
+                    keys.append(key)
+                    rows.append(self.key_row[key])
+                else:
+                    pending.append((key, text))
+            if not keys and not pending:
+                return []
+            vectors = [np.asarray(self.matrix[np.array(rows, dtype=np.int64)])] if rows else []
+            if pending:
+                vectors.append(np.asarray(self.embedder.embed([text for _, text in pending]), dtype=np.float32))
+                keys.extend(key for key, _ in pending)
+            query_vector = self.embedder.embed([query[:MAX_TEXT_CHARS]])[0]
+            scores = np.concatenate(vectors) @ query_vector
+        order = sorted(range(len(keys)), key=lambda i: (-scores[i], keys[i]))[:k]
+        return [(keys[i], float(scores[i])) for i in order]
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if len(rows) > k:
+            keep = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((rows, -scores))
+        return [(self.row_key[int(rows[i])], float(scores[i])) for i in order]
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def _source_documents(source: str):
+    """(key, text) for every object of a source, streamed from the database."""
+    if source == 'kb':
+        from Frontline_agent.models import KnowledgeBase
+        rows = KnowledgeBase.objects.order_by('id').values_list('id', 'title', 'tags', 'content')
+    elif source == 'project':
+        from core.models import Project
+        rows = Project.objects.order_by('id').values_list('id', 'name', 'description')
+    elif source == 'task':
+        from core.models import Task
+        rows = Task.objects.order_by('id').values_list('id', 'title', 'description')
+    elif source == 'marketing_doc':
+        from marketing_agent.models import MarketingDocument
+        rows = MarketingDocument.objects.order_by('id').values_list('id', 'title', 'content')
+    else:
+        raise VectorStoreError(f'Unknown vector source: {source}')
+    for object_id, *fields in rows.iterator(chunk_size=2000):
+        yield f'{source}:{object_id}', '\n'.join(field for field in fields if field)
+
+
+SOURCES = ('kb', 'project', 'task', 'marketing_doc')
+
+
+def index_sources(store: VectorStore, sources: Sequence[str] = SOURCES) -> Dict[str, Dict[str, int]]:
+    """Bring the store in line with the database: embed new/changed objects, drop deleted ones."""
+    summary = {}
+    for source in sources:
+        seen = set()
+
+        def documents():
+            for key, text in _source_documents(source):
+                seen.add(key)
+                yield key, text
+
+        embedded = store.upsert(documents())
+        removed = store.delete([key for key in store.keys(f'{source}:') if key not in seen])
+        summary[source] = {'embedded': embedded, 'removed': removed, 'total': len(seen)}
+    return summary
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(name: str = 'vectors') -> VectorStore:
+    """Process-wide store in VECTOR_STORE_DIR."""
+    from django.conf import settings
+    directory = str(_setting('VECTOR_STORE_DIR', os.path.join(settings.BASE_DIR, 'vector_store')))
+    with _stores_lock:
+        store = _stores.get(name)
+        if store is None or store.directory != directory:
+            store = _stores[name] = VectorStore(directory, name)
+        return store
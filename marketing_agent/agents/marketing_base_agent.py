@@ -18,6 +18,8 @@ import os
 from django.conf import settings
 import logging
 
+from core.llm_scheduler import estimate_request_tokens, get_llm_scheduler, groq_key_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,9 +49,11 @@ class MarketingBaseAgent:
             or os.environ.get('GROQ_API_KEY') or os.environ.get('GROQ_REC_API_KEY') or ''
         ).strip()
         self.groq_client = None
+        self._groq_pool_clients = {}  # clients for the other keys of the Groq key pool
         if self.groq_api_key:
             try:
-                self.groq_client = Groq(api_key=self.groq_api_key)
+                # Retries are left to the LLM scheduler (core/llm_scheduler.py)
+                self.groq_client = Groq(api_key=self.groq_api_key, max_retries=0)
             except TypeError as e:
                 error_msg = str(e)
                 if 'proxies' in error_msg or 'unexpected keyword' in error_msg:
@@ -92,6 +96,62 @@ class MarketingBaseAgent:
         
         self.agent_name = self.__class__.__name__
     
+    def _build_messages(self, prompt, system_prompt=None):
+        messages = []
+        
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        messages.append({
+            "role": "user",
+            "content": prompt
+        })
+        return messages
+    
+    def _uses_openai(self, model):
+        """True when a call for this model goes to OpenAI (GPT model and client available), else Groq."""
+        return bool(self.openai_client and model and 'gpt' in model.lower())
+    
+    def _require_groq_client(self):
+        if not self.groq_client:
+            raise ValueError(
+                "GROQ_API_KEY or GROQ_REC_API_KEY not found in environment variables. "
+                "Set one of them in your .env file to use LLM features."
+            )
+    
+    def _create_completion(self, messages, temperature, max_tokens, model=None, use_openai=False, **kwargs):
+        """
+        Chat completion through the LLM scheduler, on OpenAI (model) or Groq (self.model).
+        Shared by the blocking and streaming calls; kwargs go to the SDK (e.g. stream=True).
+        """
+        scheduler = get_llm_scheduler()
+        if use_openai:
+            # OpenAI keys have their own limits: follow the response headers and 429s only
+            scheduler.set_key_limits(self.openai_api_key, rpm=0, tpm=0)
+            api_keys = [self.openai_api_key]
+            
+            def create(api_key):
+                return self.openai_client.chat.completions.with_raw_response.create(
+                    model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+                )
+        else:
+            api_keys = groq_key_pool(self.groq_api_key)
+            
+            def create(api_key):
+                return self._groq_client_for(api_key).chat.completions.with_raw_response.create(
+                    model=self.model, messages=messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+                )
+        return scheduler.run(
+            lambda api_key: scheduler.parse_raw(api_key, create(api_key)),
+            api_keys,
+            estimate_request_tokens(messages, max_tokens),
+            # Streams report no usage; their reservation keeps the estimate
+            actual_tokens=None if kwargs.get('stream') else (lambda response: response.usage.total_tokens),
+        )
+    
     def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None):
         """
         Make a call to the LLM API (Groq for Q&A, OpenAI for advanced tasks).
@@ -107,7 +167,7 @@ class MarketingBaseAgent:
             str: LLM response text
         """
         # If OpenAI is available and GPT model specified, use it; otherwise use Groq
-        if self.openai_client and model and 'gpt' in model.lower():
+        if self._uses_openai(model):
             return self._call_openai(prompt, system_prompt, temperature, max_tokens, model)
         else:
             # Default to Groq for Q&A
@@ -131,28 +191,12 @@ class MarketingBaseAgent:
             raise ValueError("OpenAI client not available. Please set OPENAI_API_KEY in .env file.")
         
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
+            messages = self._build_messages(prompt, system_prompt)
             
             # Use specified model or default
             model_to_use = model or getattr(settings, 'OPENAI_MODEL', 'gpt-4.1')
             
-            response = self.openai_client.chat.completions.create(
-                model=model_to_use,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            response = self._create_completion(messages, temperature, max_tokens, model=model_to_use, use_openai=True)
             
             return response.choices[0].message.content
             
@@ -226,31 +270,10 @@ class MarketingBaseAgent:
         Returns:
             str: LLM response text
         """
-        if not self.groq_client:
-            raise ValueError(
-                "GROQ_API_KEY or GROQ_REC_API_KEY not found in environment variables. "
-                "Set one of them in your .env file to use LLM features."
-            )
+        self._require_groq_client()
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            response = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            messages = self._build_messages(prompt, system_prompt)
+            response = self._create_completion(messages, temperature, max_tokens)
             
             return response.choices[0].message.content
             
@@ -258,6 +281,37 @@ class MarketingBaseAgent:
             logger.error(f"Error in {self.agent_name} Groq Q&A call: {str(e)}")
             raise
     
+    def _stream_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=2000, model=None):
+        """
+        Streaming variant of _call_llm (same Groq / OpenAI routing, stream=True).
+        Rate limits are reported when the stream is opened, so only that part is scheduled.
+        
+        Yields:
+            str: Next piece of the response text
+        """
+        use_openai = self._uses_openai(model)
+        if not use_openai:
+            self._require_groq_client()
+        provider = 'OpenAI' if use_openai else 'Groq'
+        try:
+            messages = self._build_messages(prompt, system_prompt)
+            stream = self._create_completion(messages, temperature, max_tokens, model=model, use_openai=use_openai, stream=True)
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            logger.error(f"Error in {self.agent_name} {provider} streaming call: {str(e)}")
+            raise
+    
+    def _groq_client_for(self, api_key):
+        """Groq client for one key of the pool the LLM scheduler picks from"""
+        if api_key == self.groq_api_key:
+            return self.groq_client
+        if api_key not in self._groq_pool_clients:
+            self._groq_pool_clients[api_key] = Groq(api_key=api_key, max_retries=0)
+        return self._groq_pool_clients[api_key]
+    
     def _call_llm_for_writing(self, prompt, system_prompt=None, temperature=0.7, max_tokens=4000):
         """
         Call LLM optimized for document writing tasks.
@@ -5,7 +5,7 @@ This is the BRAIN that all other agents will use.
 """
 
 from .marketing_base_agent import MarketingBaseAgent
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 from marketing_agent.models import Campaign, CampaignPerformance, MarketResearch
 import json
 from datetime import datetime, timedelta
@@ -72,6 +72,40 @@ class MarketingQAAgent(MarketingBaseAgent):
         # Generate answer using AI
         answer = self._generate_answer(question, full_context)
         
+        return self._answer_result(question, answer, marketing_data)
+    
+    def stream_process(self, question: str, context: Optional[Dict] = None,
+                       user_id: Optional[int] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Streaming variant of process: yields ('token', text) for each piece of
+        the answer as it is generated, then ('result', Dict) with the same
+        payload process() returns.
+        """
+        self.log_action("Streaming marketing answer", {"question": question[:100]})
+        
+        marketing_data = self._get_marketing_data(user_id)
+        full_context = self._build_context(marketing_data, context)
+        
+        pieces = []
+        try:
+            for piece in self._stream_llm(
+                self._answer_prompt(question, full_context),
+                self.system_prompt,
+                temperature=0.3,
+                max_tokens=2000
+            ):
+                pieces.append(piece)
+                yield 'token', piece
+        except Exception as e:
+            self.log_action("Error generating answer", {"error": str(e)})
+            error_answer = f"I encountered an error while analyzing the data: {str(e)}"
+            if not pieces:
+                pieces.append(error_answer)
+                yield 'token', error_answer
+        
+        yield 'result', self._answer_result(question, ''.join(pieces), marketing_data)
+    
+    def _answer_result(self, question: str, answer: str, marketing_data: Dict) -> Dict:
         # Extract insights
         insights = self._extract_insights(marketing_data, question)
         
@@ -192,10 +226,10 @@ class MarketingQAAgent(MarketingBaseAgent):
         
         return context
     
-    def _generate_answer(self, question: str, context: str) -> str:
-        """Generate AI-powered answer to marketing question using Groq API"""
+    def _answer_prompt(self, question: str, context: str) -> str:
+        """Prompt for a marketing question over the given data context"""
         # Format prompt for Groq (chat format)
-        prompt = f"""Based on the marketing data provided below, answer this question: "{question}"
+        return f"""Based on the marketing data provided below, answer this question: "{question}"
 
 {context}
 
@@ -206,11 +240,13 @@ Provide a comprehensive, data-driven answer. Include:
 4. Actionable recommendations if applicable
 
 Be specific, use numbers, and base everything on the data provided."""
-        
+    
+    def _generate_answer(self, question: str, context: str) -> str:
+        """Generate AI-powered answer to marketing question using Groq API"""
         try:
             # Use Groq for Q&A
             answer = self._call_llm_for_reasoning(
-                prompt,
+                self._answer_prompt(question, context),
                 self.system_prompt,
                 temperature=0.3,  # Lower temperature for more factual answers
                 max_tokens=2000  # Groq supports longer responses
@@ -1,3 +1,58 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from core.llm_scheduler import LLMRateLimitError, LLMScheduler
+from marketing_agent.agents.marketing_base_agent import MarketingBaseAgent
+
+
+class _FakeCompletions:
+    """Stands in for client.chat.completions: records the request, answers 'hi' (or a two-chunk stream)."""
+
+    def __init__(self):
+        self.calls = []
+        self.with_raw_response = self
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get('stream'):
+            result = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]) for piece in ('h', 'i')]
+        else:
+            result = SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content='hi'))], usage=SimpleNamespace(total_tokens=12),
+            )
+        return SimpleNamespace(headers={}, parse=lambda: result)
+
+
+@override_settings(GROQ_API_KEY='groq-key', OPENAI_API_KEY='openai-key')
+class MarketingBaseAgentLLMTests(SimpleTestCase):
+    def setUp(self):
+        self.agent = MarketingBaseAgent()
+        self.groq, self.openai = _FakeCompletions(), _FakeCompletions()
+        self.agent.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=self.groq))
+        self.agent._groq_client_for = lambda api_key: self.agent.groq_client
+        self.agent.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=self.openai))
+        self.scheduler = LLMScheduler(rpm=2, tpm=100000, queue_timeout=0.05)
+        patcher = mock.patch('marketing_agent.agents.marketing_base_agent.get_llm_scheduler', return_value=self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_blocking_and_streaming_calls_send_the_same_request(self):
+        for model, client in ((None, self.groq), ('gpt-4.1', self.openai)):
+            self.assertEqual(self.agent._call_llm('Q', 'S', 0.5, 100, model=model), 'hi')
+            self.assertEqual(''.join(self.agent._stream_llm('Q', 'S', 0.5, 100, model=model)), 'hi')
+            blocking, streaming = client.calls[-2:]
+            self.assertEqual(streaming.pop('stream'), True)
+            self.assertEqual(blocking, streaming)
+            self.assertEqual(blocking['messages'], [{'role': 'system', 'content': 'S'}, {'role': 'user', 'content': 'Q'}])
+
+    def test_openai_calls_are_scheduled_without_the_groq_budget(self):
+        for _ in range(3):
+            self.assertEqual(''.join(self.agent._stream_llm('Q', model='gpt-4.1')), 'hi')
+        self.assertEqual(self.scheduler.stats()['requests'], 3)
+
+        self.agent._call_llm('Q')
+        self.agent._call_llm('Q')
+        with self.assertRaises(LLMRateLimitError):
+            self.agent._call_llm('Q')  # rpm=2 still applies to the Groq key
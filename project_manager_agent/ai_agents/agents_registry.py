@@ -1,70 +1,243 @@
 """
 Agent Registry - Central registry for all AI agents
 This allows easy access and management of all agents
+
+Agent instances are pooled: building one creates a Groq client and the
+agent's system prompt, so the registry keeps warm instances and hands them
+out instead of constructing a new one per call. An instance is leased to one
+thread at a time (a request, a Celery task) and goes back to the idle pool
+when the request or task finishes. Per-request state is cleared through the
+agent's reset_request_state() hook every time it is handed out.
 """
 
-from typing import Dict, Type
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Type
+
+from django.conf import settings
+
 from .base_agent import BaseAgent
 
+logger = logging.getLogger(__name__)
+
 
 class AgentRegistry:
     """
     Registry for managing all AI agents.
     Provides a centralized way to access and instantiate agents.
     """
-    
+
     _agents: Dict[str, Type[BaseAgent]] = {}
-    
+    _idle: Dict[str, List[BaseAgent]] = {}
+    _leased_count: Dict[str, int] = {}
+    _stats: Dict[str, Dict] = {}
+    _lock = threading.Lock()
+    _local = threading.local()
+
     @classmethod
     def register(cls, agent_name: str, agent_class: Type[BaseAgent]):
         """
         Register an agent class.
-        
+
         Args:
             agent_name (str): Name identifier for the agent
             agent_class (Type[BaseAgent]): Agent class to register
         """
-        cls._agents[agent_name] = agent_class
-    
+        with cls._lock:
+            if cls._agents.get(agent_name) is not agent_class:
+                cls._idle.pop(agent_name, None)  # instances of a replaced class are not reused
+            cls._agents[agent_name] = agent_class
+
+    @classmethod
+    def _stat(cls, agent_name: str) -> Dict:
+        return cls._stats.setdefault(agent_name, {
+            'constructed': 0, 'construction_seconds': 0.0, 'reused': 0, 'failures': 0, 'last_error': None,
+        })
+
+    @classmethod
+    def _construct(cls, agent_name: str) -> BaseAgent:
+        started = time.perf_counter()
+        try:
+            agent = cls._agents[agent_name]()
+        except Exception as e:
+            with cls._lock:
+                stat = cls._stat(agent_name)
+                stat['failures'] += 1
+                stat['last_error'] = str(e)
+            raise
+        elapsed = time.perf_counter() - started
+        with cls._lock:
+            stat = cls._stat(agent_name)
+            stat['constructed'] += 1
+            stat['construction_seconds'] += elapsed
+            stat['last_error'] = None
+        return agent
+
+    @classmethod
+    def _leases(cls) -> Dict[str, BaseAgent]:
+        leases = getattr(cls._local, 'leases', None)
+        if leases is None:
+            leases = cls._local.leases = {}
+        return leases
+
+    @staticmethod
+    def _reset(agent) -> None:
+        reset = getattr(agent, 'reset_request_state', None)
+        if reset is not None:
+            reset()
+
     @classmethod
     def get_agent(cls, agent_name: str) -> BaseAgent:
         """
         Get an instance of a registered agent.
-        
+
+        The instance is leased to the calling thread until release_thread_agents()
+        (called when a request or Celery task finishes); calling again from the
+        same thread returns the same instance.
+
         Args:
             agent_name (str): Name of the agent to get
-            
+
         Returns:
             BaseAgent: Instance of the agent
-            
+
         Raises:
             KeyError: If agent is not registered
         """
         if agent_name not in cls._agents:
             raise KeyError(f"Agent '{agent_name}' is not registered")
-        
-        return cls._agents[agent_name]()
-    
+
+        agent_class = cls._agents[agent_name]
+        leases = cls._leases()
+        agent = leases.get(agent_name)
+        if agent is None or type(agent) is not agent_class:
+            with cls._lock:
+                idle = cls._idle.get(agent_name)
+                agent = idle.pop() if idle else None
+            if agent is None:
+                agent = cls._construct(agent_name)
+            else:
+                with cls._lock:
+                    cls._stat(agent_name)['reused'] += 1
+            with cls._lock:
+                cls._leased_count[agent_name] = cls._leased_count.get(agent_name, 0) + 1
+            leases[agent_name] = agent
+        else:
+            with cls._lock:
+                cls._stat(agent_name)['reused'] += 1
+
+        cls._reset(agent)
+        return agent
+
+    @classmethod
+    def release_thread_agents(cls, **kwargs) -> None:
+        """Return the calling thread's leased agents to the idle pool (request_finished / task_postrun receiver)."""
+        leases = getattr(cls._local, 'leases', None)
+        if not leases:
+            return
+        max_idle = getattr(settings, 'AGENT_POOL_MAX_IDLE', 4)
+        for agent_name, agent in list(leases.items()):
+            cls._reset(agent)
+            with cls._lock:
+                cls._leased_count[agent_name] = max(0, cls._leased_count.get(agent_name, 0) - 1)
+                idle = cls._idle.setdefault(agent_name, [])
+                if cls._agents.get(agent_name) is type(agent) and len(idle) < max_idle:
+                    idle.append(agent)
+        leases.clear()
+
+    @classmethod
+    def warm_up(cls, agent_names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Construct one idle instance of each given agent (all registered agents
+        by default) that has none yet, e.g. when a worker boots.
+
+        Returns:
+            Dict[str, str]: 'ok' or the construction error per agent
+        """
+        results = {}
+        for agent_name in list(agent_names or cls._agents):
+            if agent_name not in cls._agents:
+                results[agent_name] = 'not registered'
+                continue
+            with cls._lock:
+                if cls._idle.get(agent_name):
+                    results[agent_name] = 'ok'
+                    continue
+            try:
+                agent = cls._construct(agent_name)
+            except Exception as e:
+                logger.warning(f"Could not warm up agent '{agent_name}': {e}")
+                results[agent_name] = str(e)
+                continue
+            with cls._lock:
+                cls._idle.setdefault(agent_name, []).append(agent)
+            results[agent_name] = 'ok'
+        logger.info(f"Warmed up agents: {', '.join(name for name, r in results.items() if r == 'ok')}")
+        return results
+
+    @classmethod
+    def health_check(cls) -> Dict:
+        """
+        Pool state and construction metrics per agent. An agent is healthy unless
+        its last construction failed. construction_seconds_avoided estimates the
+        time saved by reuse (reuses x average construction time).
+        """
+        agents = {}
+        with cls._lock:
+            for agent_name, agent_class in cls._agents.items():
+                stat = dict(cls._stat(agent_name))
+                average = stat['construction_seconds'] / stat['constructed'] if stat['constructed'] else 0.0
+                agents[agent_name] = {
+                    'class': agent_class.__name__,
+                    'healthy': stat['last_error'] is None,
+                    'idle': len(cls._idle.get(agent_name, [])),
+                    'leased': cls._leased_count.get(agent_name, 0),
+                    'constructed': stat['constructed'],
+                    'reused': stat['reused'],
+                    'failures': stat['failures'],
+                    'last_error': stat['last_error'],
+                    'avg_construction_ms': round(average * 1000, 2),
+                    'construction_seconds_avoided': round(stat['reused'] * average, 4),
+                }
+        return {
+            'healthy': all(agent['healthy'] for agent in agents.values()),
+            'constructed': sum(agent['constructed'] for agent in agents.values()),
+            'reused': sum(agent['reused'] for agent in agents.values()),
+            'construction_seconds_avoided': round(sum(a['construction_seconds_avoided'] for a in agents.values()), 4),
+            'agents': agents,
+        }
+
+    @classmethod
+    def clear_pool(cls) -> None:
+        """Drop all idle instances and metrics (the calling thread's leases too)."""
+        with cls._lock:
+            cls._idle.clear()
+            cls._leased_count.clear()
+            cls._stats.clear()
+        leases = getattr(cls._local, 'leases', None)
+        if leases:
+            leases.clear()
+
     @classmethod
     def list_agents(cls) -> list:
         """
         Get list of all registered agent names.
-        
+
         Returns:
             list: List of agent names
         """
         return list(cls._agents.keys())
-    
+
     @classmethod
     def is_registered(cls, agent_name: str) -> bool:
         """
         Check if an agent is registered.
-        
+
         Args:
             agent_name (str): Name of the agent to check
-            
+
         Returns:
             bool: True if registered, False otherwise
         """
         return agent_name in cls._agents
-
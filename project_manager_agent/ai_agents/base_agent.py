@@ -11,6 +11,8 @@ except ImportError:
 from django.conf import settings
 import logging
 
+from core.llm_scheduler import estimate_request_tokens, get_llm_scheduler, groq_key_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,9 +34,9 @@ class BaseAgent:
             raise ValueError("GROQ_API_KEY not found in environment variables. Please set it in .env file.")
         
         try:
-            # Simple initialization - just pass api_key
-            # Some versions of groq may have issues with extra arguments
-            self.client = Groq(api_key=self.api_key)
+            # Retries are left to the LLM scheduler (core/llm_scheduler.py)
+            self.client = Groq(api_key=self.api_key, max_retries=0)
+            self._pool_clients = {}  # clients for the other keys of the Groq key pool
         except TypeError as e:
             error_msg = str(e)
             if 'proxies' in error_msg or 'unexpected keyword' in error_msg:
@@ -57,6 +59,32 @@ class BaseAgent:
         self.model = model or getattr(settings, 'GROQ_MODEL', 'llama-3.1-8b-instant')
         self.agent_name = self.__class__.__name__
     
+    def _client_for(self, api_key):
+        """
+        Groq client for one key of the pool the LLM scheduler picks from
+        (GROQ_API_KEY first, GROQ_REC_API_KEY when it is out of budget).
+        """
+        if api_key == self.api_key:
+            return self.client
+        if api_key not in self._pool_clients:
+            self._pool_clients[api_key] = Groq(api_key=api_key, max_retries=0)
+        return self._pool_clients[api_key]
+    
+    def _build_messages(self, prompt, system_prompt=None):
+        messages = []
+        
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        messages.append({
+            "role": "user",
+            "content": prompt
+        })
+        return messages
+    
     def _call_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1024):
         """
         Make a call to the Groq LLM API.
@@ -71,24 +99,18 @@ class BaseAgent:
             str: LLM response text
         """
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
+            messages = self._build_messages(prompt, system_prompt)
+            scheduler = get_llm_scheduler()
+            response = scheduler.run(
+                lambda api_key: scheduler.parse_raw(api_key, self._client_for(api_key).chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )),
+                groq_key_pool(self.api_key),
+                estimate_request_tokens(messages, max_tokens),
+                actual_tokens=lambda response: response.usage.total_tokens,
             )
             
             return response.choices[0].message.content
@@ -97,6 +119,36 @@ class BaseAgent:
             logger.error(f"Error in {self.agent_name} LLM call: {str(e)}")
             raise
     
+    def _stream_llm(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1024):
+        """
+        Streaming variant of _call_llm: yields the response text piece by piece
+        as the model produces it (Groq stream=True).
+        
+        Yields:
+            str: Next piece of the response text
+        """
+        try:
+            messages = self._build_messages(prompt, system_prompt)
+            # Rate limits are reported when the stream is opened, so only that part is scheduled
+            scheduler = get_llm_scheduler()
+            stream = scheduler.run(
+                lambda api_key: scheduler.parse_raw(api_key, self._client_for(api_key).chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )),
+                groq_key_pool(self.api_key),
+                estimate_request_tokens(messages, max_tokens),
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Error in {self.agent_name} streaming LLM call: {str(e)}")
+            raise
+    
     def log_action(self, action, details=None):
         """
         Log agent actions for debugging and monitoring.
@@ -121,6 +173,13 @@ class BaseAgent:
         """
         return True
     
+    def reset_request_state(self):
+        """
+        Clear state kept for a single request. Agents are pooled and reused by
+        AgentRegistry, which calls this every time an instance is handed out
+        or returned. Override in subclasses that cache per-request data.
+        """
+    
     def process(self, **kwargs):
         """
         Main processing method. Must be implemented by subclasses.
@@ -0,0 +1,319 @@
+"""
+Context Assembler
+Builds the context block of a Knowledge QA prompt within a token budget.
+
+Every project, task, user, assignment and knowledge base article in the
+agent context becomes a candidate snippet (one line, or one block for a
+user's assignments). Snippets are scored against the question:
+
+    score = section weight for the question class
+          + sum of idf(term) over question terms found in the snippet
+          + SEMANTIC_WEIGHT * semantic search confidence of the project/task
+
+and packed greedily, best first, until the token budget is spent. A snippet
+larger than the room left is cut to fit when at least MIN_TRUNCATED_TOKENS
+remain, otherwise dropped (and logged). Selected snippets are rendered back
+in their original order under the usual section headers. The current project
+summary is always included.
+
+Assembled contexts are cached per (context version, question class, matched
+question terms, budget). Contexts carry a 'version': ContextManager's project
+version, or the Knowledge QA view's projects and their agent_context_version;
+contexts without one are keyed by a digest of their content.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .conversation_store import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'qa_context:'
+CACHE_TIMEOUT = 60 * 60
+
+SECTIONS = ('projects', 'project', 'tasks', 'users', 'assignments', 'knowledge')
+
+# Question class -> (trigger words, section weights)
+QUESTION_CLASSES = {
+    'users': (
+        {'user', 'users', 'member', 'members', 'team', 'role', 'roles', 'email', 'who', 'people', 'staff', 'active', 'inactive'},
+        {'users': 3.0, 'assignments': 1.5, 'tasks': 0.5},
+    ),
+    'assignments': (
+        {'assigned', 'assignee', 'assignment', 'assignments', 'workload', 'responsible', 'working'},
+        {'assignments': 3.0, 'users': 1.5, 'tasks': 1.0},
+    ),
+    'tasks': (
+        {'task', 'tasks', 'todo', 'blocked', 'overdue', 'deadline', 'due', 'priority', 'progress', 'done', 'review'},
+        {'tasks': 3.0, 'project': 1.0, 'projects': 0.5, 'assignments': 0.5},
+    ),
+    'projects': (
+        {'project', 'projects', 'portfolio', 'status'},
+        {'projects': 3.0, 'project': 2.0, 'tasks': 1.0},
+    ),
+}
+# A semantic search hit outranks the section weights of the question class
+SEMANTIC_WEIGHT = 4.0
+# Smallest room (tokens) worth filling with the cut-down start of a snippet that does not fit
+MIN_TRUNCATED_TOKENS = 32
+
+GENERAL_WEIGHTS = {'project': 1.0, 'projects': 1.0, 'tasks': 1.0, 'users': 0.5, 'assignments': 0.5, 'knowledge': 1.5}
+
+_TERM = re.compile(r'\w+')
+_STOPWORDS = frozenset(
+    'a an and are as at be by can do does for from has have how i in is it me my of on or '
+    'show tell the their them there these this to was what when where which with you your'.split()
+)
+
+
+def _terms(text: str) -> set:
+    return {t for t in _TERM.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS}
+
+
+def classify_question(question: str) -> str:
+    """The question class whose trigger words the question mentions most ('general' if none)."""
+    words = _terms(question)
+    best, best_hits = 'general', 0
+    for name, (triggers, _) in QUESTION_CLASSES.items():
+        hits = len(words & triggers)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+class _Snippet:
+    __slots__ = ('section', 'position', 'text', 'terms', 'tokens', 'key')
+
+    def __init__(self, section: str, position: int, text: str, key: Optional[Tuple[str, int]] = None):
+        self.section = section
+        self.position = position
+        self.text = text
+        self.terms = _terms(text)
+        self.tokens = estimate_tokens(text)
+        self.key = key
+
+    def truncated(self, tokens: int) -> '_Snippet':
+        """The start of the snippet, cut to about `tokens` tokens."""
+        return _Snippet(self.section, self.position, self.text[:max(0, tokens - 1) * 4].rstrip() + ' …\n', self.key)
+
+
+def _project_line(proj: Dict) -> str:
+    line = (f"- ID: {proj.get('id', 'N/A')}, Name: {proj.get('name', 'Unknown')}, "
+            f"Status: {proj.get('status', 'Unknown')}, Priority: {proj.get('priority', 'Unknown')}, "
+            f"Tasks: {proj.get('tasks_count', 0)}\n")
+    if proj.get('description'):
+        line += f"  Description: {proj.get('description', '')}\n"
+    return line
+
+
+def _task_line(task: Dict) -> str:
+    line = (f"- ID: {task.get('id', 'N/A')}, Title: {task.get('title', '')} "
+            f"(Status: {task.get('status', '')}, Priority: {task.get('priority', 'N/A')})")
+    if task.get('assignee_username'):
+        line += f" [Assigned to: {task.get('assignee_username')}]"
+    if task.get('project_name'):
+        line += f" [Project: {task.get('project_name')}]"
+    return line + "\n"
+
+
+def _user_lines(user: Dict) -> str:
+    text = (f"- ID: {user.get('id', 'N/A')}, Username: {user.get('username', 'Unknown')}, "
+            f"Name: {user.get('name', user.get('username', 'Unknown'))}\n")
+    if 'role' in user:
+        text += f"  Role: {user.get('role', 'team_member')}\n"
+    if 'email' in user:
+        text += f"  Email: {user.get('email', 'N/A')}\n"
+    text += f"  Status: {'Active' if user.get('is_active', True) else 'Inactive'}\n"
+    return text
+
+
+def _assignment_block(assignment: Dict) -> str:
+    name = assignment.get('name', assignment.get('username', 'Unknown'))
+    username = assignment.get('username', 'Unknown')
+    if assignment.get('total_tasks', 0) <= 0:
+        return f"\n👤 {name} (Username: {username}) - No tasks assigned\n"
+    text = f"\n👤 {name} (Username: {username}) - {assignment.get('total_tasks', 0)} task(s) assigned:\n"
+    for project_info in assignment.get('projects', []):
+        text += f"  📁 Project: {project_info.get('project_name', 'Unknown')}\n"
+        for task in project_info.get('tasks', []):
+            text += f"    - Task: \"{task.get('title', 'Unknown')}\" (Status: {task.get('status', 'N/A')}, Priority: {task.get('priority', 'N/A')})\n"
+    return text
+
+
+def _knowledge_line(article: Dict) -> str:
+    return f"- {article.get('title', 'Untitled')} ({article.get('category', 'general')}): {article.get('content', '')}\n"
+
+
+class ContextAssembler:
+    """Turns an agent context dict into a prompt context string of at most ~budget tokens."""
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget if budget is not None else getattr(settings, 'QA_CONTEXT_TOKEN_BUDGET', 3000)
+
+    def candidates(self, context: Dict, available_users: Optional[List[Dict]]) -> Tuple[List[_Snippet], List[str]]:
+        """Candidate snippets plus the always-included (pinned) text."""
+        snippets, pinned = [], []
+        context = context or {}
+        for i, proj in enumerate(context.get('all_projects') or []):
+            snippets.append(_Snippet('projects', i, _project_line(proj), ('project', proj.get('id'))))
+
+        project = context.get('project')
+        if project:
+            pinned.append(
+                f"\nCurrent Project (Selected):\n"
+                f"- Name: {project.get('name', 'Unknown')}\n"
+                f"- ID: {project.get('id', 'Unknown')}\n"
+                f"- Status: {project.get('status', 'Unknown')}\n"
+                f"- Tasks: {project.get('tasks_count', len(project.get('tasks') or []))} tasks\n"
+            )
+
+        tasks = context.get('tasks')
+        if tasks is None and project:
+            tasks = project.get('tasks')
+        for i, task in enumerate(tasks or []):
+            snippets.append(_Snippet('tasks', i, _task_line(task), ('task', task.get('id'))))
+
+        for i, user in enumerate(available_users or []):
+            snippets.append(_Snippet('users', i, _user_lines(user)))
+        for i, assignment in enumerate(context.get('user_assignments') or []):
+            snippets.append(_Snippet('assignments', i, _assignment_block(assignment)))
+        for i, article in enumerate(context.get('knowledge_base') or []):
+            snippets.append(_Snippet('knowledge', i, _knowledge_line(article)))
+        return snippets, pinned
+
+    @staticmethod
+    def _headers(totals: Dict[str, int], context: Dict, available_users) -> Dict[str, str]:
+        """Section header templates; {shown} is filled in when only some snippets of the section fit."""
+        assignments = (context or {}).get('user_assignments') or []
+        return {
+            'projects': f"\nAll Your Projects ({totals.get('projects', 0)} total{{shown}}):\n",
+            'tasks': "\nCurrent Tasks{shown}:\n",
+            'users': (
+                f"\n\n📋 USERS ADDED BY COMPANY USER ({len(available_users or [])} total{{shown}}):\n"
+                "NOTE: You have READ-ONLY access to this user information. You can view and report on users, "
+                "but you CANNOT create, update, or delete users.\n\n"
+            ),
+            'assignments': (
+                "\n\n📋 USER-TASK ASSIGNMENTS{shown}:\n"
+                f"Total Users with Assignments: {len([a for a in assignments if a.get('total_tasks', 0) > 0])}\n"
+            ),
+            'knowledge': "\n\nKnowledge Base Articles{shown}:\n",
+        }
+
+    def select(self, question: str, snippets: List[_Snippet], budget: int,
+               boosts: Optional[Dict[Tuple[str, int], float]] = None, header_tokens: Optional[Dict[str, int]] = None) -> List[_Snippet]:
+        """Greedy best-first packing of snippets into budget tokens (section headers included)."""
+        question_class = classify_question(question)
+        weights = QUESTION_CLASSES[question_class][1] if question_class in QUESTION_CLASSES else GENERAL_WEIGHTS
+        query = _terms(question)
+        df = {}
+        for snippet in snippets:
+            for term in query & snippet.terms:
+                df[term] = df.get(term, 0) + 1
+        idf = {term: math.log(1 + len(snippets) / count) for term, count in df.items()}
+        boosts = boosts or {}
+        header_tokens = header_tokens or {}
+
+        def score(snippet):
+            value = weights.get(snippet.section, 0.0) + sum(idf[t] for t in query & snippet.terms if t in idf)
+            if snippet.key is not None:
+                value += SEMANTIC_WEIGHT * boosts.get(snippet.key, 0.0)
+            return value
+
+        # Stable sort: ties keep the context's own order
+        ranked = sorted(snippets, key=score, reverse=True)
+        selected, used, opened, dropped = [], 0, set(), {}
+        for snippet in ranked:
+            header = 0 if snippet.section in opened else header_tokens.get(snippet.section, 0)
+            if used + header + snippet.tokens > budget:
+                room = budget - used - header
+                if room < MIN_TRUNCATED_TOKENS:
+                    dropped[snippet.section] = dropped.get(snippet.section, 0) + 1
+                    continue
+                snippet = snippet.truncated(room)
+            selected.append(snippet)
+            opened.add(snippet.section)
+            used += header + snippet.tokens
+        if dropped:
+            logger.info(f"Context budget of {budget} tokens: left out {dropped} snippets per section")
+        return selected
+
+    def render(self, selected: List[_Snippet], pinned: List[str], headers: Dict[str, str], totals: Dict[str, int]) -> str:
+        by_section = {}
+        for snippet in sorted(selected, key=lambda s: (SECTIONS.index(s.section), s.position)):
+            by_section.setdefault(snippet.section, []).append(snippet.text)
+        parts = []
+        for section in SECTIONS:
+            if section == 'project':
+                parts.extend(pinned)
+                continue
+            texts = by_section.get(section)
+            if not texts:
+                continue
+            if len(texts) == totals[section]:
+                shown = ""
+            elif section in ('projects', 'users'):  # header already reads "(N total)"
+                shown = f", {len(texts)} most relevant shown"
+            else:
+                shown = f" ({len(texts)} of {totals[section]} most relevant)"
+            header = headers[section].format(shown=shown)
+            parts.append(header + ''.join(texts))
+        return ''.join(parts)
+
+    def _cache_key(self, question: str, snippets: List[_Snippet], context: Dict, available_users, boosts) -> str:
+        vocabulary = set()
+        for snippet in snippets:
+            vocabulary |= snippet.terms
+        matched = sorted(_terms(question) & vocabulary)
+        context = context or {}
+        project = context.get('project') or {}
+        if context.get('version') is not None:
+            source = f"project:{project.get('id')}:v{context['version']}:" + json.dumps(available_users or [], sort_keys=True, default=str)
+        else:
+            source = json.dumps([context, available_users or []], sort_keys=True, default=str)
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (source, classify_question(question), ' '.join(matched), str(self.budget),
+                     json.dumps(sorted((f'{k[0]}:{k[1]}', round(v, 3)) for k, v in (boosts or {}).items()))):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return f"{CACHE_PREFIX}{digest.hexdigest()}"
+
+    def assemble(self, question: str, context: Optional[Dict], available_users: Optional[List[Dict]] = None,
+                 boosts: Optional[Dict[Tuple[str, int], float]] = None) -> str:
+        """
+        Context string for the prompt.
+
+        Args:
+            question (str): User's question
+            context (Dict): Agent context ('all_projects', 'project', 'tasks', 'user_assignments', 'knowledge_base')
+            available_users (List[Dict]): Users the company user added
+            boosts (Dict): Extra relevance per ('project' | 'task', id), e.g. semantic search confidence
+
+        Returns:
+            str: Context text of about budget tokens or less
+        """
+        snippets, pinned = self.candidates(context, available_users)
+        cache_key = self._cache_key(question, snippets, context, available_users, boosts)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        totals = {}
+        for snippet in snippets:
+            totals[snippet.section] = totals.get(snippet.section, 0) + 1
+        headers = self._headers(totals, context, available_users)
+        # + room for the "(k of n most relevant)" note
+        header_tokens = {section: estimate_tokens(text) + 8 for section, text in headers.items()}
+        budget = max(0, self.budget - sum(estimate_tokens(text) for text in pinned))
+        selected = self.select(question, snippets, budget, boosts, header_tokens)
+        assembled = self.render(selected, pinned, headers, totals)
+        cache.set(cache_key, assembled, CACHE_TIMEOUT)
+        return assembled
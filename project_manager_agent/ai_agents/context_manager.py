@@ -4,6 +4,7 @@ Centralized context service for all agents to share project context efficiently.
 """
 
 from typing import Dict, List, Optional
+from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 from django.db import models
@@ -19,9 +20,13 @@ class ContextManager:
     """
     Centralized context manager for project data.
     Provides cached, versioned context for all agents.
+    
+    Cache keys carry the project's (or user's) context version, which signals
+    bump on Task, Project, TeamMember and dependency changes. A change makes the
+    old entries unreachable, so the TTL only bounds memory use, not staleness.
     """
     
-    CACHE_TIMEOUT = 300  # 5 minutes
+    CACHE_TIMEOUT = getattr(settings, 'PM_CONTEXT_CACHE_TIMEOUT', 60 * 60 * 24)
     CACHE_PREFIX = "pm_context_"
     
     @staticmethod
@@ -39,7 +44,11 @@ class ContextManager:
         Returns:
             Dict: Comprehensive project context
         """
-        cache_key = f"{ContextManager.CACHE_PREFIX}project_{project_id}_{include_tasks}_{include_team}_{include_dependencies}"
+        version = Project.context_version(project_id)
+        cache_key = (
+            f"{ContextManager.CACHE_PREFIX}project_{project_id}_v{version}_"
+            f"{include_tasks}_{include_team}_{include_dependencies}"
+        )
         
         # Try cache first
         cached_context = cache.get(cache_key)
@@ -48,9 +57,7 @@ class ContextManager:
             return cached_context
         
         try:
-            project = Project.objects.select_related(
-                'owner', 'project_manager', 'company', 'industry'
-            ).prefetch_related('tasks', 'team_members').get(id=project_id)
+            project = Project.objects.select_related('owner').get(id=project_id)
         except Project.DoesNotExist:
             return {'error': f'Project {project_id} not found'}
         
@@ -71,84 +78,110 @@ class ContextManager:
                 'updated_at': project.updated_at.isoformat(),
             },
             'generated_at': timezone.now().isoformat(),
-            'version': 1
+            'version': version
         }
         
         if include_tasks:
-            tasks = Task.objects.filter(project=project).select_related(
-                'assignee', 'project'
-            ).prefetch_related('depends_on', 'dependent_tasks', 'subtasks')
-            
-            context['tasks'] = []
-            for task in tasks:
-                task_data = {
-                    'id': task.id,
-                    'title': task.title,
-                    'description': task.description,
-                    'status': task.status,
-                    'priority': task.priority,
-                    'due_date': task.due_date.isoformat() if task.due_date else None,
-                    'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                    'actual_hours': float(task.actual_hours) if task.actual_hours else None,
-                    'progress_percentage': task.progress_percentage,
-                    'assignee_id': task.assignee.id if task.assignee else None,
-                    'assignee_username': task.assignee.username if task.assignee else None,
-                    'created_at': task.created_at.isoformat(),
-                    'updated_at': task.updated_at.isoformat(),
-                }
-                
-                if include_dependencies:
-                    task_data['dependencies'] = [dep.id for dep in task.depends_on.all()]
-                    task_data['dependent_tasks'] = [dep.id for dep in task.dependent_tasks.all()]
-                    task_data['dependency_count'] = task.depends_on.count()
-                    task_data['dependent_count'] = task.dependent_tasks.count()
-                
-                context['tasks'].append(task_data)
-            
-            # Task statistics
-            context['task_stats'] = {
-                'total': len(context['tasks']),
-                'by_status': {
-                    status: sum(1 for t in context['tasks'] if t['status'] == status)
-                    for status in ['todo', 'in_progress', 'review', 'done', 'blocked']
-                },
-                'by_priority': {
-                    priority: sum(1 for t in context['tasks'] if t['priority'] == priority)
-                    for priority in ['low', 'medium', 'high']
-                },
-                'completed': sum(1 for t in context['tasks'] if t['status'] == 'done'),
-                'completion_rate': round(
-                    (sum(1 for t in context['tasks'] if t['status'] == 'done') / len(context['tasks']) * 100)
-                    if context['tasks'] else 0, 2
-                )
-            }
+            context['tasks'], context['task_stats'] = ContextManager._build_tasks(project.id, include_dependencies)
         
         if include_team:
-            team_members = project.team_members.select_related('user').all()
-            context['team'] = []
-            for member in team_members:
-                context['team'].append({
-                    'user_id': member.user.id,
-                    'username': member.user.username,
-                    'role': member.role,
-                    'name': member.user.get_full_name() or member.user.username,
-                })
-            
-            # Add owner if not in team
-            owner_in_team = any(m['user_id'] == project.owner.id for m in context['team'])
-            if not owner_in_team:
-                context['team'].append({
-                    'user_id': project.owner.id,
-                    'username': project.owner.username,
-                    'role': 'owner',
-                    'name': project.owner.get_full_name() or project.owner.username,
-                })
+            context['team'] = ContextManager._build_team(project)
         
         # Cache the context
         cache.set(cache_key, context, ContextManager.CACHE_TIMEOUT)
         
         return context
     
+    @staticmethod
+    def _build_tasks(project_id: int, include_dependencies: bool):
+        """
+        Task dicts and task statistics in one pass: one query for the task rows and,
+        with dependencies, one for the depends_on through-table (both directions,
+        so edges to tasks of other projects are included as before).
+        """
+        dependencies: Dict[int, List[int]] = {}
+        dependents: Dict[int, List[int]] = {}
+        if include_dependencies:
+            edges = Task.depends_on.through.objects.filter(
+                models.Q(from_task__project_id=project_id) | models.Q(to_task__project_id=project_id)
+            ).order_by('id').values_list('from_task_id', 'to_task_id')
+            for task_id, dep_id in edges:
+                dependencies.setdefault(task_id, []).append(dep_id)
+                dependents.setdefault(dep_id, []).append(task_id)
+        
+        rows = Task.objects.filter(project_id=project_id).values(
+            'id', 'title', 'description', 'status', 'priority', 'due_date', 'estimated_hours',
+            'actual_hours', 'progress_percentage', 'assignee_id', 'created_at', 'updated_at',
+            assignee_username=models.F('assignee__username'),
+        )
+        by_status = dict.fromkeys(['todo', 'in_progress', 'review', 'done', 'blocked'], 0)
+        by_priority = dict.fromkeys(['low', 'medium', 'high'], 0)
+        tasks = []
+        for row in rows:
+            task_data = {
+                'id': row['id'],
+                'title': row['title'],
+                'description': row['description'],
+                'status': row['status'],
+                'priority': row['priority'],
+                'due_date': row['due_date'].isoformat() if row['due_date'] else None,
+                'estimated_hours': float(row['estimated_hours']) if row['estimated_hours'] else None,
+                'actual_hours': float(row['actual_hours']) if row['actual_hours'] else None,
+                'progress_percentage': row['progress_percentage'],
+                'assignee_id': row['assignee_id'],
+                'assignee_username': row['assignee_username'],
+                'created_at': row['created_at'].isoformat(),
+                'updated_at': row['updated_at'].isoformat(),
+            }
+            if include_dependencies:
+                task_data['dependencies'] = dependencies.get(row['id'], [])
+                task_data['dependent_tasks'] = dependents.get(row['id'], [])
+                task_data['dependency_count'] = len(task_data['dependencies'])
+                task_data['dependent_count'] = len(task_data['dependent_tasks'])
+            tasks.append(task_data)
+            if row['status'] in by_status:
+                by_status[row['status']] += 1
+            if row['priority'] in by_priority:
+                by_priority[row['priority']] += 1
+        
+        completed = by_status['done']
+        task_stats = {
+            'total': len(tasks),
+            'by_status': by_status,
+            'by_priority': by_priority,
+            'completed': completed,
+            'completion_rate': round(completed / len(tasks) * 100 if tasks else 0, 2),
+        }
+        return tasks, task_stats
+    
+    @staticmethod
+    def _build_team(project) -> List[Dict]:
+        """Team members (one query) plus the owner if they are not a member."""
+        def display_name(first_name, last_name, username):
+            # Same as User.get_full_name(), without loading User instances
+            return f"{first_name} {last_name}".strip() or username
+        
+        team = [
+            {
+                'user_id': user_id,
+                'username': username,
+                'role': role,
+                'name': display_name(first_name, last_name, username),
+            }
+            for user_id, username, first_name, last_name, role in project.team_members.values_list(
+                'user_id', 'user__username', 'user__first_name', 'user__last_name', 'role'
+            )
+        ]
+        owner = project.owner
+        if not any(member['user_id'] == owner.id for member in team):
+            team.append({
+                'user_id': owner.id,
+                'username': owner.username,
+                'role': 'owner',
+                'name': display_name(owner.first_name, owner.last_name, owner.username),
+            })
+        return team
+    
     @staticmethod
     def get_user_projects_context(user_id: int, limit: int = 50) -> Dict:
         """
@@ -161,7 +194,8 @@ class ContextManager:
         Returns:
             Dict: Context with all user projects
         """
-        cache_key = f"{ContextManager.CACHE_PREFIX}user_projects_{user_id}_{limit}"
+        version = Project.user_context_version(user_id)
+        cache_key = f"{ContextManager.CACHE_PREFIX}user_projects_{user_id}_v{version}_{limit}"
         
         cached = cache.get(cache_key)
         if cached:
@@ -197,19 +231,17 @@ class ContextManager:
     @staticmethod
     def invalidate_project_context(project_id: int):
         """
-        Invalidate cached context for a project.
+        Invalidate cached context for a project (all include_* variations) and the
+        project lists of its owner and manager. Signals already do this on model
+        changes; call it after writes that bypass them (queryset.update, raw SQL).
         
         Args:
             project_id (int): Project ID
         """
-        # Invalidate all variations
-        patterns = [
-            f"{ContextManager.CACHE_PREFIX}project_{project_id}_*",
-            f"{ContextManager.CACHE_PREFIX}user_projects_*",
-        ]
-        
-        # Note: Django cache doesn't support pattern deletion easily
-        # In production, use Redis with pattern deletion
+        Project.bump_context_version(project_id)
+        Project.bump_user_context_version(*(
+            Project.objects.filter(pk=project_id).values_list('owner_id', 'project_manager_id').first() or ()
+        ))
         logger.info(f"Context invalidated for project {project_id}")
     
     @staticmethod
@@ -0,0 +1,166 @@
+"""
+Conversation Store
+Knowledge QA conversation memory shared by every worker process.
+
+With CONVERSATION_REDIS_URL set, a session is a Redis list of JSON entries:
+a turn is one RPUSH + LTRIM + EXPIRE round trip (no read-modify-write of the
+whole history) and reads are a single LRANGE of the tail. Without Redis, or
+while Redis can't be reached, turns are kept in QAConversationMessage rows;
+those of sessions idle for longer than the TTL are deleted by purge_expired()
+(the purge_conversation_messages_task Celery task).
+"""
+
+import json
+import logging
+import math
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English text)."""
+    return math.ceil(len(text or '') / 4)
+
+
+def entry_tokens(entry: Dict) -> int:
+    return estimate_tokens(entry.get('question', '')) + estimate_tokens(entry.get('answer', ''))
+
+
+class ConversationStore:
+    """
+    Append-only per-session history capped at max_messages entries that
+    expire ttl seconds after the session's last turn.
+    """
+
+    KEY_PREFIX = 'qa_conversation:'
+
+    def __init__(self, redis_url: Optional[str] = None, max_messages: int = 20, ttl: int = 3600):
+        self.redis_url = redis_url
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.redis = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = redis.Redis.from_url(
+                    redis_url, decode_responses=True, socket_timeout=2, socket_connect_timeout=2,
+                )
+            else:
+                logger.warning("CONVERSATION_REDIS_URL is set but the redis package is not installed; using the database")
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def append(self, session_id: str, entry: Dict) -> None:
+        """Add one turn and drop the oldest beyond max_messages."""
+        if self.redis is not None:
+            try:
+                key = self._key(session_id)
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.rpush(key, json.dumps(entry, default=str))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Redis conversation store unavailable, writing to the database: {e}")
+        self._db_append(session_id, entry)
+
+    def recent(self, session_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """The last `limit` turns (all kept turns by default), oldest first."""
+        limit = self.max_messages if limit is None else min(limit, self.max_messages)
+        if limit <= 0:
+            return []
+        if self.redis is not None:
+            try:
+                return [json.loads(raw) for raw in self.redis.lrange(self._key(session_id), -limit, -1)]
+            except redis.RedisError as e:
+                logger.warning(f"Redis conversation store unavailable, reading from the database: {e}")
+        return self._db_recent(session_id, limit)
+
+    def within_budget(self, session_id: str, max_tokens: int,
+                      count_tokens: Callable[[Dict], int] = entry_tokens) -> List[Dict]:
+        """The most recent turns whose combined size fits max_tokens, oldest first."""
+        selected, used = [], 0
+        for entry in reversed(self.recent(session_id)):
+            cost = count_tokens(entry)
+            if used + cost > max_tokens:
+                break
+            selected.append(entry)
+            used += cost
+        selected.reverse()
+        return selected
+
+    def clear(self, session_id: str) -> None:
+        from core.models import QAConversationMessage
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._key(session_id))
+            except redis.RedisError as e:
+                logger.warning(f"Redis conversation store unavailable: {e}")
+        QAConversationMessage.objects.filter(session_id=session_id).delete()
+
+    def purge_expired(self) -> int:
+        """Delete the database turns of sessions whose last turn is older than ttl; returns the rows deleted."""
+        from core.models import QAConversationMessage
+        expired = (
+            QAConversationMessage.objects.order_by().values('session_id')
+            .annotate(last_turn=Max('created_at'))
+            .filter(last_turn__lt=timezone.now() - timedelta(seconds=self.ttl))
+            .values('session_id')
+        )
+        deleted, _ = QAConversationMessage.objects.filter(session_id__in=expired).delete()
+        return deleted
+
+    def _db_append(self, session_id: str, entry: Dict) -> None:
+        from core.models import QAConversationMessage
+        message = QAConversationMessage.objects.create(session_id=session_id, entry=entry)
+        # Ids below the max_messages-th newest row are trimmed
+        cutoff = list(
+            QAConversationMessage.objects.filter(session_id=session_id, id__lte=message.id)
+            .order_by('-id').values_list('id', flat=True)[self.max_messages - 1:self.max_messages]
+        )
+        if cutoff:
+            QAConversationMessage.objects.filter(session_id=session_id, id__lt=cutoff[0]).delete()
+
+    def _db_recent(self, session_id: str, limit: int) -> List[Dict]:
+        from core.models import QAConversationMessage
+        rows = list(
+            QAConversationMessage.objects.filter(session_id=session_id)
+            .order_by('-id').values_list('entry', 'created_at')[:limit]
+        )
+        # Like the Redis key, the whole session expires ttl seconds after its last turn
+        if not rows or rows[0][1] < timezone.now() - timedelta(seconds=self.ttl):
+            return []
+        return [entry for entry, _ in reversed(rows)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Process-wide store configured from the CONVERSATION_* settings."""
+    global _store
+    config = (
+        getattr(settings, 'CONVERSATION_REDIS_URL', ''),
+        getattr(settings, 'CONVERSATION_MAX_MESSAGES', 20),
+        getattr(settings, 'CONVERSATION_TTL', 3600),
+    )
+    with _store_lock:
+        if _store is None or (_store.redis_url, _store.max_messages, _store.ttl) != config:
+            _store = ConversationStore(*config)
+        return _store
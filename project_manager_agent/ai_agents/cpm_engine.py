@@ -0,0 +1,236 @@
+"""
+Critical Path Method (CPM) Engine
+Iterative CPM over a task dependency graph using Kahn's algorithm, with all
+dates held as integer workday offsets from the project start (see
+workday_calendar.WorkdayCalendar for the date <-> offset conversion).
+
+Dependency cycles are detected in the same pass: when no task is ready, the
+first remaining task is scheduled with its unresolved (cyclic) dependencies
+ignored, so the rest of the project still gets a schedule.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Workdays between a dependency's finish and its dependent's start
+# (a dependent starts on the next workday, matching the Gantt scheduling rules)
+DEFAULT_LAG = 1
+
+
+class CPMSchedule:
+    """
+    Result of a CPM run. Arrays are aligned with task_ids; all values are
+    integer workday offsets from the project start (offset 0).
+    """
+
+    def __init__(self, task_ids, durations, es, ef, ls, lf, free_float, order, cyclic, edges, lag):
+        self.task_ids = task_ids
+        self.index = {task_id: i for i, task_id in enumerate(task_ids.tolist())}
+        self.durations = durations
+        self.es = es
+        self.ef = ef
+        self.ls = ls
+        self.lf = lf
+        self.total_float = ls - es
+        self.free_float = free_float
+        self.order = order  # topological order (indices), cycle breakers placed where they were forced
+        self.cyclic = cyclic  # bool mask: task is on, or downstream of, a dependency cycle
+        self.edges = edges  # (2, m) array of [predecessor index, successor index]
+        self.lag = lag
+
+    @property
+    def size(self) -> int:
+        return len(self.task_ids)
+
+    @property
+    def project_duration(self) -> int:
+        """Workdays from project start to the last early finish (inclusive)."""
+        return int(self.ef.max()) + 1 if self.size else 0
+
+    @property
+    def critical(self) -> np.ndarray:
+        return self.total_float <= 0
+
+    @property
+    def has_cycle(self) -> bool:
+        return bool(self.cyclic.any())
+
+    @property
+    def cyclic_task_ids(self) -> List[int]:
+        return self.task_ids[self.cyclic].tolist()
+
+    def critical_task_ids(self) -> List[int]:
+        """Critical tasks ordered by early start."""
+        idx = np.flatnonzero(self.critical)
+        idx = idx[np.argsort(self.es[idx], kind='stable')]
+        return self.task_ids[idx].tolist()
+
+
+def _csr(n: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Adjacency in compressed form: neighbours of u are nbr[ptr[u]:ptr[u + 1]]."""
+    order = np.argsort(src, kind='stable')
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(ptr, src + 1, 1)
+    return np.cumsum(ptr), dst[order]
+
+
+def compute_cpm(
+    task_ids: Sequence[int],
+    durations: Sequence[int],
+    dependencies: Iterable[Tuple[int, int]],
+    lag: int = DEFAULT_LAG,
+) -> CPMSchedule:
+    """
+    Run the forward and backward CPM passes.
+
+    Args:
+        task_ids: Task IDs (order is kept in the result arrays)
+        durations: Duration in workdays per task (values < 1 are treated as 1)
+        dependencies: (predecessor_id, successor_id) pairs; pairs referencing unknown tasks are ignored
+        lag: Workdays between a predecessor's finish and its successor's start
+
+    Returns:
+        CPMSchedule
+    """
+    ids = np.asarray(list(task_ids), dtype=np.int64)
+    n = len(ids)
+    dur = np.maximum(np.asarray(list(durations), dtype=np.int64), 1) if n else np.zeros(0, dtype=np.int64)
+    index = {task_id: i for i, task_id in enumerate(ids.tolist())}
+
+    pairs = {
+        (index[p], index[s]) for p, s in dependencies
+        if p in index and s in index and p != s
+    }
+    edges = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2).T
+    src, dst = edges[0], edges[1]
+    succ_ptr, succ = _csr(n, src, dst)
+    pred_ptr, pred = _csr(n, dst, src)
+    succ_ptr, succ, pred_ptr, pred = succ_ptr.tolist(), succ.tolist(), pred_ptr.tolist(), pred.tolist()
+    dur_list = dur.tolist()
+
+    # Forward pass (Kahn): a task is scheduled once all its predecessors are
+    indegree = np.bincount(dst, minlength=n).tolist() if n else []
+    es = [0] * n
+    ef = [0] * n
+    done = [False] * n
+    cyclic = [False] * n
+    position = [0] * n
+    order: List[int] = []
+    ready = deque(i for i in range(n) if indegree[i] == 0)
+    next_unscheduled = 0
+
+    while len(order) < n:
+        if not ready:
+            # Dependency cycle: nothing is ready. Everything left is on or behind a cycle;
+            # force the first remaining task, ignoring its unscheduled predecessors.
+            while done[next_unscheduled]:
+                next_unscheduled += 1
+            for i in range(next_unscheduled, n):
+                if not done[i]:
+                    cyclic[i] = True
+            indegree[next_unscheduled] = 0
+            ready.append(next_unscheduled)
+        u = ready.popleft()
+        if done[u]:
+            continue
+        done[u] = True
+        position[u] = len(order)
+        order.append(u)
+        ef[u] = es[u] + dur_list[u] - 1
+        start_after = ef[u] + lag
+        for k in range(succ_ptr[u], succ_ptr[u + 1]):
+            v = succ[k]
+            if done[v]:
+                continue  # edge into a cycle breaker - ignored
+            if start_after > es[v]:
+                es[v] = start_after
+            indegree[v] -= 1
+            if indegree[v] == 0:
+                ready.append(v)
+
+    # Backward pass in reverse topological order; edges ignored in the forward pass
+    # (successor placed earlier in the order) are ignored here too
+    project_end = max(ef) if n else 0
+    lf = [project_end] * n
+    ls = [0] * n
+    free_float = [0] * n
+    for u in reversed(order):
+        latest = project_end
+        earliest_successor = None
+        for k in range(succ_ptr[u], succ_ptr[u + 1]):
+            v = succ[k]
+            if position[v] < position[u]:
+                continue
+            if ls[v] - lag < latest:
+                latest = ls[v] - lag
+            if earliest_successor is None or es[v] < earliest_successor:
+                earliest_successor = es[v]
+        lf[u] = latest
+        ls[u] = latest - dur_list[u] + 1
+        if earliest_successor is None:
+            free_float[u] = ls[u] - es[u]
+        else:
+            free_float[u] = earliest_successor - lag - ef[u]
+
+    as_array = lambda values: np.asarray(values, dtype=np.int64)
+    return CPMSchedule(
+        task_ids=ids,
+        durations=dur,
+        es=as_array(es),
+        ef=as_array(ef),
+        ls=as_array(ls),
+        lf=as_array(lf),
+        free_float=as_array(free_float),
+        order=as_array(order),
+        cyclic=np.asarray(cyclic, dtype=bool),
+        edges=edges,
+        lag=lag,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Per schedule-version cache
+# ---------------------------------------------------------------------------
+
+_CACHE_SIZE = 128
+_cache: "OrderedDict[tuple, CPMSchedule]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_project_cpm(
+    project_id: int,
+    schedule_version: int,
+    task_ids: Sequence[int],
+    durations: Sequence[int],
+    dependencies: Iterable[Tuple[int, int]],
+    lag: int = DEFAULT_LAG,
+) -> CPMSchedule:
+    """
+    compute_cpm cached against the project's schedule_version (bumped whenever tasks
+    or dependencies change). Durations are part of the key because callers may derive
+    them from proposed dates rather than from the stored tasks.
+    """
+    key = (project_id, schedule_version, lag, hash((tuple(task_ids), tuple(durations))))
+    with _cache_lock:
+        schedule = _cache.get(key)
+        if schedule is not None:
+            _cache.move_to_end(key)
+            return schedule
+    schedule = compute_cpm(task_ids, durations, dependencies, lag=lag)
+    with _cache_lock:
+        _cache[key] = schedule
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return schedule
+
+
+def clear_cache(project_id: Optional[int] = None) -> None:
+    with _cache_lock:
+        if project_id is None:
+            _cache.clear()
+        else:
+            for key in [k for k in _cache if k[0] == project_id]:
+                del _cache[key]
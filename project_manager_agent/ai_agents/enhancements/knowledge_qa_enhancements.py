@@ -4,12 +4,13 @@ Implements conversational memory, answer quality enhancement, proactive insights
 """
 
 from typing import Dict, List, Optional, Tuple
-from django.core.cache import cache
 from datetime import datetime, timedelta
 import json
 import logging
 import math
 
+from ..conversation_store import estimate_tokens, get_conversation_store
+
 logger = logging.getLogger(__name__)
 
 # Try to import OpenAI for embeddings
@@ -29,8 +30,7 @@ except (ImportError, AttributeError):
 class KnowledgeQAEnhancements:
     """Enhancement methods for Knowledge QA Agent"""
     
-    CACHE_PREFIX = "qa_conversation_"
-    CACHE_TIMEOUT = 3600  # 1 hour
+    HISTORY_TOKEN_BUDGET = 600  # prompt tokens spent on previous turns
     
     @staticmethod
     def get_conversation_history(session_id: str, limit: int = 10) -> List[Dict]:
@@ -44,9 +44,7 @@ class KnowledgeQAEnhancements:
         Returns:
             List[Dict]: Conversation history
         """
-        cache_key = f"{KnowledgeQAEnhancements.CACHE_PREFIX}{session_id}"
-        history = cache.get(cache_key, [])
-        return history[-limit:] if len(history) > limit else history
+        return get_conversation_store().recent(session_id, limit)
     
     @staticmethod
     def add_to_conversation(session_id: str, question: str, answer: str, context: Dict = None):
@@ -59,10 +57,7 @@ class KnowledgeQAEnhancements:
             answer (str): Agent's answer
             context (Dict): Optional context
         """
-        cache_key = f"{KnowledgeQAEnhancements.CACHE_PREFIX}{session_id}"
-        history = cache.get(cache_key, [])
-        
-        history.append({
+        get_conversation_store().append(session_id, {
             'timestamp': datetime.now().isoformat(),
             'question': question,
             'answer': answer[:500],  # Limit answer length
@@ -71,33 +66,38 @@ class KnowledgeQAEnhancements:
                 'task_count': len(context.get('tasks', [])) if context else 0,
             } if context else None
         })
-        
-        # Keep only last 20 messages
-        if len(history) > 20:
-            history = history[-20:]
-        
-        cache.set(cache_key, history, KnowledgeQAEnhancements.CACHE_TIMEOUT)
     
     @staticmethod
-    def build_conversation_context(session_id: str) -> str:
+    def _format_turn(i: int, msg: Dict) -> str:
+        return f"{i}. Q: {msg['question']}\n   A: {msg['answer'][:200]}...\n\n"
+    
+    @staticmethod
+    def build_conversation_context(session_id: str, max_tokens: Optional[int] = None) -> str:
         """
         Build conversation context string for LLM.
         
         Args:
             session_id (str): Session identifier
+            max_tokens (int): Optional token budget; the most recent turns that fit
+                are used instead of the last five
             
         Returns:
             str: Formatted conversation context
         """
-        history = KnowledgeQAEnhancements.get_conversation_history(session_id, limit=5)
+        if max_tokens is None:
+            history = KnowledgeQAEnhancements.get_conversation_history(session_id, limit=5)
+        else:
+            history = get_conversation_store().within_budget(
+                session_id, max_tokens,
+                count_tokens=lambda msg: estimate_tokens(KnowledgeQAEnhancements._format_turn(0, msg)),
+            )
         
         if not history:
             return ""
         
         context_str = "\n\nPrevious Conversation:\n"
         for i, msg in enumerate(history, 1):
-            context_str += f"{i}. Q: {msg['question']}\n"
-            context_str += f"   A: {msg['answer'][:200]}...\n\n"
+            context_str += KnowledgeQAEnhancements._format_turn(i, msg)
         
         return context_str
     
@@ -198,7 +198,54 @@ class KnowledgeQAEnhancements:
                     recommendations.append(sentence.strip())
         
         return recommendations[:3]  # Limit to 3
-    
+
+    @staticmethod
+    def semantic_search(question: str, context: Dict, top_k: int = 5) -> List[Dict]:
+        """
+        Rank the projects and tasks in the context by embedding similarity to the
+        question. Items already in the vector store (core/vector_store.py) use
+        their stored vector, embedded from the full text and kept current by
+        refresh_vector_index_task (the context only carries shortened
+        descriptions); items not indexed yet are embedded for this call, in one
+        batch. Request threads never write to the store.
+
+        Args:
+            question (str): User's question
+            context (Dict): Project context ('all_projects', 'project', 'tasks')
+            top_k (int): Number of results
+
+        Returns:
+            List[Dict]: {'type', 'id', 'title', 'confidence'} best first
+        """
+        from core.vector_store import get_vector_store
+
+        items = {}
+        projects = list(context.get('all_projects') or [])
+        if context.get('project'):
+            projects.append(context['project'])
+        for project in projects:
+            if project.get('id') is not None:
+                items[f"project:{project['id']}"] = (
+                    'project', project['id'], project.get('name', ''),
+                    '\n'.join(filter(None, [project.get('name'), project.get('description')])),
+                )
+        for task in context.get('tasks') or []:
+            if task.get('id') is not None:
+                items[f"task:{task['id']}"] = (
+                    'task', task['id'], task.get('title', ''),
+                    '\n'.join(filter(None, [task.get('title'), task.get('description')])),
+                )
+        if not items:
+            return []
+
+        store = get_vector_store()
+        results = []
+        texts = {key: item[3] for key, item in items.items()}
+        for key, score in store.search_items(question, texts, k=top_k, reuse_stored=True):
+            item_type, item_id, title, _ = items[key]
+            results.append({'type': item_type, 'id': item_id, 'title': title, 'confidence': round(score, 4)})
+        return results
+
     @staticmethod
     def generate_proactive_insights(context: Dict) -> List[Dict]:
         """
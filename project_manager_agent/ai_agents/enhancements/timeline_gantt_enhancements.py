@@ -5,10 +5,18 @@ Implements risk-based planning, Monte Carlo simulation, advanced scheduling
 
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta, date
-import random
 import math
 import logging
 
+import numpy as np
+
+from .. import cpm_engine
+from ..monte_carlo import OPTIMISTIC_FACTOR, PESSIMISTIC_FACTOR, simulate_schedule
+from ..resource_scheduler import level_resources
+from ..scenario_engine import DEFAULT_SCENARIOS, ScenarioEngine, evaluate_scenarios
+from ..schedule_optimizer import ScheduleProblem, run_annealing, run_genetic
+from ..workday_calendar import WorkdayCalendar
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,16 +24,36 @@ class TimelineGanttEnhancements:
     """Enhancement methods for Timeline/Gantt Agent"""
     
     @staticmethod
-    def generate_probabilistic_timeline(tasks: List[Dict], iterations: int = 1000) -> Dict:
+    def _three_point_estimate(task: Dict) -> Tuple[float, float, float]:
+        """(optimistic, most likely, pessimistic) workdays for a task"""
+        # Explicit three-point estimates win; otherwise derive them from estimated hours
+        if task.get('most_likely_days'):
+            most_likely = float(task['most_likely_days'])
+        else:
+            estimated_hours = task.get('estimated_hours', 0) or 0
+            most_likely = float(max(1, int(estimated_hours / 8)) if estimated_hours > 0 else 3)
+        optimistic = float(task.get('optimistic_days') or most_likely * OPTIMISTIC_FACTOR)
+        pessimistic = float(task.get('pessimistic_days') or most_likely * PESSIMISTIC_FACTOR)
+        optimistic = min(optimistic, most_likely)
+        pessimistic = max(pessimistic, most_likely)
+        return optimistic, most_likely, pessimistic
+    
+    @staticmethod
+    def generate_probabilistic_timeline(tasks: List[Dict], iterations: int = 1000, seed: Optional[int] = None) -> Dict:
         """
         Generate timeline with probability distributions using Monte Carlo simulation.
+        Task durations are sampled from PERT beta distributions and propagated through
+        the dependency graph, so parallel tasks overlap instead of adding up.
         
         Args:
-            tasks (List[Dict]): Tasks with estimated durations
+            tasks (List[Dict]): Tasks with estimated durations ('estimated_hours', or
+                'optimistic_days'/'most_likely_days'/'pessimistic_days') and 'dependencies'
             iterations (int): Number of simulation iterations
+            seed (int): Optional seed for reproducible results
             
         Returns:
-            Dict: Probabilistic timeline with confidence intervals
+            Dict: Probabilistic timeline with confidence intervals (workdays) and
+                  per-task criticality index (share of iterations the task was critical)
         """
         if not tasks:
             return {
@@ -36,62 +64,50 @@ class TimelineGanttEnhancements:
                 'confidence_intervals': {}
             }
         
-        # Run Monte Carlo simulation
-        durations = []
+        task_ids = [task.get('id', idx) for idx, task in enumerate(tasks)]
+        estimates = np.array([TimelineGanttEnhancements._three_point_estimate(task) for task in tasks])
+        dependencies = [(dep_id, task_id) for task_id, task in zip(task_ids, tasks)
+                        for dep_id in task.get('dependencies', []) or []]
         
-        for _ in range(iterations):
-            total_duration = 0
-            
-            for task in tasks:
-                # Get base duration
-                estimated_hours = task.get('estimated_hours', 0) or 0
-                base_days = max(1, int(estimated_hours / 8)) if estimated_hours > 0 else 3
-                
-                # Add variability (PERT: optimistic, realistic, pessimistic)
-                # Optimistic: 85% of base
-                # Realistic: base
-                # Pessimistic: 130% of base
-                optimistic = base_days * 0.85
-                realistic = base_days
-                pessimistic = base_days * 1.3
-                
-                # Random duration between optimistic and pessimistic
-                # Weighted towards realistic (beta distribution approximation)
-                rand = random.random()
-                if rand < 0.2:
-                    duration = optimistic + (realistic - optimistic) * random.random()
-                elif rand < 0.8:
-                    duration = optimistic + (pessimistic - optimistic) * random.random() * 0.5
-                else:
-                    duration = realistic + (pessimistic - realistic) * random.random()
-                
-                total_duration += max(1, int(duration))
-            
-            durations.append(total_duration)
+        simulation = simulate_schedule(
+            task_ids, estimates[:, 0], estimates[:, 1], estimates[:, 2], dependencies,
+            iterations=iterations, seed=seed
+        )
+        completion = simulation['completion']
         
-        # Calculate statistics
-        durations.sort()
+        levels = [2.5, 10, 50, 80, 90, 95, 97.5]
+        values = dict(zip(levels, np.percentile(completion, levels).tolist()))
+        whole_days = lambda value: int(math.ceil(value - 1e-9))
         
-        optimistic_duration = durations[int(len(durations) * 0.1)]  # 10th percentile
-        realistic_duration = durations[int(len(durations) * 0.5)]   # 50th percentile (median)
-        pessimistic_duration = durations[int(len(durations) * 0.9)]  # 90th percentile
-        expected_duration = sum(durations) / len(durations)
+        criticality = simulation['criticality']
+        criticality_index = {
+            task_id: round(float(value), 3) for task_id, value in zip(task_ids, criticality)
+        }
+        most_critical = [
+            {'task_id': task_ids[i], 'title': tasks[i].get('title'), 'criticality_index': round(float(criticality[i]), 3)}
+            for i in np.argsort(-criticality, kind='stable')[:10] if criticality[i] > 0
+        ]
         
         return {
-            'optimistic': optimistic_duration,
-            'realistic': realistic_duration,
-            'pessimistic': pessimistic_duration,
-            'expected': int(expected_duration),
+            'optimistic': whole_days(values[10]),    # 10th percentile
+            'realistic': whole_days(values[50]),     # 50th percentile (median)
+            'pessimistic': whole_days(values[90]),   # 90th percentile
+            'expected': whole_days(float(completion.mean())),
+            'standard_deviation': round(float(completion.std()), 2),
+            'percentiles': {f'p{level:g}': round(value, 1) for level, value in values.items()},
             'confidence_intervals': {
                 '80%': {
-                    'lower': durations[int(len(durations) * 0.1)],
-                    'upper': durations[int(len(durations) * 0.9)]
+                    'lower': whole_days(values[10]),
+                    'upper': whole_days(values[90])
                 },
                 '95%': {
-                    'lower': durations[int(len(durations) * 0.025)],
-                    'upper': durations[int(len(durations) * 0.975)]
+                    'lower': whole_days(values[2.5]),
+                    'upper': whole_days(values[97.5])
                 }
             },
+            'criticality_index': criticality_index,
+            'most_critical_tasks': most_critical,
+            'dependency_cycles': simulation['cyclic_task_ids'],
             'simulation_iterations': iterations
         }
     
@@ -292,12 +308,19 @@ class TimelineGanttEnhancements:
         return conflicts
     
     @staticmethod
-    def coordinate_multi_project_schedules(projects: List[Dict]) -> Dict:
+    def coordinate_multi_project_schedules(projects: List[Dict], start_date: Optional[date] = None,
+                                           calendar=None, hours_per_day: int = 8) -> Dict:
         """
         Coordinate schedules across multiple projects to optimize resource allocation.
+        Conflicts are reported for the requested (due date based) windows; the
+        coordinated schedule itself is resource-leveled across all projects, so
+        no assignee works on two tasks at once and dependencies are respected.
         
         Args:
             projects (List[Dict]): List of projects with tasks
+            start_date (date): Portfolio start for the leveled schedule (default: today)
+            calendar (WorkdayCalendar): Workday calendar (weekends/holidays)
+            hours_per_day (int): Working hours per assignee per day
             
         Returns:
             Dict: Coordinated schedule with resource allocation
@@ -307,7 +330,6 @@ class TimelineGanttEnhancements:
         
         # Build resource timeline across all projects
         resource_timeline = {}  # {user_id: [(start, end, task_id, project_id), ...]}
-        all_tasks = []
         
         for project in projects:
             project_id = project.get('id')
@@ -343,18 +365,6 @@ class TimelineGanttEnhancements:
                             'project_name': project.get('name', ''),
                             'hours': estimated_hours
                         })
-                        
-                        all_tasks.append({
-                            'task_id': task.get('id'),
-                            'task_title': task.get('title', ''),
-                            'project_id': project_id,
-                            'project_name': project.get('name', ''),
-                            'assignee_id': assignee_id,
-                            'start': start,
-                            'end': due,
-                            'hours': estimated_hours,
-                            'priority': task.get('priority', 'medium')
-                        })
                     except Exception:
                         pass
         
@@ -393,6 +403,48 @@ class TimelineGanttEnhancements:
                         'severity': 'high' if (task1['hours'] + task2['hours']) > 40 else 'medium'
                     })
         
+        # Level resources across all projects
+        project_of = {}
+        leveling_input = []
+        for project in projects:
+            for task in project.get('tasks', []):
+                project_of[task.get('id')] = project
+                leveling_input.append(task)
+        leveled = level_resources(leveling_input, start_date or date.today(),
+                                  calendar=calendar, hours_per_day=hours_per_day)
+        
+        coordinated_schedule = []
+        deadline_risks = []
+        for task in leveling_input:
+            slot = leveled['tasks'].get(task.get('id'))
+            if slot is None:
+                continue  # done
+            project = project_of[task.get('id')]
+            entry = {
+                'task_id': task.get('id'),
+                'task_title': task.get('title', ''),
+                'project_id': project.get('id'),
+                'project_name': project.get('name', ''),
+                'assignee_id': task.get('assignee_id'),
+                'start': slot['start_date'],
+                'end': slot['end_date'],
+                'hours': slot['hours'],
+                'delay_hours': slot['delay_hours'],
+                'priority': task.get('priority', 'medium'),
+                'due_date': task.get('due_date'),
+            }
+            coordinated_schedule.append(entry)
+            if slot['late']:
+                deadline_risks.append({
+                    'task_id': entry['task_id'],
+                    'task_title': entry['task_title'],
+                    'project_id': entry['project_id'],
+                    'assignee_id': entry['assignee_id'],
+                    'due_date': entry['due_date'],
+                    'leveled_end': entry['end'],
+                })
+        coordinated_schedule.sort(key=lambda x: (x['start'], x['project_id'] or 0, x['task_id'] or 0))
+        
         # Calculate resource allocation
         resource_allocation = {}
         for assignee_id, tasks in resource_timeline.items():
@@ -403,23 +455,57 @@ class TimelineGanttEnhancements:
                 'projects': list(set(t['project_id'] for t in tasks)),
                 'tasks': [{'id': t['task_id'], 'title': t['task_title'], 'project': t['project_name']} for t in tasks]
             }
+        for assignee_id, load in leveled['assignees'].items():
+            allocation = resource_allocation.setdefault(assignee_id, {
+                'total_tasks': 0, 'total_hours': 0, 'projects': [], 'tasks': []
+            })
+            allocation['scheduled_hours'] = load['busy_hours']
+            allocation['utilization'] = load['utilization']
         
         return {
-            'coordinated_schedule': all_tasks,
+            'coordinated_schedule': coordinated_schedule,
             'resource_allocation': resource_allocation,
             'conflicts': conflicts,
+            'deadline_risks': deadline_risks,
+            'portfolio': {
+                'start_date': leveled['start_date'],
+                'end_date': leveled['end_date'],
+                'makespan_hours': leveled['makespan_hours'],
+            },
+            'dependency_cycles': leveled['cyclic_task_ids'],
             'total_projects': len(projects),
-            'total_tasks': len(all_tasks)
+            'total_tasks': len(coordinated_schedule)
         }
     
     @staticmethod
-    def generate_what_if_scenarios(tasks: List[Dict], scenarios: List[str] = None) -> Dict:
+    def scenario_baseline(tasks: List[Dict], project_id: Optional[int] = None,
+                          schedule_version: Optional[int] = None):
+        """
+        Baseline CPM schedule for what-if scenarios (most likely durations).
+        Served from the per schedule_version CPM cache when the project is known.
+        """
+        task_ids = [task.get('id') for task in tasks]
+        durations = [int(TimelineGanttEnhancements._three_point_estimate(task)[1]) for task in tasks]
+        dependencies = [(dep_id, task.get('id')) for task in tasks for dep_id in task.get('dependencies', []) or []]
+        if project_id is not None and schedule_version is not None:
+            return cpm_engine.get_project_cpm(project_id, schedule_version, task_ids, durations, dependencies)
+        return cpm_engine.compute_cpm(task_ids, durations, dependencies)
+    
+    @staticmethod
+    def generate_what_if_scenarios(tasks: List[Dict], scenarios: List = None, baseline=None,
+                                   start_date: Optional[date] = None, calendar=None) -> Dict:
         """
         Generate what-if scenario timelines for different conditions.
+        The baseline schedule is computed once (or passed in, e.g. from the CPM cache)
+        and every scenario is evaluated as a delta against it, in parallel.
         
         Args:
             tasks (List[Dict]): Base tasks
-            scenarios (List[str]): Scenario names (e.g., ['optimistic', 'pessimistic', 'delayed_dependencies'])
+            scenarios (List): Scenario names (e.g., ['optimistic', 'pessimistic', 'delayed_dependencies'])
+                              or scenario objects (see scenario_engine)
+            baseline (CPMSchedule): Baseline schedule for tasks (computed when omitted)
+            start_date (date): Date of workday offset 0 (default: today)
+            calendar (WorkdayCalendar): Calendar for offset -> date conversion
             
         Returns:
             Dict: Multiple scenario timelines
@@ -428,80 +514,75 @@ class TimelineGanttEnhancements:
             return {'scenarios': {}}
         
         if not scenarios:
-            scenarios = ['optimistic', 'realistic', 'pessimistic', 'delayed_dependencies', 'resource_constrained']
+            scenarios = DEFAULT_SCENARIOS
         
-        scenario_results = {}
+        if baseline is None:
+            baseline = TimelineGanttEnhancements.scenario_baseline(tasks)
+        engine = ScenarioEngine(baseline)
         
-        for scenario_name in scenarios:
-            scenario_tasks = []
-            
-            for task in tasks:
-                task_copy = task.copy()
-                estimated_hours = task.get('estimated_hours', 0) or 0
-                base_days = max(1, int(estimated_hours / 8)) if estimated_hours > 0 else 3
-                
-                if scenario_name == 'optimistic':
-                    # 80% of estimated time
-                    task_copy['scenario_hours'] = estimated_hours * 0.8
-                    task_copy['scenario_days'] = max(1, int(base_days * 0.8))
-                    task_copy['description'] = 'Optimistic: Everything goes smoothly'
-                    
-                elif scenario_name == 'realistic':
-                    # 100% of estimated time
-                    task_copy['scenario_hours'] = estimated_hours
-                    task_copy['scenario_days'] = base_days
-                    task_copy['description'] = 'Realistic: Normal execution'
-                    
-                elif scenario_name == 'pessimistic':
-                    # 150% of estimated time
-                    task_copy['scenario_hours'] = estimated_hours * 1.5
-                    task_copy['scenario_days'] = max(1, int(base_days * 1.5))
-                    task_copy['description'] = 'Pessimistic: Delays and issues occur'
-                    
-                elif scenario_name == 'delayed_dependencies':
-                    # Add 2 days buffer for each dependency
-                    dependencies = task.get('dependencies', [])
-                    buffer_days = len(dependencies) * 2
-                    task_copy['scenario_hours'] = estimated_hours + (buffer_days * 8)
-                    task_copy['scenario_days'] = base_days + buffer_days
-                    task_copy['description'] = f'Delayed Dependencies: {len(dependencies)} dependencies add {buffer_days} days'
-                    
-                elif scenario_name == 'resource_constrained':
-                    # 120% of time if resource is overloaded
-                    task_copy['scenario_hours'] = estimated_hours * 1.2
-                    task_copy['scenario_days'] = max(1, int(base_days * 1.2))
-                    task_copy['description'] = 'Resource Constrained: Limited availability'
-                
-                scenario_tasks.append(task_copy)
-            
-            # Calculate total duration for scenario
-            total_days = sum(t.get('scenario_days', 0) for t in scenario_tasks)
-            total_hours = sum(t.get('scenario_hours', 0) for t in scenario_tasks)
-            
-            scenario_results[scenario_name] = {
-                'tasks': scenario_tasks,
+        calendar = calendar or WorkdayCalendar()
+        start_date = start_date or date.today()
+        if not calendar.is_workday(start_date):
+            start_date = calendar.add_workdays(start_date, 1)
+        base_ordinal = calendar.workday_ordinal(start_date)
+        to_iso = lambda offset: calendar.date_from_ordinal(base_ordinal + int(offset)).isoformat()
+        task_by_id = {task.get('id'): task for task in tasks}
+        
+        baseline_days = engine.end + 1
+        scenario_results = {}
+        scenario_names = []
+        for result in evaluate_scenarios(engine, scenarios):
+            changed_tasks = []
+            for i, finish in sorted(result['ef'].items(), key=lambda item: result['es'][item[0]]):
+                task_id = engine.task_ids[i]
+                changed_tasks.append({
+                    'id': task_id,
+                    'title': task_by_id.get(task_id, {}).get('title', ''),
+                    'start_date': to_iso(result['es'][i]),
+                    'end_date': to_iso(max(finish, result['es'][i])),
+                    'slip_days': finish - engine.ef[i],
+                })
+            total_days = result['end'] + 1
+            name = result['name']
+            scenario_names.append(name)
+            scenario_results[name] = {
+                'description': result['description'],
                 'total_duration_days': total_days,
-                'total_duration_hours': total_hours,
-                'task_count': len(scenario_tasks)
+                'total_duration_hours': total_days * 8,
+                'delta_days': total_days - baseline_days,
+                'finish_date': to_iso(result['end']),
+                'driving_path': result['driving_path'],
+                'changed_tasks': changed_tasks,
+                'affected_task_count': len(changed_tasks),
+                'task_count': len(tasks)
             }
         
         return {
             'scenarios': scenario_results,
-            'base_tasks': tasks,
-            'scenario_names': scenarios
+            'baseline': {
+                'total_duration_days': baseline_days,
+                'finish_date': to_iso(engine.end),
+            },
+            'scenario_names': scenario_names
         }
     
     @staticmethod
     def optimize_schedule_genetic_algorithm(tasks: List[Dict], resources: List[Dict] = None, 
-                                           generations: int = 50, population_size: int = 20) -> Dict:
+                                           generations: int = 50, population_size: int = 20,
+                                           seed: Optional[int] = None, islands: Optional[int] = None) -> Dict:
         """
         Optimize schedule using genetic algorithm approach.
+        Independent populations (islands) evolve inline by default, and in a process
+        pool only when SCHEDULE_OPTIMIZER_WORKERS > 1; see schedule_optimizer for the
+        fitness and seeding.
         
         Args:
             tasks (List[Dict]): Tasks to schedule
             resources (List[Dict]): Available resources
             generations (int): Number of generations to evolve
-            population_size (int): Size of population
+            population_size (int): Size of population (per island)
+            seed (int): Optional seed for reproducible results
+            islands (int): Number of populations (default: SCHEDULE_OPTIMIZER_ISLANDS)
             
         Returns:
             Dict: Optimized schedule
@@ -509,122 +590,36 @@ class TimelineGanttEnhancements:
         if not tasks:
             return {'optimized_tasks': [], 'fitness_score': 0}
         
-        # Simple genetic algorithm for task ordering
-        # Fitness function: minimize total project duration while respecting dependencies
-        
-        def calculate_fitness(task_order: List[int], task_map: Dict) -> float:
-            """Calculate fitness: lower total duration = higher fitness"""
-            if not task_order:
-                return 0.0
-            
-            # Calculate total duration considering dependencies
-            completed = set()
-            total_duration = 0
-            current_time = 0
-            
-            for task_id in task_order:
-                task = task_map.get(task_id)
-                if not task:
-                    continue
-                
-                # Check dependencies
-                deps = task.get('dependencies', [])
-                if deps and not all(dep in completed for dep in deps):
-                    # Dependencies not met, add penalty
-                    total_duration += 1000  # Large penalty
-                    continue
-                
-                # Add task duration
-                hours = task.get('estimated_hours', 0) or 0
-                days = max(1, int(hours / 8)) if hours > 0 else 3
-                total_duration += days
-                current_time += days
-                completed.add(task_id)
-            
-            # Fitness is inverse of duration (higher is better)
-            return 1.0 / (total_duration + 1)
-        
-        # Create task map
-        task_map = {task.get('id'): task for task in tasks}
-        task_ids = list(task_map.keys())
-        
-        if not task_ids:
-            return {'optimized_tasks': [], 'fitness_score': 0}
-        
-        # Initialize population (random task orders)
-        import random
-        population = []
-        for _ in range(population_size):
-            individual = task_ids.copy()
-            random.shuffle(individual)
-            fitness = calculate_fitness(individual, task_map)
-            population.append((individual, fitness))
-        
-        # Evolve population
-        for generation in range(generations):
-            # Sort by fitness
-            population.sort(key=lambda x: x[1], reverse=True)
-            
-            # Keep top 50%
-            elite_size = population_size // 2
-            elite = population[:elite_size]
-            
-            # Generate new population
-            new_population = elite.copy()
-            
-            while len(new_population) < population_size:
-                # Crossover: take two parents from elite
-                parent1 = random.choice(elite)[0]
-                parent2 = random.choice(elite)[0]
-                
-                # Simple crossover: take first half from parent1, rest from parent2
-                crossover_point = len(parent1) // 2
-                child = parent1[:crossover_point]
-                
-                # Add remaining tasks from parent2 (not already in child)
-                for task_id in parent2:
-                    if task_id not in child:
-                        child.append(task_id)
-                
-                # Mutation: swap two random tasks
-                if random.random() < 0.1:  # 10% mutation rate
-                    idx1, idx2 = random.sample(range(len(child)), 2)
-                    child[idx1], child[idx2] = child[idx2], child[idx1]
-                
-                fitness = calculate_fitness(child, task_map)
-                new_population.append((child, fitness))
-            
-            population = new_population
-        
-        # Get best solution
-        population.sort(key=lambda x: x[1], reverse=True)
-        best_order = population[0][0]
-        best_fitness = population[0][1]
-        
-        # Build optimized task list
-        optimized_tasks = []
-        for task_id in best_order:
-            if task_id in task_map:
-                optimized_tasks.append(task_map[task_id])
+        # Fitness: minimize total project duration while respecting dependencies
+        problem = ScheduleProblem(tasks)
+        result = run_genetic(problem, generations=generations, population_size=population_size,
+                             seed=seed, islands=islands)
         
         return {
-            'optimized_tasks': optimized_tasks,
-            'fitness_score': round(best_fitness, 4),
+            'optimized_tasks': [tasks[i] for i in result['order'].tolist()],
+            'fitness_score': round(result['fitness'], 4),
+            'dependency_violations': result['violations'],
             'generations': generations,
+            'islands': result['islands'],
+            'evaluations': result['evaluations'],
+            'seed': result['seed'],
             'optimization_method': 'genetic_algorithm'
         }
     
     @staticmethod
     def optimize_schedule_simulated_annealing(tasks: List[Dict], initial_temp: float = 100.0,
-                                            cooling_rate: float = 0.95, iterations: int = 1000) -> Dict:
+                                            cooling_rate: float = 0.95, iterations: int = 1000,
+                                            seed: Optional[int] = None) -> Dict:
         """
         Optimize schedule using simulated annealing algorithm.
+        Each step swaps two tasks and only re-scores the dependencies touching them.
         
         Args:
             tasks (List[Dict]): Tasks to schedule
             initial_temp (float): Initial temperature
             cooling_rate (float): Temperature cooling rate
             iterations (int): Number of iterations
+            seed (int): Optional seed for reproducible results
             
         Returns:
             Dict: Optimized schedule
@@ -632,86 +627,17 @@ class TimelineGanttEnhancements:
         if not tasks:
             return {'optimized_tasks': [], 'energy': float('inf')}
         
-        import random
-        
-        def calculate_energy(task_order: List[int], task_map: Dict) -> float:
-            """Calculate energy: lower is better (total duration + dependency violations)"""
-            if not task_order:
-                return float('inf')
-            
-            completed = set()
-            total_duration = 0
-            violations = 0
-            
-            for task_id in task_order:
-                task = task_map.get(task_id)
-                if not task:
-                    continue
-                
-                # Check dependencies
-                deps = task.get('dependencies', [])
-                unmet_deps = [dep for dep in deps if dep not in completed]
-                if unmet_deps:
-                    violations += len(unmet_deps) * 10  # Penalty for violations
-                
-                # Add task duration
-                hours = task.get('estimated_hours', 0) or 0
-                days = max(1, int(hours / 8)) if hours > 0 else 3
-                total_duration += days
-                completed.add(task_id)
-            
-            return total_duration + violations
-        
-        # Create task map
-        task_map = {task.get('id'): task for task in tasks}
-        task_ids = list(task_map.keys())
-        
-        if not task_ids:
-            return {'optimized_tasks': [], 'energy': float('inf')}
-        
-        # Initialize solution (random order)
-        current_order = task_ids.copy()
-        random.shuffle(current_order)
-        current_energy = calculate_energy(current_order, task_map)
-        
-        best_order = current_order.copy()
-        best_energy = current_energy
-        
-        temperature = initial_temp
-        
-        # Simulated annealing
-        for iteration in range(iterations):
-            # Generate neighbor: swap two random tasks
-            neighbor = current_order.copy()
-            idx1, idx2 = random.sample(range(len(neighbor)), 2)
-            neighbor[idx1], neighbor[idx2] = neighbor[idx2], neighbor[idx1]
-            
-            neighbor_energy = calculate_energy(neighbor, task_map)
-            
-            # Accept if better or with probability based on temperature
-            delta = neighbor_energy - current_energy
-            if delta < 0 or random.random() < math.exp(-delta / temperature):
-                current_order = neighbor
-                current_energy = neighbor_energy
-                
-                # Update best if better
-                if current_energy < best_energy:
-                    best_order = current_order.copy()
-                    best_energy = current_energy
-            
-            # Cool down
-            temperature *= cooling_rate
-        
-        # Build optimized task list
-        optimized_tasks = []
-        for task_id in best_order:
-            if task_id in task_map:
-                optimized_tasks.append(task_map[task_id])
+        # Energy: total duration + dependency violations (lower is better)
+        problem = ScheduleProblem(tasks)
+        result = run_annealing(problem, initial_temp=initial_temp, cooling_rate=cooling_rate,
+                               iterations=iterations, seed=seed)
         
         return {
-            'optimized_tasks': optimized_tasks,
-            'energy': round(best_energy, 2),
+            'optimized_tasks': [tasks[i] for i in result['order'].tolist()],
+            'energy': round(result['energy'], 2),
+            'dependency_violations': result['violations'],
             'iterations': iterations,
+            'seed': result['seed'],
             'optimization_method': 'simulated_annealing'
         }
 
@@ -0,0 +1,160 @@
+"""
+Compact Gantt Payload
+Columnar encoding of a Gantt schedule and deltas between two versions of it.
+
+A chart is a set of parallel arrays (one entry per task) plus the dependency
+edges as index pairs into those arrays; dates are integer day offsets from
+the chart start and statuses/priorities are small integer codes:
+
+    {'format': 'columnar', 'version': 12, 'start': '2024-03-04',
+     'ids': [..], 'titles': [..], 'start_offsets': [..], 'durations': [..],
+     'status': [..], 'priority': [..], 'progress': [..], 'assignee_ids': [..],
+     'critical': [..], 'edges': [[dependency index..], [dependent index..]],
+     'legend': {'status': [...], 'priority': [...]}}
+
+Charts are snapshotted per (project, schedule_version) in the database
+(GanttSnapshot, latest GANTT_SNAPSHOTS_KEPT versions per project) with the
+Django cache in front, so a client holding version v can ask any web process
+for only what changed since v.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from core.models import GanttSnapshot
+
+STATUS_CODES = ['todo', 'in_progress', 'review', 'done', 'blocked']
+PRIORITY_CODES = ['low', 'medium', 'high']
+
+# Per-task columns; 'ids' is the key column
+TASK_COLUMNS = ('titles', 'start_offsets', 'durations', 'status', 'priority',
+                'progress', 'assignee_ids', 'critical')
+
+SNAPSHOT_TIMEOUT = getattr(settings, 'GANTT_SNAPSHOT_TIMEOUT', 60 * 60 * 24)
+SNAPSHOTS_KEPT = getattr(settings, 'GANTT_SNAPSHOTS_KEPT', 20)
+
+
+def _code(codes: List[str], value) -> int:
+    try:
+        return codes.index(value)
+    except ValueError:
+        return -1
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def build_compact_chart(tasks: List[Dict], start: date, version: int, critical_ids=()) -> Dict:
+    """
+    Encode Gantt tasks (dicts with id, title, start_date, end_date, status, priority,
+    progress, assignee_id, dependencies) as a columnar chart. Dependencies on tasks
+    outside the chart are dropped.
+    """
+    start = _as_date(start)
+    critical_ids = set(critical_ids)
+    chart = {
+        'format': 'columnar',
+        'version': version,
+        'start': start.isoformat(),
+        'ids': [],
+        **{column: [] for column in TASK_COLUMNS},
+        'legend': {'status': STATUS_CODES, 'priority': PRIORITY_CODES},
+    }
+    for task in tasks:
+        task_start = _as_date(task['start_date'])
+        chart['ids'].append(task['id'])
+        chart['titles'].append(task.get('title', ''))
+        chart['start_offsets'].append((task_start - start).days)
+        chart['durations'].append((_as_date(task['end_date']) - task_start).days + 1)
+        chart['status'].append(_code(STATUS_CODES, task.get('status')))
+        chart['priority'].append(_code(PRIORITY_CODES, task.get('priority')))
+        chart['progress'].append(int(task.get('progress') or 0))
+        chart['assignee_ids'].append(task.get('assignee_id'))
+        chart['critical'].append(1 if task['id'] in critical_ids else 0)
+
+    index = {task_id: i for i, task_id in enumerate(chart['ids'])}
+    edges = sorted(
+        (index[dep_id], index[task['id']]) for task in tasks
+        for dep_id in task.get('dependencies') or [] if dep_id in index
+    )
+    chart['edges'] = [[dep for dep, _ in edges], [dependent for _, dependent in edges]]
+    return chart
+
+
+def _edge_ids(chart: Dict) -> set:
+    ids = chart['ids']
+    return {(ids[dep], ids[dependent]) for dep, dependent in zip(*chart['edges'])}
+
+
+def diff_compact_charts(old: Dict, new: Dict) -> Dict:
+    """
+    Tasks of new that are missing from old or differ in any column, tasks removed
+    since old, and dependency edges (as [dependency_id, dependent_id]) added or removed.
+    Start offsets are compared as calendar dates, so a moved chart start is handled.
+    """
+    shift = (_as_date(new['start']) - _as_date(old['start'])).days
+    old_index = {task_id: i for i, task_id in enumerate(old['ids'])}
+    changed = {'ids': [], **{column: [] for column in TASK_COLUMNS}}
+    for i, task_id in enumerate(new['ids']):
+        j = old_index.pop(task_id, None)
+        if j is not None and all(
+            (old[column][j] - shift if column == 'start_offsets' else old[column][j]) == new[column][i]
+            for column in TASK_COLUMNS
+        ):
+            continue
+        changed['ids'].append(task_id)
+        for column in TASK_COLUMNS:
+            changed[column].append(new[column][i])
+
+    old_edges, new_edges = _edge_ids(old), _edge_ids(new)
+    return {
+        'format': 'columnar-delta',
+        'since': old['version'],
+        'version': new['version'],
+        'start': new['start'],
+        'changed': changed,
+        'removed': list(old_index),
+        'edges_added': sorted([list(edge) for edge in new_edges - old_edges]),
+        'edges_removed': sorted([list(edge) for edge in old_edges - new_edges]),
+    }
+
+
+def _snapshot_key(project_id: int, version: int) -> str:
+    return f'gantt_chart:{project_id}:{version}'
+
+
+def save_snapshot(project_id: int, chart: Dict) -> None:
+    """Persist the chart for its version and drop the project's older snapshots beyond SNAPSHOTS_KEPT."""
+    try:
+        with transaction.atomic():
+            GanttSnapshot.objects.update_or_create(
+                project_id=project_id, version=chart['version'], defaults={'chart': chart},
+            )
+    except IntegrityError:
+        pass  # another process stored the same version first
+    stale = list(
+        GanttSnapshot.objects.filter(project_id=project_id)
+        .order_by('-version').values_list('id', flat=True)[SNAPSHOTS_KEPT:]
+    )
+    if stale:
+        GanttSnapshot.objects.filter(id__in=stale).delete()
+    cache.set(_snapshot_key(project_id, chart['version']), chart, SNAPSHOT_TIMEOUT)
+
+
+def load_snapshot(project_id: int, version: int) -> Optional[Dict]:
+    key = _snapshot_key(project_id, version)
+    chart = cache.get(key)
+    if chart is None:
+        chart = GanttSnapshot.objects.filter(project_id=project_id, version=version).values_list('chart', flat=True).first()
+        if chart is not None:
+            cache.set(key, chart, SNAPSHOT_TIMEOUT)
+    return chart
@@ -7,7 +7,8 @@ This agent only provides descriptive answers - it does not perform actions.
 from .base_agent import BaseAgent
 from .enhancements.knowledge_qa_enhancements import KnowledgeQAEnhancements
 from .enhancements.chart_generation import ChartGenerator
-from typing import Dict, Optional, List
+from .context_assembler import ContextAssembler
+from typing import Dict, Iterator, Optional, List, Tuple
 import json
 import re
 
@@ -26,6 +27,8 @@ class KnowledgeQAAgent(BaseAgent):
     - Learn from project patterns and provide insights
     """
     
+    ANSWER_MAX_TOKENS = 800
+    
     def __init__(self):
         super().__init__()
         self.system_prompt = """You are a Knowledge Q&A Agent for a project management system.
@@ -54,83 +57,69 @@ class KnowledgeQAAgent(BaseAgent):
             Dict: Answer with relevant information and enhancements
         """
         self.log_action("Answering question", {"question": question[:50], "session_id": session_id})
+        prompt, relevant_results = self._answer_prompt(question, context, available_users, session_id)
+        
+        try:
+            response = self._call_llm(prompt, self.system_prompt, temperature=0.7, max_tokens=self.ANSWER_MAX_TOKENS)
+            return self._answer_result(question, response, context, relevant_results, session_id)
+        except Exception as e:
+            self.log_action("Error answering question", {"error": str(e)})
+            return self._error_result(e)
+    
+    def stream_answer(self, question: str, context: Optional[Dict] = None,
+                      available_users: Optional[List[Dict]] = None,
+                      session_id: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Streaming variant of answer_question.
         
+        Yields ('token', text) for each piece of the answer as the LLM produces it,
+        then ('result', Dict) with the same payload answer_question returns. The
+        conversation turn is saved once the whole answer is in.
+        """
+        self.log_action("Streaming answer", {"question": question[:50], "session_id": session_id})
+        prompt, relevant_results = self._answer_prompt(question, context, available_users, session_id)
+        
+        pieces = []
+        try:
+            for piece in self._stream_llm(prompt, self.system_prompt, temperature=0.7, max_tokens=self.ANSWER_MAX_TOKENS):
+                pieces.append(piece)
+                yield 'token', piece
+            result = self._answer_result(question, ''.join(pieces), context, relevant_results, session_id)
+        except Exception as e:
+            self.log_action("Error answering question", {"error": str(e)})
+            result = self._error_result(e)
+        yield 'result', result
+    
+    def _answer_prompt(self, question: str, context: Optional[Dict],
+                       available_users: Optional[List[Dict]], session_id: Optional[str]) -> Tuple[str, List[Dict]]:
+        """LLM prompt for a question, and the semantic search hits it was built from."""
         # Enhanced: Get conversation history
         conversation_context = ""
         if session_id:
             try:
-                conversation_context = KnowledgeQAEnhancements.build_conversation_context(session_id)
+                conversation_context = KnowledgeQAEnhancements.build_conversation_context(
+                    session_id, max_tokens=KnowledgeQAEnhancements.HISTORY_TOKEN_BUDGET
+                )
             except Exception as e:
                 self.log_action("Error building conversation context", {"error": str(e)})
         
-        # Build context string
-        context_str = ""
+        # Enhanced: Semantic search ranks the projects/tasks most related to the question
+        relevant_results = []
         if context:
-            # Always show all projects first
-            if 'all_projects' in context:
-                projects = context['all_projects']
-                context_str += f"\nAll Your Projects ({len(projects)} total):\n"
-                for proj in projects:
-                    context_str += f"- ID: {proj.get('id', 'N/A')}, Name: {proj.get('name', 'Unknown')}, "
-                    context_str += f"Status: {proj.get('status', 'Unknown')}, "
-                    context_str += f"Priority: {proj.get('priority', 'Unknown')}, "
-                    context_str += f"Tasks: {proj.get('tasks_count', 0)}\n"
-                    if proj.get('description'):
-                        context_str += f"  Description: {proj.get('description', '')}\n"
-            
-            # Show specific project details if provided
-            if 'project' in context:
-                project = context['project']
-                context_str += f"\nCurrent Project (Selected):\n"
-                context_str += f"- Name: {project.get('name', 'Unknown')}\n"
-                context_str += f"- ID: {project.get('id', 'Unknown')}\n"
-                context_str += f"- Status: {project.get('status', 'Unknown')}\n"
-                context_str += f"- Tasks: {project.get('tasks_count', 0)} tasks\n"
-            
-            # Show tasks
-            if 'tasks' in context:
-                context_str += f"\nCurrent Tasks:\n"
-                for task in context['tasks'][:20]:  # Show more tasks
-                    task_line = f"- ID: {task.get('id', 'N/A')}, Title: {task.get('title', '')} (Status: {task.get('status', '')}, Priority: {task.get('priority', 'N/A')})"
-                    if task.get('assignee_username'):
-                        task_line += f" [Assigned to: {task.get('assignee_username')}]"
-                    if task.get('project_name'):
-                        task_line += f" [Project: {task.get('project_name')}]"
-                    context_str += task_line + "\n"
+            try:
+                relevant_results = KnowledgeQAEnhancements.semantic_search(question, context, top_k=5)
+            except Exception as e:
+                self.log_action("Error in semantic search", {"error": str(e)})
         
-        # Add available users information to context string
-        if available_users:
-            context_str += f"\n\n📋 USERS ADDED BY COMPANY USER ({len(available_users)} total):\n"
-            context_str += "NOTE: You have READ-ONLY access to this user information. You can view and report on users, but you CANNOT create, update, or delete users.\n\n"
-            for user in available_users:
-                context_str += f"- ID: {user.get('id', 'N/A')}, Username: {user.get('username', 'Unknown')}, Name: {user.get('name', user.get('username', 'Unknown'))}\n"
-                if 'role' in user:
-                    context_str += f"  Role: {user.get('role', 'team_member')}\n"
-                if 'email' in user:
-                    context_str += f"  Email: {user.get('email', 'N/A')}\n"
-                context_str += f"  Status: {'Active' if user.get('is_active', True) else 'Inactive'}\n"
+        # Build context string: the most relevant snippets that fit the token budget
+        context_str = ContextAssembler().assemble(
+            question, context, available_users,
+            boosts={(r['type'], r['id']): r['confidence'] for r in relevant_results},
+        )
         
-        # Users information is already added to context_str above
+        # Users and assignments are part of context_str
         users_str = ""
         
-        # Add user-task assignments if available
-        assignments_str = ""
-        if 'user_assignments' in context:
-            assignments_str = "\n\n📋 USER-TASK ASSIGNMENTS:\n"
-            assignments_str += f"Total Users with Assignments: {len([u for u in context['user_assignments'] if u.get('total_tasks', 0) > 0])}\n\n"
-            
-            for assignment in context['user_assignments']:
-                if assignment.get('total_tasks', 0) > 0:
-                    assignments_str += f"\n👤 {assignment.get('name', assignment.get('username', 'Unknown'))} (Username: {assignment.get('username', 'Unknown')}) - {assignment.get('total_tasks', 0)} task(s) assigned:\n"
-                    for project_info in assignment.get('projects', []):
-                        assignments_str += f"  📁 Project: {project_info.get('project_name', 'Unknown')}\n"
-                        for task in project_info.get('tasks', []):
-                            assignments_str += f"    - Task: \"{task.get('title', 'Unknown')}\" (Status: {task.get('status', 'N/A')}, Priority: {task.get('priority', 'N/A')})\n"
-                else:
-                    assignments_str += f"\n👤 {assignment.get('name', assignment.get('username', 'Unknown'))} (Username: {assignment.get('username', 'Unknown')}) - No tasks assigned\n"
-        
-        context_str += assignments_str
-        
         # Check if user is asking for an action (create, add, update, etc.)
         question_lower = question.lower()
         action_keywords = ['create', 'add', 'make', 'assign', 'update', 'change', 'modify', 'edit', 'set', 'adjust', 'new task', 'new project']
@@ -180,81 +169,68 @@ IMPORTANT INSTRUCTIONS:
 Provide a helpful, accurate answer. If the question is about specific data that isn't in the context, mention that.
 Be conversational and clear. If asked about available users and their assignments, provide detailed information from both the users section and the assignments section above."""
         
-        try:
-            # Enhanced: Perform semantic search to find most relevant context
-            relevant_results = []
-            if context:
-                try:
-                    relevant_results = KnowledgeQAEnhancements.semantic_search(
-                        question, context, top_k=5
-                    )
-                    # Add semantic search results to context string if found
-                    if relevant_results:
-                        context_str += "\n\n🔍 Most Relevant Results (Semantic Search):\n"
-                        for i, result in enumerate(relevant_results[:3], 1):
-                            context_str += f"{i}. {result['type'].upper()}: {result['title']} (Confidence: {result['confidence']:.2f})\n"
-                except Exception as e:
-                    self.log_action("Error in semantic search", {"error": str(e)})
-            
-            max_tokens = 800
-            response = self._call_llm(prompt, self.system_prompt, temperature=0.7, max_tokens=max_tokens)
-            
-            # Enhanced: Improve answer quality
-            enhanced_answer = KnowledgeQAEnhancements.enhance_answer_quality(
-                question, response, context or {}
-            )
-            
-            # Add semantic search results to answer
-            if relevant_results:
-                enhanced_answer['semantic_search_results'] = relevant_results
-            
-            # Enhanced: Add to conversation history
-            if session_id:
-                try:
-                    KnowledgeQAEnhancements.add_to_conversation(
-                        session_id, question, response, context
+        return prompt, relevant_results
+    
+    def _answer_result(self, question: str, response: str, context: Optional[Dict],
+                       relevant_results: List[Dict], session_id: Optional[str]) -> Dict:
+        """Answer payload for a complete LLM response; saves the conversation turn."""
+        # Enhanced: Improve answer quality
+        enhanced_answer = KnowledgeQAEnhancements.enhance_answer_quality(
+            question, response, context or {}
+        )
+        
+        # Add semantic search results to answer
+        if relevant_results:
+            enhanced_answer['semantic_search_results'] = relevant_results
+        
+        # Enhanced: Add to conversation history
+        if session_id:
+            try:
+                KnowledgeQAEnhancements.add_to_conversation(
+                    session_id, question, response, context
+                )
+            except Exception as e:
+                self.log_action("Error saving conversation", {"error": str(e)})
+        
+        # Enhanced: Generate proactive insights
+        insights = []
+        charts = {}
+        if context:
+            try:
+                insights = KnowledgeQAEnhancements.generate_proactive_insights(context)
+                
+                # Generate charts for insights if available
+                if insights:
+                    charts['insights'] = ChartGenerator.generate_insights_chart(insights)
+                
+                # Generate status distribution chart if tasks available
+                if context.get('tasks'):
+                    charts['status_distribution'] = ChartGenerator.generate_status_distribution_chart(
+                        context['tasks']
                     )
-                except Exception as e:
-                    self.log_action("Error saving conversation", {"error": str(e)})
-            
-            # Enhanced: Generate proactive insights
-            insights = []
-            charts = {}
-            if context:
-                try:
-                    insights = KnowledgeQAEnhancements.generate_proactive_insights(context)
-                    
-                    # Generate charts for insights if available
-                    if insights:
-                        charts['insights'] = ChartGenerator.generate_insights_chart(insights)
-                    
-                    # Generate status distribution chart if tasks available
-                    if context.get('tasks'):
-                        charts['status_distribution'] = ChartGenerator.generate_status_distribution_chart(
-                            context['tasks']
-                        )
-                except Exception as e:
-                    self.log_action("Error generating insights/charts", {"error": str(e)})
-            
-            result = {
-                "success": True,
-                **enhanced_answer,
-                "proactive_insights": insights,
-                "question": question
-            }
-            
-            # Add charts if available
-            if charts:
-                result['charts'] = charts
-            
-            return result
-        except Exception as e:
-            self.log_action("Error answering question", {"error": str(e)})
-            return {
-                "success": False,
-                "error": str(e),
-                "answer": "I'm sorry, I encountered an error while processing your question. Please try again."
-            }
+            except Exception as e:
+                self.log_action("Error generating insights/charts", {"error": str(e)})
+        
+        result = {
+            "success": True,
+            **enhanced_answer,
+            "proactive_insights": insights,
+            "question": question
+        }
+        
+        # Add charts if available
+        if charts:
+            result['charts'] = charts
+        
+        return result
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict:
+        return {
+            "success": False,
+            "error": str(error),
+            "answer": "I'm sorry, I encountered an error while processing your question. Please try again."
+        }
     
     def search_project_history(self, query: str, project_id: int) -> Dict:
         """
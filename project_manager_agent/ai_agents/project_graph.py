@@ -0,0 +1,185 @@
+"""
+Project Task Graph
+Tasks of one or more projects plus their dependency edges, loaded in two
+queries (the depends_on through-table, then the task rows) and held as flat
+rows with compressed adjacency arrays. Gantt methods read everything they
+need from here instead of walking depends_on / dependent_tasks per task.
+
+Dependencies that cross into another project are kept: the other end is
+loaded too (in the same task query) but is not part of the graph's scope,
+so it shows up as a dependency without being scheduled.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Subtask, Task
+from .cpm_engine import _csr
+
+TASK_FIELDS = (
+    'id', 'project_id', 'title', 'description', 'status', 'priority', 'due_date',
+    'estimated_hours', 'actual_hours', 'created_at', 'updated_at', 'completed_at', 'assignee_id',
+)
+
+
+def _subtask_count(**filters):
+    """Correlated count of a task's subtasks (avoids GROUP BY over the task's text columns)."""
+    counts = (
+        Subtask.objects.filter(task=OuterRef('pk'), **filters)
+        .order_by().values('task').annotate(n=Count('id')).values('n')[:1]
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class ProjectGraph:
+    """
+    Rows are dicts (TASK_FIELDS plus 'assignee_username', 'subtask_total', 'subtask_done')
+    in Task's default ordering. Task i's dependencies are
+    dependency_indices(i), its dependents dependent_indices(i).
+    """
+
+    def __init__(self, project_ids: Iterable[int], rows: List[Dict], dependencies: Iterable):
+        self.project_ids = tuple(project_ids)
+        self.rows = rows
+        n = len(rows)
+        self.task_ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=n)
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids.tolist())}
+        scope = set(self.project_ids)
+        self.local = [i for i, row in enumerate(rows) if row['project_id'] in scope]
+
+        # (dependency index, dependent index), the direction of a schedule edge
+        pairs = sorted({
+            (self.index[dep_id], self.index[task_id]) for task_id, dep_id in dependencies
+            if task_id in self.index and dep_id in self.index and task_id != dep_id
+        })
+        self.edges = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+        src, dst = self.edges
+        dep_ptr, dep = _csr(n, dst, src)
+        dnt_ptr, dnt = _csr(n, src, dst)
+        self._dep_ptr, self._dep = dep_ptr.tolist(), dep.tolist()
+        self._dnt_ptr, self._dnt = dnt_ptr.tolist(), dnt.tolist()
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def dependency_indices(self, i: int) -> List[int]:
+        return self._dep[self._dep_ptr[i]:self._dep_ptr[i + 1]]
+
+    def dependent_indices(self, i: int) -> List[int]:
+        return self._dnt[self._dnt_ptr[i]:self._dnt_ptr[i + 1]]
+
+    def dependency_ids(self, i: int) -> List[int]:
+        rows = self.rows
+        return [rows[j]['id'] for j in self.dependency_indices(i)]
+
+    def cycle_paths(self) -> Dict[int, List[int]]:
+        """
+        For every task whose dependency chain runs into a cycle: a path of task
+        IDs following depends_on from the task until an ID repeats, e.g.
+        [a, b, c, b]. One iterative DFS; paths are built from next pointers.
+        """
+        n = len(self.rows)
+        state = [0] * n  # 0 unseen, 1 on the DFS stack, 2 finished
+        next_on_path = [-1] * n
+        stack_position = [0] * n
+        for root in range(n):
+            if state[root]:
+                continue
+            stack = [root]
+            cursors = [0]
+            state[root] = 1
+            while stack:
+                u = stack[-1]
+                deps = self.dependency_indices(u)
+                if cursors[-1] < len(deps):
+                    v = deps[cursors[-1]]
+                    cursors[-1] += 1
+                    if state[v] == 0:
+                        state[v] = 1
+                        stack_position[v] = len(stack)
+                        stack.append(v)
+                        cursors.append(0)
+                    elif state[v] == 1:
+                        # Back edge: every task from v to u on the stack is on the cycle
+                        cycle = stack[stack_position[v]:]
+                        for k, w in enumerate(cycle):
+                            if next_on_path[w] < 0:
+                                next_on_path[w] = cycle[k + 1] if k + 1 < len(cycle) else v
+                    elif next_on_path[u] < 0 and next_on_path[v] >= 0:
+                        next_on_path[u] = v
+                else:
+                    state[u] = 2
+                    stack.pop()
+                    cursors.pop()
+                    if stack and next_on_path[stack[-1]] < 0 and next_on_path[u] >= 0:
+                        next_on_path[stack[-1]] = u
+
+        rows = self.rows
+        paths = {}
+        for i in range(n):
+            if next_on_path[i] < 0:
+                continue
+            path, seen = [i], {i}
+            j = next_on_path[i]
+            while j not in seen:
+                path.append(j)
+                seen.add(j)
+                j = next_on_path[j]
+            path.append(j)
+            paths[rows[i]['id']] = [rows[k]['id'] for k in path]
+        return paths
+
+    def project_indices(self, project_id: int) -> List[int]:
+        return [i for i in self.local if self.rows[i]['project_id'] == project_id]
+
+    def task_data(self, i: int) -> Dict:
+        """The task dict the scheduling helpers in TimelineGanttEnhancements work on."""
+        row = self.rows[i]
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'estimated_hours': float(row['estimated_hours']) if row['estimated_hours'] else None,
+            'actual_hours': float(row['actual_hours']) if row['actual_hours'] else None,
+            'assignee_id': row['assignee_id'],
+            'priority': row['priority'],
+            'status': row['status'],
+            'dependencies': self.dependency_ids(i),
+            'due_date': row['due_date'].isoformat() if row['due_date'] else None,
+        }
+
+    def tasks_data(self, project_id: Optional[int] = None) -> List[Dict]:
+        indices = self.local if project_id is None else self.project_indices(project_id)
+        return [self.task_data(i) for i in indices]
+
+
+def load_project_graph(project_ids: Iterable[int]) -> ProjectGraph:
+    """Load the task graph of the given projects: one query for edges, one for tasks."""
+    project_ids = list(dict.fromkeys(project_ids))
+    scope_ids = set(project_ids)
+    dependencies = []
+    external_ids = set()
+    for task_id, dep_id, task_project, dep_project in Task.depends_on.through.objects.filter(
+        Q(from_task__project_id__in=project_ids) | Q(to_task__project_id__in=project_ids)
+    ).values_list('from_task_id', 'to_task_id', 'from_task__project_id', 'to_task__project_id'):
+        dependencies.append((task_id, dep_id))
+        if task_project not in scope_ids:
+            external_ids.add(task_id)
+        if dep_project not in scope_ids:
+            external_ids.add(dep_id)
+    # Far ends of cross-project edges are loaded with the projects' own tasks
+    scope = Q(project_id__in=project_ids)
+    if external_ids:
+        scope |= Q(id__in=external_ids)
+    rows = list(
+        Task.objects.filter(scope).values(
+            *TASK_FIELDS,
+            assignee_username=F('assignee__username'),
+            subtask_total=_subtask_count(),
+            subtask_done=_subtask_count(status='done'),
+        )
+    )
+    return ProjectGraph(project_ids, rows, dependencies)
@@ -0,0 +1,276 @@
+"""
+Resource-Constrained Scheduler
+Serial list scheduler (RCPSP with one unit of capacity per assignee) used to
+level workload across several projects.
+
+Time is counted in working hours from the portfolio start (hour h is on
+workday h // hours_per_day, converted to a date with WorkdayCalendar). Each
+assignee's capacity is a CapacityTimeline: an implicit segment tree over the
+hour axis storing the longest free run per node, so "earliest start >= t with
+d free hours" and "reserve [s, e)" are both O(log horizon). Eligible tasks
+(all dependencies placed) wait in a heap ordered by the priority rule and are
+placed one at a time at their earliest feasible slot, which may backfill a gap
+left earlier in the assignee's calendar.
+
+Priority rule: business priority (high, medium, low), then minimum latest
+start from an uncapacitated CPM pass (tightened by due dates), then task order.
+"""
+
+import heapq
+import math
+from datetime import date as date_type, datetime
+from typing import Dict, List, Optional
+
+from . import cpm_engine
+from .workday_calendar import WorkdayCalendar
+
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+DEFAULT_TASK_HOURS = 24  # 3 workdays, as elsewhere in the Gantt tooling
+_SPAN = 1 << 32  # hours addressable by a timeline (far beyond any schedule)
+
+
+class CapacityTimeline:
+    """
+    Busy/free hours of one assignee. Nodes are created only along reserved
+    ranges; a missing child is an entirely free range. Only free -> busy
+    transitions happen, so a fully busy node never needs pushing down.
+    """
+
+    __slots__ = ('left', 'right', 'pref', 'suf', 'best', 'busy_hours')
+
+    def __init__(self):
+        self.left = [-1]
+        self.right = [-1]
+        self.pref = [_SPAN]  # free run starting at the node's left edge
+        self.suf = [_SPAN]   # free run ending at the node's right edge
+        self.best = [_SPAN]  # longest free run inside the node
+        self.busy_hours = 0
+
+    def _new_node(self, length: int) -> int:
+        self.left.append(-1)
+        self.right.append(-1)
+        self.pref.append(length)
+        self.suf.append(length)
+        self.best.append(length)
+        return len(self.best) - 1
+
+    def _values(self, node: int, length: int):
+        if node < 0:
+            return length, length, length
+        return self.pref[node], self.suf[node], self.best[node]
+
+    def earliest_fit(self, release: int, duration: int) -> int:
+        """First start >= release with duration consecutive free hours."""
+        start, _ = self._find(0, 0, _SPAN, release, duration, 0)
+        return start
+
+    def _find(self, node: int, lo: int, hi: int, release: int, duration: int, run: int):
+        """(start or -1, free run reaching hi) - run is the free run (from release on) ending at lo."""
+        if hi <= release:
+            return -1, 0
+        length = hi - lo
+        pref, suf, best = self._values(node, length)
+        if lo >= release:
+            if run + pref >= duration:
+                return lo - run, 0
+            if best < duration:
+                return -1, (run + length if pref == length else suf)
+        elif node < 0:
+            # Free from release to hi
+            free = hi - release
+            return (release, 0) if free >= duration else (-1, free)
+        elif best == 0:
+            return -1, 0
+        mid = (lo + hi) // 2
+        start, run = self._find(self.left[node], lo, mid, release, duration, run)
+        if start >= 0:
+            return start, 0
+        return self._find(self.right[node], mid, hi, release, duration, run)
+
+    def reserve(self, start: int, end: int) -> None:
+        """Mark hours [start, end) busy (they must be free)."""
+        self.busy_hours += end - start
+        self._reserve(0, 0, _SPAN, start, end)
+
+    def _reserve(self, node: int, lo: int, hi: int, start: int, end: int) -> None:
+        if end <= lo or hi <= start or self.best[node] == 0:
+            return
+        if start <= lo and hi <= end:
+            self.pref[node] = self.suf[node] = self.best[node] = 0
+            return
+        mid = (lo + hi) // 2
+        if start < mid:
+            if self.left[node] < 0:
+                self.left[node] = self._new_node(mid - lo)
+            self._reserve(self.left[node], lo, mid, start, end)
+        if end > mid:
+            if self.right[node] < 0:
+                self.right[node] = self._new_node(hi - mid)
+            self._reserve(self.right[node], mid, hi, start, end)
+        left_len, right_len = mid - lo, hi - mid
+        lp, ls, lb = self._values(self.left[node], left_len)
+        rp, rs, rb = self._values(self.right[node], right_len)
+        self.pref[node] = lp if lp < left_len else left_len + rp
+        self.suf[node] = rs if rs < right_len else right_len + ls
+        self.best[node] = max(lb, rb, ls + rp)
+
+
+def task_hours(task: Dict) -> int:
+    """Remaining working hours: estimate minus hours already logged on started tasks."""
+    estimated = task.get('estimated_hours') or 0
+    if estimated <= 0:
+        return DEFAULT_TASK_HOURS
+    actual = task.get('actual_hours') or 0
+    if task.get('status') in ('in_progress', 'review') and 0 < actual < estimated:
+        estimated -= actual
+    return max(1, int(math.ceil(estimated)))
+
+
+def _to_date(value) -> Optional[date_type]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+def level_resources(
+    tasks: List[Dict],
+    start_date: date_type,
+    calendar: Optional[WorkdayCalendar] = None,
+    hours_per_day: int = 8,
+) -> Dict:
+    """
+    Schedule tasks under dependency and per-assignee capacity constraints.
+
+    Args:
+        tasks: Dicts with 'id', 'dependencies', 'assignee_id', 'estimated_hours',
+               'actual_hours', 'status', 'priority', 'due_date'. Done tasks are
+               skipped (their dependents are not held back by them).
+        start_date: Portfolio start (moved to the next workday if needed)
+        calendar: Workday calendar for hour -> date conversion
+        hours_per_day: Working hours per assignee per day
+
+    Returns:
+        {'tasks': {task_id: {'start_hour', 'finish_hour', 'start_date', 'end_date',
+                             'delay_hours', 'late'}},
+         'assignees': {assignee_id: {'busy_hours', 'span_hours', 'utilization'}},
+         'makespan_hours', 'end_date', 'cyclic_task_ids'}
+    """
+    calendar = calendar or WorkdayCalendar()
+    if not calendar.is_workday(start_date):
+        start_date = calendar.add_workdays(start_date, 1)
+    base = calendar.workday_ordinal(start_date)
+
+    open_tasks = [task for task in tasks if task.get('status') != 'done']
+    n = len(open_tasks)
+    ids = [task['id'] for task in open_tasks]
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    hours = [task_hours(task) for task in open_tasks]
+    edges = [(index[dep], i) for i, task in enumerate(open_tasks)
+             for dep in task.get('dependencies', []) or [] if dep in index]
+
+    # Uncapacitated CPM in hours for the latest-start priority rule and cycle handling
+    # (lag 1: CPM finishes are inclusive, a successor starts on the next hour).
+    # Edges the CPM pass had to ignore are ignored here too.
+    cpm = cpm_engine.compute_cpm(range(n), hours, edges, lag=1)
+    position = [0] * n
+    for rank, i in enumerate(cpm.order.tolist()):
+        position[i] = rank
+    preds: List[List[int]] = [[] for _ in range(n)]
+    succs: List[List[int]] = [[] for _ in range(n)]
+    for p, s in edges:
+        if position[p] < position[s]:
+            preds[s].append(p)
+            succs[p].append(s)
+
+    latest_start = [int(ls) for ls in cpm.ls.tolist()]
+    due_hours = [None] * n
+    for i, task in enumerate(open_tasks):
+        due = _to_date(task.get('due_date'))
+        if due is not None:
+            # Finish by the end of the due date (or the last workday before it)
+            due_hours[i] = (calendar.workday_ordinal(due) - base + 1) * hours_per_day
+            latest_start[i] = min(latest_start[i], due_hours[i] - hours[i])
+
+    def priority_key(i):
+        return (PRIORITY_RANK.get(open_tasks[i].get('priority'), 1), latest_start[i], i)
+
+    remaining = [len(p) for p in preds]
+    release = [0] * n
+    heap = [priority_key(i) for i in range(n) if remaining[i] == 0]
+    heapq.heapify(heap)
+    timelines: Dict[int, CapacityTimeline] = {}
+    start = [0] * n
+    finish = [0] * n
+
+    while heap:
+        i = heapq.heappop(heap)[2]
+        assignee = open_tasks[i].get('assignee_id')
+        if assignee is None:
+            begin = release[i]  # unassigned work is not capacity constrained
+        else:
+            timeline = timelines.get(assignee)
+            if timeline is None:
+                timeline = timelines[assignee] = CapacityTimeline()
+            begin = timeline.earliest_fit(release[i], hours[i])
+            timeline.reserve(begin, begin + hours[i])
+        start[i] = begin
+        finish[i] = begin + hours[i]
+        for s in succs[i]:
+            if finish[i] > release[s]:
+                release[s] = finish[i]
+            remaining[s] -= 1
+            if remaining[s] == 0:
+                heapq.heappush(heap, priority_key(s))
+
+    date_cache: Dict[int, str] = {}
+
+    def hour_to_iso(hour: int) -> str:
+        day = hour // hours_per_day
+        if day not in date_cache:
+            date_cache[day] = calendar.date_from_ordinal(base + day).isoformat()
+        return date_cache[day]
+
+    scheduled = {}
+    for i, task_id in enumerate(ids):
+        scheduled[task_id] = {
+            'start_hour': start[i],
+            'finish_hour': finish[i],
+            'start_date': hour_to_iso(start[i]),
+            'end_date': hour_to_iso(finish[i] - 1),
+            'hours': hours[i],
+            'delay_hours': start[i] - int(cpm.es[i]),
+            'late': due_hours[i] is not None and finish[i] > due_hours[i],
+        }
+
+    spans: Dict[int, List[int]] = {}
+    for i, task in enumerate(open_tasks):
+        assignee = task.get('assignee_id')
+        if assignee is not None:
+            span = spans.setdefault(assignee, [start[i], finish[i]])
+            span[0] = min(span[0], start[i])
+            span[1] = max(span[1], finish[i])
+    assignees = {}
+    for assignee, timeline in timelines.items():
+        span = spans[assignee][1] - spans[assignee][0]
+        assignees[assignee] = {
+            'busy_hours': timeline.busy_hours,
+            'span_hours': span,
+            'utilization': round(timeline.busy_hours / span * 100, 1) if span else 0.0,
+        }
+
+    makespan = max(finish) if n else 0
+    return {
+        'tasks': scheduled,
+        'assignees': assignees,
+        'makespan_hours': makespan,
+        'start_date': start_date.isoformat(),
+        'end_date': hour_to_iso(makespan - 1) if makespan else start_date.isoformat(),
+        'cyclic_task_ids': [ids[i] for i in cpm.cyclic_task_ids],
+    }
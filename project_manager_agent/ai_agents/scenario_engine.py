@@ -0,0 +1,281 @@
+"""
+What-if Scenario Engine
+Evaluates schedule scenarios as deltas against one baseline CPM run.
+
+A scenario changes durations (scale, set, add resources, scope cut) and/or
+delays task starts. Only the changed tasks are seeded; early start/finish is
+re-propagated in topological order through the successors whose dates
+actually move, so a local change costs the size of its downstream subgraph,
+not the whole project. Results are overlays on the baseline arrays.
+
+Scenario specs are JSON friendly:
+    'pessimistic'                                  # preset name
+    {'name': 'vendor late', 'delay': {42: 5}}      # start task 42 five workdays later
+    {'name': 'crunch', 'add_resources': {42: 1}}   # one more person on task 42
+    {'scale': {'*': 1.2, 17: 2.0}, 'remove': [23]} # all tasks +20%, task 17 x2, cut task 23
+    {'duration': {17: 4}}                          # set task 17 to 4 workdays
+Task keys may be ints or numeric strings. Durations are workdays.
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .cpm_engine import CPMSchedule
+from .schedule_optimizer import available_cpus, process_pool
+
+# name -> (description, duration scale, workdays of start delay per dependency)
+PRESET_SCENARIOS = {
+    'optimistic': ('Optimistic: Everything goes smoothly', 0.8, 0),
+    'realistic': ('Realistic: Normal execution', 1.0, 0),
+    'pessimistic': ('Pessimistic: Delays and issues occur', 1.5, 0),
+    'delayed_dependencies': ('Delayed Dependencies: each dependency adds 2 days', 1.0, 2),
+    'resource_constrained': ('Resource Constrained: Limited availability', 1.2, 0),
+}
+DEFAULT_SCENARIOS = list(PRESET_SCENARIOS)
+
+# Below this many scenarios a process pool costs more than it saves
+MIN_PARALLEL_SCENARIOS = 8
+DEFAULT_WORKERS = 0  # inline; see SCENARIO_ENGINE_WORKERS
+
+
+def _setting(name: str, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class ScenarioError(ValueError):
+    """Raised for malformed scenario specs."""
+
+
+class ScenarioEngine:
+    """Baseline CPM schedule plus the adjacency needed for delta propagation."""
+
+    def __init__(self, baseline: CPMSchedule):
+        self.baseline = baseline
+        self.n = baseline.size
+        self.task_ids = baseline.task_ids.tolist()
+        self.index = dict(baseline.index)
+        self.lag = baseline.lag
+        self.durations = baseline.durations.tolist()
+        self.es = baseline.es.tolist()
+        self.ef = baseline.ef.tolist()
+        self.end = max(self.ef) if self.n else 0
+
+        self.position = [0] * self.n
+        for rank, i in enumerate(baseline.order.tolist()):
+            self.position[i] = rank
+        self.preds: List[List[int]] = [[] for _ in range(self.n)]
+        self.succs: List[List[int]] = [[] for _ in range(self.n)]
+        for p, s in baseline.edges.T.tolist():
+            # Edges the baseline ignored to break a cycle stay ignored
+            if self.position[p] < self.position[s]:
+                self.preds[s].append(p)
+                self.succs[p].append(s)
+        # Tasks by baseline finish, latest first - the new project end is found
+        # from the changed tasks plus the first unchanged task in this list
+        self._by_finish = np.argsort(-baseline.ef, kind='stable').tolist()
+
+    # ------------------------------------------------------------------
+    # Scenario -> per-task changes
+    # ------------------------------------------------------------------
+
+    def _task_index(self, key) -> Optional[int]:
+        try:
+            return self.index.get(int(key))
+        except (TypeError, ValueError):
+            return None
+
+    def changes_for(self, spec: Union[str, Dict]) -> Dict:
+        """Resolve a scenario spec into {'name', 'description', 'durations': {i: d}, 'delays': {i: d}}."""
+        if isinstance(spec, str):
+            if spec not in PRESET_SCENARIOS:
+                raise ScenarioError(f"Unknown scenario: {spec}. Presets: {', '.join(PRESET_SCENARIOS)}")
+            description, scale, delay_per_dependency = PRESET_SCENARIOS[spec]
+            spec = {'name': spec, 'description': description, 'scale': {'*': scale}}
+            if delay_per_dependency:
+                spec['delay'] = {
+                    self.task_ids[i]: delay_per_dependency * len(self.preds[i])
+                    for i in range(self.n) if self.preds[i]
+                }
+        if not isinstance(spec, dict):
+            raise ScenarioError('A scenario must be a preset name or an object')
+
+        durations: Dict[int, int] = {}
+        delays: Dict[int, int] = {}
+        scale = dict(spec.get('scale') or {})
+        default_scale = scale.pop('*', None)
+        if default_scale is not None and default_scale != 1:
+            for i in range(self.n):
+                durations[i] = max(1, int(self.durations[i] * float(default_scale)))
+        for key, factor in scale.items():
+            i = self._task_index(key)
+            if i is not None:
+                durations[i] = max(1, int(self.durations[i] * float(factor)))
+        for key, extra_people in (spec.get('add_resources') or {}).items():
+            i = self._task_index(key)
+            if i is not None and extra_people:
+                current = durations.get(i, self.durations[i])
+                durations[i] = max(1, int(math.ceil(current / (1.0 + float(extra_people)))))
+        for key, days in (spec.get('duration') or {}).items():
+            i = self._task_index(key)
+            if i is not None:
+                durations[i] = max(1, int(days))
+        for key in spec.get('remove') or []:
+            i = self._task_index(key)
+            if i is not None:
+                durations[i] = 0  # cut from scope: dependents still wait for its predecessors
+        for key, days in (spec.get('delay') or {}).items():
+            i = self._task_index(key)
+            if i is not None and int(days):
+                delays[i] = int(days)
+
+        name = spec.get('name') or 'custom'
+        return {
+            'name': name,
+            'description': spec.get('description', ''),
+            'durations': {i: d for i, d in durations.items() if d != self.durations[i]},
+            'delays': delays,
+        }
+
+    # ------------------------------------------------------------------
+    # Delta propagation
+    # ------------------------------------------------------------------
+
+    def evaluate(self, changes: Dict) -> Dict:
+        """
+        Propagate resolved changes (see changes_for). Returns offsets only:
+        {'name', 'description', 'end', 'es': {i: v}, 'ef': {i: v}, 'visited', 'driving_path'}
+        where es/ef hold the tasks whose dates moved.
+        """
+        durations = changes['durations']
+        delays = changes['delays']
+        position, preds, succs, lag = self.position, self.preds, self.succs, self.lag
+        new_es: Dict[int, int] = {}
+        new_ef: Dict[int, int] = {}
+
+        seeds = set(durations) | set(delays)
+        if len(seeds) * 4 > self.n:
+            # Broad changes (e.g. scale every task): a plain pass in topological order
+            # beats heap bookkeeping once most of the graph moves anyway
+            new_es, new_ef = self._full_pass(durations, delays)
+            heap, visited = [], self.n
+        else:
+            heap = [(position[i], i) for i in seeds]
+            heapq.heapify(heap)
+            visited = 0
+        queued = set(seeds)
+        while heap:
+            _, u = heapq.heappop(heap)
+            visited += 1
+            start = 0
+            for p in preds[u]:
+                candidate = new_ef.get(p, self.ef[p]) + lag
+                if candidate > start:
+                    start = candidate
+            start += delays.get(u, 0)
+            finish = start + durations.get(u, self.durations[u]) - 1
+            if start != self.es[u] or finish != self.ef[u]:
+                new_es[u] = start
+                new_ef[u] = finish
+            if finish != self.ef[u]:
+                for s in succs[u]:
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(heap, (position[s], s))
+
+        end = max(new_ef.values()) if new_ef else None
+        for i in self._by_finish:
+            if i not in new_ef:
+                end = self.ef[i] if end is None else max(end, self.ef[i])
+                break
+        if end is None:
+            end = 0
+
+        return {
+            'name': changes['name'],
+            'description': changes['description'],
+            'end': end,
+            'es': new_es,
+            'ef': new_ef,
+            'visited': visited,
+            'driving_path': self._driving_path(new_es, new_ef, durations, delays, end),
+        }
+
+    def _full_pass(self, durations, delays):
+        es, ef, lag = self.es, self.ef, self.lag
+        finish_of = [0] * self.n
+        new_es: Dict[int, int] = {}
+        new_ef: Dict[int, int] = {}
+        for u in self.baseline.order.tolist():
+            start = 0
+            for p in self.preds[u]:
+                if finish_of[p] + lag > start:
+                    start = finish_of[p] + lag
+            start += delays.get(u, 0)
+            finish = start + durations.get(u, self.durations[u]) - 1
+            finish_of[u] = finish
+            if start != es[u] or finish != ef[u]:
+                new_es[u] = start
+                new_ef[u] = finish
+        return new_es, new_ef
+
+    def _driving_path(self, new_es, new_ef, durations, delays, end) -> List[int]:
+        """Chain of tasks (first to last) that determines the scenario's finish."""
+        if not self.n:
+            return []
+        finish_of = lambda i: new_ef.get(i, self.ef[i])
+        current = next((i for i in new_ef if new_ef[i] == end), None)
+        if current is None:
+            current = next(i for i in self._by_finish if i not in new_ef)
+        path = [current]
+        while True:
+            target = new_es.get(current, self.es[current]) - delays.get(current, 0)
+            driver = next((p for p in self.preds[current] if finish_of(p) + self.lag == target), None)
+            if driver is None:
+                break
+            path.append(driver)
+            current = driver
+        path.reverse()
+        return [self.task_ids[i] for i in path]
+
+
+# ---------------------------------------------------------------------------
+# Parallel evaluation
+# ---------------------------------------------------------------------------
+
+def _evaluate_chunk(args) -> List[Dict]:
+    engine, changes_list = args
+    return [engine.evaluate(changes) for changes in changes_list]
+
+
+def evaluate_scenarios(engine: ScenarioEngine, specs: Sequence[Union[str, Dict]],
+                       workers: Optional[int] = None) -> List[Dict]:
+    """
+    Evaluate scenarios against one baseline. Order of the results matches specs.
+
+    Runs inline unless a process pool is configured (workers=, or
+    SCENARIO_ENGINE_WORKERS on Celery workers) and there are enough scenarios
+    to pay for it. Each pool worker receives the engine once with a contiguous
+    share of the scenarios.
+    """
+    resolved = [engine.changes_for(spec) for spec in specs]
+    if workers is None:
+        workers = _setting('SCENARIO_ENGINE_WORKERS', DEFAULT_WORKERS)
+    workers = min(len(resolved), workers, available_cpus())
+    if workers > 1 and len(resolved) >= MIN_PARALLEL_SCENARIOS:
+        size = math.ceil(len(resolved) / workers)
+        chunks = [(engine, resolved[start:start + size]) for start in range(0, len(resolved), size)]
+        try:
+            pool = process_pool(workers)
+            if pool is not None:
+                with pool:
+                    return [result for chunk in pool.map(_evaluate_chunk, chunks) for result in chunk]
+        except (OSError, ValueError):
+            pass
+    return [engine.evaluate(changes) for changes in resolved]
@@ -0,0 +1,389 @@
+"""
+Schedule Optimizer Core
+Integer-indexed task ordering problem shared by the genetic algorithm and
+simulated annealing optimizers in TimelineGanttEnhancements.
+
+Tasks are numbered 0..n-1 with durations in an int array and dependencies as
+(predecessor, successor) index arrays plus per-task adjacency lists. An order
+is an int array of task indices; pos[task] is its position. Objectives (same
+as the original dict-based implementations):
+
+- annealing energy: total days + 10 per dependency that is not earlier in the order
+- genetic total: days of valid tasks + 1000 per invalid task, where a task is
+  invalid when a dependency is missing, later in the order, or itself invalid
+
+Annealing swaps two tasks per step, so its energy change is evaluated from
+the edges touching those two tasks only. Genetic populations run as
+independent islands, each seeded from one SeedSequence so results do not
+depend on the worker count.
+
+Islands run inline unless a process pool is explicitly configured: web
+processes should not start child processes per request, so parallel islands
+are meant for Celery workers or commands that set SCHEDULE_OPTIMIZER_WORKERS
+(or pass workers=). Pools use the spawn start method.
+
+Settings (optional):
+    SCHEDULE_OPTIMIZER_ISLANDS - independent GA populations per run (default: 1)
+    SCHEDULE_OPTIMIZER_WORKERS - processes used for the islands, 0/1 = inline (default: 0)
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ISLANDS = 1
+DEFAULT_WORKERS = 0
+
+ANNEALING_VIOLATION_PENALTY = 10
+GENETIC_INVALID_PENALTY = 1000
+
+
+def _setting(name: str, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def task_days(task: Dict) -> int:
+    """Duration used by the optimizers: estimated hours / 8 (min 1), or 3 days when unknown."""
+    hours = task.get('estimated_hours', 0) or 0
+    return max(1, int(hours / 8)) if hours > 0 else 3
+
+
+class ScheduleProblem:
+    """Task ordering problem in array form (picklable, so it can be sent to pool workers)."""
+
+    def __init__(self, tasks: List[Dict]):
+        self.task_ids = [task.get('id') for task in tasks]
+        index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.n = len(self.task_ids)
+        self.days = np.array([task_days(task) for task in tasks], dtype=np.int64)
+        self.total_days = int(self.days.sum())
+
+        # Dependencies on tasks outside the problem can never be satisfied
+        self.external = np.zeros(self.n, dtype=np.int64)
+        pairs = []
+        for i, task in enumerate(tasks):
+            for dep in task.get('dependencies', []) or []:
+                if dep in index:
+                    pairs.append((index[dep], i))
+                else:
+                    self.external[i] += 1
+        edges = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        self.src = edges[:, 0].copy()
+        self.dst = edges[:, 1].copy()
+        self.external_total = int(self.external.sum())
+        self.has_external = self.external > 0
+
+        self.preds: List[List[int]] = [[] for _ in range(self.n)]
+        self.succs: List[List[int]] = [[] for _ in range(self.n)]
+        for p, s in pairs:
+            self.preds[s].append(p)
+            self.succs[p].append(s)
+
+    @staticmethod
+    def positions(order: np.ndarray) -> np.ndarray:
+        pos = np.empty(len(order), dtype=np.int64)
+        pos[order] = np.arange(len(order))
+        return pos
+
+    def violations(self, pos: np.ndarray) -> int:
+        """Dependencies not placed before their dependent (missing tasks included)."""
+        return int(np.count_nonzero(pos[self.src] > pos[self.dst])) + self.external_total
+
+    def annealing_energy(self, pos: np.ndarray) -> int:
+        return self.total_days + ANNEALING_VIOLATION_PENALTY * self.violations(pos)
+
+    def swap_violation_delta(self, pos: List[int], a: int, b: int) -> int:
+        """
+        Change in violations if tasks a and b swap positions. Only edges touching
+        a or b can change; the a-b edge (if any) is counted once.
+        """
+        pa, pb = pos[a], pos[b]
+        delta = 0
+        for p in self.preds[a]:
+            pp = pos[p]
+            new_pp = pa if p == b else pp
+            delta += (new_pp > pb) - (pp > pa)
+        for succ in self.succs[a]:
+            ps = pos[succ]
+            new_ps = pa if succ == b else ps
+            delta += (pb > new_ps) - (pa > ps)
+        # Edges between a and b were counted above
+        for p in self.preds[b]:
+            if p != a:
+                pp = pos[p]
+                delta += (pp > pa) - (pp > pb)
+        for succ in self.succs[b]:
+            if succ != a:
+                ps = pos[succ]
+                delta += (pa > ps) - (pb > ps)
+        return delta
+
+    def invalid_mask(self, pos: np.ndarray) -> np.ndarray:
+        """Tasks the sequential walk cannot complete: bad tasks and everything downstream of them."""
+        invalid = self.has_external.copy()
+        invalid[self.dst[pos[self.src] > pos[self.dst]]] = True
+        stack = np.flatnonzero(invalid).tolist()
+        succs = self.succs
+        while stack:
+            for s in succs[stack.pop()]:
+                if not invalid[s]:
+                    invalid[s] = True
+                    stack.append(s)
+        return invalid
+
+    def genetic_total(self, pos: np.ndarray) -> int:
+        invalid = self.invalid_mask(pos)
+        invalid_days = int(self.days[invalid].sum())
+        return self.total_days - invalid_days + GENETIC_INVALID_PENALTY * int(np.count_nonzero(invalid))
+
+
+# ---------------------------------------------------------------------------
+# Simulated annealing
+# ---------------------------------------------------------------------------
+
+def run_annealing(problem: ScheduleProblem, initial_temp: float = 100.0, cooling_rate: float = 0.95,
+                  iterations: int = 1000, seed: Optional[int] = None, incremental: bool = True) -> Dict:
+    """
+    Swap-neighbourhood simulated annealing. With incremental=False every
+    neighbour is re-scored from scratch (kept for benchmarking and checks).
+
+    Returns:
+        {'order': task index array, 'energy', 'violations', 'evaluations', 'seed'}
+    """
+    seed = _resolve_seed(seed)
+    rng = random.Random(seed)
+    n = problem.n
+    order = list(range(n))
+    rng.shuffle(order)
+    pos_array = problem.positions(np.asarray(order, dtype=np.int64))
+    pos = pos_array.tolist()
+    violations = problem.violations(pos_array)
+    best_violations = violations
+    best_order = list(order)
+    temperature = initial_temp
+
+    if n >= 2:
+        for _ in range(iterations):
+            i, j = rng.sample(range(n), 2)
+            a, b = order[i], order[j]
+            if incremental:
+                delta = problem.swap_violation_delta(pos, a, b)
+            else:
+                pos[a], pos[b] = pos[b], pos[a]
+                delta = problem.violations(np.asarray(pos, dtype=np.int64)) - violations
+                pos[a], pos[b] = pos[b], pos[a]
+            energy_delta = ANNEALING_VIOLATION_PENALTY * delta
+            if energy_delta <= 0 or (temperature > 0 and rng.random() < math.exp(-energy_delta / temperature)):
+                order[i], order[j] = b, a
+                pos[a], pos[b] = j, i
+                violations += delta
+                if violations < best_violations:
+                    best_violations = violations
+                    best_order = list(order)
+            temperature *= cooling_rate
+
+    return {
+        'order': np.asarray(best_order, dtype=np.int64),
+        'energy': problem.total_days + ANNEALING_VIOLATION_PENALTY * best_violations,
+        'violations': best_violations,
+        'evaluations': iterations if n >= 2 else 0,
+        'seed': seed,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Genetic algorithm
+# ---------------------------------------------------------------------------
+
+def _run_island(problem: ScheduleProblem, generations: int, population_size: int,
+                seed_sequence: np.random.SeedSequence) -> Tuple[np.ndarray, int, int]:
+    """One GA population. Module-level so it can run in a pool worker."""
+    rng = np.random.default_rng(seed_sequence)
+    n = problem.n
+    population_size = max(2, population_size)
+    elite_size = max(1, population_size // 2)
+    crossover_point = n // 2
+
+    def score(order):
+        return problem.genetic_total(problem.positions(order))
+
+    population = [rng.permutation(n) for _ in range(population_size)]
+    totals = [score(order) for order in population]
+    evaluations = population_size
+    in_child = np.zeros(n, dtype=bool)
+
+    for _ in range(generations):
+        ranked = sorted(range(population_size), key=totals.__getitem__)
+        elite = [population[k] for k in ranked[:elite_size]]
+        elite_totals = [totals[k] for k in ranked[:elite_size]]
+        population, totals = list(elite), list(elite_totals)
+        while len(population) < population_size:
+            parent1 = elite[rng.integers(elite_size)]
+            parent2 = elite[rng.integers(elite_size)]
+            # First half of parent1, then parent2's remaining tasks in parent2 order
+            head = parent1[:crossover_point]
+            in_child[:] = False
+            in_child[head] = True
+            child = np.concatenate((head, parent2[~in_child[parent2]]))
+            if n >= 2 and rng.random() < 0.1:
+                idx1, idx2 = rng.choice(n, 2, replace=False)
+                child[idx1], child[idx2] = child[idx2], child[idx1]
+            population.append(child)
+            totals.append(score(child))
+            evaluations += 1
+
+    best = min(range(population_size), key=totals.__getitem__)
+    return population[best], totals[best], evaluations
+
+
+def _run_island_args(args):
+    return _run_island(*args)
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def process_pool(processes: int):
+    """
+    Spawn-context pool for CPU-bound work (GA islands, scenario batches), or None to run inline.
+
+    Spawned workers start clean instead of copying the parent's DB connections,
+    locks and threads. They run django.setup() before unpickling any work,
+    because the worker functions live in this package, which imports Django models.
+    """
+    if processes <= 1 or multiprocessing.current_process().daemon:
+        return None  # e.g. Celery prefork children cannot have children
+    if not os.environ.get('DJANGO_SETTINGS_MODULE'):
+        return None  # workers could not set up Django to import the package
+    import django
+    return multiprocessing.get_context('spawn').Pool(processes=processes, initializer=django.setup)
+
+
+def run_genetic(problem: ScheduleProblem, generations: int = 50, population_size: int = 20,
+                seed: Optional[int] = None, islands: Optional[int] = None,
+                workers: Optional[int] = None) -> Dict:
+    """
+    Island-model GA: `islands` independent populations evolved in parallel,
+    best individual wins (ties go to the lowest island).
+
+    Returns:
+        {'order', 'total', 'fitness', 'violations', 'evaluations', 'islands', 'seed'}
+    """
+    seed = _resolve_seed(seed)
+    islands = max(1, islands or _setting('SCHEDULE_OPTIMIZER_ISLANDS', DEFAULT_ISLANDS))
+    if workers is None:
+        workers = _setting('SCHEDULE_OPTIMIZER_WORKERS', DEFAULT_WORKERS)
+    # More processes than CPUs only adds fork/pickle overhead
+    workers = min(islands, workers, available_cpus())
+    jobs = [(problem, generations, population_size, child)
+            for child in np.random.SeedSequence(seed).spawn(islands)]
+
+    results = None
+    if problem.n > 1:
+        try:
+            pool = process_pool(workers)
+            if pool is not None:
+                with pool:
+                    results = pool.map(_run_island_args, jobs)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Schedule optimizer pool unavailable, running islands inline: {exc}")
+    if results is None:
+        results = [_run_island(*job) for job in jobs]
+
+    best = min(range(islands), key=lambda k: results[k][1])
+    order, total, _ = results[best]
+    return {
+        'order': order,
+        'total': total,
+        'fitness': 1.0 / (total + 1),
+        'violations': problem.violations(problem.positions(order)),
+        'evaluations': sum(result[2] for result in results),
+        'islands': islands,
+        'seed': seed,
+    }
+
+
+def _resolve_seed(seed: Optional[int]) -> int:
+    """Seed actually used, so an unseeded run can be reproduced from its result."""
+    if seed is None:
+        return int.from_bytes(os.urandom(4), 'little')
+    return int(seed)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def random_problem_tasks(n: int, seed: int = 0, dependency_probability: float = 0.05,
+                         window: int = 20) -> List[Dict]:
+    """Random DAG of n tasks with dependencies on up to `window` previous tasks."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        deps = [j for j in range(max(0, i - window), i) if rng.random() < dependency_probability * window / 4]
+        tasks.append({
+            'id': i + 1,
+            'estimated_hours': rng.choice([None, 4, 8, 16, 24, 40, 80]),
+            'dependencies': [dep + 1 for dep in deps],
+        })
+    return tasks
+
+
+def benchmark(tasks: List[Dict], seed: int = 0, annealing_iterations: int = 20000,
+              generations: int = 50, population_size: int = 20,
+              islands: Optional[int] = None, workers: Optional[int] = None) -> List[Dict]:
+    """
+    Run each optimizer on the same problem and report solution quality per second.
+    Quality is the dependency violations removed compared with a random order;
+    invalid_tasks is the genetic objective (tasks blocked by a misplaced dependency).
+    """
+    problem = ScheduleProblem(tasks)
+    # The comparison needs a pool even where the settings keep runs inline
+    islands = islands or 4
+    workers = workers or min(islands, available_cpus())
+    random_pos = problem.positions(np.random.default_rng(seed).permutation(problem.n))
+    start_violations = problem.violations(random_pos)
+
+    runs = [
+        ('annealing (full recompute)', lambda: run_annealing(
+            problem, iterations=annealing_iterations, seed=seed, incremental=False)),
+        ('annealing (incremental)', lambda: run_annealing(
+            problem, iterations=annealing_iterations, seed=seed)),
+        ('genetic (inline)', lambda: run_genetic(
+            problem, generations, population_size, seed=seed, islands=islands, workers=1)),
+        ('genetic (process pool)', lambda: run_genetic(
+            problem, generations, population_size, seed=seed, islands=islands, workers=workers)),
+    ]
+    rows = []
+    for name, run in runs:
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        improvement = start_violations - result['violations']
+        rows.append({
+            'optimizer': name,
+            'seconds': round(elapsed, 4),
+            'violations': result['violations'],
+            'random_order_violations': start_violations,
+            'invalid_tasks': int(np.count_nonzero(problem.invalid_mask(problem.positions(result['order'])))),
+            'evaluations': result['evaluations'],
+            'evaluations_per_second': round(result['evaluations'] / elapsed) if elapsed else None,
+            'improvement_per_second': round(improvement / elapsed, 2) if elapsed else None,
+        })
+    return rows
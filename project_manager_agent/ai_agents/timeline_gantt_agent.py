@@ -5,10 +5,17 @@ Manages project timelines, creates Gantt charts, and tracks project schedules.
 
 from .base_agent import BaseAgent
 from .enhancements.timeline_gantt_enhancements import TimelineGanttEnhancements
+from .workday_calendar import WorkdayCalendar
+from . import cpm_engine
+from .cpm_engine import CPMSchedule
+from . import gantt_payload
+from .project_graph import ProjectGraph, load_project_graph
+from .scenario_engine import ScenarioError
 from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta, timezone as dt_timezone, date as date_type
+from django.conf import settings
 from django.utils import timezone
-from core.models import Project, Task
+from core.models import Project
 import calendar
 
 
@@ -34,41 +41,35 @@ class TimelineGanttAgent(BaseAgent):
         You should consider dependencies, resources, and constraints when planning timelines."""
         self.workdays_per_week = 5  # Monday-Friday
         self.hours_per_day = 8
+        # Closed-form workday arithmetic; company holidays from settings.PROJECT_HOLIDAYS (ISO dates)
+        self.calendar = WorkdayCalendar(getattr(settings, 'PROJECT_HOLIDAYS', []))
+        # Task graphs loaded during the current request (reset by process() / reset_request_state())
+        self._graphs: Dict[Tuple[int, ...], ProjectGraph] = {}
+    
+    def _project_graph(self, *project_ids: int) -> ProjectGraph:
+        """Task graph of the given projects, loaded once per request (two queries)."""
+        key = tuple(sorted(set(project_ids)))
+        graph = self._graphs.get(key)
+        if graph is None:
+            graph = self._graphs[key] = load_project_graph(key)
+        return graph
+    
+    def reset_request_state(self):
+        self._graphs = {}
     
     def _is_workday(self, date: date_type) -> bool:
-        """Check if a date is a workday (Monday-Friday)"""
-        return date.weekday() < 5  # 0-4 are Monday-Friday
+        """Check if a date is a workday (Monday-Friday, not a company holiday)"""
+        return self.calendar.is_workday(date)
     
     def _add_workdays(self, start_date: date_type, workdays: int) -> date_type:
-        """Add workdays to a date, skipping weekends. Supports negative workdays."""
-        if workdays == 0:
-            return start_date
-        
-        current = start_date
-        days_added = 0
-        direction = 1 if workdays > 0 else -1
-        target = abs(workdays)
-        
-        while abs(days_added) < target:
-            current += timedelta(days=direction)
-            if self._is_workday(current):
-                days_added += direction
-        
-        return current
+        """Add workdays to a date, skipping weekends and holidays. Supports negative workdays."""
+        return self.calendar.add_workdays(start_date, workdays)
     
     def _calculate_workdays_between(self, start_date: date_type, end_date: date_type) -> int:
-        """Calculate number of workdays between two dates"""
-        if end_date < start_date:
-            return 0
-        workdays = 0
-        current = start_date
-        while current <= end_date:
-            if self._is_workday(current):
-                workdays += 1
-            current += timedelta(days=1)
-        return workdays
+        """Calculate number of workdays between two dates (inclusive)"""
+        return self.calendar.workdays_between(start_date, end_date)
     
-    def create_timeline(self, project_id: int, tasks: List[Dict]) -> Dict:
+    def create_timeline(self, project_id: int, tasks: List[Dict], graph: ProjectGraph = None) -> Dict:
         """
         Create a project timeline from tasks - shows task date ranges, status changes, and completion dates.
         Displays tasks on a calendar timeline graph.
@@ -90,50 +91,60 @@ class TimelineGanttAgent(BaseAgent):
                 'error': f'Project with ID {project_id} not found'
             }
         
-        # Get actual Task objects from database to access all fields including timestamps
-        tasks_queryset = Task.objects.filter(project=project).select_related('assignee').prefetch_related('depends_on', 'dependent_tasks', 'activity_logs')
+        # Task rows (with timestamps) and dependencies from the request's project graph
+        graph = graph or self._project_graph(project.id)
+        rows = graph.rows
         
         # Get project start date or use earliest task creation date
-        project_start = project.start_date or (tasks_queryset.order_by('created_at').first().created_at.date() if tasks_queryset.exists() else timezone.now().date())
+        project_start = project.start_date or (
+            min(rows[i]['created_at'] for i in graph.local).date() if graph.local else timezone.now().date()
+        )
+        
+        # Status change history for all tasks in one query
+        status_history = None
+        try:
+            from core.models import TaskActivityLog
+            status_history = {}
+            for log in TaskActivityLog.objects.filter(
+                task__project=project,
+                action_type='status_changed'
+            ).order_by('created_at').values('task_id', 'old_value', 'new_value', 'created_at', 'user__username'):
+                status_history.setdefault(log['task_id'], []).append({
+                    'from_status': log['old_value'],
+                    'to_status': log['new_value'],
+                    'changed_at': log['created_at'].isoformat(),
+                    'changed_by': log['user__username']
+                })
+        except Exception:
+            status_history = None
         
         timeline_tasks = []
         
-        for task in tasks_queryset:
+        for i in graph.local:
+            task = rows[i]
             # Calculate task start and end dates
-            task_start, task_end, _ = self._calculate_task_dates(task, project_start)
+            task_start, task_end, _ = self._calculate_task_dates(graph, i, project_start)
             
             # Get status change history from activity logs
-            status_changes = []
-            try:
-                from core.models import TaskActivityLog
-                status_logs = TaskActivityLog.objects.filter(
-                    task=task,
-                    action_type='status_changed'
-                ).order_by('created_at')
-                
-                for log in status_logs:
-                    status_changes.append({
-                        'from_status': log.old_value,
-                        'to_status': log.new_value,
-                        'changed_at': log.created_at.isoformat(),
-                        'changed_by': log.user.username if log.user else None
-                    })
-            except Exception:
-                # Fallback: use created_at and updated_at if activity logs not available
-                if task.created_at:
+            if status_history is not None:
+                status_changes = status_history.get(task['id'], [])
+            else:
+                # Fallback: use created_at if activity logs not available
+                status_changes = []
+                if task['created_at']:
                     status_changes.append({
                         'from_status': None,
-                        'to_status': task.status,
-                        'changed_at': task.created_at.isoformat(),
+                        'to_status': task['status'],
+                        'changed_at': task['created_at'].isoformat(),
                         'changed_by': None
                     })
             
             # Determine task date ranges based on status
-            if task.status == 'done' and task.completed_at:
+            if task['status'] == 'done' and task['completed_at']:
                 # Task is completed - show completion date range
-                completion_date = task.completed_at.date()
+                completion_date = task['completed_at'].date()
                 # Estimate when work started (use created_at or when status changed to in_progress)
-                work_start_date = task.created_at.date()
+                work_start_date = task['created_at'].date()
                 for change in status_changes:
                     if change.get('to_status') == 'in_progress':
                         try:
@@ -149,9 +160,9 @@ class TimelineGanttAgent(BaseAgent):
                     'completed_from': work_start_date.isoformat(),
                     'completed_to': completion_date.isoformat()
                 }
-            elif task.status in ['in_progress', 'review']:
+            elif task['status'] in ['in_progress', 'review']:
                 # Task is in progress - show current date range
-                work_start_date = task.created_at.date()
+                work_start_date = task['created_at'].date()
                 for change in status_changes:
                     if change.get('to_status') == 'in_progress':
                         try:
@@ -161,7 +172,7 @@ class TimelineGanttAgent(BaseAgent):
                             pass
                 
                 # End date is either due_date or calculated end date
-                end_date = task.due_date.date() if task.due_date else task_end
+                end_date = task['due_date'].date() if task['due_date'] else task_end
                 if end_date < work_start_date:
                     end_date = task_end
                 
@@ -183,22 +194,22 @@ class TimelineGanttAgent(BaseAgent):
             
             # Build task timeline data
             task_timeline = {
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'status': task.status,
-                'priority': task.priority,
-                'assignee': task.assignee.username if task.assignee else None,
-                'assignee_id': task.assignee.id if task.assignee else None,
+                'id': task['id'],
+                'title': task['title'],
+                'description': task['description'],
+                'status': task['status'],
+                'priority': task['priority'],
+                'assignee': task['assignee_username'],
+                'assignee_id': task['assignee_id'],
                 'date_range': task_date_range,
                 'status_changes': status_changes,
-                'created_at': task.created_at.isoformat(),
-                'updated_at': task.updated_at.isoformat(),
-                'completed_at': task.completed_at.isoformat() if task.completed_at else None,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                'actual_hours': float(task.actual_hours) if task.actual_hours else None,
-                'dependencies': [dep.id for dep in task.depends_on.all()],
+                'created_at': task['created_at'].isoformat(),
+                'updated_at': task['updated_at'].isoformat(),
+                'completed_at': task['completed_at'].isoformat() if task['completed_at'] else None,
+                'due_date': task['due_date'].isoformat() if task['due_date'] else None,
+                'estimated_hours': float(task['estimated_hours']) if task['estimated_hours'] else None,
+                'actual_hours': float(task['actual_hours']) if task['actual_hours'] else None,
+                'dependencies': graph.dependency_ids(i),
                 'progress': self._calculate_task_progress(task)
             }
             
@@ -253,7 +264,7 @@ class TimelineGanttAgent(BaseAgent):
         
         # Generate chart data for visualization
         try:
-            chart_data = self._generate_chart_data(gantt_data, tasks_queryset)
+            chart_data = self._generate_chart_data(gantt_data)
             timeline_data['charts'] = chart_data
         except Exception as e:
             self.log_action("Chart generation failed", {"error": str(e)})
@@ -263,7 +274,7 @@ class TimelineGanttAgent(BaseAgent):
             'timeline': timeline_data
         }
     
-    def generate_gantt_chart(self, project_id: int) -> Dict:
+    def generate_gantt_chart(self, project_id: int, graph: ProjectGraph = None) -> Dict:
         """
         Generate Gantt chart data for visualization with AI-optimized timeline calculations.
         
@@ -284,23 +295,25 @@ class TimelineGanttAgent(BaseAgent):
             }
         
         # Get all tasks for the project
-        tasks_queryset = Task.objects.filter(project=project).select_related('assignee').prefetch_related('depends_on', 'dependent_tasks')
+        graph = graph or self._project_graph(project.id)
+        rows = graph.rows
         
         # Prepare task data for AI analysis
         tasks_data = []
-        for task in tasks_queryset:
+        for i in graph.local:
+            task = rows[i]
             tasks_data.append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description[:200] if task.description else '',
-                'status': task.status,
-                'priority': task.priority,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                'actual_hours': float(task.actual_hours) if task.actual_hours else None,
-                'assignee': task.assignee.username if task.assignee else None,
-                'dependencies': [dep.id for dep in task.depends_on.all()],
-                'dependent_count': task.dependent_tasks.count()
+                'id': task['id'],
+                'title': task['title'],
+                'description': task['description'][:200] if task['description'] else '',
+                'status': task['status'],
+                'priority': task['priority'],
+                'due_date': task['due_date'].isoformat() if task['due_date'] else None,
+                'estimated_hours': float(task['estimated_hours']) if task['estimated_hours'] else None,
+                'actual_hours': float(task['actual_hours']) if task['actual_hours'] else None,
+                'assignee': task['assignee_username'],
+                'dependencies': graph.dependency_ids(i),
+                'dependent_count': len(graph.dependent_indices(i))
             })
         
         # Use AI to optimize timeline if we have tasks
@@ -376,39 +389,40 @@ Return JSON array with optimized dates:
         # Calculate start and end dates for each task (use AI optimization if available)
         project_start = project.start_date or timezone.now().date()
         
-        for task in tasks_queryset:
+        for i in graph.local:
+            task = rows[i]
             # Use AI optimization if available
-            if task.id in optimization_map:
-                opt = optimization_map[task.id]
+            if task['id'] in optimization_map:
+                opt = optimization_map[task['id']]
                 try:
                     task_start = datetime.strptime(opt['start_date'], '%Y-%m-%d').date()
                     task_end = datetime.strptime(opt['end_date'], '%Y-%m-%d').date()
                     ai_reasoning = opt.get('reasoning', '')
                 except (ValueError, KeyError):
                     # Fallback to manual calculation
-                    task_start, task_end, ai_reasoning = self._calculate_task_dates(task, project_start)
+                    task_start, task_end, ai_reasoning = self._calculate_task_dates(graph, i, project_start)
             else:
                 # Manual calculation
-                task_start, task_end, ai_reasoning = self._calculate_task_dates(task, project_start)
+                task_start, task_end, ai_reasoning = self._calculate_task_dates(graph, i, project_start)
             
             # Get dependencies
-            dependencies = [dep.id for dep in task.depends_on.all()]
+            dependencies = graph.dependency_ids(i)
             
             # Calculate progress more accurately
             progress = self._calculate_task_progress(task)
             
             gantt_task = {
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
+                'id': task['id'],
+                'title': task['title'],
+                'description': task['description'],
                 'start_date': task_start.isoformat(),
                 'end_date': task_end.isoformat(),
-                'status': task.status,
-                'priority': task.priority,
-                'assignee': task.assignee.username if task.assignee else None,
-                'assignee_id': task.assignee.id if task.assignee else None,
-                'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                'actual_hours': float(task.actual_hours) if task.actual_hours else None,
+                'status': task['status'],
+                'priority': task['priority'],
+                'assignee': task['assignee_username'],
+                'assignee_id': task['assignee_id'],
+                'estimated_hours': float(task['estimated_hours']) if task['estimated_hours'] else None,
+                'actual_hours': float(task['actual_hours']) if task['actual_hours'] else None,
                 'dependencies': dependencies,
                 'progress': progress,
                 'duration_days': (task_end - task_start).days + 1,
@@ -438,7 +452,9 @@ Return JSON array with optimized dates:
             }
         
         # Add critical path analysis using proper CPM algorithm
-        critical_path_tasks, task_slack = self._identify_critical_path(gantt_data['tasks'], tasks_queryset)
+        critical_path_tasks, task_slack = self._identify_critical_path(
+            gantt_data['tasks'], project_id=project.id, schedule_version=project.schedule_version
+        )
         
         # Add slack information to each task
         for task in gantt_data['tasks']:
@@ -463,7 +479,7 @@ Return JSON array with optimized dates:
         
         # Generate chart data for visualization
         try:
-            chart_data = self._generate_chart_data(gantt_data, tasks_queryset)
+            chart_data = self._generate_chart_data(gantt_data)
             gantt_data['charts'] = chart_data
         except Exception as e:
             self.log_action("Chart generation failed", {"error": str(e)})
@@ -490,23 +506,114 @@ Return JSON array with optimized dates:
             'gantt_chart': gantt_data
         }
     
-    def _calculate_task_dates(self, task, project_start):
-        """Helper method to calculate task start and end dates with workday awareness"""
+    def _chart_start(self, project: Project, graph: ProjectGraph) -> date_type:
+        """Stable origin for compact chart offsets: project start, else the first task's creation date"""
+        if project.start_date:
+            return project.start_date
+        if graph.local:
+            return min(graph.rows[i]['created_at'] for i in graph.local).date()
+        return timezone.now().date()
+    
+    def get_compact_gantt(self, project_id: int, graph: ProjectGraph = None) -> Dict:
+        """
+        Compact columnar Gantt chart (see gantt_payload) for the project's current schedule_version.
+        Dates come from the deterministic scheduling rules (no AI pass) laid out from a stable
+        start, so a version always encodes the same chart and deltas only show real changes.
+        Served from the snapshot cache when this version was already built.
+        
+        Args:
+            project_id (int): Project ID
+            
+        Returns:
+            Dict: {'success', 'gantt_chart': columnar chart}
+        """
+        self.log_action("Generating compact Gantt chart", {"project_id": project_id})
+        
+        try:
+            project = Project.objects.get(id=project_id)
+        except Project.DoesNotExist:
+            return {
+                'success': False,
+                'error': f'Project with ID {project_id} not found'
+            }
+        
+        chart = gantt_payload.load_snapshot(project.id, project.schedule_version)
+        if chart is None:
+            graph = graph or self._project_graph(project.id)
+            project_start = self._chart_start(project, graph)
+            tasks = []
+            for i in graph.local:
+                row = graph.rows[i]
+                task_start, task_end, _ = self._calculate_task_dates(graph, i, project_start)
+                tasks.append({
+                    'id': row['id'],
+                    'title': row['title'],
+                    'start_date': task_start.isoformat(),
+                    'end_date': task_end.isoformat(),
+                    'duration_days': (task_end - task_start).days + 1,
+                    'status': row['status'],
+                    'priority': row['priority'],
+                    'progress': self._calculate_task_progress(row),
+                    'assignee_id': row['assignee_id'],
+                    'dependencies': graph.dependency_ids(i),
+                })
+            tasks.sort(key=lambda t: (t['start_date'], t['id']))
+            critical_ids = self._run_cpm(tasks, project.id, project.schedule_version).critical_task_ids() if tasks else []
+            chart = gantt_payload.build_compact_chart(tasks, project_start, project.schedule_version, critical_ids)
+            gantt_payload.save_snapshot(project.id, chart)
+        
+        return {
+            'success': True,
+            'project_id': project.id,
+            'gantt_chart': chart
+        }
+    
+    def get_gantt_delta(self, project_id: int, since_version: int, graph: ProjectGraph = None) -> Dict:
+        """
+        Changes to the compact Gantt chart since a schedule version the client already has.
+        Falls back to the full chart ('full': True) when that version is no longer cached.
+        
+        Args:
+            project_id (int): Project ID
+            since_version (int): schedule_version of the client's chart
+            
+        Returns:
+            Dict: {'success', 'full', 'delta' or 'gantt_chart'}
+        """
+        result = self.get_compact_gantt(project_id, graph=graph)
+        if not result['success']:
+            return result
+        chart = result['gantt_chart']
+        previous = gantt_payload.load_snapshot(result['project_id'], int(since_version))
+        if previous is None:
+            return {'success': True, 'full': True, 'version': chart['version'], 'gantt_chart': chart}
+        return {
+            'success': True,
+            'full': False,
+            'version': chart['version'],
+            'delta': gantt_payload.diff_compact_charts(previous, chart)
+        }
+    
+    def _calculate_task_dates(self, graph: ProjectGraph, i: int, project_start):
+        """Helper method to calculate task start and end dates with workday awareness (task i of graph)"""
+        task = graph.rows[i]
         # Calculate task start date (consider dependencies)
         task_start = project_start
-        if task.depends_on.exists():
+        dependency_indices = graph.dependency_indices(i)
+        if dependency_indices:
             # Start after the latest dependency ends
             latest_dependency_end = None
-            for dep_task in task.depends_on.all():
+            for j in dependency_indices:
+                dep_task = graph.rows[j]
                 # Check actual completion first, then due date, then estimate
-                if dep_task.status == 'done' and hasattr(dep_task, 'completed_at') and dep_task.completed_at:
-                    dep_end = dep_task.completed_at.date()
-                elif dep_task.due_date:
-                    dep_end = dep_task.due_date.date()
-                elif dep_task.estimated_hours:
+                if dep_task['status'] == 'done' and dep_task['completed_at']:
+                    dep_end = dep_task['completed_at'].date()
+                elif dep_task['due_date']:
+                    dep_end = dep_task['due_date'].date()
+                elif dep_task['estimated_hours']:
                     # Estimate dependency end based on hours (convert to workdays)
-                    workdays = max(1, int(dep_task.estimated_hours / self.hours_per_day))
-                    dep_start = dep_task.created_at.date() if hasattr(dep_task, 'created_at') else project_start
+                    workdays = max(1, int(dep_task['estimated_hours'] / self.hours_per_day))
+                    dep_start = dep_task['created_at'].date() if dep_task['created_at'] else project_start
                     dep_end = self._add_workdays(dep_start, workdays - 1)
                 else:
                     continue
@@ -523,253 +630,155 @@ Return JSON array with optimized dates:
             task_start = self._add_workdays(task_start, 1)
         
         # Calculate task end date
-        task_end = task.due_date.date() if task.due_date else None
+        task_end = task['due_date'].date() if task['due_date'] else None
         if not task_end:
             # Estimate end date based on estimated hours
-            if task.estimated_hours:
+            if task['estimated_hours']:
                 # Convert hours to workdays
-                workdays = max(1, int(task.estimated_hours / self.hours_per_day))
-                if task.priority == 'high':
+                workdays = max(1, int(task['estimated_hours'] / self.hours_per_day))
+                if task['priority'] == 'high':
                     workdays = int(workdays * 1.2)  # 20% buffer for high priority
                 task_end = self._add_workdays(task_start, workdays - 1)
             else:
                 # Default workdays based on priority
-                default_workdays = {'high': 5, 'medium': 3, 'low': 2}.get(task.priority, 3)
+                default_workdays = {'high': 5, 'medium': 3, 'low': 2}.get(task['priority'], 3)
                 task_end = self._add_workdays(task_start, default_workdays - 1)
         else:
             # If due date provided, ensure it's reasonable
             if task_end < task_start:
                 # Due date is before start, adjust it
-                if task.estimated_hours:
-                    workdays = max(1, int(task.estimated_hours / self.hours_per_day))
+                if task['estimated_hours']:
+                    workdays = max(1, int(task['estimated_hours'] / self.hours_per_day))
                     task_end = self._add_workdays(task_start, workdays - 1)
                 else:
                     task_end = self._add_workdays(task_start, 3)
         
         return task_start, task_end, None
     
-    def _calculate_task_progress(self, task):
-        """Calculate task progress percentage considering subtasks and actual hours"""
-        if task.status == 'done':
+    def _calculate_task_progress(self, task: Dict):
+        """Calculate task progress percentage (task row of a ProjectGraph) considering subtasks and actual hours"""
+        if task['status'] == 'done':
             return 100
         
+        estimated_hours = task['estimated_hours']
+        actual_hours = task['actual_hours']
+        
         # Check subtask completion for more accurate progress
-        try:
-            subtasks = task.subtasks.all()
-            if subtasks.exists():
-                completed_subtasks = subtasks.filter(status='done').count()
-                total_subtasks = subtasks.count()
-                subtask_progress = (completed_subtasks / total_subtasks * 100) if total_subtasks > 0 else 0
-                
-                if task.status == 'in_progress':
-                    # Blend subtask progress with time-based progress
-                    if task.estimated_hours and task.actual_hours:
-                        time_progress = min(90, (task.actual_hours / task.estimated_hours) * 100)
-                        # Weight: 60% subtasks, 40% time
-                        progress = (subtask_progress * 0.6) + (time_progress * 0.4)
-                        return max(10, min(90, int(progress)))
-                    return max(10, min(90, int(subtask_progress * 0.8)))  # Cap at 90% if not done
-        except:
-            pass  # If subtasks don't exist, fall back to time-based
+        total_subtasks = task.get('subtask_total') or 0
+        if total_subtasks:
+            subtask_progress = (task.get('subtask_done') or 0) / total_subtasks * 100
+            
+            if task['status'] == 'in_progress':
+                # Blend subtask progress with time-based progress
+                if estimated_hours and actual_hours:
+                    time_progress = min(90, (actual_hours / estimated_hours) * 100)
+                    # Weight: 60% subtasks, 40% time
+                    progress = (subtask_progress * 0.6) + (time_progress * 0.4)
+                    return max(10, min(90, int(progress)))
+                return max(10, min(90, int(subtask_progress * 0.8)))  # Cap at 90% if not done
         
         # Time-based progress calculation
-        if task.status == 'in_progress':
-            if task.estimated_hours and task.actual_hours:
-                progress = min(90, int((task.actual_hours / task.estimated_hours) * 100))
+        if task['status'] == 'in_progress':
+            if estimated_hours and actual_hours:
+                progress = min(90, int((actual_hours / estimated_hours) * 100))
                 return max(10, progress)  # At least 10% if in progress
             return 50
-        elif task.status == 'review':
+        elif task['status'] == 'review':
             return 90
-        elif task.status == 'blocked':
+        elif task['status'] == 'blocked':
             return 0
         else:
             return 0
     
-    def _identify_critical_path(self, tasks_data: List[Dict], tasks_queryset=None) -> Tuple[List[Dict], Dict]:
+    def _get_task_duration(self, task_data: Dict) -> int:
+        """Get task duration in workdays"""
+        duration = task_data.get('duration_days', 1) or 0
+        if duration <= 0:
+            # Estimate from hours or default
+            hours = task_data.get('estimated_hours', 0) or 0
+            if hours > 0:
+                return max(1, int(hours / self.hours_per_day))
+            return 3  # Default 3 days
+        return max(1, duration)
+    
+    def _schedule_start(self, tasks_data: List[Dict]) -> date_type:
+        """Project start for CPM: earliest task start date (or today), moved onto a workday"""
+        start_dates = [datetime.strptime(t['start_date'], '%Y-%m-%d').date()
+                       for t in tasks_data if t.get('start_date')]
+        start = min(start_dates) if start_dates else date_type.today()
+        if not self._is_workday(start):
+            start = self._add_workdays(start, 1)
+        return start
+    
+    def _run_cpm(self, tasks_data: List[Dict], project_id: int = None, schedule_version: int = None) -> CPMSchedule:
+        """
+        Run the CPM engine over task dicts (id, dependencies, duration_days/estimated_hours).
+        Cached per project schedule_version when both are given.
+        """
+        task_ids = [t['id'] for t in tasks_data]
+        durations = [self._get_task_duration(t) for t in tasks_data]
+        dependencies = [(dep_id, t['id']) for t in tasks_data for dep_id in t.get('dependencies', [])]
+        if project_id is not None and schedule_version is not None:
+            return cpm_engine.get_project_cpm(project_id, schedule_version, task_ids, durations, dependencies)
+        return cpm_engine.compute_cpm(task_ids, durations, dependencies)
+    
+    def _offset_to_date(self, base_ordinal: int, offset: int) -> date_type:
+        return self.calendar.date_from_ordinal(base_ordinal + int(offset))
+    
+    def _identify_critical_path(self, tasks_data: List[Dict], project_id: int = None,
+                                schedule_version: int = None) -> Tuple[List[Dict], Dict]:
         """
         Identify critical path using Critical Path Method (CPM) algorithm.
         Calculates early start/finish, late start/finish, and float for each task.
+        Floats are in workdays (0 = critical). Tasks on a dependency cycle are flagged with 'in_cycle'.
         """
         if not tasks_data:
-            return []
-        
-        # Build task map and dependency graph
-        task_map = {t['id']: t for t in tasks_data}
-        dependencies = {}
-        dependents = {}
-        
-        for task in tasks_data:
-            task_id = task['id']
-            deps = task.get('dependencies', [])
-            dependencies[task_id] = deps
-            for dep_id in deps:
-                if dep_id not in dependents:
-                    dependents[dep_id] = []
-                dependents[dep_id].append(task_id)
-        
-        # Find tasks with no dependencies (start nodes)
-        start_tasks = [t_id for t_id in task_map.keys() if not dependencies.get(t_id, [])]
-        
-        # Forward pass: Calculate Early Start (ES) and Early Finish (EF)
-        early_start = {}
-        early_finish = {}
-        visited = set()
-        
-        def get_task_duration(task_data):
-            """Get task duration in days"""
-            duration = task_data.get('duration_days', 1)
-            if duration <= 0:
-                # Estimate from hours or default
-                hours = task_data.get('estimated_hours', 0) or 0
-                if hours > 0:
-                    return max(1, int(hours / self.hours_per_day))
-                return 3  # Default 3 days
-            return max(1, duration)
-        
-        def forward_pass(task_id):
-            if task_id in visited:
-                return early_start.get(task_id, date_type.today())
-            
-            visited.add(task_id)
-            task = task_map[task_id]
-            
-            # Get dependencies' early finish dates
-            dep_early_finishes = []
-            for dep_id in dependencies.get(task_id, []):
-                if dep_id in task_map:
-                    forward_pass(dep_id)  # Ensure dependency is processed
-                    dep_ef = early_finish.get(dep_id)
-                    if dep_ef:
-                        dep_early_finishes.append(dep_ef)
-            
-            # Early start is max of all dependency early finishes (or project start)
-            if dep_early_finishes:
-                es = max(dep_early_finishes)
-                # Add 1 workday buffer between tasks
-                es = self._add_workdays(es, 1)
-            else:
-                # Start task on project start date (or earliest date in tasks)
-                start_dates = [datetime.strptime(t.get('start_date', ''), '%Y-%m-%d').date() 
-                             for t in tasks_data if t.get('start_date')]
-                es = min(start_dates) if start_dates else date_type.today()
-            
-            duration = get_task_duration(task)
-            ef = self._add_workdays(es, duration - 1)  # -1 because start day counts
-            
-            early_start[task_id] = es
-            early_finish[task_id] = ef
-            
-            return es
-        
-        # Process all tasks
-        for task_id in task_map.keys():
-            forward_pass(task_id)
-        
-        # Find project end date (max early finish)
-        if not early_finish:
             return [], {}
         
-        project_end = max(early_finish.values())
-        
-        # Backward pass: Calculate Late Start (LS) and Late Finish (LF)
-        late_finish = {}
-        late_start = {}
-        visited_backward = set()
-        
-        def backward_pass(task_id):
-            if task_id in visited_backward:
-                return late_finish.get(task_id, project_end)
-            
-            visited_backward.add(task_id)
-            task = task_map[task_id]
-            
-            # Get dependents' late start dates
-            dependent_late_starts = []
-            for dep_id in dependents.get(task_id, []):
-                if dep_id in task_map:
-                    backward_pass(dep_id)  # Ensure dependent is processed
-                    dep_ls = late_start.get(dep_id)
-                    if dep_ls:
-                        dependent_late_starts.append(dep_ls)
-            
-            # Late finish is min of all dependent late starts (or project end)
-            if dependent_late_starts:
-                lf = min(dependent_late_starts)
-                # Subtract 1 workday buffer
-                lf = self._add_workdays(lf, -1)
-            else:
-                lf = project_end
-            
-            duration = get_task_duration(task)
-            ls = self._add_workdays(lf, -(duration - 1))
-            
-            late_finish[task_id] = lf
-            late_start[task_id] = ls
-            
-            return lf
+        schedule = self._run_cpm(tasks_data, project_id, schedule_version)
+        base_ordinal = self.calendar.workday_ordinal(self._schedule_start(tasks_data))
         
-        # Process all tasks in reverse order
-        for task_id in reversed(list(task_map.keys())):
-            backward_pass(task_id)
+        # Convert offsets once per distinct value (many tasks share start/finish days)
+        date_cache = {}
+        def to_iso(offset):
+            offset = int(offset)
+            if offset not in date_cache:
+                date_cache[offset] = self._offset_to_date(base_ordinal, offset).isoformat()
+            return date_cache[offset]
         
-        # Calculate float (slack) for all tasks and identify critical path
         all_task_slack = {}
         critical_path = []
-        
-        for task_id, task_data in task_map.items():
-            es = early_start.get(task_id)
-            ef = early_finish.get(task_id)
-            ls = late_start.get(task_id)
-            lf = late_finish.get(task_id)
-            
-            if es and ef and ls and lf:
-                # Total float = LS - ES or LF - EF (should be same)
-                total_float = self._calculate_workdays_between(ef, lf)
-                
-                # Free float (can delay without affecting next task)
-                free_float = float('inf')
-                for dep_id in dependents.get(task_id, []):
-                    if dep_id in early_start:
-                        dep_es = early_start[dep_id]
-                        free_float = min(free_float, self._calculate_workdays_between(ef, dep_es))
-                
-                if free_float == float('inf'):
-                    free_float = total_float
-                
-                # Critical path: tasks with zero or near-zero float
-                is_critical = total_float <= 1  # Allow 1 day tolerance
-                
-                # Store slack for all tasks
-                all_task_slack[task_id] = {
-                    'total_float': total_float,
-                    'free_float': free_float,
-                    'early_start': es.isoformat(),
-                    'early_finish': ef.isoformat(),
-                    'late_start': ls.isoformat(),
-                    'late_finish': lf.isoformat()
-                }
-                
-                # Add to critical path if zero float
-                if is_critical:
-                    critical_path.append({
-                        'task_id': task_id,
-                        'title': task_data.get('title', 'Unknown'),
-                        'early_start': es.isoformat(),
-                        'early_finish': ef.isoformat(),
-                        'late_start': ls.isoformat(),
-                        'late_finish': lf.isoformat(),
-                        'total_float': total_float,
-                        'free_float': free_float,
-                        'duration_days': get_task_duration(task_data),
-                        'reason': f'Zero float - on critical path (blocks project completion)'
-                    })
+        critical = schedule.critical
+        for i, task_data in enumerate(tasks_data):
+            task_id = task_data['id']
+            slack = {
+                'total_float': int(schedule.total_float[i]),
+                'free_float': int(schedule.free_float[i]),
+                'early_start': to_iso(schedule.es[i]),
+                'early_finish': to_iso(schedule.ef[i]),
+                'late_start': to_iso(schedule.ls[i]),
+                'late_finish': to_iso(schedule.lf[i]),
+            }
+            if schedule.cyclic[i]:
+                slack['in_cycle'] = True
+            all_task_slack[task_id] = slack
+            
+            # Critical path: tasks with zero float
+            if critical[i]:
+                critical_path.append({
+                    'task_id': task_id,
+                    'title': task_data.get('title', 'Unknown'),
+                    **slack,
+                    'duration_days': int(schedule.durations[i]),
+                    'reason': f'Zero float - on critical path (blocks project completion)'
+                })
         
         # Sort by early start
         critical_path.sort(key=lambda x: x['early_start'])
         
         return critical_path, all_task_slack
     
-    def track_milestones(self, project_id: int) -> Dict:
+    def track_milestones(self, project_id: int, graph: ProjectGraph = None) -> Dict:
         """
         Track project milestones and deadlines.
         
@@ -790,38 +799,39 @@ Return JSON array with optimized dates:
             }
         
         # Get all tasks
-        tasks = Task.objects.filter(project=project)
+        graph = graph or self._project_graph(project.id)
         
         milestones = []
         now = timezone.now()
         
         # Identify milestones (high priority tasks, tasks with many dependencies, or key tasks)
-        for task in tasks:
+        for i in graph.local:
+            task = graph.rows[i]
             is_milestone = (
-                task.priority == 'high' or
-                task.depends_on.count() > 2 or
-                task.dependent_tasks.count() > 2
+                task['priority'] == 'high' or
+                len(graph.dependency_indices(i)) > 2 or
+                len(graph.dependent_indices(i)) > 2
             )
             
             if is_milestone:
-                milestone_status = 'completed' if task.status == 'done' else (
-                    'in_progress' if task.status == 'in_progress' else 'upcoming'
+                milestone_status = 'completed' if task['status'] == 'done' else (
+                    'in_progress' if task['status'] == 'in_progress' else 'upcoming'
                 )
                 
                 days_until_due = None
-                if task.due_date:
-                    delta = task.due_date - now
+                if task['due_date']:
+                    delta = task['due_date'] - now
                     days_until_due = delta.days
                 
                 milestones.append({
-                    'task_id': task.id,
-                    'title': task.title,
-                    'description': task.description,
+                    'task_id': task['id'],
+                    'title': task['title'],
+                    'description': task['description'],
                     'status': milestone_status,
-                    'due_date': task.due_date.isoformat() if task.due_date else None,
+                    'due_date': task['due_date'].isoformat() if task['due_date'] else None,
                     'days_until_due': days_until_due,
-                    'priority': task.priority,
-                    'assignee': task.assignee.username if task.assignee else None,
+                    'priority': task['priority'],
+                    'assignee': task['assignee_username'],
                     'is_overdue': days_until_due < 0 if days_until_due is not None else False
                 })
         
@@ -864,7 +874,7 @@ Return JSON array with optimized dates:
             }
         }
     
-    def identify_conflicts(self, project_id: int) -> Dict:
+    def identify_conflicts(self, project_id: int, graph: ProjectGraph = None) -> Dict:
         """
         Identify timeline conflicts and dependencies.
         
@@ -884,127 +894,111 @@ Return JSON array with optimized dates:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).prefetch_related('depends_on', 'dependent_tasks')
+        graph = graph or self._project_graph(project.id)
+        rows = graph.rows
         
         conflicts = []
         dependency_issues = []
         
-        # Check for circular dependencies
-        def has_circular_dependency(task, visited=None, path=None):
-            if visited is None:
-                visited = set()
-            if path is None:
-                path = []
-            
-            if task.id in path:
-                return True, path + [task.id]
-            
-            if task.id in visited:
-                return False, []
-            
-            visited.add(task.id)
-            path.append(task.id)
-            
-            for dep in task.depends_on.all():
-                has_circle, circle_path = has_circular_dependency(dep, visited, path.copy())
-                if has_circle:
-                    return True, circle_path
-            
-            return False, []
+        # Circular dependencies: dependency paths that run into a cycle (one pass over the graph)
+        circular_paths = graph.cycle_paths()
+        
+        # Workday window [due - duration + 1, due] per task with a due date (computed once)
+        windows = {}
+        for i in graph.local:
+            task = rows[i]
+            if task['due_date']:
+                task_end_window = task['due_date'].date()
+                if task['estimated_hours']:
+                    workdays = max(1, int(task['estimated_hours'] / self.hours_per_day))
+                    windows[i] = (self._add_workdays(task_end_window, -(workdays - 1)), task_end_window)
+                else:
+                    windows[i] = (task_end_window - timedelta(days=3), task_end_window)
+        
+        # Open tasks with a due date per assignee (candidates for overlapping assignments)
+        open_by_assignee = {}
+        for i in graph.local:
+            task = rows[i]
+            if task['assignee_id'] and i in windows and task['status'] in ('todo', 'in_progress'):
+                open_by_assignee.setdefault(task['assignee_id'], []).append(i)
         
         # Check each task for conflicts
-        for task in tasks:
+        for i in graph.local:
+            task = rows[i]
             # Check circular dependencies
-            has_circle, circle_path = has_circular_dependency(task)
-            if has_circle:
+            circle_path = circular_paths.get(task['id'])
+            if circle_path:
                 dependency_issues.append({
                     'type': 'circular_dependency',
-                    'task_id': task.id,
-                    'task_title': task.title,
+                    'task_id': task['id'],
+                    'task_title': task['title'],
                     'circular_path': circle_path,
                     'severity': 'high',
-                    'description': f'Circular dependency detected involving task: {task.title}'
+                    'description': f'Circular dependency detected involving task: {task["title"]}'
                 })
             
             # Check if task's due date is before its dependencies' due dates
-            if task.due_date:
-                for dep_task in task.depends_on.all():
-                    if dep_task.due_date and dep_task.due_date > task.due_date:
+            if task['due_date']:
+                for j in graph.dependency_indices(i):
+                    dep_task = rows[j]
+                    if dep_task['due_date'] and dep_task['due_date'] > task['due_date']:
                         conflicts.append({
                             'type': 'dependency_timing_conflict',
-                            'task_id': task.id,
-                            'task_title': task.title,
-                            'task_due_date': task.due_date.isoformat(),
-                            'dependency_id': dep_task.id,
-                            'dependency_title': dep_task.title,
-                            'dependency_due_date': dep_task.due_date.isoformat(),
+                            'task_id': task['id'],
+                            'task_title': task['title'],
+                            'task_due_date': task['due_date'].isoformat(),
+                            'dependency_id': dep_task['id'],
+                            'dependency_title': dep_task['title'],
+                            'dependency_due_date': dep_task['due_date'].isoformat(),
                             'severity': 'high',
-                            'description': f'Task "{task.title}" is due before its dependency "{dep_task.title}"'
+                            'description': f'Task "{task["title"]}" is due before its dependency "{dep_task["title"]}"'
                         })
             
             # Check for overlapping assignments with actual task durations
-            if task.assignee and task.due_date:
-                # Calculate actual task duration window
-                if task.estimated_hours:
-                    workdays = max(1, int(task.estimated_hours / self.hours_per_day))
-                    task_start_window = self._add_workdays(task.due_date.date(), -(workdays - 1))
-                else:
-                    task_start_window = task.due_date.date() - timedelta(days=3)
-                
-                task_end_window = task.due_date.date()
+            if task['assignee_id'] and task['due_date']:
+                task_start_window, task_end_window = windows[i]
                 
-                overlapping_tasks = Task.objects.filter(
-                    project=project,
-                    assignee=task.assignee,
-                    due_date__isnull=False,
-                    status__in=['todo', 'in_progress']
-                ).exclude(id=task.id)
-                
-                for other_task in overlapping_tasks:
-                    if other_task.due_date:
-                        # Calculate other task's duration window
-                        if other_task.estimated_hours:
-                            other_workdays = max(1, int(other_task.estimated_hours / self.hours_per_day))
-                            other_start_window = self._add_workdays(other_task.due_date.date(), -(other_workdays - 1))
-                        else:
-                            other_start_window = other_task.due_date.date() - timedelta(days=3)
-                        
-                        other_end_window = other_task.due_date.date()
+                for j in open_by_assignee.get(task['assignee_id'], []):
+                    if j == i:
+                        continue
+                    other_task = rows[j]
+                    other_start_window, other_end_window = windows[j]
+                    
+                    # Check for overlap in workday windows
+                    if not (task_end_window < other_start_window or task_start_window > other_end_window):
+                        # Calculate overlap in workdays
+                        overlap_start = max(task_start_window, other_start_window)
+                        overlap_end = min(task_end_window, other_end_window)
+                        overlap_days = self._calculate_workdays_between(overlap_start, overlap_end)
                         
-                        # Check for overlap in workday windows
-                        if not (task_end_window < other_start_window or task_start_window > other_end_window):
-                            # Calculate overlap in workdays
-                            overlap_start = max(task_start_window, other_start_window)
-                            overlap_end = min(task_end_window, other_end_window)
-                            overlap_days = self._calculate_workdays_between(overlap_start, overlap_end)
-                            
-                            if overlap_days > 0:
-                                conflicts.append({
+                        if overlap_days > 0:
+                            conflicts.append({
                                 'type': 'resource_overload',
-                                'task_id': task.id,
-                                'task_title': task.title,
-                                'conflicting_task_id': other_task.id,
-                                'conflicting_task_title': other_task.title,
-                                'assignee': task.assignee.username,
-                                'assignee_id': task.assignee.id,
-                                    'overlap_workdays': overlap_days,
-                                    'severity': 'high' if overlap_days > 3 else 'medium',
-                                    'description': f'"{task.assignee.username}" has {overlap_days} workday(s) overlap between "{task.title}" and "{other_task.title}"'
+                                'task_id': task['id'],
+                                'task_title': task['title'],
+                                'conflicting_task_id': other_task['id'],
+                                'conflicting_task_title': other_task['title'],
+                                'assignee': task['assignee_username'],
+                                'assignee_id': task['assignee_id'],
+                                'overlap_workdays': overlap_days,
+                                'severity': 'high' if overlap_days > 3 else 'medium',
+                                'description': f'"{task["assignee_username"]}" has {overlap_days} workday(s) overlap between "{task["title"]}" and "{other_task["title"]}"'
                             })
         
         # Check for missing dependencies (tasks that should depend on others but don't)
-        for task in tasks:
+        for i in graph.local:
+            task = rows[i]
             # If a task has many dependent tasks, it might be a critical path item
-            dependent_count = task.dependent_tasks.count()
-            if dependent_count > 3 and task.status in ['todo', 'in_progress']:
-                if not task.due_date:
+            dependent_count = len(graph.dependent_indices(i))
+            if dependent_count > 3 and task['status'] in ['todo', 'in_progress']:
+                if not task['due_date']:
                     conflicts.append({
                         'type': 'missing_deadline',
-                        'task_id': task.id,
-                        'task_title': task.title,
+                        'task_id': task['id'],
+                        'task_title': task['title'],
                         'dependent_tasks_count': dependent_count,
                         'severity': 'medium',
-                        'description': f'Task "{task.title}" has {dependent_count} dependent tasks but no deadline set'
+                        'description': f'Task "{task["title"]}" has {dependent_count} dependent tasks but no deadline set'
                     })
         
         # Use AI to analyze conflicts and provide resolution suggestions
@@ -1098,7 +1092,7 @@ Return JSON:
         
         return result
     
-    def suggest_adjustments(self, project_id: int, current_progress: Dict) -> Dict:
+    def suggest_adjustments(self, project_id: int, current_progress: Dict, graph: ProjectGraph = None) -> Dict:
         """
         Suggest timeline adjustments based on progress with AI-powered analysis.
         
@@ -1120,40 +1114,42 @@ Return JSON:
             }
         
         # Get all tasks
-        tasks = Task.objects.filter(project=project).select_related('assignee').prefetch_related('depends_on')
+        graph = graph or self._project_graph(project.id)
+        tasks = [graph.rows[i] for i in graph.local]
+        tasks_by_id = {task['id']: task for task in tasks}
         
         # Prepare task data for AI analysis
         import json
         now = timezone.now()
         tasks_analysis = []
-        for task in tasks:
+        for i, task in zip(graph.local, tasks):
             days_overdue = None
-            if task.due_date and task.due_date < now:
-                days_overdue = (now - task.due_date).days
+            if task['due_date'] and task['due_date'] < now:
+                days_overdue = (now - task['due_date']).days
             
             overage_percentage = None
-            if task.estimated_hours and task.actual_hours:
-                if task.actual_hours > task.estimated_hours:
-                    overage_percentage = ((task.actual_hours - task.estimated_hours) / task.estimated_hours) * 100
+            if task['estimated_hours'] and task['actual_hours']:
+                if task['actual_hours'] > task['estimated_hours']:
+                    overage_percentage = ((task['actual_hours'] - task['estimated_hours']) / task['estimated_hours']) * 100
             
             tasks_analysis.append({
-                'id': task.id,
-                'title': task.title,
-                'status': task.status,
-                'priority': task.priority,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                'actual_hours': float(task.actual_hours) if task.actual_hours else None,
+                'id': task['id'],
+                'title': task['title'],
+                'status': task['status'],
+                'priority': task['priority'],
+                'due_date': task['due_date'].isoformat() if task['due_date'] else None,
+                'estimated_hours': float(task['estimated_hours']) if task['estimated_hours'] else None,
+                'actual_hours': float(task['actual_hours']) if task['actual_hours'] else None,
                 'days_overdue': days_overdue,
                 'overage_percentage': round(overage_percentage, 1) if overage_percentage else None,
-                'assignee': task.assignee.username if task.assignee else None,
-                'dependencies_count': task.depends_on.count(),
-                'dependent_tasks_count': task.dependent_tasks.count()
+                'assignee': task['assignee_username'],
+                'dependencies_count': len(graph.dependency_indices(i)),
+                'dependent_tasks_count': len(graph.dependent_indices(i))
             })
         
         # Calculate project metrics
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(status='done').count()
+        total_tasks = len(tasks)
+        completed_tasks = sum(1 for task in tasks if task['status'] == 'done')
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
         expected_completion_rate = None
@@ -1233,24 +1229,24 @@ Return JSON array:
             for sug in ai_suggestions:
                 if sug.get('task_id'):
                     # Verify task exists
-                    task = tasks.filter(id=sug['task_id']).first()
+                    task = tasks_by_id.get(sug['task_id'])
                     if task:
-                        sug['task_title'] = task.title
-                        sug['assignee'] = task.assignee.username if task.assignee else None
+                        sug['task_title'] = task['title']
+                        sug['assignee'] = task['assignee_username']
                 suggestions.append(sug)
                 
         except Exception as e:
             self.log_action("AI suggestions failed, using fallback", {"error": str(e)})
             # Fallback to rule-based suggestions
         for task in tasks:
-            if task.status in ['todo', 'in_progress', 'review']:
-                if task.due_date and task.due_date < now:
-                    days_overdue = (now - task.due_date).days
+            if task['status'] in ['todo', 'in_progress', 'review']:
+                if task['due_date'] and task['due_date'] < now:
+                    days_overdue = (now - task['due_date']).days
                     suggestions.append({
                         'type': 'extend_deadline',
-                        'task_id': task.id,
-                        'task_title': task.title,
-                        'current_due_date': task.due_date.isoformat(),
+                        'task_id': task['id'],
+                        'task_title': task['title'],
+                        'current_due_date': task['due_date'].isoformat(),
                         'days_overdue': days_overdue,
                         'suggested_extension_days': max(3, days_overdue + 2),
                             'priority': 'high' if days_overdue > 7 else 'medium',
@@ -1258,15 +1254,15 @@ Return JSON array:
                             'impact': 'May delay dependent tasks'
                     })
                 
-                if task.estimated_hours and task.actual_hours:
-                    if task.actual_hours > task.estimated_hours * 1.2:
-                        overage_percentage = ((task.actual_hours - task.estimated_hours) / task.estimated_hours) * 100
+                if task['estimated_hours'] and task['actual_hours']:
+                    if task['actual_hours'] > task['estimated_hours'] * 1.2:
+                        overage_percentage = ((task['actual_hours'] - task['estimated_hours']) / task['estimated_hours']) * 100
                         suggestions.append({
                             'type': 'revise_estimate',
-                            'task_id': task.id,
-                            'task_title': task.title,
-                            'current_estimate': task.estimated_hours,
-                            'actual_hours': task.actual_hours,
+                            'task_id': task['id'],
+                            'task_title': task['title'],
+                            'current_estimate': task['estimated_hours'],
+                            'actual_hours': task['actual_hours'],
                             'overage_percentage': round(overage_percentage, 1),
                                 'priority': 'medium',
                                 'reasoning': f'Task is taking {round(overage_percentage, 1)}% longer than estimated',
@@ -1292,21 +1288,23 @@ Return JSON array:
         
         # Resource overload check
         assignee_counts = {}
-        for task in tasks.filter(status__in=['todo', 'in_progress']):
-            if task.assignee:
-                assignee_id = task.assignee.id
+        assignee_names = {}
+        for task in tasks:
+            if task['status'] in ['todo', 'in_progress'] and task['assignee_id']:
+                assignee_id = task['assignee_id']
                 assignee_counts[assignee_id] = assignee_counts.get(assignee_id, 0) + 1
+                assignee_names[assignee_id] = task['assignee_username']
         
         for assignee_id, count in assignee_counts.items():
             if count > 5:
-                assignee = tasks.filter(assignee_id=assignee_id).first().assignee
+                assignee_name = assignee_names[assignee_id]
                 suggestions.append({
                     'type': 'redistribute_workload',
                     'assignee_id': assignee_id,
-                    'assignee_name': assignee.username,
+                    'assignee_name': assignee_name,
                     'current_task_count': count,
                     'priority': 'high' if count > 8 else 'medium',
-                    'reasoning': f'{assignee.username} has {count} active tasks, which may lead to delays',
+                    'reasoning': f'{assignee_name} has {count} active tasks, which may lead to delays',
                     'impact': 'May cause bottlenecks and missed deadlines'
                 })
         
@@ -1644,7 +1642,7 @@ CALCULATE AND RETURN JSON:
             'recommendations': recommendations
         }
     
-    def manage_phases(self, project_id: int, phases: List[Dict] = None) -> Dict:
+    def manage_phases(self, project_id: int, phases: List[Dict] = None, graph: ProjectGraph = None) -> Dict:
         """
         Manage project phases and stages.
         
@@ -1666,23 +1664,26 @@ CALCULATE AND RETURN JSON:
             }
         
         # Group tasks by status as phases
-        tasks = Task.objects.filter(project=project)
+        graph = graph or self._project_graph(project.id)
+        tasks_by_status = {}
+        for i in graph.local:
+            tasks_by_status.setdefault(graph.rows[i]['status'], []).append(graph.rows[i])
         
         phases_data = []
         phase_order = ['todo', 'in_progress', 'review', 'done']
         
         for phase_status in phase_order:
-            phase_tasks = tasks.filter(status=phase_status)
-            if phase_tasks.exists():
+            phase_tasks = tasks_by_status.get(phase_status)
+            if phase_tasks:
                 phases_data.append({
                     'phase': phase_status.replace('_', ' ').title(),
                     'status': phase_status,
-                    'task_count': phase_tasks.count(),
+                    'task_count': len(phase_tasks),
                     'tasks': [{
-                        'id': t.id,
-                        'title': t.title,
-                        'priority': t.priority,
-                        'due_date': t.due_date.isoformat() if t.due_date else None
+                        'id': t['id'],
+                        'title': t['title'],
+                        'priority': t['priority'],
+                        'due_date': t['due_date'].isoformat() if t['due_date'] else None
                     } for t in phase_tasks[:10]]  # Limit to 10 tasks per phase
                 })
         
@@ -1692,7 +1693,7 @@ CALCULATE AND RETURN JSON:
             'total_phases': len(phases_data)
         }
     
-    def check_upcoming_deadlines(self, project_id: int, days_ahead: int = 7) -> Dict:
+    def check_upcoming_deadlines(self, project_id: int, days_ahead: int = 7, graph: ProjectGraph = None) -> Dict:
         """
         Check and alert on upcoming deadlines and milestones.
         
@@ -1721,22 +1722,21 @@ CALCULATE AND RETURN JSON:
         alerts = []
         
         # Get all tasks that are not completed and have a due_date
-        incomplete_tasks = Task.objects.filter(
-            project=project,
-            due_date__isnull=False,
-            status__in=['todo', 'in_progress', 'review', 'blocked']
-        ).select_related('assignee').order_by('due_date')
+        graph = graph or self._project_graph(project.id)
+        incomplete_tasks = sorted(
+            (graph.rows[i] for i in graph.local
+             if graph.rows[i]['due_date'] and graph.rows[i]['status'] in ('todo', 'in_progress', 'review', 'blocked')),
+            key=lambda task: task['due_date']
+        )
         
         for task in incomplete_tasks:
-            if not task.due_date:
-                continue
                 
             # Convert due_date to datetime for comparison if it's a date
-            if isinstance(task.due_date, date_type):
-                task_due_datetime = datetime.combine(task.due_date, datetime.min.time())
+            if isinstance(task['due_date'], date_type):
+                task_due_datetime = datetime.combine(task['due_date'], datetime.min.time())
                 task_due_datetime = timezone.make_aware(task_due_datetime)
             else:
-                task_due_datetime = task.due_date
+                task_due_datetime = task['due_date']
             
             # Check if task is overdue (deadline has passed)
             is_overdue = task_due_datetime < now
@@ -1746,23 +1746,23 @@ CALCULATE AND RETURN JSON:
                 days_overdue = (now - task_due_datetime).days
                 alerts.append({
                     'type': 'overdue',
-                    'task_id': task.id,
-                    'task_title': task.title,
-                    'title': task.title,
+                    'task_id': task['id'],
+                    'task_title': task['title'],
+                    'title': task['title'],
                     'due_date': task_due_datetime.isoformat(),
                     'days_overdue': days_overdue,
                     'urgency': 'critical',
-                    'status': task.status,
-                    'priority': task.priority,
-                    'assignee': task.assignee.username if task.assignee else None,
-                    'assignee_name': task.assignee.username if task.assignee else 'Unassigned'
+                    'status': task['status'],
+                    'priority': task['priority'],
+                    'assignee': task['assignee_username'],
+                    'assignee_name': task['assignee_username'] or 'Unassigned'
                 })
             else:
                 # Task is not overdue - check if less than 20% time remaining
                 # Calculate total time: from task start (created_at or project start) to due_date
                 task_start = None
-                if task.created_at:
-                    task_start = task.created_at
+                if task['created_at']:
+                    task_start = task['created_at']
                 elif project.start_date:
                     task_start = datetime.combine(project.start_date, datetime.min.time())
                     if timezone.is_naive(task_start):
@@ -1797,16 +1797,16 @@ CALCULATE AND RETURN JSON:
                         
                         alerts.append({
                             'type': 'upcoming',
-                            'task_id': task.id,
-                            'task_title': task.title,
-                            'title': task.title,
+                            'task_id': task['id'],
+                            'task_title': task['title'],
+                            'title': task['title'],
                             'due_date': task_due_datetime.isoformat(),
                             'days_until': int(days_until) if days_until > 0 else 0,
                             'urgency': urgency,
-                            'status': task.status,
-                            'priority': task.priority,
-                            'assignee': task.assignee.username if task.assignee else None,
-                            'assignee_name': task.assignee.username if task.assignee else 'Unassigned',
+                            'status': task['status'],
+                            'priority': task['priority'],
+                            'assignee': task['assignee_username'],
+                            'assignee_name': task['assignee_username'] or 'Unassigned',
                             'remaining_percentage': round(remaining_percentage, 1)
                         })
         
@@ -1842,7 +1842,7 @@ CALCULATE AND RETURN JSON:
             }
         }
     
-    def identify_dependencies(self, project_id: int) -> Dict:
+    def identify_dependencies(self, project_id: int, graph: ProjectGraph = None) -> Dict:
         """
         Identify dependencies: Highlight task relationships to avoid bottlenecks.
         
@@ -1862,118 +1862,96 @@ CALCULATE AND RETURN JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee').prefetch_related('depends_on', 'dependent_tasks')
+        graph = graph or self._project_graph(project.id)
+        rows = graph.rows
+        
+        def task_ref(j):
+            related = rows[j]
+            return {
+                'id': related['id'],
+                'title': related['title'],
+                'status': related['status'],
+                'due_date': related['due_date'].isoformat() if related['due_date'] else None
+            }
         
         dependency_map = []
         critical_path = []
         bottlenecks = []
         
         # Build dependency relationships
-        for task in tasks:
-            dependencies = task.depends_on.all()
-            dependents = task.dependent_tasks.all()
+        for i in graph.local:
+            task = rows[i]
+            dependencies = graph.dependency_indices(i)
+            dependents = graph.dependent_indices(i)
             
-            if dependencies.exists() or dependents.exists():
+            if dependencies or dependents:
                 dependency_info = {
-                    'task_id': task.id,
-                    'task_title': task.title,
-                    'status': task.status,
-                    'priority': task.priority,
-                    'due_date': task.due_date.isoformat() if task.due_date else None,
-                    'assignee': task.assignee.username if task.assignee else None,
-                    'depends_on': [],
-                    'dependent_tasks': [],
-                    'dependency_count': dependencies.count(),
-                    'dependent_count': dependents.count(),
+                    'task_id': task['id'],
+                    'task_title': task['title'],
+                    'status': task['status'],
+                    'priority': task['priority'],
+                    'due_date': task['due_date'].isoformat() if task['due_date'] else None,
+                    'assignee': task['assignee_username'],
+                    'depends_on': [task_ref(j) for j in dependencies],
+                    'dependent_tasks': [task_ref(j) for j in dependents],
+                    'dependency_count': len(dependencies),
+                    'dependent_count': len(dependents),
                     'is_critical': False,
                     'is_bottleneck': False
                 }
                 
-                # Map dependencies
-                for dep in dependencies:
-                    dependency_info['depends_on'].append({
-                        'id': dep.id,
-                        'title': dep.title,
-                        'status': dep.status,
-                        'due_date': dep.due_date.isoformat() if dep.due_date else None
-                    })
-                
-                # Map dependent tasks
-                for dep_task in dependents:
-                    dependency_info['dependent_tasks'].append({
-                        'id': dep_task.id,
-                        'title': dep_task.title,
-                        'status': dep_task.status,
-                        'due_date': dep_task.due_date.isoformat() if dep_task.due_date else None
-                    })
-                
                 # Identify critical path tasks (tasks with many dependents)
-                if dependents.count() >= 3:
+                if len(dependents) >= 3:
                     dependency_info['is_critical'] = True
                     critical_path.append({
-                        'task_id': task.id,
-                        'task_title': task.title,
-                        'dependent_count': dependents.count(),
-                        'reason': f'This task blocks {dependents.count()} other tasks'
+                        'task_id': task['id'],
+                        'task_title': task['title'],
+                        'dependent_count': len(dependents),
+                        'reason': f'This task blocks {len(dependents)} other tasks'
                     })
                 
                 # Identify bottlenecks (tasks with many dependencies and many dependents)
-                if dependencies.count() >= 2 and dependents.count() >= 2:
+                if len(dependencies) >= 2 and len(dependents) >= 2:
                     dependency_info['is_bottleneck'] = True
                     bottlenecks.append({
-                        'task_id': task.id,
-                        'task_title': task.title,
-                        'dependency_count': dependencies.count(),
-                        'dependent_count': dependents.count(),
-                        'status': task.status,
-                        'priority': task.priority,
-                        'risk_level': 'high' if task.status in ['todo', 'blocked'] else 'medium',
-                        'reason': f'Task has {dependencies.count()} dependencies and blocks {dependents.count()} tasks'
+                        'task_id': task['id'],
+                        'task_title': task['title'],
+                        'dependency_count': len(dependencies),
+                        'dependent_count': len(dependents),
+                        'status': task['status'],
+                        'priority': task['priority'],
+                        'risk_level': 'high' if task['status'] in ['todo', 'blocked'] else 'medium',
+                        'reason': f'Task has {len(dependencies)} dependencies and blocks {len(dependents)} tasks'
                     })
                 
                 dependency_map.append(dependency_info)
         
         # Identify potential bottleneck risks
         bottleneck_risks = []
-        for task in tasks:
-            if task.status in ['todo', 'blocked'] and task.dependent_tasks.count() > 0:
-                blocking_count = task.dependent_tasks.filter(status__in=['todo', 'in_progress']).count()
+        for i in graph.local:
+            task = rows[i]
+            if task['status'] in ['todo', 'blocked']:
+                blocking_count = sum(1 for j in graph.dependent_indices(i) if rows[j]['status'] in ('todo', 'in_progress'))
                 if blocking_count > 2:
                     bottleneck_risks.append({
-                        'task_id': task.id,
-                        'task_title': task.title,
-                        'status': task.status,
+                        'task_id': task['id'],
+                        'task_title': task['title'],
+                        'status': task['status'],
                         'blocking_count': blocking_count,
-                        'risk_level': 'high' if task.status == 'blocked' else 'medium',
+                        'risk_level': 'high' if task['status'] == 'blocked' else 'medium',
                         'recommendation': f'Prioritize this task - it\'s blocking {blocking_count} other tasks'
                     })
         
         # Calculate dependency statistics
         total_dependencies = sum(len(d['depends_on']) for d in dependency_map)
         total_dependents = sum(len(d['dependent_tasks']) for d in dependency_map)
-        max_dependency_depth = 0
-        
-        def calculate_depth(task_id, visited=None, depth=0):
-            if visited is None:
-                visited = set()
-            if task_id in visited:
-                return depth
-            visited.add(task_id)
-            
-            task_info = next((d for d in dependency_map if d['task_id'] == task_id), None)
-            if not task_info:
-                return depth
-            
-            max_child_depth = depth
-            for dep in task_info['depends_on']:
-                child_depth = calculate_depth(dep['id'], visited.copy(), depth + 1)
-                max_child_depth = max(max_child_depth, child_depth)
-            
-            return max_child_depth
         
-        for task_info in dependency_map:
-            depth = calculate_depth(task_info['task_id'])
-            max_dependency_depth = max(max_dependency_depth, depth)
+        # Longest depends_on chain (in edges): CPM over unit durations with lag 1 makes
+        # each task's early start equal its depth. Iterative, and cycles cannot loop.
+        depth_edges = [(dep['id'], d['task_id']) for d in dependency_map for dep in d['depends_on']]
+        depth_ids = list(dict.fromkeys([d['task_id'] for d in dependency_map] + [p for p, _ in depth_edges]))
+        depth_schedule = cpm_engine.compute_cpm(depth_ids, [1] * len(depth_ids), depth_edges, lag=1)
+        max_dependency_depth = int(depth_schedule.es.max()) if depth_schedule.size else 0
         
         # Use AI to analyze dependencies and provide insights
         if dependency_map:
@@ -2054,13 +2032,12 @@ Return JSON:
         
         return result
     
-    def _generate_chart_data(self, gantt_data: Dict, tasks_queryset) -> Dict:
+    def _generate_chart_data(self, gantt_data: Dict) -> Dict:
         """
         Generate chart data structures for visualization.
         
         Args:
             gantt_data (Dict): Gantt chart data with tasks
-            tasks_queryset: QuerySet of tasks
             
         Returns:
             Dict: Chart data for various visualizations
@@ -2158,6 +2135,7 @@ Return JSON:
         }
         
         # 5. Timeline Visualization Data (for Gantt Chart)
+        critical_ids = {cp['task_id'] for cp in gantt_data.get('critical_path', [])}
         charts['gantt_timeline'] = {
             'type': 'gantt',
             'title': 'Project Timeline',
@@ -2173,7 +2151,7 @@ Return JSON:
                     'status': task.get('status', 'todo'),
                     'priority': task.get('priority', 'medium'),
                     'assignee': task.get('assignee', 'Unassigned'),
-                    'isCritical': task.get('id') in [cp['task_id'] for cp in gantt_data.get('critical_path', [])]
+                    'isCritical': task.get('id') in critical_ids
                 }
                 for task in gantt_data.get('tasks', [])
             ]
@@ -2196,7 +2174,7 @@ Return JSON:
         
         return charts
     
-    def get_shared_view(self, project_id: int) -> Dict:
+    def get_shared_view(self, project_id: int, graph: ProjectGraph = None) -> Dict:
         """
         Enhance collaboration: Provide a shared view of the project for all stakeholders.
         
@@ -2217,7 +2195,9 @@ Return JSON:
             }
         
         # Get all project data
-        tasks = Task.objects.filter(project=project).select_related('assignee').prefetch_related('depends_on', 'dependent_tasks')
+        graph = graph or self._project_graph(project.id)
+        rows = graph.rows
+        tasks = [rows[i] for i in graph.local]
         team_members = project.team_members.select_related('user').all()
         
         # Project overview
@@ -2243,100 +2223,91 @@ Return JSON:
             'blocked': []
         }
         
-        for task in tasks:
+        for i, task in zip(graph.local, tasks):
             task_data = {
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'priority': task.priority,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'assignee': task.assignee.username if task.assignee else None,
-                'assignee_id': task.assignee.id if task.assignee else None,
-                'estimated_hours': float(task.estimated_hours) if task.estimated_hours else None,
-                'actual_hours': float(task.actual_hours) if task.actual_hours else None,
-                'dependencies': [{'id': dep.id, 'title': dep.title} for dep in task.depends_on.all()],
-                'dependent_tasks': [{'id': dep.id, 'title': dep.title} for dep in task.dependent_tasks.all()],
-                'created_at': task.created_at.isoformat(),
-                'updated_at': task.updated_at.isoformat()
+                'id': task['id'],
+                'title': task['title'],
+                'description': task['description'],
+                'priority': task['priority'],
+                'due_date': task['due_date'].isoformat() if task['due_date'] else None,
+                'assignee': task['assignee_username'],
+                'assignee_id': task['assignee_id'],
+                'estimated_hours': float(task['estimated_hours']) if task['estimated_hours'] else None,
+                'actual_hours': float(task['actual_hours']) if task['actual_hours'] else None,
+                'dependencies': [{'id': rows[j]['id'], 'title': rows[j]['title']} for j in graph.dependency_indices(i)],
+                'dependent_tasks': [{'id': rows[j]['id'], 'title': rows[j]['title']} for j in graph.dependent_indices(i)],
+                'created_at': task['created_at'].isoformat(),
+                'updated_at': task['updated_at'].isoformat()
             }
-            tasks_by_status[task.status].append(task_data)
+            tasks_by_status[task['status']].append(task_data)
         
-        # Team member workload
-        team_workload = []
-        for member in team_members:
-            member_tasks = tasks.filter(assignee=member.user)
-            active_tasks = member_tasks.filter(status__in=['todo', 'in_progress', 'review'])
-            completed_tasks = member_tasks.filter(status='done')
-            
-            team_workload.append({
-                'user_id': member.user.id,
-                'username': member.user.username,
-                'role': member.role,
-                'total_tasks': member_tasks.count(),
-                'active_tasks': active_tasks.count(),
-                'completed_tasks': completed_tasks.count(),
+        # Tasks per assignee, in task order
+        tasks_by_assignee = {}
+        for task in tasks:
+            if task['assignee_id']:
+                tasks_by_assignee.setdefault(task['assignee_id'], []).append(task)
+        
+        def workload(user, role):
+            member_tasks = tasks_by_assignee.get(user.id, [])
+            active_tasks = [t for t in member_tasks if t['status'] in ('todo', 'in_progress', 'review')]
+            return {
+                'user_id': user.id,
+                'username': user.username,
+                'role': role,
+                'total_tasks': len(member_tasks),
+                'active_tasks': len(active_tasks),
+                'completed_tasks': sum(1 for t in member_tasks if t['status'] == 'done'),
                 'tasks': [{
-                    'id': t.id,
-                    'title': t.title,
-                    'status': t.status,
-                    'priority': t.priority,
-                    'due_date': t.due_date.isoformat() if t.due_date else None
+                    'id': t['id'],
+                    'title': t['title'],
+                    'status': t['status'],
+                    'priority': t['priority'],
+                    'due_date': t['due_date'].isoformat() if t['due_date'] else None
                 } for t in active_tasks[:10]]  # Limit to 10 tasks per member
-            })
+            }
+        
+        # Team member workload
+        team_workload = [workload(member.user, member.role) for member in team_members]
         
         # Also include project owner if not in team
         if project.owner not in [m.user for m in team_members]:
-            owner_tasks = tasks.filter(assignee=project.owner)
-            active_tasks = owner_tasks.filter(status__in=['todo', 'in_progress', 'review'])
-            team_workload.append({
-                'user_id': project.owner.id,
-                'username': project.owner.username,
-                'role': 'owner',
-                'total_tasks': owner_tasks.count(),
-                'active_tasks': active_tasks.count(),
-                'completed_tasks': owner_tasks.filter(status='done').count(),
-                'tasks': [{
-                    'id': t.id,
-                    'title': t.title,
-                    'status': t.status,
-                    'priority': t.priority,
-                    'due_date': t.due_date.isoformat() if t.due_date else None
-                } for t in active_tasks[:10]]
-            })
+            team_workload.append(workload(project.owner, 'owner'))
         
         # Progress metrics
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(status='done').count()
-        in_progress_tasks = tasks.filter(status='in_progress').count()
-        blocked_tasks = tasks.filter(status='blocked').count()
+        status_counts = {}
+        priority_counts = {}
+        for task in tasks:
+            status_counts[task['status']] = status_counts.get(task['status'], 0) + 1
+            priority_counts[task['priority']] = priority_counts.get(task['priority'], 0) + 1
+        total_tasks = len(tasks)
+        completed_tasks = status_counts.get('done', 0)
+        in_progress_tasks = status_counts.get('in_progress', 0)
+        blocked_tasks = status_counts.get('blocked', 0)
         
         # Calculate completion percentage
         completion_percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
         # Timeline summary
-        tasks_with_dates = tasks.exclude(due_date__isnull=True)
-        if tasks_with_dates.exists():
-            earliest_due = tasks_with_dates.order_by('due_date').first().due_date
-            latest_due = tasks_with_dates.order_by('-due_date').first().due_date
-        else:
-            earliest_due = None
-            latest_due = None
+        due_dates = [task['due_date'] for task in tasks if task['due_date']]
+        earliest_due = min(due_dates) if due_dates else None
+        latest_due = max(due_dates) if due_dates else None
         
         # Priority distribution
         priority_distribution = {
-            'high': tasks.filter(priority='high').count(),
-            'medium': tasks.filter(priority='medium').count(),
-            'low': tasks.filter(priority='low').count()
+            'high': priority_counts.get('high', 0),
+            'medium': priority_counts.get('medium', 0),
+            'low': priority_counts.get('low', 0)
         }
         
-        # Upcoming deadlines (next 7 days)
+        # Upcoming deadlines (next 7 days) and overdue tasks
         now = timezone.now()
         next_week = now + timedelta(days=7)
-        upcoming_deadlines = tasks.filter(
-            due_date__gte=now,
-            due_date__lte=next_week,
-            status__in=['todo', 'in_progress', 'review']
-        ).order_by('due_date')[:10]
+        open_tasks = [task for task in tasks if task['due_date'] and task['status'] in ('todo', 'in_progress', 'review')]
+        upcoming_deadlines = sorted(
+            (task for task in open_tasks if now <= task['due_date'] <= next_week),
+            key=lambda task: task['due_date']
+        )[:10]
+        overdue_count = sum(1 for task in open_tasks if task['due_date'] < now)
         
         # Use AI to generate insights and recommendations
         import json
@@ -2361,7 +2332,7 @@ Priority Distribution:
 
 Team Members: {len(team_workload)}
 Upcoming Deadlines (next 7 days): {len(upcoming_deadlines)}
-Overdue Tasks: {tasks.filter(due_date__lt=now, status__in=['todo', 'in_progress', 'review']).count()}
+Overdue Tasks: {overdue_count}
 
 Provide:
 1. Overall project health assessment
@@ -2428,16 +2399,13 @@ Return JSON:
             'metrics': {
                 'priority_distribution': priority_distribution,
                 'upcoming_deadlines': [{
-                    'id': t.id,
-                    'title': t.title,
-                    'due_date': t.due_date.isoformat(),
-                    'assignee': t.assignee.username if t.assignee else None,
-                    'priority': t.priority
+                    'id': t['id'],
+                    'title': t['title'],
+                    'due_date': t['due_date'].isoformat(),
+                    'assignee': t['assignee_username'],
+                    'priority': t['priority']
                 } for t in upcoming_deadlines],
-                'overdue_tasks': tasks.filter(
-                    due_date__lt=now,
-                    status__in=['todo', 'in_progress', 'review']
-                ).count()
+                'overdue_tasks': overdue_count
             },
             'generated_at': timezone.now().isoformat()
         }
@@ -2450,7 +2418,7 @@ Return JSON:
             'shared_view': shared_view
         }
     
-    def optimize_schedule(self, project_id: int, resources: List[Dict] = None) -> Dict:
+    def optimize_schedule(self, project_id: int, resources: List[Dict] = None, graph: ProjectGraph = None) -> Dict:
         """
         Optimize schedule with resource constraints.
         
@@ -2471,18 +2439,7 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'assignee_id': t.assignee.id if t.assignee else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = (graph or self._project_graph(project.id)).tasks_data()
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule(tasks_data, resources)
         
@@ -2493,7 +2450,7 @@ Return JSON:
             'project_name': project.name,
         }
     
-    def coordinate_multi_project_schedules(self, project_ids: List[int]) -> Dict:
+    def coordinate_multi_project_schedules(self, project_ids: List[int], graph: ProjectGraph = None) -> Dict:
         """
         Coordinate schedules across multiple projects (Phase 2 feature).
         
@@ -2505,32 +2462,20 @@ Return JSON:
         """
         self.log_action("Coordinating multi-project schedules", {"project_ids": project_ids})
         
-        projects_data = []
-        for project_id in project_ids:
-            try:
-                project = Project.objects.get(id=project_id)
-                tasks = Task.objects.filter(project=project).select_related('assignee')
-                
-                tasks_data = [{
-                    'id': t.id,
-                    'title': t.title,
-                    'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-                    'assignee_id': t.assignee.id if t.assignee else None,
-                    'priority': t.priority,
-                    'status': t.status,
-                    'dependencies': [dep.id for dep in t.depends_on.all()],
-                    'due_date': t.due_date.isoformat() if t.due_date else None,
-                } for t in tasks]
-                
-                projects_data.append({
-                    'id': project.id,
-                    'name': project.name,
-                    'tasks': tasks_data
-                })
-            except Project.DoesNotExist:
-                continue
+        # Whole portfolio in three queries: projects, then the shared task graph (edges, tasks)
+        projects = Project.objects.filter(id__in=project_ids).only('id', 'name').in_bulk()
+        graph = graph or self._project_graph(*projects.keys())
+        
+        projects_data = [{
+            'id': projects[project_id].id,
+            'name': projects[project_id].name,
+            'tasks': graph.tasks_data(project_id)
+        } for project_id in dict.fromkeys(project_ids) if project_id in projects]
         
-        coordination_result = TimelineGanttEnhancements.coordinate_multi_project_schedules(projects_data)
+        coordination_result = TimelineGanttEnhancements.coordinate_multi_project_schedules(
+            projects_data, start_date=timezone.now().date(), calendar=self.calendar,
+            hours_per_day=self.hours_per_day
+        )
         
         return {
             'success': True,
@@ -2538,13 +2483,14 @@ Return JSON:
             'projects_analyzed': len(projects_data)
         }
     
-    def generate_what_if_scenarios(self, project_id: int, scenarios: List[str] = None) -> Dict:
+    def generate_what_if_scenarios(self, project_id: int, scenarios: List[str] = None, graph: ProjectGraph = None) -> Dict:
         """
         Generate what-if scenario timelines (Phase 2 feature).
         
         Args:
             project_id (int): Project ID
-            scenarios (List[str]): Optional list of scenario names
+            scenarios (List): Optional list of scenario names or scenario objects
+                              (delay / duration / scale / add_resources / remove, see scenario_engine)
             
         Returns:
             Dict: Multiple scenario timelines
@@ -2559,19 +2505,22 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = (graph or self._project_graph(project.id)).tasks_data()
         
-        scenarios_result = TimelineGanttEnhancements.generate_what_if_scenarios(tasks_data, scenarios)
+        # Baseline CPM comes from the schedule_version cache; scenarios are deltas on it
+        baseline = TimelineGanttEnhancements.scenario_baseline(
+            tasks_data, project.id, project.schedule_version
+        ) if tasks_data else None
+        try:
+            scenarios_result = TimelineGanttEnhancements.generate_what_if_scenarios(
+                tasks_data, scenarios, baseline=baseline,
+                start_date=project.start_date or timezone.now().date(), calendar=self.calendar
+            )
+        except ScenarioError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
         return {
             'success': True,
@@ -2580,7 +2529,8 @@ Return JSON:
             'project_name': project.name,
         }
     
-    def optimize_schedule_genetic(self, project_id: int, generations: int = 50, population_size: int = 20) -> Dict:
+    def optimize_schedule_genetic(self, project_id: int, generations: int = 50, population_size: int = 20,
+                                  graph: ProjectGraph = None) -> Dict:
         """
         Optimize schedule using genetic algorithm (Phase 2 feature).
         
@@ -2602,17 +2552,7 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = (graph or self._project_graph(project.id)).tasks_data()
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule_genetic_algorithm(
             tasks_data, generations=generations, population_size=population_size
@@ -2625,7 +2565,8 @@ Return JSON:
             'project_name': project.name,
         }
     
-    def optimize_schedule_simulated_annealing(self, project_id: int, iterations: int = 1000) -> Dict:
+    def optimize_schedule_simulated_annealing(self, project_id: int, iterations: int = 1000,
+                                              graph: ProjectGraph = None) -> Dict:
         """
         Optimize schedule using simulated annealing (Phase 2 feature).
         
@@ -2646,17 +2587,7 @@ Return JSON:
                 'error': f'Project with ID {project_id} not found'
             }
         
-        tasks = Task.objects.filter(project=project).select_related('assignee')
-        
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'estimated_hours': float(t.estimated_hours) if t.estimated_hours else None,
-            'priority': t.priority,
-            'status': t.status,
-            'dependencies': [dep.id for dep in t.depends_on.all()],
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-        } for t in tasks]
+        tasks_data = (graph or self._project_graph(project.id)).tasks_data()
         
         optimization_result = TimelineGanttEnhancements.optimize_schedule_simulated_annealing(
             tasks_data, iterations=iterations
@@ -2676,7 +2607,8 @@ Return JSON:
         Args:
             action (str): Action to perform:
                 - 'create_timeline': Create project timeline
-                - 'generate_gantt': Generate Gantt chart
+                - 'generate_gantt': Generate Gantt chart (compact=True for the columnar payload)
+                - 'gantt_delta': Compact Gantt changes since since_version
                 - 'track_milestones': Track milestones
                 - 'check_deadlines': Check upcoming deadlines
                 - 'suggest_adjustments': Suggest timeline adjustments
@@ -2691,6 +2623,7 @@ Return JSON:
             dict: Processing results
         """
         self.log_action("Processing timeline action", {"action": action})
+        self._graphs = {}
         
         project_id = kwargs.get('project_id')
         if not project_id:
@@ -2705,8 +2638,16 @@ Return JSON:
                 return self.create_timeline(project_id, tasks)
             
             elif action == 'generate_gantt':
+                if kwargs.get('compact'):
+                    return self.get_compact_gantt(project_id)
                 return self.generate_gantt_chart(project_id)
             
+            elif action == 'gantt_delta':
+                since_version = kwargs.get('since_version')
+                if since_version is None:
+                    return self.get_compact_gantt(project_id)
+                return self.get_gantt_delta(project_id, since_version)
+            
             elif action == 'track_milestones':
                 return self.track_milestones(project_id)
             
@@ -2763,7 +2704,7 @@ Return JSON:
                     'success': False,
                     'error': f'Unknown action: {action}',
                     'available_actions': [
-                        'create_timeline', 'generate_gantt', 'track_milestones',
+                        'create_timeline', 'generate_gantt', 'gantt_delta', 'track_milestones',
                         'check_deadlines', 'suggest_adjustments', 'identify_conflicts',
                         'identify_dependencies', 'get_shared_view', 'calculate_duration', 
                         'manage_phases', 'optimize_schedule', 'coordinate_multi_project',
@@ -0,0 +1,107 @@
+"""
+Workday Calendar
+Closed-form conversion between dates and business-day ordinals, so adding or
+counting workdays is O(1) (O(log H) with H company holidays) instead of
+stepping one day at a time.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date as date_type, datetime
+from typing import Iterable, List, Optional, Union
+
+# date(1, 1, 1).toordinal() == 1 and it is a Monday, so (ordinal - 1) % 7 is the weekday
+_WORKDAYS_PER_WEEK = 5
+
+
+def _plain_index(day: date_type) -> int:
+    """Number of Monday-Friday days from 0001-01-01 up to and including day."""
+    offset = day.toordinal() - 1
+    weeks, remainder = divmod(offset, 7)
+    return weeks * _WORKDAYS_PER_WEEK + min(remainder + 1, _WORKDAYS_PER_WEEK)
+
+
+def _plain_date(index: int) -> date_type:
+    """Inverse of _plain_index for workdays: the index-th Monday-Friday day (1-based)."""
+    weeks, remainder = divmod(index - 1, _WORKDAYS_PER_WEEK)
+    return date_type.fromordinal(weeks * 7 + remainder + 1)
+
+
+class WorkdayCalendar:
+    """
+    Monday-Friday calendar with optional holidays.
+
+    Every workday has an ordinal (its position among all workdays), computed as
+    weeks × 5 + remainder minus the number of holidays up to that date (binary
+    search over a sorted array). Adding n workdays is then ordinal arithmetic
+    and counting workdays in a range is a difference of ordinals.
+    """
+
+    def __init__(self, holidays: Optional[Iterable[Union[date_type, datetime, str]]] = None):
+        self.set_holidays(holidays or [])
+
+    def set_holidays(self, holidays: Iterable[Union[date_type, datetime, str]]) -> None:
+        """Replace the holiday list. Accepts dates, datetimes or ISO date strings."""
+        days = set()
+        for holiday in holidays:
+            if isinstance(holiday, str):
+                holiday = date_type.fromisoformat(holiday.strip()[:10])
+            elif isinstance(holiday, datetime):
+                holiday = holiday.date()
+            # Weekend holidays do not change anything
+            if holiday.weekday() < 5:
+                days.add(holiday)
+        ordered = sorted(days)
+        self.holidays: List[date_type] = ordered
+        self._holiday_ordinals = [d.toordinal() for d in ordered]
+        # For holiday i (0-based) at plain index h_i: number of working (non-holiday)
+        # days before it. Non-decreasing, so it can be binary searched.
+        self._workdays_before_holiday = [
+            _plain_index(d) - 1 - i for i, d in enumerate(ordered)
+        ]
+
+    def is_workday(self, day: date_type) -> bool:
+        if day.weekday() >= 5:
+            return False
+        if not self._holiday_ordinals:
+            return True
+        ordinal = day.toordinal()
+        idx = bisect_left(self._holiday_ordinals, ordinal)
+        return not (idx < len(self._holiday_ordinals) and self._holiday_ordinals[idx] == ordinal)
+
+    def workday_ordinal(self, day: date_type) -> int:
+        """Number of workdays from 0001-01-01 up to and including day."""
+        count = _plain_index(day)
+        if self._holiday_ordinals:
+            count -= bisect_right(self._holiday_ordinals, day.toordinal())
+        return count
+
+    def date_from_ordinal(self, ordinal: int) -> date_type:
+        """The workday whose workday_ordinal is ordinal."""
+        if self._workdays_before_holiday:
+            # Holidays that fall before the ordinal-th working day push it later
+            ordinal += bisect_right(self._workdays_before_holiday, ordinal - 1)
+        return _plain_date(ordinal)
+
+    def add_workdays(self, start_date: date_type, workdays: int) -> date_type:
+        """
+        Move workdays business days from start_date (start_date itself is not counted).
+        Negative values move backwards. Zero returns start_date unchanged.
+        """
+        if workdays == 0:
+            return start_date
+        ordinal = self.workday_ordinal(start_date)
+        if workdays > 0:
+            return self.date_from_ordinal(ordinal + workdays)
+        # Backwards: the first step lands on the last workday strictly before start_date
+        if self.is_workday(start_date):
+            ordinal -= 1
+        return self.date_from_ordinal(ordinal + workdays + 1)
+
+    def workdays_between(self, start_date: date_type, end_date: date_type) -> int:
+        """Workdays in [start_date, end_date], inclusive. 0 if end_date < start_date."""
+        if end_date < start_date:
+            return 0
+        count = self.workday_ordinal(end_date) - self.workday_ordinal(start_date)
+        if self.is_workday(start_date):
+            count += 1
+        return count
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class ProjectManagerAgentConfig(AppConfig):
     name = 'project_manager_agent'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from .ai_agents.agents_registry import AgentRegistry
+
+        # Pooled agents leased during a request go back to the idle pool when it ends
+        request_finished.connect(AgentRegistry.release_thread_agents, dispatch_uid='agent_pool_release')
@@ -0,0 +1 @@
+# Management commands for project_manager_agent
@@ -1,3 +1,990 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Project, QAConversationMessage, Subtask, Task, TeamMember
+from project_manager_agent.ai_agents import (
+    cpm_engine, gantt_payload, monte_carlo, resource_scheduler, scenario_engine, schedule_optimizer,
+)
+from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+from project_manager_agent.ai_agents.knowledge_qa_agent import KnowledgeQAAgent
+from project_manager_agent.ai_agents.context_assembler import ContextAssembler, classify_question
+from project_manager_agent.ai_agents.context_manager import ContextManager
+from project_manager_agent.ai_agents.conversation_store import ConversationStore, estimate_tokens
+from project_manager_agent.ai_agents.enhancements.knowledge_qa_enhancements import KnowledgeQAEnhancements
+from project_manager_agent.ai_agents.project_graph import load_project_graph
+from project_manager_agent.ai_agents.timeline_gantt_agent import TimelineGanttAgent
+from project_manager_agent.ai_agents.workday_calendar import WorkdayCalendar
+
+
+def _loop_is_workday(day, holidays):
+    return day.weekday() < 5 and day not in holidays
+
+
+def _loop_add_workdays(start_date, workdays, holidays=frozenset()):
+    """Reference: the original day-by-day TimelineGanttAgent._add_workdays."""
+    if workdays == 0:
+        return start_date
+    current = start_date
+    days_added = 0
+    direction = 1 if workdays > 0 else -1
+    target = abs(workdays)
+    while abs(days_added) < target:
+        current += timedelta(days=direction)
+        if _loop_is_workday(current, holidays):
+            days_added += direction
+    return current
+
+
+def _loop_workdays_between(start_date, end_date, holidays=frozenset()):
+    """Reference: the original day-by-day TimelineGanttAgent._calculate_workdays_between."""
+    if end_date < start_date:
+        return 0
+    workdays = 0
+    current = start_date
+    while current <= end_date:
+        if _loop_is_workday(current, holidays):
+            workdays += 1
+        current += timedelta(days=1)
+    return workdays
+
+
+class WorkdayCalendarPropertyTests(SimpleTestCase):
+    """WorkdayCalendar must agree with the day-stepping loops it replaced."""
+
+    CASES = 3000
+
+    def setUp(self):
+        self.rng = random.Random(20240601)
+        self.base = date(2024, 1, 1)
+
+    def _random_date(self, span=3 * 365):
+        return self.base + timedelta(days=self.rng.randint(-span, span))
+
+    def _random_holidays(self, count=40):
+        return {self._random_date() for _ in range(count)}
+
+    def _check_calendar(self, calendar, holidays):
+        for _ in range(self.CASES):
+            start = self._random_date()
+            workdays = self.rng.randint(-400, 400)
+            self.assertEqual(
+                calendar.add_workdays(start, workdays),
+                _loop_add_workdays(start, workdays, holidays),
+                msg=f"add_workdays({start}, {workdays})",
+            )
+            end = start + timedelta(days=self.rng.randint(-30, 600))
+            self.assertEqual(
+                calendar.workdays_between(start, end),
+                _loop_workdays_between(start, end, holidays),
+                msg=f"workdays_between({start}, {end})",
+            )
+            self.assertEqual(calendar.is_workday(start), _loop_is_workday(start, holidays))
+
+    def test_matches_loop_without_holidays(self):
+        self._check_calendar(WorkdayCalendar(), frozenset())
+
+    def test_matches_loop_with_holidays(self):
+        holidays = self._random_holidays()
+        self._check_calendar(WorkdayCalendar(holidays), holidays)
+
+    def test_matches_loop_with_consecutive_holidays(self):
+        # A two-week company shutdown around the new year, plus weekend entries that must be ignored
+        holidays = {date(2024, 12, 23) + timedelta(days=i) for i in range(14)}
+        self._check_calendar(WorkdayCalendar(holidays), holidays)
+
+    def test_small_steps_around_every_weekday(self):
+        holidays = {date(2024, 3, 6), date(2024, 3, 8), date(2024, 3, 11)}
+        calendar = WorkdayCalendar([d.isoformat() for d in holidays])
+        for offset in range(21):
+            start = date(2024, 3, 1) + timedelta(days=offset)
+            for workdays in range(-8, 9):
+                self.assertEqual(
+                    calendar.add_workdays(start, workdays),
+                    _loop_add_workdays(start, workdays, holidays),
+                )
+
+    def test_round_trip_ordinals(self):
+        calendar = WorkdayCalendar(self._random_holidays())
+        for _ in range(self.CASES):
+            day = self._random_date()
+            if calendar.is_workday(day):
+                self.assertEqual(calendar.date_from_ordinal(calendar.workday_ordinal(day)), day)
+
+
+class CPMEngineTests(SimpleTestCase):
+
+    def test_diamond_floats(self):
+        # 1 -> 2 -> 4 and 1 -> 3 -> 4; task 3 is shorter so it has float
+        schedule = cpm_engine.compute_cpm(
+            [1, 2, 3, 4], [2, 5, 1, 3], [(1, 2), (1, 3), (2, 4), (3, 4)], lag=1
+        )
+        self.assertEqual(schedule.es.tolist(), [0, 2, 2, 7])
+        self.assertEqual(schedule.ef.tolist(), [1, 6, 2, 9])
+        self.assertEqual(schedule.total_float.tolist(), [0, 0, 4, 0])
+        self.assertEqual(schedule.free_float.tolist(), [0, 0, 4, 0])
+        self.assertEqual(schedule.critical_task_ids(), [1, 2, 4])
+        self.assertEqual(schedule.project_duration, 10)
+        self.assertFalse(schedule.has_cycle)
+
+    def test_long_chain_is_iterative(self):
+        n = 20000
+        schedule = cpm_engine.compute_cpm(range(n), [1] * n, [(i, i + 1) for i in range(n - 1)], lag=1)
+        self.assertEqual(int(schedule.es[-1]), n - 1)
+        self.assertTrue(schedule.critical.all())
+
+    def test_cycle_is_detected_and_still_scheduled(self):
+        schedule = cpm_engine.compute_cpm(
+            [1, 2, 3, 4], [2, 2, 2, 2], [(3, 1), (1, 2), (2, 3), (3, 4)], lag=1
+        )
+        self.assertTrue(schedule.has_cycle)
+        self.assertEqual(sorted(schedule.cyclic_task_ids), [1, 2, 3, 4])
+        self.assertEqual(schedule.es.tolist(), [0, 2, 4, 6])
+
+    def test_cache_is_keyed_on_schedule_version(self):
+        cpm_engine.clear_cache()
+        first = cpm_engine.get_project_cpm(7, 1, [1, 2], [1, 1], [(1, 2)])
+        self.assertIs(cpm_engine.get_project_cpm(7, 1, [1, 2], [1, 1], [(1, 2)]), first)
+        second = cpm_engine.get_project_cpm(7, 2, [1, 2], [1, 1], [])
+        self.assertIsNot(second, first)
+        self.assertEqual(second.es.tolist(), [0, 0])
+        cpm_engine.clear_cache(7)
+
+
+class MonteCarloScheduleTests(SimpleTestCase):
+
+    def _simulate(self, estimates, dependencies, iterations=2000, seed=11):
+        ids = list(range(len(estimates)))
+        low, likely, high = zip(*estimates)
+        return monte_carlo.simulate_schedule(ids, low, likely, high, dependencies, iterations=iterations, seed=seed)
+
+    def test_fixed_durations_follow_dependencies(self):
+        chain = self._simulate([(2, 2, 2), (3, 3, 3), (4, 4, 4)], [(0, 1), (1, 2)], iterations=10)
+        self.assertTrue((chain['completion'] == 9).all())
+        parallel = self._simulate([(2, 2, 2), (3, 3, 3), (4, 4, 4)], [], iterations=10)
+        self.assertTrue((parallel['completion'] == 4).all())
+        self.assertEqual(parallel['criticality'].tolist(), [0.0, 0.0, 1.0])
+
+    def test_criticality_index_splits_between_branches(self):
+        # Two equally distributed branches into a join: each is critical about half the time
+        result = self._simulate([(1, 1, 1), (2, 5, 9), (2, 5, 9), (1, 1, 1)], [(0, 1), (0, 2), (1, 3), (2, 3)])
+        self.assertEqual(result['criticality'][0], 1.0)
+        self.assertEqual(result['criticality'][3], 1.0)
+        self.assertAlmostEqual(result['criticality'][1], 0.5, delta=0.05)
+        self.assertAlmostEqual(result['criticality'][1] + result['criticality'][2], 1.0, delta=0.01)
+
+    def test_samples_stay_within_estimates_and_match_pert_mean(self):
+        result = self._simulate([(3, 4, 8)], [], iterations=50000)
+        completion = result['completion']
+        self.assertGreaterEqual(completion.min(), 3)
+        self.assertLessEqual(completion.max(), 8)
+        self.assertAlmostEqual(completion.mean(), (3 + 4 * 4 + 8) / 6.0, delta=0.02)
+
+    def test_seed_is_reproducible(self):
+        first = self._simulate([(1, 2, 4), (2, 3, 6)], [(0, 1)], seed=5)
+        second = self._simulate([(1, 2, 4), (2, 3, 6)], [(0, 1)], seed=5)
+        self.assertTrue((first['completion'] == second['completion']).all())
+
+
+def _legacy_genetic_total(order_ids, task_map):
+    """Reference: the dict-based walk of the original GA fitness (before 1 / (total + 1))."""
+    completed = set()
+    total = 0
+    for task_id in order_ids:
+        deps = task_map[task_id].get('dependencies', [])
+        if deps and not all(dep in completed for dep in deps):
+            total += 1000
+            continue
+        total += schedule_optimizer.task_days(task_map[task_id])
+        completed.add(task_id)
+    return total
+
+
+class ScheduleOptimizerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rng = random.Random(99)
+
+    def _problems(self, count=40):
+        for seed in range(count):
+            tasks = schedule_optimizer.random_problem_tasks(self.rng.randint(2, 40), seed=seed, dependency_probability=0.3)
+            if seed % 4 == 0:
+                tasks[0]['dependencies'] = [10 ** 6]  # dependency outside the project
+            yield tasks, schedule_optimizer.ScheduleProblem(tasks)
+
+    def test_swap_delta_matches_full_recompute(self):
+        for _, problem in self._problems():
+            pos = problem.positions(np.random.default_rng(1).permutation(problem.n))
+            for _ in range(50):
+                a, b = self.rng.sample(range(problem.n), 2)
+                swapped = pos.copy()
+                swapped[a], swapped[b] = pos[b], pos[a]
+                self.assertEqual(
+                    problem.swap_violation_delta(pos.tolist(), a, b),
+                    problem.violations(swapped) - problem.violations(pos),
+                )
+
+    def test_genetic_total_matches_legacy_walk(self):
+        for tasks, problem in self._problems():
+            task_map = {task['id']: task for task in tasks}
+            for _ in range(10):
+                order = np.random.default_rng(self.rng.randint(0, 10 ** 6)).permutation(problem.n)
+                self.assertEqual(
+                    problem.genetic_total(problem.positions(order)),
+                    _legacy_genetic_total([problem.task_ids[i] for i in order], task_map),
+                )
+
+    def test_runs_are_deterministic(self):
+        problem = schedule_optimizer.ScheduleProblem(schedule_optimizer.random_problem_tasks(60, seed=3))
+        inline = schedule_optimizer.run_genetic(problem, 10, 10, seed=4, islands=3, workers=1)
+        pooled = schedule_optimizer.run_genetic(problem, 10, 10, seed=4, islands=3, workers=3)
+        self.assertEqual(inline['order'].tolist(), pooled['order'].tolist())
+        incremental = schedule_optimizer.run_annealing(problem, iterations=2000, seed=4)
+        full = schedule_optimizer.run_annealing(problem, iterations=2000, seed=4, incremental=False)
+        self.assertEqual(incremental['order'].tolist(), full['order'].tolist())
+        self.assertEqual(incremental['energy'], problem.annealing_energy(problem.positions(incremental['order'])))
+
+    @override_settings(SCHEDULE_OPTIMIZER_ISLANDS=1, SCHEDULE_OPTIMIZER_WORKERS=0)
+    def test_islands_run_inline_unless_a_pool_is_configured(self):
+        problem = schedule_optimizer.ScheduleProblem(schedule_optimizer.random_problem_tasks(30, seed=5))
+        with mock.patch.object(schedule_optimizer.multiprocessing, 'get_context') as get_context:
+            result = schedule_optimizer.run_genetic(problem, 5, 5, seed=2)
+            self.assertIsNone(schedule_optimizer.process_pool(schedule_optimizer.DEFAULT_WORKERS))
+        get_context.assert_not_called()
+        self.assertEqual(result['islands'], 1)
+
+        context = mock.Mock()
+        with mock.patch.object(schedule_optimizer.multiprocessing, 'get_context', return_value=context) as get_context:
+            schedule_optimizer.process_pool(2)
+        get_context.assert_called_once_with('spawn')
+        self.assertEqual(context.Pool.call_args.kwargs['processes'], 2)
+
+
+class ResourceSchedulerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rng = random.Random(35)
+
+    def test_capacity_timeline_matches_brute_force(self):
+        for _ in range(100):
+            timeline = resource_scheduler.CapacityTimeline()
+            busy = set()
+            for _ in range(30):
+                release, hours = self.rng.randint(0, 150), self.rng.randint(1, 25)
+                expected = release
+                while any(h in busy for h in range(expected, expected + hours)):
+                    expected += 1
+                start = timeline.earliest_fit(release, hours)
+                self.assertEqual(start, expected)
+                timeline.reserve(start, start + hours)
+                busy.update(range(start, start + hours))
+            self.assertEqual(timeline.busy_hours, len(busy))
+
+    def test_leveled_schedule_is_feasible(self):
+        tasks = []
+        for i in range(400):
+            tasks.append({
+                'id': i + 1,
+                'dependencies': [j + 1 for j in range(max(0, i - 15), i) if self.rng.random() < 0.1],
+                'assignee_id': self.rng.choice([None, 1, 2, 3, 4, 5]),
+                'estimated_hours': self.rng.choice([None, 3, 8, 20]),
+                'priority': self.rng.choice(['low', 'medium', 'high']),
+                'status': self.rng.choice(['todo', 'todo', 'in_progress', 'done']),
+            })
+        result = resource_scheduler.level_resources(tasks, date(2024, 6, 1))  # a Saturday
+        self.assertEqual(result['start_date'], '2024-06-03')
+        scheduled = result['tasks']
+        self.assertEqual(len(scheduled), sum(1 for t in tasks if t['status'] != 'done'))
+        by_assignee = {}
+        for task in tasks:
+            slot = scheduled.get(task['id'])
+            if slot is None:
+                continue
+            for dep in task['dependencies']:
+                if dep in scheduled:
+                    self.assertLessEqual(scheduled[dep]['finish_hour'], slot['start_hour'])
+            if task['assignee_id'] is not None:
+                by_assignee.setdefault(task['assignee_id'], []).append((slot['start_hour'], slot['finish_hour']))
+        for windows in by_assignee.values():
+            windows.sort()
+            for (_, finish), (start, _) in zip(windows, windows[1:]):
+                self.assertLessEqual(finish, start)
+
+    def test_dates_follow_working_hours(self):
+        tasks = [
+            {'id': 1, 'assignee_id': 7, 'estimated_hours': 12, 'dependencies': []},
+            {'id': 2, 'assignee_id': 7, 'estimated_hours': 8, 'dependencies': [], 'priority': 'low'},
+        ]
+        result = resource_scheduler.level_resources(tasks, date(2024, 3, 8), hours_per_day=8)  # a Friday
+        self.assertEqual((result['tasks'][1]['start_date'], result['tasks'][1]['end_date']), ('2024-03-08', '2024-03-11'))
+        self.assertEqual((result['tasks'][2]['start_date'], result['tasks'][2]['end_date']), ('2024-03-11', '2024-03-12'))
+        self.assertEqual(result['assignees'][7]['utilization'], 100.0)
+
+
+class ScenarioEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rng = random.Random(11)
+
+    def _random_dag(self, n):
+        ids = list(range(1, n + 1))
+        durations = [self.rng.randint(1, 6) for _ in ids]
+        deps = [(j, i) for i in ids for j in range(max(1, i - 10), i) if self.rng.random() < 0.2]
+        return ids, durations, deps
+
+    def test_delta_matches_full_recompute(self):
+        for _ in range(30):
+            ids, durations, deps = self._random_dag(self.rng.randint(2, 80))
+            engine = scenario_engine.ScenarioEngine(cpm_engine.compute_cpm(ids, durations, deps))
+            changed = {task_id: self.rng.randint(1, 9) for task_id in self.rng.sample(ids, min(3, len(ids)))}
+            result = engine.evaluate(engine.changes_for({'duration': changed}))
+            expected = cpm_engine.compute_cpm(ids, [changed.get(t, d) for t, d in zip(ids, durations)], deps)
+            ef = [result['ef'].get(i, engine.ef[i]) for i in range(len(ids))]
+            self.assertEqual(ef, expected.ef.tolist())
+            self.assertEqual(result['end'] + 1, expected.project_duration)
+
+    def test_local_change_only_visits_downstream_tasks(self):
+        # Two independent chains; delaying the head of one never touches the other
+        n = 1000
+        deps = [(i, i + 1) for i in range(1, n)] + [(i, i + 1) for i in range(n + 1, 2 * n)]
+        engine = scenario_engine.ScenarioEngine(cpm_engine.compute_cpm(range(1, 2 * n + 1), [1] * (2 * n), deps))
+        result = engine.evaluate(engine.changes_for({'name': 'late', 'delay': {str(n - 4): 3}}))
+        self.assertEqual(result['visited'], 5)
+        self.assertEqual(result['end'], engine.end + 3)
+        self.assertEqual(result['driving_path'], list(range(1, n + 1)))
+
+    def test_presets_and_errors(self):
+        engine = scenario_engine.ScenarioEngine(cpm_engine.compute_cpm([1, 2, 3], [5, 5, 5], [(1, 2), (2, 3)]))
+        results = scenario_engine.evaluate_scenarios(engine, scenario_engine.DEFAULT_SCENARIOS)
+        ends = {result['name']: result['end'] + 1 for result in results}
+        self.assertEqual(ends, {
+            'optimistic': 12, 'realistic': 15, 'pessimistic': 21,
+            'delayed_dependencies': 19, 'resource_constrained': 18,
+        })
+        removed = engine.evaluate(engine.changes_for({'remove': [2]}))
+        self.assertEqual(removed['end'] + 1, 10)
+        with self.assertRaises(scenario_engine.ScenarioError):
+            engine.changes_for('apocalyptic')
+
+    def test_scenario_batches_use_a_pool_only_when_configured(self):
+        engine = scenario_engine.ScenarioEngine(
+            cpm_engine.compute_cpm(range(1, 21), [2] * 20, [(i, i + 1) for i in range(1, 20)]))
+        specs = [{'name': f'late {i}', 'delay': {i: i}} for i in range(1, 11)]
+        inline = scenario_engine.evaluate_scenarios(engine, specs)
+
+        class InlinePool:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, func, items):
+                self.chunks = [len(item[1]) for item in items]
+                return [func(item) for item in items]
+
+        pool = InlinePool()
+        with mock.patch.object(scenario_engine, 'available_cpus', return_value=4), \
+                mock.patch.object(scenario_engine, 'process_pool', return_value=pool) as process_pool:
+            with override_settings(SCENARIO_ENGINE_WORKERS=0):
+                scenario_engine.evaluate_scenarios(engine, specs)
+            process_pool.assert_not_called()
+            pooled = scenario_engine.evaluate_scenarios(engine, specs, workers=3)
+        process_pool.assert_called_once_with(3)
+        self.assertEqual(pool.chunks, [4, 4, 2])
+        self.assertEqual([r['name'] for r in pooled], [r['name'] for r in inline])
+        self.assertEqual([r['end'] for r in pooled], [r['end'] for r in inline])
+
+
+class ProjectGraphTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='graph-owner')
+        cls.project = Project.objects.create(name='Graph', owner=owner)
+        other = Project.objects.create(name='Other', owner=owner)
+        cls.tasks = [Task.objects.create(project=cls.project, title=f'T{i}', assignee=owner if i % 2 else None)
+                     for i in range(12)]
+        for i in range(1, 12):
+            cls.tasks[i].depends_on.add(cls.tasks[(i - 1) // 2])
+        cls.tasks[1].depends_on.add(cls.tasks[9])  # cycle 1 -> 9 -> 4 -> 1
+        cls.external = Task.objects.create(project=other, title='External')
+        cls.tasks[2].depends_on.add(cls.external)
+        Subtask.objects.create(task=cls.tasks[3], title='a', status='done')
+        Subtask.objects.create(task=cls.tasks[3], title='b')
+
+    def test_two_queries_and_same_relations_as_orm(self):
+        with self.assertNumQueries(2):
+            graph = load_project_graph([self.project.id])
+        self.assertEqual(sorted(graph.rows[i]['id'] for i in graph.local), sorted(t.id for t in self.tasks))
+        for task in self.tasks:
+            i = graph.index[task.id]
+            self.assertEqual(sorted(graph.dependency_ids(i)), sorted(t.id for t in task.depends_on.all()))
+            self.assertEqual(sorted(graph.rows[j]['id'] for j in graph.dependent_indices(i)),
+                             sorted(t.id for t in task.dependent_tasks.all()))
+        row = graph.rows[graph.index[self.tasks[3].id]]
+        self.assertEqual((row['subtask_total'], row['subtask_done']), (2, 1))
+        self.assertEqual(row['assignee_username'], 'graph-owner')
+        self.assertNotIn(graph.index[self.external.id], graph.local)
+
+    def test_cycle_paths_follow_dependencies(self):
+        graph = load_project_graph([self.project.id])
+        paths = graph.cycle_paths()
+        on_cycle = {self.tasks[i].id for i in (1, 4, 9)}
+        self.assertTrue(on_cycle <= set(paths))
+        self.assertNotIn(self.tasks[0].id, paths)
+        for task_id, path in paths.items():
+            self.assertEqual(path[0], task_id)
+            self.assertIn(path[-1], path[:-1])
+            for a, b in zip(path, path[1:]):
+                self.assertIn(b, graph.dependency_ids(graph.index[a]))
+
+    @override_settings(GROQ_API_KEY='test')
+    def test_gantt_methods_share_one_graph_per_request(self):
+        agent = TimelineGanttAgent()
+        with self.assertNumQueries(3):  # project, dependency edges, tasks
+            result = agent.process('track_milestones', project_id=self.project.id)
+        self.assertTrue(result['success'])
+        graph = agent._project_graph(self.project.id)
+        with self.assertNumQueries(1):  # the project only
+            agent.check_upcoming_deadlines(self.project.id, graph=graph)
+
+    @override_settings(GROQ_API_KEY='test')
+    def test_gantt_delta_survives_a_cold_cache(self):
+        from django.core.cache import cache
+
+        agent = TimelineGanttAgent()
+        first = agent.get_compact_gantt(self.project.id)['gantt_chart']
+        Task.objects.filter(id=self.tasks[5].id).update(status='done')
+        Project.objects.filter(id=self.project.id).update(schedule_version=first['version'] + 1)
+        cache.clear()  # e.g. the next request lands on another web process
+
+        agent.reset_request_state()
+        result = agent.get_gantt_delta(self.project.id, first['version'])
+        self.assertFalse(result['full'])
+        self.assertEqual(result['delta']['changed']['ids'], [self.tasks[5].id])
+
+        with mock.patch.object(gantt_payload, 'SNAPSHOTS_KEPT', 1):
+            gantt_payload.save_snapshot(self.project.id, dict(first, version=first['version'] + 2))
+        self.assertEqual(list(self.project.gantt_snapshots.values_list('version', flat=True)), [first['version'] + 2])
+
+
+class GanttPayloadTests(SimpleTestCase):
+
+    def _tasks(self, rng, n, start):
+        tasks = []
+        for i in range(n):
+            begin = start + timedelta(days=rng.randint(0, 30))
+            tasks.append({
+                'id': 100 + i, 'title': f'T{i}', 'start_date': begin.isoformat(),
+                'end_date': (begin + timedelta(days=rng.randint(0, 9))).isoformat(),
+                'status': rng.choice(gantt_payload.STATUS_CODES), 'priority': rng.choice(gantt_payload.PRIORITY_CODES),
+                'progress': rng.randint(0, 100), 'assignee_id': rng.choice([None, 1, 2]),
+                'dependencies': [100 + j for j in range(i) if rng.random() < 0.1],
+            })
+        return tasks
+
+    def _apply(self, chart, delta):
+        """Client side: rebuild the new chart as {task_id: (absolute start, other columns)} plus edge ids."""
+        start = date.fromisoformat(chart['start'])
+        tasks = {task_id: [start + timedelta(days=chart['start_offsets'][i])] +
+                 [chart[c][i] for c in gantt_payload.TASK_COLUMNS if c != 'start_offsets']
+                 for i, task_id in enumerate(chart['ids'])}
+        edges = {(chart['ids'][a], chart['ids'][b]) for a, b in zip(*chart['edges'])}
+        for task_id in delta['removed']:
+            del tasks[task_id]
+        changed = delta['changed']
+        new_start = date.fromisoformat(delta['start'])
+        for i, task_id in enumerate(changed['ids']):
+            tasks[task_id] = [new_start + timedelta(days=changed['start_offsets'][i])] + \
+                [changed[c][i] for c in gantt_payload.TASK_COLUMNS if c != 'start_offsets']
+        edges -= {tuple(e) for e in delta['edges_removed']}
+        edges |= {tuple(e) for e in delta['edges_added']}
+        return tasks, edges
+
+    def test_delta_reproduces_new_chart(self):
+        rng = random.Random(5)
+        start = date(2024, 1, 1)
+        tasks = self._tasks(rng, 60, start)
+        old = gantt_payload.build_compact_chart(tasks, start, 1, critical_ids=[100, 101])
+        self.assertEqual(len(old['ids']), len(old['durations']))
+        for task in rng.sample(tasks, 5):
+            task['end_date'] = (date.fromisoformat(task['end_date']) + timedelta(days=2)).isoformat()
+        tasks[10]['dependencies'] = []
+        removed = tasks.pop(20)
+        tasks.append(dict(removed, id=999))
+        new = gantt_payload.build_compact_chart(tasks, start - timedelta(days=3), 2, critical_ids=[101])
+        delta = gantt_payload.diff_compact_charts(old, new)
+        self.assertEqual((delta['since'], delta['version']), (1, 2))
+        self.assertIn(removed['id'], delta['removed'])
+        self.assertLess(len(delta['changed']['ids']), len(new['ids']))
+        self.assertEqual(self._apply(old, delta), self._apply(new, gantt_payload.diff_compact_charts(new, new)))
+
+
+class ContextManagerCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='ctx-owner')
+        cls.member = User.objects.create(username='ctx-member')
+        cls.project = Project.objects.create(name='Context', owner=cls.owner)
+        cls.tasks = [Task.objects.create(project=cls.project, title=f'T{i}') for i in range(3)]
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        # Versions roll back with each test; contexts cached by an earlier test must not match them
+        cache.clear()
+
+    def test_cached_until_a_related_model_changes(self):
+        context = ContextManager.get_project_context(self.project.id)
+        with self.assertNumQueries(1):  # the version lookup
+            self.assertEqual(ContextManager.get_project_context(self.project.id), context)
+
+        self.tasks[0].title = 'Renamed'
+        self.tasks[0].save()
+        context = ContextManager.get_project_context(self.project.id)
+        self.assertIn('Renamed', [t['title'] for t in context['tasks']])
+
+        self.tasks[2].depends_on.add(self.tasks[1])
+        context = ContextManager.get_project_context(self.project.id)
+        self.assertEqual(next(t for t in context['tasks'] if t['id'] == self.tasks[2].id)['dependencies'],
+                         [self.tasks[1].id])
+
+        TeamMember.objects.create(user=self.member, project=self.project)
+        context = ContextManager.get_project_context(self.project.id)
+        self.assertIn('ctx-member', [m['username'] for m in context['team']])
+
+        self.project.name = 'Context 2'
+        self.project.save()
+        self.assertEqual(ContextManager.get_project_context(self.project.id)['project']['name'], 'Context 2')
+
+    def test_constant_queries_and_same_dependencies_as_orm(self):
+        other = Project.objects.create(name='Other context', owner=self.owner)
+        external = Task.objects.create(project=other, title='External')
+        TeamMember.objects.create(user=self.member, project=self.project, role='member')
+        for tasks in (3, 40):
+            while len(self.tasks) < tasks:
+                self.tasks.append(Task.objects.create(project=self.project, title=f'T{len(self.tasks)}'))
+            for i in range(1, tasks):
+                self.tasks[i].depends_on.add(self.tasks[(i - 1) // 2])
+            self.tasks[1].depends_on.add(external)
+            external.depends_on.add(self.tasks[2])
+            # Version, project, tasks, dependency edges, team
+            with self.assertNumQueries(5):
+                context = ContextManager.get_project_context(self.project.id)
+        self.assertEqual(context['task_stats']['total'], 40)
+        self.assertEqual(context['task_stats']['by_status']['todo'], 40)
+        for task_data in context['tasks']:
+            task = Task.objects.get(pk=task_data['id'])
+            self.assertEqual(sorted(task_data['dependencies']), sorted(t.id for t in task.depends_on.all()))
+            self.assertEqual(sorted(task_data['dependent_tasks']), sorted(t.id for t in task.dependent_tasks.all()))
+            self.assertEqual(task_data['dependency_count'], len(task_data['dependencies']))
+        self.assertEqual(sorted(m['username'] for m in context['team']), ['ctx-member', 'ctx-owner'])
+
+    def test_user_projects_follow_task_count_and_ownership(self):
+        self.assertEqual(ContextManager.get_user_projects_context(self.owner.id)['projects'][0]['tasks_count'], 3)
+        Task.objects.create(project=self.project, title='T3')
+        self.assertEqual(ContextManager.get_user_projects_context(self.owner.id)['projects'][0]['tasks_count'], 4)
+
+        self.assertEqual(ContextManager.get_user_projects_context(self.member.id)['total_projects'], 0)
+        self.project.owner = self.member
+        self.project.save()
+        self.assertEqual(ContextManager.get_user_projects_context(self.owner.id)['total_projects'], 0)
+        self.assertEqual(ContextManager.get_user_projects_context(self.member.id)['total_projects'], 1)
+
+    def test_versions_are_shared_through_the_database(self):
+        from django.core.cache import cache
+
+        ContextManager.get_project_context(self.project.id)
+        ContextManager.get_user_projects_context(self.owner.id)
+        project_version = Project.context_version(self.project.id)
+        user_version = Project.user_context_version(self.owner.id)
+        cache.clear()  # another process's cache: the versions do not live there
+        self.assertEqual(Project.context_version(self.project.id), project_version)
+        self.assertEqual(Project.user_context_version(self.owner.id), user_version)
+
+        self.tasks[0].save()
+        self.assertEqual(Project.context_version(self.project.id), project_version + 1)
+        Project.bump_user_context_version(self.owner.id, self.member.id, None)
+        self.assertEqual(Project.user_context_version(self.owner.id), user_version + 1)
+        self.assertEqual(Project.user_context_version(self.member.id), 1)
+
+        # A stale instance never writes its counters back
+        stale = Project.objects.get(pk=self.project.pk)
+        Project.bump_context_version(self.project.id)
+        stale.save()
+        self.assertEqual(Project.context_version(self.project.id), project_version + 3)
+
+    def test_renaming_a_user_invalidates_their_contexts(self):
+        task = self.tasks[0]
+        task.assignee = self.member
+        task.save()
+        ContextManager.get_project_context(self.project.id)
+        project_version = Project.context_version(self.project.id)
+        user_version = Project.user_context_version(self.member.id)
+
+        self.member.last_login = timezone.now()
+        self.member.save(update_fields=['last_login'])
+        self.assertEqual(Project.context_version(self.project.id), project_version)
+        self.assertEqual(Project.user_context_version(self.member.id), user_version)
+
+        self.member.username = 'ctx-renamed'
+        self.member.save()
+        self.assertEqual(Project.context_version(self.project.id), project_version + 1)
+        self.assertEqual(Project.user_context_version(self.member.id), user_version + 1)
+        tasks = ContextManager.get_project_context(self.project.id)['tasks']
+        self.assertEqual(next(t for t in tasks if t['id'] == task.id)['assignee_username'], 'ctx-renamed')
+
+    def test_project_save_writes_loaded_fields_and_reinserts_a_deleted_row(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        partial = Project.objects.only('id', 'name').get(pk=self.project.pk)
+        partial.name = 'Partial'
+        with CaptureQueriesContext(connection) as queries:
+            partial.save()
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_project" SET "name"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"description"', updates[0])
+        # The signals' one lookup of the previous values; no per-field refresh of the deferred ones
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('SELECT "core_project"')]), 1)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.name, self.project.owner_id), ('Partial', self.owner.id))
+
+        orphan = Project.objects.create(name='Orphan', owner=self.owner)
+        Project.objects.filter(pk=orphan.pk).delete()
+        orphan.save()
+        self.assertTrue(Project.objects.filter(pk=orphan.pk, name='Orphan').exists())
+
+
+class SemanticSearchTests(SimpleTestCase):
+
+    def test_ranks_context_items_without_writing_to_the_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        context = {
+            'project': {'id': 1, 'name': 'Website relaunch', 'description': 'New marketing site'},
+            'tasks': [
+                {'id': 10, 'title': 'Configure payment gateway', 'description': 'Stripe checkout and refunds'},
+                {'id': 11, 'title': 'Write onboarding emails', 'description': 'Welcome sequence'},
+                {'id': 12, 'title': 'Database backups', 'description': 'Nightly snapshots'},
+            ],
+        }
+        with override_settings(VECTOR_STORE_DIR=directory.name, VECTOR_STORE_EMBEDDER='hashing'):
+            results = KnowledgeQAEnhancements.semantic_search('who handles the payment gateway refunds', context, top_k=2)
+            self.assertEqual((results[0]['type'], results[0]['id']), ('task', 10))
+            self.assertEqual(len(results), 2)
+
+            from core.vector_store import get_vector_store
+            store = get_vector_store()
+            self.assertEqual(store.rows, 0)  # request threads do not write to the store
+
+            self.assertFalse(os.listdir(directory.name))  # not even the header
+
+            store.upsert([('task:10', 'Configure payment gateway\nStripe checkout and refunds'),
+                          ('task:12', 'Database backups\nNightly snapshots')])
+            # Views pass shortened descriptions; indexed items still use their stored vector
+            context['tasks'][0]['description'] = 'Stripe checkout'
+            with mock.patch.object(store.embedder, 'embed', wraps=store.embedder.embed) as embed:
+                results = KnowledgeQAEnhancements.semantic_search('who handles the payment gateway refunds', context)
+            self.assertEqual((results[0]['type'], results[0]['id']), ('task', 10))
+            self.assertEqual(len(results), 4)
+            # Project 1 and task 11 in one batch, then the question
+            self.assertEqual([len(call.args[0]) for call in embed.call_args_list], [2, 1])
+            self.assertEqual(store.rows, 2)
+
+
+class ConversationStoreTests(TestCase):
+
+    def turn(self, n, words=10):
+        return {'question': f'question {n}', 'answer': ' '.join(['word'] * words)}
+
+    def test_database_store_trims_and_expires(self):
+        store = ConversationStore(max_messages=3, ttl=60)
+        for n in range(5):
+            store.append('s1', self.turn(n))
+        store.append('s2', self.turn(9))
+        self.assertEqual([t['question'] for t in store.recent('s1')], ['question 2', 'question 3', 'question 4'])
+        self.assertEqual([t['question'] for t in store.recent('s1', limit=1)], ['question 4'])
+        self.assertEqual(QAConversationMessage.objects.filter(session_id='s1').count(), 3)
+
+        QAConversationMessage.objects.filter(session_id='s1').update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(store.recent('s1'), [])
+        self.assertEqual(len(store.recent('s2')), 1)
+
+    def test_purge_deletes_only_expired_sessions(self):
+        store = ConversationStore(max_messages=5, ttl=60)
+        for n in range(3):
+            store.append('idle', self.turn(n))
+            store.append('active', self.turn(n))
+        old = timezone.now() - timedelta(minutes=2)
+        QAConversationMessage.objects.filter(session_id='idle').update(created_at=old)
+        QAConversationMessage.objects.filter(session_id='active', entry__question='question 0').update(created_at=old)
+
+        self.assertEqual(store.purge_expired(), 3)
+        self.assertFalse(QAConversationMessage.objects.filter(session_id='idle').exists())
+        self.assertEqual(len(store.recent('active')), 3)
+
+    def test_history_within_token_budget(self):
+        store = ConversationStore(max_messages=10)
+        store.append('s', self.turn(1, words=200))
+        store.append('s', self.turn(2, words=10))
+        store.append('s', self.turn(3, words=10))
+        self.assertEqual([t['question'] for t in store.within_budget('s', 40)], ['question 2', 'question 3'])
+        self.assertEqual(store.within_budget('s', 5), [])
+
+    def test_unreachable_redis_falls_back_to_database(self):
+        store = ConversationStore('redis://127.0.0.1:1/0', max_messages=5)
+        store.append('s', self.turn(1))
+        self.assertEqual(store.recent('s'), [self.turn(1)])
+        self.assertEqual(QAConversationMessage.objects.filter(session_id='s').count(), 1)
+
+    def test_conversation_context_uses_the_store(self):
+        with override_settings(CONVERSATION_REDIS_URL='', CONVERSATION_MAX_MESSAGES=20):
+            for n in range(8):
+                KnowledgeQAEnhancements.add_to_conversation('qa', f'question {n}', 'answer ' * 30)
+            self.assertEqual(len(KnowledgeQAEnhancements.get_conversation_history('qa')), 8)
+            self.assertEqual(KnowledgeQAEnhancements.build_conversation_context('qa').count('Q: '), 5)
+            budgeted = KnowledgeQAEnhancements.build_conversation_context('qa', max_tokens=150)
+            self.assertIn('Q: question 7', budgeted)
+            self.assertLess(budgeted.count('Q: '), 5)
+
+
+class ContextAssemblerTests(SimpleTestCase):
+
+    def workspace(self, n_projects=80, n_tasks=600, n_users=60):
+        rng = random.Random(3)
+        words = ['alpha', 'beta', 'gamma', 'delta', 'report', 'design', 'api', 'review', 'sprint', 'backend']
+        context = {
+            'all_projects': [
+                {'id': p, 'name': f'Project {p}', 'status': 'active', 'priority': 'medium', 'tasks_count': 8,
+                 'description': ' '.join(rng.choices(words, k=12))}
+                for p in range(n_projects)
+            ],
+            'tasks': [
+                {'id': t, 'title': ' '.join(rng.choices(words, k=4)), 'status': 'todo', 'priority': 'low',
+                 'assignee_username': f'user{t % n_users}', 'project_name': f'Project {t % n_projects}'}
+                for t in range(n_tasks)
+            ],
+            'user_assignments': [
+                {'username': f'user{u}', 'name': f'User {u}', 'total_tasks': 1,
+                 'projects': [{'project_name': 'Project 1', 'tasks': [{'title': 'alpha beta', 'status': 'todo'}]}]}
+                for u in range(n_users)
+            ],
+        }
+        context['tasks'][n_tasks * 2 // 3]['title'] = 'Migrate invoice exporter'
+        users = [{'id': u, 'username': f'user{u}', 'name': f'User {u}', 'role': 'developer', 'email': f'u{u}@x.io'}
+                 for u in range(n_users)]
+        return context, users
+
+    def test_large_workspace_fits_the_budget_and_keeps_relevant_snippets(self):
+        context, users = self.workspace()
+        assembled = ContextAssembler(budget=1500).assemble('Who owns the invoice exporter task?', context, users)
+        self.assertLessEqual(estimate_tokens(assembled), 1500)
+        self.assertIn('Migrate invoice exporter', assembled)
+        self.assertIn('most relevant', assembled)
+
+        users_context = ContextAssembler(budget=1500).assemble('What roles do my team members have?', context, users)
+        self.assertIn('USERS ADDED BY COMPANY USER (60 total', users_context)
+        self.assertGreater(users_context.count('Role: developer'), 10)
+        self.assertEqual(classify_question('Which tasks are overdue?'), 'tasks')
+
+    def test_small_context_is_kept_whole(self):
+        context, users = self.workspace(n_projects=2, n_tasks=3, n_users=1)
+        assembled = ContextAssembler(budget=3000).assemble('hello', context, users)
+        self.assertIn('All Your Projects (2 total):', assembled)
+        self.assertIn('Current Tasks:', assembled)
+        self.assertEqual(assembled.count('- ID: '), 2 + 3 + 1)
+        self.assertNotIn('most relevant', assembled)
+
+    def test_semantic_boosts_and_cache_per_version(self):
+        context, users = self.workspace(n_tasks=300)
+        context['project'] = {'id': 9000, 'name': 'Pinned'}
+        context['version'] = 1
+        assembler = ContextAssembler(budget=400)
+        boosted = assembler.assemble('status update', context, users, boosts={('task', 123): 1.0})
+        self.assertIn('Current Project (Selected):', boosted)
+        self.assertIn(f"- ID: 123, Title: {context['tasks'][123]['title']}", boosted)
+
+        question = 'Migrate invoice exporter status'
+        first = assembler.assemble(question, context, users)
+        self.assertIn('Migrate invoice exporter (Status: todo', first)
+        context['tasks'][200]['status'] = 'blocked'
+        self.assertEqual(assembler.assemble(question, context, users), first)
+        context['version'] = 2
+        self.assertIn('Migrate invoice exporter (Status: blocked', assembler.assemble(question, context, users))
+
+    def test_versioned_key_skips_the_context_digest(self):
+        context, users = self.workspace(n_projects=3, n_tasks=5, n_users=2)
+        context['version'] = '0.1,1.4,2.2'  # the Knowledge QA view: project ids and context versions
+        assembler = ContextAssembler(budget=3000)
+        snippets, _ = assembler.candidates(context, users)
+        with mock.patch('project_manager_agent.ai_agents.context_assembler.json.dumps', wraps=json.dumps) as dumps:
+            assembler._cache_key('hello', snippets, context, users, None)
+        self.assertNotIn([context, users], [call.args[0] for call in dumps.call_args_list])
+
+    def test_oversized_snippets_are_cut_to_fit(self):
+        context = {'knowledge_base': [
+            {'title': 'Refund policy', 'category': 'policies', 'content': 'refund rules ' * 400},
+            {'title': 'Shipping', 'category': 'faq', 'content': 'ships in two days'},
+        ]}
+        with self.assertLogs('project_manager_agent.ai_agents.context_assembler', 'INFO') as logs:
+            assembled = ContextAssembler(budget=200).assemble('refund policy and shipping details', context)
+        self.assertIn('- Refund policy (policies): refund rules', assembled)
+        self.assertIn(' …', assembled)
+        self.assertLessEqual(estimate_tokens(assembled), 200)
+        self.assertIn("{'knowledge': 1}", logs.output[0])
+
+
+class _PooledAgent:
+    constructed = 0
+
+    def __init__(self):
+        type(self).constructed += 1
+        self.request_cache = {}
+
+    def reset_request_state(self):
+        self.request_cache = {}
+
+
+class _BrokenAgent:
+    def __init__(self):
+        raise ValueError('GROQ_API_KEY not found')
+
+
+class AgentRegistryPoolTests(SimpleTestCase):
+    def setUp(self):
+        _PooledAgent.constructed = 0
+        AgentRegistry.register('_pooled', _PooledAgent)
+        AgentRegistry.clear_pool()
+
+    def tearDown(self):
+        AgentRegistry.clear_pool()
+        for name in ('_pooled', '_broken'):
+            AgentRegistry._agents.pop(name, None)
+
+    def test_instances_are_reused_across_requests_with_fresh_request_state(self):
+        agent = AgentRegistry.get_agent('_pooled')
+        agent.request_cache['project'] = 1
+        self.assertIs(AgentRegistry.get_agent('_pooled'), agent)
+        AgentRegistry.release_thread_agents()
+
+        again = AgentRegistry.get_agent('_pooled')
+        self.assertIs(again, agent)
+        self.assertEqual(again.request_cache, {})
+        self.assertEqual(_PooledAgent.constructed, 1)
+
+        health = AgentRegistry.health_check()['agents']['_pooled']
+        self.assertEqual((health['constructed'], health['reused'], health['leased']), (1, 2, 1))
+        self.assertTrue(health['healthy'])
+
+    def test_threads_never_share_an_instance(self):
+        import threading
+
+        mine = AgentRegistry.get_agent('_pooled')
+        seen = []
+        worker = threading.Thread(target=lambda: seen.append(AgentRegistry.get_agent('_pooled')))
+        worker.start()
+        worker.join()
+        self.assertIsNot(seen[0], mine)
+        self.assertEqual(AgentRegistry.health_check()['agents']['_pooled']['leased'], 2)
+
+    @override_settings(AGENT_POOL_MAX_IDLE=1)
+    def test_warm_up_idle_cap_and_failures(self):
+        AgentRegistry.register('_broken', _BrokenAgent)
+        results = AgentRegistry.warm_up(['_pooled', '_broken', '_missing'])
+        self.assertEqual(results['_pooled'], 'ok')
+        self.assertEqual(results['_missing'], 'not registered')
+        self.assertIn('GROQ_API_KEY', results['_broken'])
+
+        AgentRegistry.get_agent('_pooled')
+        self.assertEqual(_PooledAgent.constructed, 1)
+        AgentRegistry.release_thread_agents()
+        self.assertEqual(AgentRegistry.health_check()['agents']['_pooled']['idle'], 1)
+
+        health = AgentRegistry.health_check()
+        self.assertFalse(health['healthy'])
+        self.assertEqual(health['agents']['_broken']['failures'], 1)
+
+        AgentRegistry.register('_pooled', type('_ReplacedAgent', (_PooledAgent,), {}))
+        self.assertEqual(AgentRegistry.health_check()['agents']['_pooled']['idle'], 0)
+
+
+class _FakeCompletions:
+    def __init__(self, pieces, headers=None):
+        from types import SimpleNamespace
+
+        self.pieces = pieces
+        self.with_raw_response = SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(headers=headers or {}, parse=lambda: self.create(**kwargs))
+        )
+
+    def create(self, stream=False, **kwargs):
+        from types import SimpleNamespace
+
+        if stream:
+            return iter(
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+                for piece in self.pieces + [None]
+            )
+        message = SimpleNamespace(content=''.join(self.pieces))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@override_settings(GROQ_API_KEY='test')
+class KnowledgeQAStreamingTests(TestCase):
+    def agent(self, pieces, headers=None):
+        from types import SimpleNamespace
+
+        agent = KnowledgeQAAgent()
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(pieces, headers)))
+        return agent
+
+    @override_settings(GROQ_API_KEY='test-headers', GROQ_REC_API_KEY='')
+    def test_rate_limit_headers_reach_the_scheduler(self):
+        from core.llm_scheduler import get_llm_scheduler
+
+        headers = {'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '30s'}
+        self.agent(['Hi'], headers)._call_llm('hello')
+        self.assertGreater(get_llm_scheduler().stats()['keys']['...ders']['blocked_seconds'], 20)
+
+    def test_stream_yields_tokens_then_the_blocking_payload(self):
+        context = {'all_projects': [{'id': 1, 'name': 'Apollo', 'status': 'active', 'priority': 'high'}]}
+        pieces = ['Apollo ', 'is ', 'active.']
+        events = list(self.agent(pieces).stream_answer('How is Apollo?', context, [], session_id='stream-1'))
+
+        self.assertEqual(events[:-1], [('token', piece) for piece in pieces])
+        kind, result = events[-1]
+        self.assertEqual(kind, 'result')
+        self.assertEqual(result['answer'], 'Apollo is active.')
+
+        blocking = self.agent(pieces).answer_question('How is Apollo?', context, [], session_id='stream-2')
+        self.assertEqual(set(blocking), set(result))
+        self.assertEqual(blocking['answer'], result['answer'])
+
+        saved = QAConversationMessage.objects.get(session_id='stream-1')
+        self.assertEqual(saved.entry['answer'], 'Apollo is active.')
+
+    def test_sse_response_frames_tokens_and_final_payload(self):
+        from core.streaming import sse_response
+
+        response = sse_response(
+            self.agent(['Hi', ' there']).stream_answer('hello', {}, []),
+            lambda result: {'status': 'success', 'data': result},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        frames = body.strip().split('\n\n')
+        self.assertEqual(frames[0], 'event: token\ndata: {"text": "Hi"}')
+        self.assertEqual(frames[1], 'event: token\ndata: {"text": " there"}')
+        self.assertTrue(frames[2].startswith('event: done\ndata: {"status": "success"'))
+        self.assertEqual(len(frames), 3)
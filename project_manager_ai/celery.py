@@ -4,6 +4,7 @@ Handles all marketing automation tasks (replaces Windows Task Scheduler).
 """
 import os
 from celery import Celery
+from celery.signals import task_postrun, worker_process_init
 from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
@@ -58,3 +59,23 @@ except Exception as e:
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+@worker_process_init.connect
+def warm_up_agent_pool(**kwargs):
+    """
+    Build one instance of each AI agent in every pool process (AGENT_POOL_WARMUP).
+    Runs after the fork so each child gets its own API clients.
+    """
+    if not getattr(settings, 'AGENT_POOL_WARMUP', False):
+        return
+    import project_manager_agent.ai_agents  # noqa: F401 - registers the agents
+    from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+    AgentRegistry.warm_up()
+
+
+@task_postrun.connect
+def release_agent_pool(**kwargs):
+    """Return the agents a task leased from AgentRegistry to the idle pool."""
+    from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+    AgentRegistry.release_thread_agents()
@@ -417,6 +417,63 @@ LOGIN_URL = '/login/'
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
 GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.1-8b-instant')
 GROQ_REC_API_KEY = os.getenv('GROQ_REC_API_KEY', '')
+# Per-key Groq limits and retry policy for core/llm_scheduler.py (defaults: free tier, llama-3.1-8b-instant)
+GROQ_RPM_LIMIT = int(os.getenv('GROQ_RPM_LIMIT', '30'))  # requests per minute per API key
+GROQ_TPM_LIMIT = int(os.getenv('GROQ_TPM_LIMIT', '6000'))  # tokens per minute per API key
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))  # retries of rate-limited / 5xx / connection failures
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1.0'))  # seconds, doubled per retry (with jitter)
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '60'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '300'))  # longest a Celery / background call waits for a key with budget
+# Calls made while serving a web request fail fast instead of holding the worker
+LLM_REQUEST_QUEUE_TIMEOUT = float(os.getenv('LLM_REQUEST_QUEUE_TIMEOUT', '10'))  # seconds
+LLM_REQUEST_MAX_RETRIES = int(os.getenv('LLM_REQUEST_MAX_RETRIES', '1'))
+
+
+# --------------------
+# Document text extraction (core/document_extraction.py)
+# --------------------
+# PDF/DOCX extraction runs in a small process pool with a page limit and per-file timeout
+DOCUMENT_EXTRACTION_USE_PROCESS_POOL = os.getenv('DOCUMENT_EXTRACTION_USE_PROCESS_POOL', 'True').lower() == 'true'
+DOCUMENT_EXTRACTION_WORKERS = int(os.getenv('DOCUMENT_EXTRACTION_WORKERS', '2'))
+DOCUMENT_EXTRACTION_MAX_PAGES = int(os.getenv('DOCUMENT_EXTRACTION_MAX_PAGES', '50'))
+DOCUMENT_EXTRACTION_TIMEOUT = int(os.getenv('DOCUMENT_EXTRACTION_TIMEOUT', '30'))  # seconds per file
+DOCUMENT_EXTRACTION_MAX_BYTES = int(os.getenv('DOCUMENT_EXTRACTION_MAX_BYTES', str(20 * 1024 * 1024)))
+DOCUMENT_EXTRACTION_CACHE_SIZE = int(os.getenv('DOCUMENT_EXTRACTION_CACHE_SIZE', '256'))  # entries, keyed by content hash
+
+# spaCy NER (recruitment_agent/nlp.py) - loaded once per process on first use, NER components only
+SPACY_MODEL = os.getenv('SPACY_MODEL', 'en_core_web_sm')
+SPACY_PREWARM = os.getenv('SPACY_PREWARM', 'False').lower() == 'true'  # load when a Celery worker starts
+
+# Company holidays skipped by the Timeline/Gantt workday calendar (comma separated ISO dates)
+PROJECT_HOLIDAYS = [d.strip() for d in os.getenv('PROJECT_HOLIDAYS', '').split(',') if d.strip()]
+
+# Genetic schedule optimizer (project_manager_agent/ai_agents/schedule_optimizer.py)
+SCHEDULE_OPTIMIZER_ISLANDS = int(os.getenv('SCHEDULE_OPTIMIZER_ISLANDS', '1'))  # independent GA populations per run
+# Processes for the islands (0/1 = inline). Leave inline on web servers; set it on Celery workers to run islands in parallel
+SCHEDULE_OPTIMIZER_WORKERS = int(os.getenv('SCHEDULE_OPTIMIZER_WORKERS', '0'))
+# Processes for what-if scenario batches of 8+ (project_manager_agent/ai_agents/scenario_engine.py), 0/1 = inline; same advice
+SCENARIO_ENGINE_WORKERS = int(os.getenv('SCENARIO_ENGINE_WORKERS', '0'))
+
+# Compact Gantt snapshots per schedule version, diffed for delta refreshes (project_manager_agent/ai_agents/gantt_payload.py)
+GANTT_SNAPSHOT_TIMEOUT = int(os.getenv('GANTT_SNAPSHOT_TIMEOUT', str(60 * 60 * 24)))  # seconds in the cache
+GANTT_SNAPSHOTS_KEPT = int(os.getenv('GANTT_SNAPSHOTS_KEPT', '20'))  # versions kept in the database per project
+# Agent project context cache; entries are invalidated by version bumps, the TTL only bounds memory
+PM_CONTEXT_CACHE_TIMEOUT = int(os.getenv('PM_CONTEXT_CACHE_TIMEOUT', str(60 * 60 * 24)))  # seconds
+# Frontline knowledge base BM25 index (segment + change log), see core/Fronline_agent/knowledge_index.py
+FRONTLINE_KB_INDEX_DIR = os.getenv('FRONTLINE_KB_INDEX_DIR', str(BASE_DIR / 'search_index'))
+# Embedding vector store for semantic retrieval (core/vector_store.py); 'hashing', 'openai' or a dotted class path
+VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', str(BASE_DIR / 'vector_store'))
+VECTOR_STORE_EMBEDDER = os.getenv('VECTOR_STORE_EMBEDDER', 'hashing')
+VECTOR_STORE_BATCH_SIZE = int(os.getenv('VECTOR_STORE_BATCH_SIZE', '64'))  # texts per embedding call
+# Knowledge QA conversation memory (project_manager_agent/ai_agents/conversation_store.py); Redis lists, database when unset
+CONVERSATION_REDIS_URL = os.getenv('CONVERSATION_REDIS_URL', '')  # e.g. redis://localhost:6379/1
+CONVERSATION_MAX_MESSAGES = int(os.getenv('CONVERSATION_MAX_MESSAGES', '20'))  # turns kept per session
+CONVERSATION_TTL = int(os.getenv('CONVERSATION_TTL', '3600'))  # seconds after the last turn
+# Token budget for the project/task/user context of a Knowledge QA prompt (project_manager_agent/ai_agents/context_assembler.py)
+QA_CONTEXT_TOKEN_BUDGET = int(os.getenv('QA_CONTEXT_TOKEN_BUDGET', '3000'))
+# Idle instances AgentRegistry keeps per agent for reuse (project_manager_agent/ai_agents/agents_registry.py)
+AGENT_POOL_MAX_IDLE = int(os.getenv('AGENT_POOL_MAX_IDLE', '4'))
+AGENT_POOL_WARMUP = os.getenv('AGENT_POOL_WARMUP', 'False').lower() == 'true'  # build one of each agent at WSGI / Celery worker start
 
 
 # --------------------
@@ -631,6 +688,29 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 86400.0,  # Daily (86400 seconds = 24 hours)
         'options': {'expires': 172800}  # Expires after 2 days
     },
+    
+    # Rebuild recent Frontline ticket rollups - runs daily
+    # Signals keep them current; this catches writes that bypass signals (bulk_update, raw SQL)
+    'rebuild-ticket-rollups': {
+        'task': 'Frontline_agent.tasks.rebuild_ticket_rollups_task',
+        'schedule': 86400.0,  # Daily
+        'options': {'expires': 172800}
+    },
+    
+    # Embed new/changed content into the vector store - runs every 15 minutes
+    # Semantic search only reads the store; this is how new projects, tasks and articles get indexed
+    'refresh-vector-index': {
+        'task': 'core.tasks.refresh_vector_index_task',
+        'schedule': 900.0,  # Every 15 minutes
+        'options': {'expires': 600}
+    },
+    
+    # Delete database-stored Knowledge QA conversation turns past CONVERSATION_TTL - runs every hour
+    'purge-conversation-messages': {
+        'task': 'core.tasks.purge_conversation_messages_task',
+        'schedule': 3600.0,  # Every hour
+        'options': {'expires': 1800}
+    },
 }
 
 # Use django-celery-beat for database-backed periodic tasks (optional, more flexible)
@@ -654,6 +734,9 @@ print("  - Retry failed: Every 15 minutes")
 print("  - Auto-start campaigns: Every hour")
 print("  - Monitor campaigns & notifications: Every 30 minutes (FULLY AUTOMATED)")
 print("  - Auto-pause campaigns: Daily")
+print("  - Rebuild ticket analytics rollups: Daily")
+print("  - Refresh vector index: Every 15 minutes")
+print("  - Purge expired QA conversations: Every hour")
 print("="*60 + "\n")
 
 # --------------------
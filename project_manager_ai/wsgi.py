@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_manager_ai.settings')
 
 application = get_wsgi_application()
+
+# Build one instance of each AI agent before the first request (AGENT_POOL_WARMUP)
+from django.conf import settings
+
+if getattr(settings, 'AGENT_POOL_WARMUP', False):
+    import project_manager_agent.ai_agents  # noqa: F401 - registers the agents
+    from project_manager_agent.ai_agents.agents_registry import AgentRegistry
+
+    AgentRegistry.warm_up()
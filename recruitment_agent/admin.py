@@ -25,16 +25,19 @@ class JobDescriptionAdmin(admin.ModelAdmin):
 
 @admin.register(CVRecord)
 class CVRecordAdmin(admin.ModelAdmin):
-    list_display = ['id', 'file_name', 'role_fit_score', 'rank', 'qualification_decision', 'qualification_confidence', 'qualification_priority', 'created_at']
+    list_display = ['id', 'file_name', 'candidate_name', 'candidate_email', 'role_fit_score', 'rank', 'qualification_decision', 'qualification_confidence', 'qualification_priority', 'created_at']
     list_filter = ['qualification_decision', 'qualification_priority', 'created_at']
-    search_fields = ['file_name']
-    readonly_fields = ['created_at']
+    search_fields = ['file_name', 'candidate_name', 'candidate_email']
+    readonly_fields = ['created_at', 'candidate_name', 'candidate_email', 'top_skills', 'total_experience_years']
     ordering = ['-created_at']
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('file_name', 'created_at')
         }),
+        ('Summary (derived from JSON)', {
+            'fields': ('candidate_name', 'candidate_email', 'top_skills', 'total_experience_years')
+        }),
         ('Parsed Data', {
             'fields': ('parsed_json',)
         }),
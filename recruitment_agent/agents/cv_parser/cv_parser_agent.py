@@ -2,23 +2,10 @@ import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
-import pdfplumber
-from docx import Document
-
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-except (ImportError, TypeError, Exception):
-    # Catch all exceptions during spacy import to handle compatibility issues
-    # (e.g., pydantic compatibility issues with Python 3.12)
-    SPACY_AVAILABLE = False
-    spacy = None
-    # Note: To use spaCy NER, install spaCy and download the model:
-    # pip install spacy
-    # python -m spacy download en_core_web_sm
-
+from core.document_extraction import extract_text
 from recruitment_agent.core import GroqClient, GroqClientError
 from recruitment_agent.log_service import LogService
+from recruitment_agent.nlp import get_ner_pipeline
 from recruitment_agent.agents.cv_parser.prompts import CV_PARSING_SYSTEM_PROMPT
 
 
@@ -34,16 +21,7 @@ class CVParserAgent:
     ) -> None:
         self.groq_client = groq_client or GroqClient()
         self.log_service = log_service or LogService()
-        self._nlp = None
-        if SPACY_AVAILABLE and spacy is not None:
-            try:
-                # Try to load spaCy model, fallback to regex if not available
-                self._nlp = spacy.load("en_core_web_sm")
-                self._log_step("spacy_model_loaded", {"model": "en_core_web_sm"})
-            except (OSError, Exception):
-                # Model not installed or other error, will use regex fallback
-                self._log_step("spacy_model_not_found", {"fallback": "regex"})
-                self._nlp = None
+        # spaCy NER is loaded lazily, once per process (see recruitment_agent.nlp)
 
     def parse_file(self, filepath: str) -> Dict[str, Any]:
         """
@@ -116,31 +94,46 @@ class CVParserAgent:
         self._log_step("batch_parse_complete", {"count": len(results)})
         return results
 
+    def parse_upload(self, uploaded_file: Any, file_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extract text from an uploaded file in memory (no temp file) and parse it.
+        """
+        name = file_name or getattr(uploaded_file, "name", "") or ""
+        self._log_step("file_detected", {"path": name, "extension": Path(name).suffix.lower()})
+        try:
+            extraction = extract_text(uploaded_file, filename=name)
+        except Exception as exc:  # pragma: no cover - propagated
+            self._log_error("text_extraction_failed", exc, {"path": name})
+            raise
+        self._log_extraction(name, extraction)
+        return self.parse_text(extraction["text"])
+
     def _extract_text_from_pdf(self, path: Path) -> str:
         """
-        Extract text from a PDF using pdfplumber.
+        Extract text from a PDF (shared extraction service: process pool, page limit, cache).
         """
         self._log_step("pdf_extraction_started", {"path": str(path)})
-        texts: List[str] = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                if page_text:
-                    texts.append(page_text)
-        combined = "\n".join(texts)
-        self._log_step("pdf_extraction_complete", {"length": len(combined)})
-        return combined
+        extraction = extract_text(path)
+        self._log_extraction(str(path), extraction)
+        return extraction["text"]
 
     def _extract_text_from_docx(self, path: Path) -> str:
         """
-        Extract text from a DOCX using python-docx.
+        Extract text from a DOCX (shared extraction service).
         """
         self._log_step("docx_extraction_started", {"path": str(path)})
-        doc = Document(path)
-        paragraphs = [para.text for para in doc.paragraphs if para.text]
-        combined = "\n".join(paragraphs)
-        self._log_step("docx_extraction_complete", {"length": len(combined)})
-        return combined
+        extraction = extract_text(path)
+        self._log_extraction(str(path), extraction)
+        return extraction["text"]
+
+    def _log_extraction(self, name: str, extraction: Dict[str, Any]) -> None:
+        self._log_step("text_extraction_complete", {
+            "path": name,
+            "length": len(extraction["text"]),
+            "pages": extraction["pages_extracted"],
+            "truncated": extraction["truncated"],
+            "cached": extraction["cached"],
+        })
 
     def _call_groq(self, cleaned_text: str) -> Dict[str, Any]:
         """
@@ -307,10 +300,11 @@ class CVParserAgent:
             self._log_step("email_extracted_regex", {"email": email, "total_found": len(regex_emails)})
             return email
         
-        # If regex didn't find anything, try spaCy NER
-        if self._nlp is not None:
+        # If regex didn't find anything, try spaCy NER (shared pipeline, loaded on first use)
+        nlp = get_ner_pipeline()
+        if nlp is not None:
             try:
-                doc = self._nlp(text)
+                doc = nlp(text)
                 # Look for entities that might be emails
                 for ent in doc.ents:
                     # Check if entity text matches email pattern
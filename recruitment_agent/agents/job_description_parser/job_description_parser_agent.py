@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from core.document_extraction import extract_text
 from recruitment_agent.core import GroqClient, GroqClientError
 from recruitment_agent.log_service import LogService
 from recruitment_agent.agents.job_description_parser.prompts import JOB_DESCRIPTION_PARSING_SYSTEM_PROMPT
@@ -96,29 +97,49 @@ class JobDescriptionParserAgent:
         parsed = self.parse_text(job_description)
         return parsed.get("keywords", [])
 
+    def parse_upload(self, uploaded_file: Any, file_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse job description from an uploaded file in memory (no temp file).
+        
+        Args:
+            uploaded_file: File object (e.g. Django UploadedFile) or bytes
+            file_name: File name, used for the file type when uploaded_file has none
+            
+        Returns:
+            Dictionary with extracted job keywords and requirements
+        """
+        name = file_name or getattr(uploaded_file, "name", "") or ""
+        self._log_step("file_detected", {"path": name, "extension": Path(name).suffix.lower()})
+        try:
+            extraction = extract_text(uploaded_file, filename=name)
+        except Exception as exc:
+            self._log_error("text_extraction_failed", exc, {"path": name})
+            raise
+        self._log_extraction(name, extraction)
+        return self.parse_text(extraction["text"])
+
     def _extract_text_from_pdf(self, path: Path) -> str:
-        """Extract text from PDF file."""
-        import pdfplumber
+        """Extract text from PDF file (shared extraction service)."""
         self._log_step("pdf_extraction_started", {"path": str(path)})
-        texts: List[str] = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                if page_text:
-                    texts.append(page_text)
-        combined = "\n".join(texts)
-        self._log_step("pdf_extraction_complete", {"length": len(combined)})
-        return combined
+        extraction = extract_text(path)
+        self._log_extraction(str(path), extraction)
+        return extraction["text"]
 
     def _extract_text_from_docx(self, path: Path) -> str:
-        """Extract text from DOCX file."""
-        from docx import Document
+        """Extract text from DOCX file (shared extraction service)."""
         self._log_step("docx_extraction_started", {"path": str(path)})
-        doc = Document(path)
-        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-        combined = "\n".join(paragraphs)
-        self._log_step("docx_extraction_complete", {"length": len(combined)})
-        return combined
+        extraction = extract_text(path)
+        self._log_extraction(str(path), extraction)
+        return extraction["text"]
+
+    def _log_extraction(self, name: str, extraction: Dict[str, Any]) -> None:
+        self._log_step("text_extraction_complete", {
+            "path": name,
+            "length": len(extraction["text"]),
+            "pages": extraction["pages_extracted"],
+            "truncated": extraction["truncated"],
+            "cached": extraction["cached"],
+        })
 
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text."""
@@ -3,6 +3,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from recruitment_agent.log_service import LogService
 from recruitment_agent.skill_equivalences import skill_matches_keyword, is_exact_match, is_related_match
+from recruitment_agent.skill_matrix import SkillMatchMatrix
 
 
 class LeadQualificationAgent:
@@ -32,7 +33,29 @@ class LeadQualificationAgent:
         self._log_step("qualification_start", {"has_keywords": bool(job_keywords), "has_enriched": bool(enriched_data)})
 
         normalized_keywords = self._normalize_keywords(job_keywords)
+        all_skills, inferred_skills, stack_related_skills, all_skills_for_matching = self._collect_skills(
+            parsed_cv, candidate_insights, enriched_data
+        )
         
+        # Match against job keywords using inference-aware matching
+        # Pass all skills as explicit_skills (stack-related are treated as additional skills)
+        exact_matched, related_matched, missing = self._match_with_inference(all_skills_for_matching, [], normalized_keywords)
+
+        return self._evaluate(
+            parsed_cv, candidate_insights, job_keywords, enriched_data, interview_threshold, hold_threshold,
+            all_skills, inferred_skills, stack_related_skills, exact_matched, related_matched, missing,
+        )
+
+    def _collect_skills(
+        self,
+        parsed_cv: Dict[str, Any],
+        candidate_insights: Dict[str, Any],
+        enriched_data: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """
+        Gather explicit, inferred and stack-related skills for one candidate.
+        Returns: (all_skills, inferred_skills, stack_related_skills, all_skills_for_matching)
+        """
         # Use enriched normalized_skills if available, otherwise extract from CV
         if enriched_data and enriched_data.get("normalized_skills"):
             all_skills = enriched_data.get("normalized_skills", [])
@@ -52,11 +75,24 @@ class LeadQualificationAgent:
         
         # Combine all skills for matching (explicit + inferred + stack-related)
         all_skills_for_matching = list(set(all_skills + inferred_skills + stack_related_skills))
-        
-        # Match against job keywords using inference-aware matching
-        # Pass all skills as explicit_skills (stack-related are treated as additional skills)
-        exact_matched, related_matched, missing = self._match_with_inference(all_skills_for_matching, [], normalized_keywords)
-        
+        return all_skills, inferred_skills, stack_related_skills, all_skills_for_matching
+
+    def _evaluate(
+        self,
+        parsed_cv: Dict[str, Any],
+        candidate_insights: Dict[str, Any],
+        job_keywords: Optional[List[str]],
+        enriched_data: Optional[Dict[str, Any]],
+        interview_threshold: Optional[int],
+        hold_threshold: Optional[int],
+        all_skills: List[str],
+        inferred_skills: List[str],
+        stack_related_skills: List[str],
+        exact_matched: List[str],
+        related_matched: List[str],
+        missing: List[str],
+    ) -> Dict[str, Any]:
+        """Decision, priority and reasoning for one candidate once keyword matching is done."""
         # Combine exact and related for backward compatibility
         matched = exact_matched + related_matched
         
@@ -102,6 +138,38 @@ class LeadQualificationAgent:
         self._log_step("qualification_complete", {"decision": decision, "priority": priority, "confidence": confidence})
         return result
 
+    def qualify_batch(
+        self,
+        cvs: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        job_keywords: Optional[List[str]] = None,
+        enriched_list: Optional[List[Optional[Dict[str, Any]]]] = None,
+        interview_threshold: Optional[int] = None,
+        hold_threshold: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Qualify many candidates against the same job keywords; results are in input order.
+        Keyword matching for the whole batch is done at once with SkillMatchMatrix.
+        """
+        enriched_list = enriched_list or [None] * len(cvs)
+        collected = [
+            self._collect_skills(parsed_cv, insights, enriched_list[idx])
+            for idx, (parsed_cv, insights) in enumerate(cvs)
+        ]
+
+        # Match every candidate against the job keywords in one vectorized pass
+        matrix = SkillMatchMatrix(self._normalize_keywords(job_keywords))
+        codes = matrix.match([skills[3] for skills in collected])
+
+        results: List[Dict[str, Any]] = []
+        for idx, (parsed_cv, insights) in enumerate(cvs):
+            all_skills, inferred_skills, stack_related_skills, _ = collected[idx]
+            exact_matched, related_matched, missing = matrix.split(codes[idx])
+            results.append(self._evaluate(
+                parsed_cv, insights, job_keywords, enriched_list[idx], interview_threshold, hold_threshold,
+                all_skills, inferred_skills, stack_related_skills, exact_matched, related_matched, missing,
+            ))
+        return results
+
     def qualify_multiple(
         self,
         cvs: List[Tuple[Dict[str, Any], Dict[str, Any]]],
@@ -109,9 +177,7 @@ class LeadQualificationAgent:
         top_n: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         self._log_step("batch_qualification_start", {"count": len(cvs), "has_keywords": bool(job_keywords), "top_n": top_n})
-        results: List[Dict[str, Any]] = []
-        for parsed_cv, insights in cvs:
-            results.append(self.qualify(parsed_cv, insights, job_keywords))
+        results = self.qualify_batch(cvs, job_keywords)
 
         # Rank by SKILLS MATCH - job requirements se best match wale top par
         def skills_based_sort_key(r: Dict[str, Any]) -> Tuple[float, int, int, int]:
@@ -2,12 +2,13 @@ import json
 import math
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from recruitment_agent.core import GroqClient, GroqClientError
 from recruitment_agent.log_service import LogService
 from recruitment_agent.agents.summarization.prompts import SUMMARIZATION_SYSTEM_PROMPT
-from recruitment_agent.skill_equivalences import skill_matches_keyword, get_all_match_terms, is_exact_match, is_related_match
+from recruitment_agent.skill_equivalences import skill_matches_keyword, is_exact_match, is_related_match
+from recruitment_agent.skill_matrix import SkillMatchMatrix, match_terms, skills_match_scores
 
 
 class SummarizationAgent:
@@ -533,6 +534,55 @@ class SummarizationAgent:
         self._log_step("batch_summarize_complete", {"count": len(results_sorted)})
         return results_sorted
 
+    def score_fit_batch(
+        self,
+        cvs: List[Dict[str, Any]],
+        job_keywords: Optional[List[str]] = None,
+        total_experience_years: Optional[List[Optional[float]]] = None,
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Deterministic role_fit_score for many parsed CVs against one job (no LLM).
+        Skill matching for the whole batch is done at once with SkillMatchMatrix; the
+        remaining components reuse _compute_fit_score, so scores equal the
+        rule-based per-candidate path.
+        total_experience_years: optional precomputed years per CV (e.g. from stored insights).
+        Returns [(score, metrics), ...] in input order.
+        """
+        self._log_step("batch_fit_score_start", {"count": len(cvs), "has_keywords": bool(job_keywords)})
+        all_skills = [cv.get("skills") or [] for cv in cvs]
+
+        skill_rows: List[Optional[Dict[str, Any]]] = [None] * len(cvs)
+        matrix = SkillMatchMatrix(job_keywords)
+        if matrix.keyword_count:
+            codes = matrix.match(all_skills)
+            batch_metrics = skills_match_scores(*matrix.counts(codes))
+            skill_rows = [
+                {name: values[idx] for name, values in batch_metrics.items()}
+                for idx in range(len(cvs))
+            ]
+
+        results: List[Tuple[int, Dict[str, Any]]] = []
+        for idx, cv in enumerate(cvs):
+            if total_experience_years is not None:
+                total_exp = total_experience_years[idx]
+            else:
+                total_exp = self._estimate_total_experience_years(cv.get("experience"))
+            results.append(
+                self._compute_fit_score(
+                    all_skills[idx],
+                    self._extract_achievements(cv),
+                    self._highest_degree(cv.get("education")),
+                    total_exp,
+                    job_keywords,
+                    cv.get("experience"),
+                    cv.get("certifications"),
+                    cv.get("education"),
+                    skill_match=skill_rows[idx],
+                )
+            )
+        self._log_step("batch_fit_score_complete", {"count": len(results)})
+        return results
+
     def _llm_summarize(self, parsed_cv: Dict[str, Any], job_keywords: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Use LLM to generate intelligent summarization and insights.
@@ -1087,6 +1137,7 @@ Return ONLY JSON, no other text."""
         experience: Any,
         certifications: Any,
         education: Any = None,
+        skill_match: Optional[Dict[str, Any]] = None,
     ) -> tuple[int, Dict[str, Any]]:
         """
         IMPROVED role_fit_score (0-100): More accurate scoring algorithm with additional metrics.
@@ -1101,6 +1152,9 @@ Return ONLY JSON, no other text."""
         
         Formula: Role Fit Score = Skills Match + Exp Relevance + Exp Years + Education + Certifications + Job Stability
         
+        skill_match: precomputed skills-match metrics for this candidate (one row of
+        skill_matrix.skills_match_scores); skips the per-keyword matching loop when given.
+        
         Returns: (score, metrics_dict) where metrics_dict contains breakdown of each component
         """
         score = 0.0
@@ -1118,7 +1172,18 @@ Return ONLY JSON, no other text."""
         job_kw_set = set(job_kw)
         skills_lower = [s.lower() for s in key_skills]
 
-        if job_kw_set:
+        if job_kw_set and skill_match is not None:
+            # PRIMARY: Skills Match (70 points max) - already computed by the batch scorer
+            skills_score = int(skill_match["skills_match_score"])
+            score += skills_score
+            metrics["skills_match_score"] = skills_score
+            metrics["exact_matches_count"] = int(skill_match["exact_matches_count"])
+            metrics["related_matches_count"] = int(skill_match["related_matches_count"])
+            metrics["missing_matches_count"] = int(skill_match["missing_matches_count"])
+            metrics["missing_penalty"] = float(skill_match["missing_penalty"])
+            metrics["weighted_matches"] = float(skill_match["weighted_matches"])
+            metrics["weighted_match_ratio"] = float(skill_match["weighted_match_ratio"])
+        elif job_kw_set:
             # PRIMARY: Skills Match (70 points max) - 70% weight
             exact_matches = 0
             related_matches = 0
@@ -1172,7 +1237,8 @@ Return ONLY JSON, no other text."""
             metrics["missing_penalty"] = missing_matches * 0.2  # Penalty per missing skill
             metrics["weighted_matches"] = weighted_matches
             metrics["weighted_match_ratio"] = weighted_match_ratio
-            
+
+        if job_kw_set:
             # SECONDARY: Experience Relevance (10 points max) - 10% weight
             exp_keywords_found = set()
             if experience and isinstance(experience, list):
@@ -1196,8 +1262,8 @@ Return ONLY JSON, no other text."""
                     if not kw_lower:
                         continue
                     
-                    # Get all match terms for this keyword (includes equivalents)
-                    terms = get_all_match_terms(kw_lower)
+                    # Get all match terms for this keyword (includes equivalents, cached per keyword)
+                    terms = set(match_terms(kw_lower))
                     # Also add the keyword itself
                     terms.add(kw_lower)
                     
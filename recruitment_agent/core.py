@@ -4,15 +4,19 @@ from typing import Any, Dict, Optional
 
 import requests
 
+from core.llm_scheduler import LLMRateLimitError, estimate_request_tokens, get_llm_scheduler, groq_key_pool
+
 
 class GroqClientError(Exception):
     """Custom exception for Groq client failures."""
     
-    def __init__(self, message: str, is_auth_error: bool = False, is_rate_limit: bool = False, is_request_too_large: bool = False):
+    def __init__(self, message: str, is_auth_error: bool = False, is_rate_limit: bool = False, is_request_too_large: bool = False,
+                 retry_after: Optional[float] = None):
         super().__init__(message)
         self.is_auth_error = is_auth_error  # API key expired/invalid
         self.is_rate_limit = is_rate_limit  # Rate limit exceeded
         self.is_request_too_large = is_request_too_large  # Request exceeds token limit (413)
+        self.retry_after = retry_after  # Seconds until the rate limit resets, when known
 
 
 class GroqClient:
@@ -20,6 +24,11 @@ class GroqClient:
     Thin wrapper around Groq's chat completion API for structured JSON extraction.
     Uses GROQ_REC_API_KEY from environment for recruitment agent.
     Handles API key expiration and rate limits gracefully.
+
+    Requests go through the LLM scheduler (core/llm_scheduler.py), which keeps
+    them within the per-key rate limits, may send them with GROQ_API_KEY when
+    this key is out of budget, and retries rate-limited and transient failures
+    before the errors below are raised.
     """
 
     def __init__(
@@ -42,6 +51,33 @@ class GroqClient:
         )
         self.timeout = timeout
 
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """POST a chat completion through the LLM scheduler; HTTP errors of the last attempt are raised as is."""
+        scheduler = get_llm_scheduler()
+
+        def request(api_key: str) -> requests.Response:
+            response = requests.post(
+                self.base_url,
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                json=payload,
+                timeout=self.timeout,
+            )
+            scheduler.observe(api_key, response.headers)
+            response.raise_for_status()
+            return response
+
+        try:
+            return scheduler.run(
+                request,
+                groq_key_pool(self.api_key),
+                estimate_request_tokens(payload["messages"], payload.get("max_tokens")),
+                actual_tokens=lambda response: response.json().get("usage", {}).get("total_tokens"),
+            )
+        except LLMRateLimitError as exc:
+            raise GroqClientError(
+                f"Groq API rate limit exceeded. {exc}", is_rate_limit=True, retry_after=exc.retry_after
+            ) from exc
+
     def send_prompt(self, system_prompt: str, text: str) -> Dict[str, Any]:
         """
         Send a prompt and text to Groq and return parsed JSON.
@@ -57,16 +93,8 @@ class GroqClient:
             "response_format": {"type": "json_object"},
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=self.timeout
-            )
-            response.raise_for_status()
+            response = self._post(payload)
         except requests.HTTPError as exc:
             # Check for authentication errors (401, 403)
             if exc.response.status_code in (401, 403):
@@ -99,7 +127,8 @@ class GroqClient:
                 
                 raise GroqClientError(
                     error_msg,
-                    is_rate_limit=True
+                    is_rate_limit=True,
+                    retry_after=retry_after
                 ) from exc
             
             # Check for request too large errors (413)
@@ -148,15 +177,8 @@ class GroqClient:
             ],
             "temperature": 0,
         }
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=self.timeout
-            )
-            response.raise_for_status()
+            response = self._post(payload)
         except requests.HTTPError as exc:
             detail = ""
             try:
@@ -42,6 +42,7 @@ class DjangoRepository:
                 insights_json=json.dumps(insights, ensure_ascii=False),
                 role_fit_score=insights.get("role_fit_score"),
                 rank=rank,
+                **CVRecord.summary_fields(insights=insights),
             )
         except Exception:
             pass
@@ -81,7 +82,7 @@ class DjangoRepository:
             pass
 
     def fetch_recent(self, limit: int = 20) -> list[Dict[str, Any]]:
-        """Fetch recent CV records"""
+        """Fetch recent CV records (full blobs - use CVRecord hot fields for listings)"""
         records = CVRecord.objects.all().order_by('-created_at')[:limit]
         results = []
         for record in records:
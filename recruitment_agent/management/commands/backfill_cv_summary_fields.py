@@ -0,0 +1,55 @@
+"""
+Management command to backfill CVRecord hot-field columns.
+
+Extracts candidate name/email, top skills and total experience years from the
+stored parsed/insights JSON into the indexed CVRecord columns used by the CV
+list endpoints. New records fill these at write time; this is for existing rows.
+
+Usage:
+    python manage.py backfill_cv_summary_fields
+    python manage.py backfill_cv_summary_fields --only-missing --chunk-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+from recruitment_agent.models import CVRecord
+
+SUMMARY_FIELDS = ['candidate_name', 'candidate_email', 'top_skills', 'total_experience_years']
+
+
+class Command(BaseCommand):
+    help = 'Backfill CVRecord candidate_name/email, top_skills and total_experience_years from the JSON blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of CV records loaded and updated per chunk (default: 500)',
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only process records without a candidate_name yet',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        queryset = CVRecord.objects.order_by('id')
+        if options['only_missing']:
+            queryset = queryset.filter(candidate_name__isnull=True)
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Only the two blobs the fields come from are loaded
+            records = list(queryset.filter(id__gt=last_id).only('id', 'parsed_json', 'insights_json')[:chunk_size])
+            if not records:
+                break
+            last_id = records[-1].id
+            for record in records:
+                record.refresh_summary_fields()
+            CVRecord.objects.bulk_update(records, SUMMARY_FIELDS, batch_size=chunk_size)
+            updated += len(records)
+            self.stdout.write(f'Processed {updated} CV records...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled summary fields for {updated} CV records'))
@@ -0,0 +1,57 @@
+"""
+Management command to re-rank stored CVs against a job description.
+
+Scores the existing CV pool of the job's owner against the job using the stored
+parsed/insights/enriched JSON (deterministic scoring, no LLM calls) and stores
+the results in CVJobMatch.
+
+Usage:
+    python manage.py rematch_cvs --job-id 12
+    python manage.py rematch_cvs --all-active
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from recruitment_agent.models import JobDescription
+from recruitment_agent.rematch import DEFAULT_CHUNK_SIZE, rematch_job_description
+
+
+class Command(BaseCommand):
+    help = 'Score stored CVs against a job description without re-parsing (no LLM calls)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job-id',
+            type=int,
+            help='Job description ID to re-match the CV pool against',
+        )
+        parser.add_argument(
+            '--all-active',
+            action='store_true',
+            help='Re-match every active job description',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Number of CV records loaded per chunk (default: {DEFAULT_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        job_id = options['job_id']
+        if not job_id and not options['all_active']:
+            raise CommandError('Pass --job-id or --all-active')
+
+        if job_id:
+            job_ids = [job_id]
+            if not JobDescription.objects.filter(id=job_id).exists():
+                raise CommandError(f'Job description #{job_id} not found')
+        else:
+            job_ids = list(JobDescription.objects.filter(is_active=True).values_list('id', flat=True))
+
+        for jid in job_ids:
+            stats = rematch_job_description(jid, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Job #{jid}: scored {stats['scored']} CVs "
+                f"({stats['created']} new, {stats['updated']} updated, {stats['skipped']} skipped) "
+                f"in {stats['elapsed_seconds']}s"
+            ))
@@ -0,0 +1,47 @@
+# Generated manually for CVJobMatch (offline re-match of stored CVs against a job)
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment_agent', '0022_add_ppp_table_prefix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVJobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role_fit_score', models.IntegerField(blank=True, help_text='Rule-based role fit score 0-100 for this job', null=True)),
+                ('score_breakdown_json', models.TextField(blank=True, help_text='Fit score component breakdown (JSON)', null=True)),
+                ('qualification_json', models.TextField(blank=True, help_text='Qualification results from LeadQualificationAgent (JSON)', null=True)),
+                ('qualification_decision', models.CharField(blank=True, help_text='INTERVIEW/HOLD/REJECT', max_length=32, null=True)),
+                ('qualification_confidence', models.IntegerField(blank=True, help_text='Confidence score 0-100', null=True)),
+                ('qualification_priority', models.CharField(blank=True, help_text='HIGH/MEDIUM/LOW', max_length=16, null=True)),
+                ('match_percentage', models.IntegerField(blank=True, help_text='Share of job keywords matched (0-100)', null=True)),
+                ('rank', models.IntegerField(blank=True, help_text="Ranking position within this job's CV pool", null=True)),
+                ('narrative_json', models.TextField(blank=True, help_text='LLM summary/reasoning for this CV and job (JSON)', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cv_record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_matches', to='recruitment_agent.cvrecord')),
+                ('job_description', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cv_matches', to='recruitment_agent.jobdescription')),
+            ],
+            options={
+                'verbose_name': 'CV Job Match',
+                'verbose_name_plural': 'CV Job Matches',
+                'db_table': 'ppp_recruitment_agent_cvjobmatch',
+                'ordering': ['rank', '-role_fit_score'],
+                'indexes': [
+                    models.Index(fields=['job_description', 'rank'], name='ppp_cvmatch_job_rank_idx'),
+                    models.Index(fields=['job_description', 'qualification_decision'], name='ppp_cvmatch_job_decision_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('cv_record', 'job_description'), name='unique_cv_job_match'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated manually for CVRecord hot-field columns (list/filter/sort without JSON blobs)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment_agent', '0023_cvjobmatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvrecord',
+            name='candidate_name',
+            field=models.CharField(blank=True, db_index=True, help_text='Candidate name from parsed_json', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='cvrecord',
+            name='candidate_email',
+            field=models.CharField(blank=True, db_index=True, help_text='Candidate email from parsed_json', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='cvrecord',
+            name='top_skills',
+            field=models.CharField(blank=True, help_text='Top skills, comma separated (key_skills from insights, else parsed skills)', max_length=1000, null=True),
+        ),
+        migrations.AddField(
+            model_name='cvrecord',
+            name='total_experience_years',
+            field=models.FloatField(blank=True, help_text='Total experience years from insights_json', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cvrecord',
+            index=models.Index(fields=['job_description', 'qualification_decision'], name='ppp_cvrecord_job_decision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cvrecord',
+            index=models.Index(fields=['job_description', '-rank', '-created_at'], name='ppp_cvrecord_job_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cvrecord',
+            index=models.Index(fields=['role_fit_score'], name='ppp_cvrecord_fit_score_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated manually for the CVRecord owner column (re-match pool includes CVs uploaded without a job)
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_company_user(apps, schema_editor):
+    CVRecord = apps.get_model('recruitment_agent', 'CVRecord')
+    JobDescription = apps.get_model('recruitment_agent', 'JobDescription')
+    owned_jobs = JobDescription.objects.filter(company_user__isnull=False).values_list('id', 'company_user_id')
+    for job_id, company_user_id in owned_jobs.iterator():
+        CVRecord.objects.filter(job_description_id=job_id, company_user__isnull=True).update(company_user_id=company_user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_context_versions'),
+        ('recruitment_agent', '0024_cvrecord_summary_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvrecord',
+            name='company_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cv_records', to='core.companyuser'),
+        ),
+        migrations.RunPython(backfill_company_user, migrations.RunPython.noop),
+    ]
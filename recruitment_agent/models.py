@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -226,16 +228,144 @@ class CVRecord(models.Model):
     # Link to job description (optional)
     job_description = models.ForeignKey(JobDescription, on_delete=models.SET_NULL, null=True, blank=True, related_name='cv_records')
     
+    # Company user who uploaded the CV (set even when no job description was selected)
+    company_user = models.ForeignKey('core.CompanyUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='cv_records')
+    
+    # Hot fields extracted from the JSON blobs at write time, so list/filter/sort
+    # queries never need to load and json.loads the full blobs
+    candidate_name = models.CharField(max_length=255, null=True, blank=True, db_index=True, help_text="Candidate name from parsed_json")
+    candidate_email = models.CharField(max_length=255, null=True, blank=True, db_index=True, help_text="Candidate email from parsed_json")
+    top_skills = models.CharField(max_length=1000, null=True, blank=True, help_text="Top skills, comma separated (key_skills from insights, else parsed skills)")
+    total_experience_years = models.FloatField(null=True, blank=True, help_text="Total experience years from insights_json")
+    
     created_at = models.DateTimeField(default=timezone.now)
     
+    TOP_SKILLS_LIMIT = 10
+    
     class Meta:
         db_table = 'ppp_recruitment_agent_cvrecord'
         ordering = ['-created_at']
         verbose_name = 'CV Record'
         verbose_name_plural = 'CV Records'
+        indexes = [
+            models.Index(fields=['job_description', 'qualification_decision'], name='ppp_cvrecord_job_decision_idx'),
+            models.Index(fields=['job_description', '-rank', '-created_at'], name='ppp_cvrecord_job_rank_idx'),
+            models.Index(fields=['role_fit_score'], name='ppp_cvrecord_fit_score_idx'),
+        ]
     
     def __str__(self):
         return f"{self.file_name} (ID: {self.id})"
+    
+    @classmethod
+    def summary_fields(cls, parsed: dict = None, insights: dict = None) -> dict:
+        """
+        Extract the indexed hot fields from parsed/insights dicts.
+        Only keys whose source dict is given are returned, so callers that update
+        one blob do not clear fields derived from the other.
+        """
+        fields = {}
+        if parsed is not None:
+            parsed = parsed if isinstance(parsed, dict) else {}
+            name = parsed.get('name')
+            email = parsed.get('email')
+            fields['candidate_name'] = str(name).strip()[:255] if name else None
+            fields['candidate_email'] = str(email).strip()[:255] if email else None
+        key_skills = insights.get('key_skills') if isinstance(insights, dict) else None
+        if key_skills:
+            fields['top_skills'] = cls._join_skills(key_skills)
+        elif parsed is not None:
+            fields['top_skills'] = cls._join_skills(parsed.get('skills') or [])
+        if insights is not None:
+            years = insights.get('total_experience_years') if isinstance(insights, dict) else None
+            try:
+                fields['total_experience_years'] = float(years) if years is not None else None
+            except (TypeError, ValueError):
+                fields['total_experience_years'] = None
+        return fields
+    
+    @classmethod
+    def _join_skills(cls, skills) -> str:
+        if not isinstance(skills, list):
+            skills = [skills] if skills else []
+        seen = set()
+        top = []
+        for skill in skills:
+            val = str(skill).strip() if skill else ''
+            if not val or val.lower() in seen:
+                continue
+            seen.add(val.lower())
+            top.append(' '.join(val.replace(',', ' ').split()))
+            if len(top) >= cls.TOP_SKILLS_LIMIT:
+                break
+        return ', '.join(top)[:1000] or None
+    
+    def refresh_summary_fields(self) -> None:
+        """Re-derive the hot fields from the stored JSON blobs."""
+        def _load(raw):
+            try:
+                return json.loads(raw) if raw else None
+            except (json.JSONDecodeError, TypeError):
+                return None
+        parsed = _load(self.parsed_json) or {}
+        insights = _load(self.insights_json)
+        for field, value in self.summary_fields(parsed, insights or {}).items():
+            setattr(self, field, value)
+    
+    def save(self, *args, **kwargs):
+        # Keep hot fields in sync on full saves (update_fields saves are left to the caller)
+        if kwargs.get('update_fields') is None:
+            self.refresh_summary_fields()
+        super().save(*args, **kwargs)
+    
+    @property
+    def top_skills_list(self) -> list:
+        return split_top_skills(self.top_skills)
+
+
+def split_top_skills(value) -> list:
+    """Inverse of CVRecord top_skills storage (comma separated)."""
+    return [s.strip() for s in value.split(',') if s.strip()] if value else []
+
+
+class CVJobMatch(models.Model):
+    """
+    Deterministic fit/qualification of a stored CV against a job description.
+    Filled by the offline re-match job (recruitment_agent.rematch) so an existing CV pool
+    can be ranked against a new job without re-uploading or LLM re-parsing.
+    """
+    cv_record = models.ForeignKey(CVRecord, on_delete=models.CASCADE, related_name='job_matches')
+    job_description = models.ForeignKey(JobDescription, on_delete=models.CASCADE, related_name='cv_matches')
+    
+    role_fit_score = models.IntegerField(null=True, blank=True, help_text="Rule-based role fit score 0-100 for this job")
+    score_breakdown_json = models.TextField(null=True, blank=True, help_text="Fit score component breakdown (JSON)")
+    qualification_json = models.TextField(null=True, blank=True, help_text="Qualification results from LeadQualificationAgent (JSON)")
+    qualification_decision = models.CharField(max_length=32, null=True, blank=True, help_text="INTERVIEW/HOLD/REJECT")
+    qualification_confidence = models.IntegerField(null=True, blank=True, help_text="Confidence score 0-100")
+    qualification_priority = models.CharField(max_length=16, null=True, blank=True, help_text="HIGH/MEDIUM/LOW")
+    match_percentage = models.IntegerField(null=True, blank=True, help_text="Share of job keywords matched (0-100)")
+    rank = models.IntegerField(null=True, blank=True, help_text="Ranking position within this job's CV pool")
+    
+    # Filled only when a recruiter asks for narrative (LLM) reasoning for this candidate
+    narrative_json = models.TextField(null=True, blank=True, help_text="LLM summary/reasoning for this CV and job (JSON)")
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ppp_recruitment_agent_cvjobmatch'
+        ordering = ['rank', '-role_fit_score']
+        verbose_name = 'CV Job Match'
+        verbose_name_plural = 'CV Job Matches'
+        constraints = [
+            models.UniqueConstraint(fields=['cv_record', 'job_description'], name='unique_cv_job_match'),
+        ]
+        indexes = [
+            models.Index(fields=['job_description', 'rank'], name='ppp_cvmatch_job_rank_idx'),
+            models.Index(fields=['job_description', 'qualification_decision'], name='ppp_cvmatch_job_decision_idx'),
+        ]
+    
+    def __str__(self):
+        return f"CV {self.cv_record_id} vs Job {self.job_description_id} ({self.role_fit_score})"
 
 
 class Interview(models.Model):
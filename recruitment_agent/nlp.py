@@ -0,0 +1,104 @@
+"""
+Process-wide, lazily loaded spaCy pipeline for the recruitment agents.
+
+CVParserAgent only needs spaCy NER as a fallback when the email regex finds
+nothing, so the model is loaded on first use (not per agent instance) and
+only with the components NER needs. Celery workers can pre-warm it once in
+the parent process (see recruitment_agent.tasks) so forked children share it.
+
+Settings (optional):
+    SPACY_MODEL  - model package name (default: en_core_web_sm)
+    SPACY_PREWARM - load the model when a Celery worker starts (default: False)
+"""
+import logging
+import threading
+from typing import Any, Optional
+
+try:
+    import spacy
+    SPACY_AVAILABLE = True
+except (ImportError, TypeError, Exception):
+    # Catch all exceptions during spacy import to handle compatibility issues
+    # (e.g., pydantic compatibility issues with Python 3.12)
+    SPACY_AVAILABLE = False
+    spacy = None
+    # Note: To use spaCy NER, install spaCy and download the model:
+    # pip install spacy
+    # python -m spacy download en_core_web_sm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+# Components never needed for entity extraction. Excluded (not just disabled) so
+# their weights are never loaded. en_core_web_sm's NER has its own tok2vec.
+NER_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+
+
+class SpacyModelHolder:
+    """
+    Thread-safe holder that loads a spaCy pipeline once per process on first use.
+    A failed load (spaCy or model missing) is remembered so callers fall back
+    to regex without retrying the load on every call.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, exclude: Optional[list] = None) -> None:
+        self._model_name = model_name
+        self._exclude = list(exclude if exclude is not None else NER_EXCLUDE)
+        self._nlp = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        if self._model_name:
+            return self._model_name
+        try:
+            from django.conf import settings
+            return getattr(settings, "SPACY_MODEL", DEFAULT_MODEL)
+        except Exception:
+            return DEFAULT_MODEL
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._nlp is not None
+
+    def get(self) -> Optional[Any]:
+        """Return the loaded pipeline, loading it on first call; None if unavailable."""
+        if self._nlp is not None or self._load_failed:
+            return self._nlp
+        with self._lock:
+            if self._nlp is None and not self._load_failed:
+                self._load()
+        return self._nlp
+
+    def _load(self) -> None:
+        if not SPACY_AVAILABLE or spacy is None:
+            self._load_failed = True
+            return
+        try:
+            self._nlp = spacy.load(self.model_name, exclude=self._exclude)
+            logger.info(f"spaCy model loaded: {self.model_name} (pipes: {self._nlp.pipe_names})")
+        except (OSError, Exception) as exc:
+            # Model not installed or other error - callers use their regex fallback
+            logger.warning(f"spaCy model {self.model_name} not available, using regex fallback: {exc}")
+            self._load_failed = True
+
+    def reset(self) -> None:
+        """Drop the loaded pipeline (tests, or to retry after installing the model)."""
+        with self._lock:
+            self._nlp = None
+            self._load_failed = False
+
+
+_ner_holder = SpacyModelHolder()
+
+
+def get_ner_pipeline() -> Optional[Any]:
+    """Shared NER-only pipeline, or None when spaCy/the model is not installed."""
+    return _ner_holder.get()
+
+
+def prewarm() -> bool:
+    """Load the shared pipeline now (e.g. at worker start). Returns True if available."""
+    return _ner_holder.get() is not None
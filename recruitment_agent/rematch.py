@@ -0,0 +1,202 @@
+"""
+Offline re-match of stored CVs against a job description.
+
+Scores the existing CVRecord pool against a (usually new) JobDescription using the stored
+parsed/insights/enriched JSON - no re-upload and no LLM parsing. Fit scoring and qualification
+are the deterministic rule-based paths (SummarizationAgent.score_fit_batch and
+LeadQualificationAgent.qualify_batch); results go to CVJobMatch, one row per (CV, job).
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .agents.lead_qualification import LeadQualificationAgent
+from .agents.summarization import SummarizationAgent
+from .log_service import LogService
+from .models import CVJobMatch, CVRecord, JobDescription, RecruiterQualificationSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+_MATCH_UPDATE_FIELDS = [
+    'role_fit_score',
+    'score_breakdown_json',
+    'qualification_json',
+    'qualification_decision',
+    'qualification_confidence',
+    'qualification_priority',
+    'match_percentage',
+]
+
+
+def _loads(raw: Optional[str]) -> Dict[str, Any]:
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def get_job_keywords(job_desc: JobDescription) -> List[str]:
+    """Keywords stored by JobDescriptionParserAgent on the job (empty list if none)."""
+    keywords = _loads(job_desc.keywords_json).get("keywords") or []
+    return [str(k) for k in keywords if k]
+
+
+def get_qualification_thresholds(job_desc: JobDescription):
+    """(interview_threshold, hold_threshold) for the job owner, or (None, None) for defaults."""
+    if not job_desc.company_user_id:
+        return None, None
+    settings = RecruiterQualificationSettings.objects.filter(company_user_id=job_desc.company_user_id).first()
+    if settings and settings.use_custom_thresholds:
+        return settings.interview_threshold, settings.hold_threshold
+    return None, None
+
+
+def cv_pool_for_job(job_desc: JobDescription):
+    """
+    Stored CVs owned by the job owner, scoped by the CV's own company_user so CVs
+    uploaded without a job description are included.
+    """
+    if job_desc.company_user_id:
+        return CVRecord.objects.filter(company_user_id=job_desc.company_user_id)
+    if job_desc.company_id:
+        return CVRecord.objects.filter(company_user__company_id=job_desc.company_id)
+    return CVRecord.objects.filter(job_description=job_desc)
+
+
+def rematch_job_description(
+    job_description_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    log_service: Optional[LogService] = None,
+) -> Dict[str, Any]:
+    """
+    Score every stored CV in the job owner's pool against the job and upsert CVJobMatch rows.
+    CVs are loaded in primary-key chunks with only the JSON columns needed for scoring.
+    Returns run statistics.
+    """
+    started = time.monotonic()
+    job_desc = JobDescription.objects.get(id=job_description_id)
+    job_keywords = get_job_keywords(job_desc)
+    interview_threshold, hold_threshold = get_qualification_thresholds(job_desc)
+
+    log_service = log_service or LogService()
+    sum_agent = SummarizationAgent(log_service=log_service, use_llm=False)
+    # No repository: re-match results must not overwrite the CV's own qualification
+    qualify_agent = LeadQualificationAgent(log_service=log_service)
+
+    stats = {'job_description_id': job_desc.id, 'scored': 0, 'created': 0, 'updated': 0, 'skipped': 0}
+    pool = cv_pool_for_job(job_desc).order_by('id')
+    last_id = 0
+    while True:
+        rows = list(
+            pool.filter(id__gt=last_id).values('id', 'parsed_json', 'insights_json', 'enriched_json')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+
+        cv_ids, parsed_list, insights_list, enriched_list = [], [], [], []
+        for row in rows:
+            parsed = _loads(row['parsed_json'])
+            if not parsed:
+                stats['skipped'] += 1
+                continue
+            cv_ids.append(row['id'])
+            parsed_list.append(parsed)
+            insights_list.append(_loads(row['insights_json']))
+            enriched_list.append(_loads(row['enriched_json']) or None)
+        if not cv_ids:
+            continue
+
+        # Experience years do not depend on the job - reuse the stored value when present
+        stored_years = [insights.get('total_experience_years') for insights in insights_list]
+        total_years = [
+            years if years is not None else sum_agent._estimate_total_experience_years(parsed.get('experience'))
+            for years, parsed in zip(stored_years, parsed_list)
+        ]
+        fit_results = sum_agent.score_fit_batch(parsed_list, job_keywords, total_experience_years=total_years)
+
+        qualify_inputs = []
+        for idx, parsed in enumerate(parsed_list):
+            insights = dict(insights_list[idx])
+            insights.pop('record_id', None)
+            insights['role_fit_score'] = fit_results[idx][0]
+            insights['total_experience_years'] = total_years[idx]
+            qualify_inputs.append((parsed, insights))
+        qualified_list = qualify_agent.qualify_batch(
+            qualify_inputs, job_keywords, enriched_list, interview_threshold, hold_threshold
+        )
+
+        existing = {
+            m.cv_record_id: m
+            for m in CVJobMatch.objects.filter(job_description=job_desc, cv_record_id__in=cv_ids)
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+        for idx, cv_id in enumerate(cv_ids):
+            score, breakdown = fit_results[idx]
+            qualified = qualified_list[idx]
+            match = existing.get(cv_id) or CVJobMatch(cv_record_id=cv_id, job_description=job_desc)
+            match.role_fit_score = score
+            match.score_breakdown_json = json.dumps(breakdown, ensure_ascii=False)
+            match.qualification_json = json.dumps(qualified, ensure_ascii=False)
+            match.qualification_decision = qualified.get('decision')
+            match.qualification_confidence = qualified.get('confidence_score')
+            match.qualification_priority = qualified.get('priority')
+            match.match_percentage = qualified.get('match_percentage')
+            match.updated_at = now  # bulk_update does not apply auto_now
+            (to_update if match.pk else to_create).append(match)
+
+        with transaction.atomic():
+            if to_create:
+                CVJobMatch.objects.bulk_create(to_create, batch_size=chunk_size)
+            if to_update:
+                CVJobMatch.objects.bulk_update(to_update, _MATCH_UPDATE_FIELDS + ['updated_at'], batch_size=chunk_size)
+        stats['scored'] += len(cv_ids)
+        stats['created'] += len(to_create)
+        stats['updated'] += len(to_update)
+
+    stats['ranked'] = rank_job_matches(job_desc.id, chunk_size=chunk_size)
+    stats['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    logger.info(f"Re-matched CV pool against job #{job_desc.id}: {stats}")
+    log_service.log_event("cv_rematch_complete", stats)
+    return stats
+
+
+def rank_job_matches(job_description_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Assign ranks by role_fit_score (then confidence) for all matches of a job."""
+    ordered = list(
+        CVJobMatch.objects.filter(job_description_id=job_description_id)
+        .order_by('-role_fit_score', '-qualification_confidence', 'id')
+        .values_list('id', flat=True)
+    )
+    matches = [CVJobMatch(id=match_id, rank=rank) for rank, match_id in enumerate(ordered, start=1)]
+    CVJobMatch.objects.bulk_update(matches, ['rank'], batch_size=chunk_size)
+    return len(matches)
+
+
+def generate_narrative(match: CVJobMatch, sum_agent: SummarizationAgent) -> Dict[str, Any]:
+    """
+    LLM summary/reasoning for one (CV, job) pair - only on recruiter request.
+    Stored on the match so it is generated at most once.
+    """
+    parsed = _loads(match.cv_record.parsed_json)
+    summary = sum_agent.summarize(parsed, get_job_keywords(match.job_description))
+    narrative = {
+        'candidate_summary': summary.get('candidate_summary'),
+        'key_skills': summary.get('key_skills'),
+        'notable_achievements': summary.get('notable_achievements'),
+        'llm_role_fit_score': summary.get('role_fit_score'),
+        'summarization_source': summary.get('summarization_source'),
+    }
+    match.narrative_json = json.dumps(narrative, ensure_ascii=False)
+    match.save(update_fields=['narrative_json', 'updated_at'])
+    return narrative
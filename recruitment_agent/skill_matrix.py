@@ -0,0 +1,204 @@
+"""
+Vectorized candidate-vs-job skill matching for batch scoring.
+
+Instead of calling is_exact_match / is_related_match for every
+(candidate, skill, keyword) triple, the batch is encoded once over its skill
+vocabulary (distinct lowercased skills seen in the batch):
+
+- a relation matrix R (vocabulary × keywords) holding NO/RELATED/EXACT codes,
+  computed once per distinct skill string;
+- a sparse incidence list (candidate, vocabulary index) for every skill a
+  candidate has.
+
+Per-candidate match codes are then the row-wise max of R over the candidate's
+skills (exact takes priority over related, same as the per-candidate loops),
+done with NumPy. Results are identical to the loop-based path.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from recruitment_agent.skill_equivalences import get_all_match_terms, get_database_type
+
+NO_MATCH = 0
+RELATED_MATCH = 1
+EXACT_MATCH = 2
+
+
+@lru_cache(maxsize=4096)
+def match_terms(term: str) -> frozenset:
+    """Cached, immutable version of get_all_match_terms."""
+    return frozenset(get_all_match_terms(term))
+
+
+@lru_cache(maxsize=4096)
+def _database_type(term: str) -> Optional[str]:
+    return get_database_type(term)
+
+
+def relation_code(skill_lower: str, keyword_lower: str) -> int:
+    """
+    Single-pair relation: EXACT_MATCH, RELATED_MATCH or NO_MATCH.
+    Mirrors is_exact_match / is_related_match from skill_equivalences, using cached term sets.
+    """
+    if not skill_lower or not keyword_lower:
+        return NO_MATCH
+    if skill_lower == keyword_lower:
+        return EXACT_MATCH
+    kw_match = match_terms(keyword_lower)
+    skill_match = match_terms(skill_lower)
+    # Related through equivalences is never exact, even when one is a substring of the other
+    if skill_lower in kw_match or keyword_lower in skill_match:
+        return RELATED_MATCH
+    if keyword_lower in skill_lower or skill_lower in keyword_lower:
+        return EXACT_MATCH
+    # Database type matching (e.g. MS SQL and MySQL are both relational)
+    type1 = _database_type(skill_lower)
+    type2 = _database_type(keyword_lower)
+    if type1 and type2 and type1 == type2:
+        return RELATED_MATCH
+    return NO_MATCH
+
+
+class SkillMatchMatrix:
+    """
+    Scores many candidates against one set of job keywords.
+
+    Keywords are deduplicated case-insensitively (first spelling wins, order kept),
+    matching LeadQualificationAgent._normalize_keywords and the keyword set used by
+    SummarizationAgent._compute_fit_score.
+    """
+
+    def __init__(self, job_keywords: Optional[Sequence[Any]]) -> None:
+        self.keywords: List[str] = []
+        self.keywords_lower: List[str] = []
+        seen = set()
+        for k in job_keywords or []:
+            if k is None:
+                continue
+            val = str(k).strip()
+            key = val.lower()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self.keywords.append(val)
+            self.keywords_lower.append(key)
+        # Relation rows are cached per distinct skill, so repeated batches against
+        # the same job reuse work done for skills already seen.
+        self._vocab: Dict[str, int] = {}
+        self._relation_rows: List[np.ndarray] = []
+
+    @property
+    def keyword_count(self) -> int:
+        return len(self.keywords_lower)
+
+    def _vocab_index(self, skill_lower: str) -> int:
+        idx = self._vocab.get(skill_lower)
+        if idx is None:
+            idx = len(self._relation_rows)
+            self._vocab[skill_lower] = idx
+            self._relation_rows.append(
+                np.fromiter(
+                    (relation_code(skill_lower, kw) for kw in self.keywords_lower),
+                    dtype=np.uint8,
+                    count=self.keyword_count,
+                )
+            )
+        return idx
+
+    def match(self, skill_lists: Sequence[Optional[Iterable[Any]]]) -> np.ndarray:
+        """
+        Return an (n_candidates, n_keywords) uint8 array of NO/RELATED/EXACT codes.
+        """
+        n = len(skill_lists)
+        k = self.keyword_count
+        codes = np.zeros((n, k), dtype=np.uint8)
+        if n == 0 or k == 0:
+            return codes
+
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, skills in enumerate(skill_lists):
+            for s in skills or []:
+                if not s:
+                    continue
+                skill_lower = str(s).lower()
+                if not skill_lower:
+                    continue
+                rows.append(row)
+                cols.append(self._vocab_index(skill_lower))
+        if not rows:
+            return codes
+
+        relation = np.vstack(self._relation_rows)
+        row_idx = np.asarray(rows, dtype=np.intp)
+        col_idx = np.asarray(cols, dtype=np.intp)
+        # rows are already grouped by candidate (appended in order), so reduceat
+        # over the start of each non-empty group gives the per-candidate max.
+        starts = np.flatnonzero(np.r_[True, row_idx[1:] != row_idx[:-1]])
+        codes[row_idx[starts]] = np.maximum.reduceat(relation[col_idx], starts, axis=0)
+        return codes
+
+    @staticmethod
+    def counts(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-candidate (exact, related, missing) counts as int64 arrays."""
+        exact = (codes == EXACT_MATCH).sum(axis=1, dtype=np.int64)
+        related = (codes == RELATED_MATCH).sum(axis=1, dtype=np.int64)
+        missing = (codes == NO_MATCH).sum(axis=1, dtype=np.int64)
+        return exact, related, missing
+
+    def split(self, code_row: np.ndarray) -> Tuple[List[str], List[str], List[str]]:
+        """Turn one candidate's code row into (exact_matched, related_matched, missing) keyword lists."""
+        exact, related, missing = [], [], []
+        for kw, code in zip(self.keywords, code_row.tolist()):
+            if code == EXACT_MATCH:
+                exact.append(kw)
+            elif code == RELATED_MATCH:
+                related.append(kw)
+            else:
+                missing.append(kw)
+        return exact, related, missing
+
+
+def skills_match_scores(
+    exact: np.ndarray, related: np.ndarray, missing: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized skills-match component of SummarizationAgent._compute_fit_score (0-70 points).
+    Same weights and piecewise mapping; returns arrays for each metric.
+    """
+    exact = np.asarray(exact, dtype=np.int64)
+    related = np.asarray(related, dtype=np.int64)
+    missing = np.asarray(missing, dtype=np.int64)
+    total = exact + related + missing
+
+    weighted_matches = (exact * 1.0) + (related * 0.5) - (missing * 0.2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(total > 0, weighted_matches / (total * 1.0), 0.0)
+    ratio = np.maximum(0.0, np.minimum(1.0, ratio))
+
+    # Bands are evaluated top-down like the if/elif chain; values are non-negative so
+    # truncation toward zero matches int().
+    skills_score = np.select(
+        [ratio >= 0.90, ratio >= 0.75, ratio >= 0.60, ratio >= 0.45, ratio >= 0.30, ratio >= 0.15],
+        [
+            np.full_like(ratio, 70.0),
+            54 + np.trunc((ratio - 0.75) * 107),
+            42 + np.trunc((ratio - 0.60) * 80),
+            28 + np.trunc((ratio - 0.45) * 93),
+            14 + np.trunc((ratio - 0.30) * 93),
+            5 + np.trunc((ratio - 0.15) * 60),
+        ],
+        default=np.trunc(ratio * (5 / 0.15)),
+    ).astype(np.int64)
+
+    return {
+        "skills_match_score": skills_score,
+        "exact_matches_count": exact,
+        "related_matches_count": related,
+        "missing_matches_count": missing,
+        "missing_penalty": missing * 0.2,
+        "weighted_matches": weighted_matches,
+        "weighted_match_ratio": ratio,
+    }
@@ -1,13 +1,18 @@
 """
 Background tasks for automatic interview follow-up email checking.
 This runs periodically to check for interviews that need follow-up emails.
+Also holds the Celery task for re-matching stored CVs against a job description
+and the worker start hook that pre-warms the shared spaCy pipeline.
 """
 
+from celery import shared_task
+from celery.signals import worker_init
+from django.conf import settings
 from django.utils import timezone
 from django.db import connection, close_old_connections
 from django.db.utils import OperationalError
 from datetime import timedelta
-from .models import Interview
+from .models import Interview, JobDescription
 from .agents.interview_scheduling.interview_scheduling_agent import InterviewSchedulingAgent
 from .log_service import LogService
 import logging
@@ -159,3 +164,33 @@ def check_and_send_followup_emails():
         logger.error(f"Error in check_and_send_followup_emails: {str(e)}", exc_info=True)
         return {'followups_sent': 0, 'reminders_sent': 0, 'errors': 1}
 
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=300)
+def rematch_job_description_task(self, job_description_id):
+    """
+    Celery task to score the stored CV pool against a job description (no LLM calls).
+    Queued when a job is created with rematch enabled or from the re-match endpoint.
+    """
+    from .rematch import rematch_job_description
+    try:
+        return rematch_job_description(job_description_id)
+    except JobDescription.DoesNotExist:
+        logger.warning(f"Re-match skipped: job description #{job_description_id} no longer exists")
+        return {'job_description_id': job_description_id, 'scored': 0}
+    except Exception as e:
+        logger.error(f"Error re-matching CVs for job #{job_description_id}: {str(e)}", exc_info=True)
+        raise self.retry(exc=e)
+
+
+@worker_init.connect
+def prewarm_spacy_pipeline(**kwargs):
+    """
+    Load the shared spaCy NER pipeline once in the worker's main process, before the
+    pool forks, so children share it instead of each loading its own copy on first use.
+    """
+    if not getattr(settings, 'SPACY_PREWARM', False):
+        return
+    from .nlp import prewarm
+    if prewarm():
+        logger.info("spaCy NER pipeline pre-warmed for Celery worker")
@@ -1,3 +1,438 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views.recruitment_agent import _queue_rematch, _run_rematch_in_thread, get_cv_record, list_cv_records
+from core.models import Company, CompanyUser
+from recruitment_agent import nlp
+from recruitment_agent.agents.cv_parser import CVParserAgent
+from recruitment_agent.agents.summarization import SummarizationAgent
+from recruitment_agent.log_service import LogService
+from recruitment_agent.models import CVJobMatch, CVRecord, JobDescription
+from recruitment_agent.rematch import rematch_job_description
+from recruitment_agent.skill_matrix import SkillMatchMatrix
+
+SKILL_POOL = [
+    'Python', 'python3', 'Django', 'Django REST Framework', 'JS', 'JavaScript', 'TypeScript', 'ReactJS',
+    'React', 'Node.js', 'Postgres', 'PostgreSQL', 'MySQL', 'AWS', 'Amazon Web Services', 'Docker',
+    'Kubernetes', 'k8s', 'Machine Learning', 'TensorFlow', 'Excel', 'Communication', 'Go', 'C#', '.NET',
+]
+JOB_KEYWORDS = ['Python', 'Django', 'React', 'PostgreSQL', 'AWS', 'Docker', 'machine learning', 'Leadership']
+
+
+def make_company_user(name: str = 'Acme') -> CompanyUser:
+    company = Company.objects.create(name=name, email=f'hr@{name.lower()}.test')
+    return CompanyUser.objects.create(
+        company=company, email=f'recruiter@{name.lower()}.test', password_hash='x', full_name='Recruiter', role='admin',
+    )
+
+
+def make_cv(rng: random.Random, idx: int) -> dict:
+    skills = rng.sample(SKILL_POOL, rng.randint(0, 12))
+    experience = [
+        {
+            'role': rng.choice(['Backend Developer', 'Data Scientist', 'Intern', 'Team Lead']),
+            'company': f'Company {idx}-{n}',
+            'description': rng.choice([
+                'Built REST APIs with Django and PostgreSQL for 18 months',
+                'Led a team of 5 engineers; improved performance by 40%',
+                'Worked on a small React project',
+                '',
+            ]),
+            'start_date': f'{2015 + n}-01',
+            'end_date': f'{2016 + n}-06',
+        }
+        for n in range(rng.randint(0, 3))
+    ]
+    return {
+        'name': f'Candidate {idx}',
+        'skills': skills,
+        'experience': experience,
+        'education': rng.choice([[], [{'degree': 'BSc Computer Science'}], [{'degree': 'MSc Data Science'}]]),
+        'certifications': rng.choice([
+            [],
+            [{'name': 'AWS Certified Developer', 'issuer': 'Amazon', 'year': '2021'}],
+            [{'name': 'Scrum Master', 'issuer': None, 'year': None}, {'name': 'CKA Kubernetes', 'issuer': 'CNCF', 'year': '2022'}],
+        ]),
+    }
+
+
+class FitScoreBatchTests(SimpleTestCase):
+    def setUp(self):
+        self.agent = SummarizationAgent(use_llm=False)
+        rng = random.Random(7)
+        self.cvs = [make_cv(rng, idx) for idx in range(60)]
+
+    def per_candidate(self, cv, job_keywords):
+        return self.agent._compute_fit_score(
+            cv.get('skills') or [],
+            self.agent._extract_achievements(cv),
+            self.agent._highest_degree(cv.get('education')),
+            self.agent._estimate_total_experience_years(cv.get('experience')),
+            job_keywords,
+            cv.get('experience'),
+            cv.get('certifications'),
+            cv.get('education'),
+        )
+
+    def test_batch_scores_equal_the_per_candidate_path(self):
+        for job_keywords in (JOB_KEYWORDS, ['go', 'c#'], [], None):
+            batch = self.agent.score_fit_batch(self.cvs, job_keywords)
+            self.assertEqual(batch, [self.per_candidate(cv, job_keywords) for cv in self.cvs], job_keywords)
+
+    def test_matrix_counts_equal_per_skill_matching(self):
+        from recruitment_agent.skill_equivalences import is_exact_match, is_related_match
+
+        matrix = SkillMatchMatrix(JOB_KEYWORDS)
+        codes = matrix.match([cv['skills'] for cv in self.cvs])
+        for cv, row in zip(self.cvs, codes):
+            exact, related, missing = matrix.split(row)
+            for keyword in JOB_KEYWORDS:
+                skills = [s.lower() for s in cv['skills']]
+                if any(is_exact_match(s, keyword.lower()) for s in skills):
+                    self.assertIn(keyword.lower(), [k.lower() for k in exact], (cv['skills'], keyword))
+                elif any(is_related_match(s, keyword.lower()) for s in skills):
+                    self.assertIn(keyword.lower(), [k.lower() for k in related], (cv['skills'], keyword))
+                else:
+                    self.assertIn(keyword.lower(), [k.lower() for k in missing], (cv['skills'], keyword))
+
+
+class RematchTests(TestCase):
+    def setUp(self):
+        self.company_user = make_company_user()
+        self.source_job = JobDescription.objects.create(
+            title='Backend Developer', description='Python APIs',
+            keywords_json=json.dumps({'keywords': ['Python']}), company_user=self.company_user,
+        )
+        self.job = JobDescription.objects.create(
+            title='Full Stack Engineer', description='Django and React',
+            keywords_json=json.dumps({'keywords': JOB_KEYWORDS}), company_user=self.company_user,
+        )
+        rng = random.Random(11)
+        self.cvs = [make_cv(rng, idx) for idx in range(25)]
+        for idx, parsed in enumerate(self.cvs):
+            CVRecord.objects.create(
+                file_name=f'cv_{idx}.pdf', parsed_json=json.dumps(parsed), job_description=self.source_job,
+                company_user=self.company_user,
+            )
+        CVRecord.objects.create(
+            file_name='unparsed.pdf', parsed_json='', job_description=self.source_job, company_user=self.company_user,
+        )
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.log_dir.cleanup)
+
+    def rematch(self, **kwargs):
+        log_service = LogService(log_file=f'{self.log_dir.name}/rematch.jsonl')
+        return rematch_job_description(self.job.id, log_service=log_service, **kwargs)
+
+    def test_rematch_upserts_one_match_per_cv(self):
+        first = self.rematch(chunk_size=7)
+        self.assertEqual((first['scored'], first['created'], first['updated'], first['skipped']), (25, 25, 0, 1))
+        scores = dict(CVJobMatch.objects.values_list('cv_record_id', 'role_fit_score'))
+
+        second = self.rematch(chunk_size=4)
+        self.assertEqual((second['scored'], second['created'], second['updated']), (25, 0, 25))
+        self.assertEqual(CVJobMatch.objects.filter(job_description=self.job).count(), 25)
+        self.assertEqual(dict(CVJobMatch.objects.values_list('cv_record_id', 'role_fit_score')), scores)
+
+    def test_ranking_matches_a_fresh_scoring_pass(self):
+        self.rematch(chunk_size=6)
+        agent = SummarizationAgent(use_llm=False)
+        records = list(CVRecord.objects.exclude(parsed_json='').order_by('id'))
+        fresh = agent.score_fit_batch([json.loads(r.parsed_json) for r in records], JOB_KEYWORDS)
+        expected_scores = {record.id: score for record, (score, _) in zip(records, fresh)}
+
+        matches = list(CVJobMatch.objects.filter(job_description=self.job).order_by('rank'))
+        self.assertEqual([m.rank for m in matches], list(range(1, 26)))
+        self.assertEqual({m.cv_record_id: m.role_fit_score for m in matches}, expected_scores)
+        ranked = [(m.role_fit_score, m.qualification_confidence or 0) for m in matches]
+        self.assertEqual(ranked, sorted(ranked, reverse=True))
+
+    def test_pool_is_scoped_by_the_cv_owner(self):
+        rng = random.Random(12)
+        no_job = CVRecord.objects.create(
+            file_name='no_job.pdf', parsed_json=json.dumps(make_cv(rng, 30)), company_user=self.company_user,
+        )
+        other_user = make_company_user('Globex')
+        CVRecord.objects.create(
+            file_name='other.pdf', parsed_json=json.dumps(make_cv(rng, 31)), company_user=other_user,
+        )
+        stats = self.rematch()
+        self.assertEqual(stats['scored'], 26)
+        self.assertTrue(CVJobMatch.objects.filter(job_description=self.job, cv_record=no_job).exists())
+
+    def test_rematch_cvs_command(self):
+        out = StringIO()
+        call_command('rematch_cvs', job_id=self.job.id, chunk_size=10, stdout=out)
+        self.assertIn(f'Job #{self.job.id}: scored 25 CVs (25 new, 0 updated, 1 skipped)', out.getvalue())
+        self.assertEqual(CVJobMatch.objects.filter(job_description=self.job).count(), 25)
+
+        with self.assertRaises(CommandError):
+            call_command('rematch_cvs', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('rematch_cvs', job_id=999999, stdout=StringIO())
+
+    def test_queue_rematch_uses_celery_when_available(self):
+        with mock.patch('recruitment_agent.tasks.rematch_job_description_task.delay') as delay, \
+                mock.patch('threading.Thread') as thread:
+            self.assertTrue(_queue_rematch(self.job.id))
+        delay.assert_called_once_with(self.job.id)
+        thread.assert_not_called()
+
+    def test_queue_rematch_falls_back_to_a_thread(self):
+        with mock.patch('recruitment_agent.tasks.rematch_job_description_task.delay', side_effect=OSError('no broker')), \
+                mock.patch('threading.Thread') as thread:
+            self.assertTrue(_queue_rematch(self.job.id))
+        thread.assert_called_once_with(target=_run_rematch_in_thread, args=(self.job.id,))
+        thread.return_value.start.assert_called_once_with()
+
+    def test_rematch_thread_closes_its_connection_and_releases_agents(self):
+        with mock.patch('recruitment_agent.rematch.rematch_job_description', side_effect=RuntimeError('boom')), \
+                mock.patch('api.views.recruitment_agent.connection') as conn, \
+                mock.patch('project_manager_agent.ai_agents.agents_registry.AgentRegistry.release_thread_agents') as release:
+            _run_rematch_in_thread(self.job.id)
+        conn.close.assert_called_once_with()
+        release.assert_called_once_with()
+
+
+class CVRecordSummaryFieldsTests(TestCase):
+    PARSED = {
+        'name': '  Jane Doe ',
+        'email': 'jane@example.com',
+        'skills': ['Python', 'python', 'Django, REST', '', 'AWS'] + [f'Skill {n}' for n in range(12)],
+    }
+    INSIGHTS = {'key_skills': ['Django', 'PostgreSQL'], 'total_experience_years': '4.5'}
+
+    def setUp(self):
+        self.company_user = make_company_user()
+        self.job = JobDescription.objects.create(
+            title='Backend Developer', description='Python APIs', company_user=self.company_user,
+        )
+
+    def test_summary_fields(self):
+        fields = CVRecord.summary_fields(self.PARSED, {})
+        self.assertEqual(fields['candidate_name'], 'Jane Doe')
+        self.assertEqual(fields['candidate_email'], 'jane@example.com')
+        skills = fields['top_skills'].split(', ')
+        self.assertEqual(skills[:3], ['Python', 'Django REST', 'AWS'])
+        self.assertEqual(len(skills), CVRecord.TOP_SKILLS_LIMIT)
+        self.assertIsNone(fields['total_experience_years'])
+
+        fields = CVRecord.summary_fields(self.PARSED, self.INSIGHTS)
+        self.assertEqual(fields['top_skills'], 'Django, PostgreSQL')
+        self.assertEqual(fields['total_experience_years'], 4.5)
+
+        # Only keys derived from the given blob are returned
+        self.assertEqual(
+            CVRecord.summary_fields(insights={'total_experience_years': 'n/a'}),
+            {'total_experience_years': None},
+        )
+
+    def test_save_refreshes_fields_unless_update_fields_given(self):
+        record = CVRecord.objects.create(
+            file_name='jane.pdf', parsed_json=json.dumps(self.PARSED),
+            insights_json=json.dumps(self.INSIGHTS), job_description=self.job,
+        )
+        record.refresh_from_db()
+        self.assertEqual(record.candidate_name, 'Jane Doe')
+        self.assertEqual(record.top_skills_list, ['Django', 'PostgreSQL'])
+        self.assertEqual(record.total_experience_years, 4.5)
+
+        record.parsed_json = json.dumps({'name': 'John Roe'})
+        record.save(update_fields=['parsed_json'])
+        record.refresh_from_db()
+        self.assertEqual(record.candidate_name, 'Jane Doe')
+
+        record.save()
+        record.refresh_from_db()
+        self.assertEqual(record.candidate_name, 'John Roe')
+        self.assertIsNone(record.candidate_email)
+
+    def test_refresh_summary_fields_tolerates_bad_json(self):
+        record = CVRecord(file_name='broken.pdf', parsed_json='{not json', insights_json='[]')
+        record.refresh_summary_fields()
+        self.assertIsNone(record.candidate_name)
+        self.assertIsNone(record.top_skills)
+        self.assertIsNone(record.total_experience_years)
+
+    def test_backfill_command(self):
+        record = CVRecord.objects.create(
+            file_name='jane.pdf', parsed_json=json.dumps(self.PARSED),
+            insights_json=json.dumps(self.INSIGHTS), job_description=self.job,
+        )
+        CVRecord.objects.filter(id=record.id).update(
+            candidate_name=None, candidate_email=None, top_skills=None, total_experience_years=None,
+        )
+        filled = CVRecord.objects.create(file_name='john.pdf', parsed_json=json.dumps({'name': 'John Roe'}), job_description=self.job)
+        CVRecord.objects.filter(id=filled.id).update(candidate_name='Kept')
+
+        out = StringIO()
+        call_command('backfill_cv_summary_fields', only_missing=True, chunk_size=1, stdout=out)
+        self.assertIn('Backfilled summary fields for 1 CV records', out.getvalue())
+        record.refresh_from_db()
+        filled.refresh_from_db()
+        self.assertEqual(record.candidate_name, 'Jane Doe')
+        self.assertEqual(record.top_skills, 'Django, PostgreSQL')
+        self.assertEqual(filled.candidate_name, 'Kept')
+
+        call_command('backfill_cv_summary_fields', stdout=StringIO())
+        filled.refresh_from_db()
+        self.assertEqual(filled.candidate_name, 'John Roe')
+
+
+class CVRecordEndpointTests(TestCase):
+    LIST_KEYS = {
+        'id', 'file_name', 'role_fit_score', 'rank', 'qualification_decision', 'qualification_confidence',
+        'qualification_priority', 'job_description_id', 'job_description_title', 'candidate_name',
+        'candidate_email', 'top_skills', 'total_experience_years', 'created_at',
+    }
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.company_user = make_company_user()
+        self.job = JobDescription.objects.create(
+            title='Backend Developer', description='Python APIs', company_user=self.company_user,
+        )
+        self.records = [
+            CVRecord.objects.create(
+                file_name=f'cv_{idx}.pdf',
+                parsed_json=json.dumps({'name': name, 'email': f'{name.lower()}@example.com', 'skills': ['Python', 'SQL']}),
+                insights_json=json.dumps({'total_experience_years': idx + 1}),
+                role_fit_score=score, rank=rank, qualification_decision=decision, job_description=self.job,
+            )
+            for idx, (name, score, rank, decision) in enumerate([
+                ('Alice', 90, 3, 'INTERVIEW'), ('Bob', 60, 2, 'HOLD'), ('Carol', 30, 1, 'REJECT'),
+            ])
+        ]
+        other_job = JobDescription.objects.create(
+            title='Other', description='Other company', company_user=make_company_user('Other'),
+        )
+        CVRecord.objects.create(file_name='other.pdf', parsed_json=json.dumps({'name': 'Alice'}), job_description=other_job)
+
+    def get(self, view, path, params=None, **kwargs):
+        request = self.factory.get(path, params or {})
+        force_authenticate(request, user=self.company_user)
+        return view(request, **kwargs)
+
+    def test_list_returns_summary_columns_only(self):
+        response = self.get(list_cv_records, '/api/recruitment/cv-records/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'success')
+        self.assertEqual(response.data['total'], 3)
+        self.assertNotIn('page', response.data)
+        rows = response.data['data']
+        self.assertEqual([row['candidate_name'] for row in rows], ['Alice', 'Bob', 'Carol'])
+        for row in rows:
+            self.assertEqual(set(row), self.LIST_KEYS)
+        self.assertEqual(rows[0]['top_skills'], ['Python', 'SQL'])
+        self.assertEqual(rows[0]['job_description_title'], 'Backend Developer')
+        self.assertEqual(rows[0]['total_experience_years'], 1.0)
+
+    def test_list_filters_sorting_and_pagination(self):
+        response = self.get(list_cv_records, '/api/recruitment/cv-records/', {'search': 'bob@'})
+        self.assertEqual([row['candidate_name'] for row in response.data['data']], ['Bob'])
+
+        response = self.get(list_cv_records, '/api/recruitment/cv-records/', {'min_score': 50, 'sort': 'score'})
+        self.assertEqual([row['candidate_name'] for row in response.data['data']], ['Alice', 'Bob'])
+
+        response = self.get(list_cv_records, '/api/recruitment/cv-records/', {'decision': 'REJECT'})
+        self.assertEqual([row['candidate_name'] for row in response.data['data']], ['Carol'])
+
+        response = self.get(list_cv_records, '/api/recruitment/cv-records/', {'sort': 'experience', 'page': 2, 'page_size': 2})
+        self.assertEqual((response.data['total'], response.data['page'], response.data['page_size']), (3, 2, 2))
+        self.assertEqual([row['candidate_name'] for row in response.data['data']], ['Alice'])
+
+    def test_detail_includes_the_json_blobs(self):
+        record = self.records[1]
+        response = self.get(get_cv_record, f'/api/recruitment/cv-records/{record.id}/', cv_id=record.id)
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual(set(data), self.LIST_KEYS | {'parsed', 'insights', 'enriched', 'qualified'})
+        self.assertEqual(data['parsed']['name'], 'Bob')
+        self.assertEqual(data['insights'], {'total_experience_years': 2})
+        self.assertEqual((data['enriched'], data['qualified']), ({}, {}))
+        self.assertEqual(data['top_skills'], ['Python', 'SQL'])
+
+        other = CVRecord.objects.get(file_name='other.pdf')
+        response = self.get(get_cv_record, f'/api/recruitment/cv-records/{other.id}/', cv_id=other.id)
+        self.assertEqual(response.status_code, 404)
+
+
+class _FakeEntity:
+    def __init__(self, text, label):
+        self.text = text
+        self.label_ = label
+
+
+class _FakePipeline:
+    pipe_names = ['tok2vec', 'ner']
+
+    def __call__(self, text):
+        return mock.Mock(ents=[_FakeEntity('ACME Corp', 'ORG'), _FakeEntity('jane.doe@example.com', 'EMAIL')])
+
+
+class SpacyModelHolderTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(nlp, 'spacy')
+        self.spacy = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_loads_once_without_non_ner_pipes(self):
+        self.spacy.load.return_value = _FakePipeline()
+        holder = nlp.SpacyModelHolder()
+        with override_settings(SPACY_MODEL='en_core_web_md'):
+            threads = [threading.Thread(target=holder.get) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertIs(holder.get(), self.spacy.load.return_value)
+        self.spacy.load.assert_called_once_with('en_core_web_md', exclude=nlp.NER_EXCLUDE)
+        for pipe in ('tagger', 'parser', 'lemmatizer', 'attribute_ruler'):
+            self.assertIn(pipe, nlp.NER_EXCLUDE)
+        self.assertNotIn('ner', nlp.NER_EXCLUDE)
+        self.assertTrue(holder.is_loaded)
+
+    def test_missing_model_is_remembered_until_reset(self):
+        self.spacy.load.side_effect = OSError("[E050] Can't find model 'en_core_web_sm'")
+        holder = nlp.SpacyModelHolder()
+        self.assertIsNone(holder.get())
+        self.assertIsNone(holder.get())
+        self.assertEqual(self.spacy.load.call_count, 1)
+        self.assertFalse(holder.is_loaded)
+
+        self.spacy.load.side_effect = None
+        self.spacy.load.return_value = _FakePipeline()
+        holder.reset()
+        self.assertIsNotNone(holder.get())
+        self.assertEqual(self.spacy.load.call_count, 2)
+
+    def test_spacy_not_installed(self):
+        holder = nlp.SpacyModelHolder()
+        with mock.patch.object(nlp, 'SPACY_AVAILABLE', False):
+            self.assertIsNone(holder.get())
+        self.spacy.load.assert_not_called()
+
+    def test_cv_parser_email_fallback(self):
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        parser = CVParserAgent(groq_client=mock.Mock(), log_service=LogService(log_file=f'{log_dir.name}/parser.jsonl'))
+        holder = nlp.SpacyModelHolder()
+        with mock.patch.object(nlp, '_ner_holder', holder):
+            self.spacy.load.side_effect = OSError('model missing')
+            self.assertEqual(parser._extract_email_with_ner('Contact: Jane.Doe@Example.com'), 'jane.doe@example.com')
+            self.assertIsNone(parser._extract_email_with_ner('No address here'))
+            self.assertEqual(self.spacy.load.call_count, 1)
+
+            self.spacy.load.side_effect = None
+            self.spacy.load.return_value = _FakePipeline()
+            holder.reset()
+            self.assertEqual(parser._extract_email_with_ner('No address here'), 'jane.doe@example.com')
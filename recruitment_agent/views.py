@@ -1,7 +1,5 @@
 import json
 import logging
-import tempfile
-from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.shortcuts import render
@@ -106,8 +104,11 @@ def recruitment_dashboard(request):
     # Get job descriptions
     job_descriptions = JobDescription.objects.all().order_by('-created_at')[:20]
     
-    # Get recent CV records (for display)
-    recent_cvs = CVRecord.objects.all().order_by('-created_at')[:10]
+    # Get recent CV records (for display) - summary columns only, not the JSON blobs
+    recent_cvs = CVRecord.objects.order_by('-created_at').only(
+        'id', 'file_name', 'candidate_name', 'candidate_email', 'role_fit_score',
+        'rank', 'qualification_decision', 'job_description_id', 'created_at',
+    )[:10]
     
     # Get filter job description ID from request
     filter_job_id = request.GET.get('filter_job_id', '').strip()
@@ -128,20 +129,18 @@ def recruitment_dashboard(request):
     if filter_job:
         selected_for_interview_qs = selected_for_interview_qs.filter(job_description=filter_job)
     
-    selected_for_interview_qs = selected_for_interview_qs.order_by('-created_at')[:50]
+    selected_for_interview_qs = selected_for_interview_qs.order_by('-created_at').values(
+        'id', 'file_name', 'candidate_name', 'candidate_email', 'role_fit_score', 'qualification_decision'
+    )[:50]
     
-    # Parse candidate info from JSON for each CV
+    # Candidate info comes from the summary columns - no JSON parsing per row
     selected_for_interview = []
     for cv in selected_for_interview_qs:
-        candidate_info = {'cv_record': cv, 'name': cv.file_name, 'email': None}
-        if cv.parsed_json:
-            try:
-                parsed_data = json.loads(cv.parsed_json)
-                candidate_info['name'] = parsed_data.get('name') or cv.file_name
-                candidate_info['email'] = parsed_data.get('email')
-            except (json.JSONDecodeError, TypeError):
-                pass
-        selected_for_interview.append(candidate_info)
+        selected_for_interview.append({
+            'cv_record': cv,
+            'name': cv['candidate_name'] or cv['file_name'],
+            'email': cv['candidate_email'],
+        })
     
     # Interview Email Sent = Interviews with invitation_sent_at not null
     interview_email_sent_qs = Interview.objects.filter(
@@ -261,25 +260,13 @@ def process_cvs(request):
         # Priority 1: Parse from uploaded file (only if keywords not already loaded)
         if not job_kw_list and job_description_file:
             try:
-                suffix = Path(job_description_file.name).suffix
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    for chunk in job_description_file.chunks():
-                        tmp.write(chunk)
-                    temp_path = Path(tmp.name)
-                
-                job_desc_parsed = job_desc_agent.parse_file(str(temp_path))
+                job_desc_parsed = job_desc_agent.parse_upload(job_description_file)
                 extracted_keywords = job_desc_parsed.get("keywords", [])
                 
                 if extracted_keywords:
                     job_kw_list = extracted_keywords
                 else:
                     log_service.log_error("job_description_parsing_failed", {"path": job_description_file.name, "error": "No keywords extracted"})
-                
-                # Clean up temp file
-                try:
-                    temp_path.unlink()
-                except Exception:
-                    pass
             except Exception as exc:
                 log_service.log_error("job_description_parsing_failed", {"path": job_description_file.name, "error": str(exc)})
         
@@ -306,188 +293,173 @@ def process_cvs(request):
         
         # Process CV files
         parsed_results = []
-        temp_paths = []
         
-        try:
-            for uploaded_file in files:
-                suffix = Path(uploaded_file.name).suffix
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    for chunk in uploaded_file.chunks():
-                        tmp.write(chunk)
-                    temp_path = Path(tmp.name)
-                    temp_paths.append(temp_path)
-                
-                parsed = cv_agent.parse_file(str(temp_path))
-                
-                # Debug: Print parsing result (can be removed in production)
-                print("\n" + "="*60)
-                print(f"📄 PARSING RESULT for: {uploaded_file.name}")
-                print("="*60)
-                print(json.dumps(parsed, indent=2, ensure_ascii=False))
-                print("="*60 + "\n")
-                
-                record_id = django_repo.store_parsed(uploaded_file.name, parsed) if django_repo else None
-                # Link to job description if provided
-                if job_description_id and record_id:
-                    try:
-                        job_desc = JobDescription.objects.get(id=job_description_id)
-                        cv_record = CVRecord.objects.get(id=record_id)
-                        cv_record.job_description = job_desc
-                        cv_record.save()
-                    except (JobDescription.DoesNotExist, CVRecord.DoesNotExist):
-                        pass
-                parsed_results.append({"file": uploaded_file.name, "data": parsed, "record_id": record_id})
+        for uploaded_file in files:
+            # Extracted from memory by the shared extraction service (no temp file)
+            parsed = cv_agent.parse_upload(uploaded_file)
             
-            if parse_only:
-                return JsonResponse(parsed_results, safe=False)
+            # Debug: Print parsing result (can be removed in production)
+            print("\n" + "="*60)
+            print(f"📄 PARSING RESULT for: {uploaded_file.name}")
+            print("="*60)
+            print(json.dumps(parsed, indent=2, ensure_ascii=False))
+            print("="*60 + "\n")
             
-            # Summarize
-            insights = []
-            for item in parsed_results:
-                insight = sum_agent.summarize(item["data"], job_keywords=job_kw_list)
-                insights.append({
-                    "file": item["file"],
-                    "parsed": item["data"],
-                    "insights": insight,
-                    "record_id": item.get("record_id"),
-                })
-            
-            insights_sorted = sorted(
-                insights,
-                key=lambda r: r["insights"].get("role_fit_score")
-                if r["insights"].get("role_fit_score") is not None
-                else -1,
-                reverse=True,
+            record_id = django_repo.store_parsed(uploaded_file.name, parsed) if django_repo else None
+            # Link to job description if provided
+            if job_description_id and record_id:
+                try:
+                    job_desc = JobDescription.objects.get(id=job_description_id)
+                    cv_record = CVRecord.objects.get(id=record_id)
+                    cv_record.job_description = job_desc
+                    cv_record.save()
+                except (JobDescription.DoesNotExist, CVRecord.DoesNotExist):
+                    pass
+            parsed_results.append({"file": uploaded_file.name, "data": parsed, "record_id": record_id})
+        
+        if parse_only:
+            return JsonResponse(parsed_results, safe=False)
+        
+        # Summarize
+        insights = []
+        for item in parsed_results:
+            insight = sum_agent.summarize(item["data"], job_keywords=job_kw_list)
+            insights.append({
+                "file": item["file"],
+                "parsed": item["data"],
+                "insights": insight,
+                "record_id": item.get("record_id"),
+            })
+        
+        insights_sorted = sorted(
+            insights,
+            key=lambda r: r["insights"].get("role_fit_score")
+            if r["insights"].get("role_fit_score") is not None
+            else -1,
+            reverse=True,
+        )
+        for rank, item in enumerate(insights_sorted, start=1):
+            item["rank"] = rank
+            if django_repo and item.get("record_id"):
+                django_repo.store_insights(item["record_id"], item["insights"], rank=rank)
+        
+        # Enrichment
+        enriched_items = []
+        for item in insights_sorted:
+            parsed_with_id = {**item["parsed"], "record_id": item.get("record_id")}
+            insights_with_id = {**item["insights"], "record_id": item.get("record_id")}
+            enrichment = enrich_agent.enrich(parsed_with_id, insights_with_id)
+            enriched_items.append({**item, "enrichment": enrichment})
+        
+        # Qualification
+        qualified = []
+        for item in enriched_items:
+            insights_with_id = {**item["insights"], "record_id": item.get("record_id")}
+            enriched_data = item.get("enrichment")
+            qual = qualify_agent.qualify(
+                item["parsed"], insights_with_id, job_keywords=job_kw_list, enriched_data=enriched_data
             )
-            for rank, item in enumerate(insights_sorted, start=1):
-                item["rank"] = rank
-                if django_repo and item.get("record_id"):
-                    django_repo.store_insights(item["record_id"], item["insights"], rank=rank)
-            
-            # Enrichment
-            enriched_items = []
-            for item in insights_sorted:
-                parsed_with_id = {**item["parsed"], "record_id": item.get("record_id")}
-                insights_with_id = {**item["insights"], "record_id": item.get("record_id")}
-                enrichment = enrich_agent.enrich(parsed_with_id, insights_with_id)
-                enriched_items.append({**item, "enrichment": enrichment})
+            qualified.append({**item, "qualification": qual})
+        
+        # Rank by SKILLS MATCH
+        if not job_kw_list or len(job_kw_list) == 0:
+            def fit_score_sort_key(r: Dict[str, Any]) -> float:
+                insights = r.get("insights", {})
+                return insights.get("role_fit_score") if insights.get("role_fit_score") is not None else 0.0
+            qualified_sorted = sorted(qualified, key=fit_score_sort_key, reverse=True)
+        else:
+            def skills_based_sort_key(r: Dict[str, Any]) -> Tuple[float, int, int, int, float]:
+                qual = r.get("qualification", {})
+                insights = r.get("insights", {})
+                matched = qual.get("matched_skills") or []
+                inferred = qual.get("inferred_skills") or []
+                missing = qual.get("missing_skills") or []
+                confidence = qual.get("confidence_score") if qual.get("confidence_score") is not None else 0
+                role_fit = insights.get("role_fit_score") if insights.get("role_fit_score") is not None else 0.0
+                
+                matched_count = len(matched) if isinstance(matched, list) else 0
+                missing_count = len(missing) if isinstance(missing, list) else 0
+                total_keywords = matched_count + missing_count
+                
+                match_ratio = matched_count / max(total_keywords, 1) if total_keywords > 0 else 0.0
+                inferred_count = len(inferred) if isinstance(inferred, list) else 0
+                
+                return (match_ratio, matched_count, inferred_count, confidence, role_fit)
             
-            # Qualification
-            qualified = []
-            for item in enriched_items:
-                insights_with_id = {**item["insights"], "record_id": item.get("record_id")}
-                enriched_data = item.get("enrichment")
-                qual = qualify_agent.qualify(
-                    item["parsed"], insights_with_id, job_keywords=job_kw_list, enriched_data=enriched_data
-                )
-                qualified.append({**item, "qualification": qual})
+            qualified_sorted = sorted(qualified, key=skills_based_sort_key, reverse=True)
+        
+        # Store qualification and auto-schedule interviews for INTERVIEW decisions
+        interview_agent = agents['interview_agent']
+        for rank, item in enumerate(qualified_sorted, start=1):
+            item["rank"] = rank
+            if django_repo and item.get("record_id"):
+                django_repo.store_qualification(item["record_id"], item["qualification"], rank=rank)
             
-            # Rank by SKILLS MATCH
-            if not job_kw_list or len(job_kw_list) == 0:
-                def fit_score_sort_key(r: Dict[str, Any]) -> float:
-                    insights = r.get("insights", {})
-                    return insights.get("role_fit_score") if insights.get("role_fit_score") is not None else 0.0
-                qualified_sorted = sorted(qualified, key=fit_score_sort_key, reverse=True)
-            else:
-                def skills_based_sort_key(r: Dict[str, Any]) -> Tuple[float, int, int, int, float]:
-                    qual = r.get("qualification", {})
-                    insights = r.get("insights", {})
-                    matched = qual.get("matched_skills") or []
-                    inferred = qual.get("inferred_skills") or []
-                    missing = qual.get("missing_skills") or []
-                    confidence = qual.get("confidence_score") if qual.get("confidence_score") is not None else 0
-                    role_fit = insights.get("role_fit_score") if insights.get("role_fit_score") is not None else 0.0
-                    
-                    matched_count = len(matched) if isinstance(matched, list) else 0
-                    missing_count = len(missing) if isinstance(missing, list) else 0
-                    total_keywords = matched_count + missing_count
-                    
-                    match_ratio = matched_count / max(total_keywords, 1) if total_keywords > 0 else 0.0
-                    inferred_count = len(inferred) if isinstance(inferred, list) else 0
-                    
-                    return (match_ratio, matched_count, inferred_count, confidence, role_fit)
+            # Auto-schedule interview if decision is INTERVIEW
+            qual_decision = item.get("qualification", {}).get("decision", "")
+            if qual_decision == "INTERVIEW":
+                parsed_cv = item.get("parsed", {})
+                candidate_name = parsed_cv.get("name", "Candidate")
+                candidate_email = parsed_cv.get("email")
+                candidate_phone = parsed_cv.get("phone")
                 
-                qualified_sorted = sorted(qualified, key=skills_based_sort_key, reverse=True)
-            
-            # Store qualification and auto-schedule interviews for INTERVIEW decisions
-            interview_agent = agents['interview_agent']
-            for rank, item in enumerate(qualified_sorted, start=1):
-                item["rank"] = rank
-                if django_repo and item.get("record_id"):
-                    django_repo.store_qualification(item["record_id"], item["qualification"], rank=rank)
+                # Get job role from job description or use default
+                job_role = job_kw_list[0] if job_kw_list and len(job_kw_list) > 0 else "Position"
+                if job_description_text:
+                    # Try to extract job title from job description (clean it)
+                    job_role = job_description_text.split('\n')[0][:100] if job_description_text else "Position"
+                    # Remove newlines and clean whitespace
+                    import re
+                    job_role = re.sub(r'[\r\n\t]+', ' ', job_role)
+                    job_role = re.sub(r'\s+', ' ', job_role).strip()
                 
-                # Auto-schedule interview if decision is INTERVIEW
-                qual_decision = item.get("qualification", {}).get("decision", "")
-                if qual_decision == "INTERVIEW":
-                    parsed_cv = item.get("parsed", {})
-                    candidate_name = parsed_cv.get("name", "Candidate")
-                    candidate_email = parsed_cv.get("email")
-                    candidate_phone = parsed_cv.get("phone")
-                    
-                    # Get job role from job description or use default
-                    job_role = job_kw_list[0] if job_kw_list and len(job_kw_list) > 0 else "Position"
-                    if job_description_text:
-                        # Try to extract job title from job description (clean it)
-                        job_role = job_description_text.split('\n')[0][:100] if job_description_text else "Position"
-                        # Remove newlines and clean whitespace
-                        import re
-                        job_role = re.sub(r'[\r\n\t]+', ' ', job_role)
-                        job_role = re.sub(r'\s+', ' ', job_role).strip()
+                if candidate_email:
+                    print("\n" + "="*60)
+                    print("🎯 AUTO-SCHEDULING INTERVIEW FOR APPROVED CANDIDATE")
+                    print("="*60)
+                    print(f"✓ Candidate: {candidate_name}")
+                    print(f"✓ Email: {candidate_email}")
+                    print(f"✓ Decision: {qual_decision}")
+                    print(f"✓ Job Role: {job_role}")
                     
-                    if candidate_email:
-                        print("\n" + "="*60)
-                        print("🎯 AUTO-SCHEDULING INTERVIEW FOR APPROVED CANDIDATE")
-                        print("="*60)
-                        print(f"✓ Candidate: {candidate_name}")
-                        print(f"✓ Email: {candidate_email}")
-                        print(f"✓ Decision: {qual_decision}")
-                        print(f"✓ Job Role: {job_role}")
+                    try:
+                        interview_result = interview_agent.schedule_interview(
+                            candidate_name=candidate_name,
+                            candidate_email=candidate_email,
+                            job_role=job_role,
+                            interview_type='ONLINE',  # Default to ONLINE
+                            candidate_phone=candidate_phone,
+                            cv_record_id=item.get("record_id"),
+                            recruiter_id=request.user.id,
+                        )
                         
-                        try:
-                            interview_result = interview_agent.schedule_interview(
-                                candidate_name=candidate_name,
-                                candidate_email=candidate_email,
-                                job_role=job_role,
-                                interview_type='ONLINE',  # Default to ONLINE
-                                candidate_phone=candidate_phone,
-                                cv_record_id=item.get("record_id"),
-                                recruiter_id=request.user.id,
-                            )
-                            
-                            if interview_result.get("invitation_sent"):
-                                print(f"✅ Interview invitation sent successfully!")
-                                item["interview_scheduled"] = True
-                                item["interview_id"] = interview_result.get("interview_id")
-                            else:
-                                print(f"⚠️  Interview created but email failed")
-                                item["interview_scheduled"] = False
-                                item["interview_error"] = interview_result.get("message", "Unknown error")
-                        except Exception as interview_exc:
-                            print(f"❌ ERROR: Failed to schedule interview: {interview_exc}")
-                            log_service.log_error("auto_interview_scheduling_error", {
-                                "record_id": item.get("record_id"),
-                                "candidate_email": candidate_email,
-                                "error": str(interview_exc),
-                            })
+                        if interview_result.get("invitation_sent"):
+                            print(f"✅ Interview invitation sent successfully!")
+                            item["interview_scheduled"] = True
+                            item["interview_id"] = interview_result.get("interview_id")
+                        else:
+                            print(f"⚠️  Interview created but email failed")
                             item["interview_scheduled"] = False
-                            item["interview_error"] = str(interview_exc)
-                    else:
-                        print(f"\n⚠️  Skipping interview scheduling - no email found for {candidate_name}")
+                            item["interview_error"] = interview_result.get("message", "Unknown error")
+                    except Exception as interview_exc:
+                        print(f"❌ ERROR: Failed to schedule interview: {interview_exc}")
+                        log_service.log_error("auto_interview_scheduling_error", {
+                            "record_id": item.get("record_id"),
+                            "candidate_email": candidate_email,
+                            "error": str(interview_exc),
+                        })
                         item["interview_scheduled"] = False
-                        item["interview_error"] = "No email address found"
-            
-            if top_n is not None:
-                qualified_sorted = qualified_sorted[:top_n]
-            
-            return JsonResponse(qualified_sorted, safe=False)
-            
-        finally:
-            # Clean up temp files
-            for path in temp_paths:
-                try:
-                    path.unlink()
-                except Exception:
-                    pass
+                        item["interview_error"] = str(interview_exc)
+                else:
+                    print(f"\n⚠️  Skipping interview scheduling - no email found for {candidate_name}")
+                    item["interview_scheduled"] = False
+                    item["interview_error"] = "No email address found"
+        
+        if top_n is not None:
+            qualified_sorted = qualified_sorted[:top_n]
+        
+        return JsonResponse(qualified_sorted, safe=False)
+        
                     
     except Exception as e:
         log_service.log_error("cv_processing_error", {"error": str(e)})